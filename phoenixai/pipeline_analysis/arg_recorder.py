@@ -0,0 +1,135 @@
+"""
+Zeichnet die Argumente ausgewählter Funktionen auf, während ein Ziel (meist die
+Tests des Projekts) läuft, und speichert sie als Pickle für Micro-Benchmarks.
+
+Wird von ``benchmark_generator.record_arguments`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul). Nur Standardbibliothek.
+
+    python arg_recorder.py --output args.pickle --file work.py --function dedupe:1 \
+        --kind pytest tests
+
+Funktionen werden über Datei und erste Zeile ihres Codes (``co_firstlineno``, bei
+Dekoratoren die Zeile des ersten Dekorators) erkannt. Aufgezeichnet wird beim Aufruf,
+also vor jeder Änderung der Argumente durch die Funktion. Je Funktion werden bis zu
+``--max-cases`` unterschiedliche, picklebare Argumentsätze behalten; Methoden
+enthalten ``self`` als erstes Argument.
+
+Ergebnis: ``{"qualname": {"cases": [pickle-bytes von (args, kwargs)], "calls": n, "skipped": n}}``.
+"""
+
+import argparse
+import inspect
+import os
+import pickle
+import runpy
+import sys
+import threading
+
+
+class ArgumentRecorder:
+    def __init__(self, file_path, functions, max_cases):
+        """
+        :param file_path: Datei, in der die Funktionen definiert sind.
+        :param functions: erste Zeile -> qualifizierter Name.
+        :param max_cases: Maximale Anzahl unterschiedlicher Argumentsätze je Funktion.
+        """
+        self.file_path = os.path.normcase(os.path.abspath(file_path))
+        self.functions = functions
+        self.max_cases = max_cases
+        self.records = {name: {"cases": [], "calls": 0, "skipped": 0} for name in functions.values()}
+        self._files = {}
+
+    def _matches(self, code) -> bool:
+        result = self._files.get(code.co_filename)
+        if result is None:
+            result = self._files[code.co_filename] = os.path.normcase(os.path.abspath(code.co_filename)) == self.file_path
+        return result
+
+    def profile(self, frame, event, arg):
+        if event != "call":
+            return
+        code = frame.f_code
+        if code.co_firstlineno not in self.functions or not self._matches(code):
+            return
+        name = self.functions[code.co_firstlineno]
+        if code.co_name != name.rsplit(".", 1)[-1]:
+            # Modulcode einer Funktion in Zeile 1 oder eine Klasse/Lambda in derselben Zeile
+            return
+        record = self.records[name]
+        record["calls"] += 1
+        if len(record["cases"]) >= self.max_cases:
+            return
+        try:
+            data = pickle.dumps(self._arguments(frame), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Nicht picklebare Argumente (Dateien, Sockets, Lambdas, ...) lassen sich nicht wiederverwenden
+            record["skipped"] += 1
+            return
+        if data not in record["cases"]:
+            record["cases"].append(data)
+
+    @staticmethod
+    def _arguments(frame):
+        code = frame.f_code
+        local = frame.f_locals
+        names = code.co_varnames
+        positional = [local[name] for name in names[:code.co_argcount]]
+        kwargs = {name: local[name] for name in names[code.co_argcount:code.co_argcount + code.co_kwonlyargcount]}
+        index = code.co_argcount + code.co_kwonlyargcount
+        if code.co_flags & inspect.CO_VARARGS:
+            positional.extend(local[names[index]])
+            index += 1
+        if code.co_flags & inspect.CO_VARKEYWORDS:
+            kwargs.update(local[names[index]])
+        return tuple(positional), kwargs
+
+
+def _run_target(kind, target, args):
+    if kind in ("module", "pytest"):
+        # Wie bei "python -m": das Arbeitsverzeichnis statt des Ordners dieses Runners
+        sys.path[0] = os.getcwd()
+    if kind == "module":
+        sys.argv = [target, *args]
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+    elif kind == "pytest":
+        import pytest
+
+        pytest.main(["-q", "-p", "no:cacheprovider", target, *args])
+    else:
+        sys.argv = [target, *args]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+        runpy.run_path(target, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Argumente ausgewählter Funktionen aufzeichnen")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--file", required=True, help="Datei mit den Funktionen")
+    parser.add_argument("--function", action="append", required=True,
+                        help="qualifizierter Name:erste Zeile (mehrfach)")
+    parser.add_argument("--max-cases", type=int, default=5)
+    parser.add_argument("--kind", choices=["script", "module", "pytest"], default="pytest")
+    parser.add_argument("target")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    functions = {}
+    for spec in options.function:
+        name, _, line = spec.rpartition(":")
+        functions[int(line)] = name
+    recorder = ArgumentRecorder(options.file, functions, options.max_cases)
+    threading.setprofile(recorder.profile)
+    sys.setprofile(recorder.profile)
+    try:
+        _run_target(options.kind, options.target, options.args)
+    except (SystemExit, KeyboardInterrupt):
+        pass
+    finally:
+        sys.setprofile(None)
+        threading.setprofile(None)
+        with open(options.output, "wb") as f:
+            pickle.dump(recorder.records, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+# concurrency_analysis.py
+"""
+Sucht unabhängige blockierende Aufrufe (Netzwerk, Subprozesse, Dateien), die sich
+nebenläufig ausführen ließen, und schätzt den erreichbaren Gewinn aus gemessenen
+Aufrufzeiten.
+
+Statisch (AST):
+
+- ``for``-Schleifen und Comprehensions, deren Rumpf blockierende Aufrufe enthält – direkt
+  oder über Funktionen desselben Moduls, die solche Aufrufe machen – und deren Iterationen
+  unabhängig sind: kein ``break``/``return``/``yield``, kein ``input()``, kein
+  ``time.sleep`` (Drosselung) und keine Variable, die eine Iteration für die nächste setzt.
+  Sammeln (``append``, ``add``, ``d[k] = …``) und Summen (``total += …``) sind erlaubt.
+- Folgen von mindestens zwei Anweisungen mit blockierenden Aufrufen, von denen keine ein
+  Ergebnis einer vorherigen verwendet.
+
+Gemessen (optional): ``io_latency_runner.py`` führt das Ziel aus, umhüllt die gefundenen
+Aufrufziele und misst Anzahl und Dauer je Zeile. Rufen Kandidaten eine blockierende
+Funktion des Moduls auf (``fetch()`` → ``open``), wird deren ganzer Aufruf gemessen,
+samt Lesen und Schreiben; bei ``open`` direkt im Kandidaten nur das Öffnen. Daraus folgt eine Schätzung nach Amdahl:
+mit ``CONCURRENCY_MAX_WORKERS`` Threads sinkt die I/O-Zeit einer Schleife mit n Aufrufen
+höchstens auf ceil(n / Threads) mittlere Aufrufe, aber nie unter ihren längsten einzelnen
+Aufruf; die einer Folge auf ihre langsamste Zeile. Der Rest des Laufs bleibt gleich. Jeder gemessene Aufruf zählt dabei für höchstens
+einen Kandidaten (bei geschachtelten den mit dem größeren Gewinn). Limits der Server,
+Verbindungsaufbau und CPU-Anteile unter dem GIL sind nicht berücksichtigt.
+"""
+
+import ast
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from phoenixai.pipeline_analysis.performance_analysis import (PROFILE_INTERRUPT_GRACE, PROFILE_TIMEOUT,
+                                                              parse_entry_point, script_entry)
+from phoenixai.pipeline_analysis.static_performance import BLOCKING_CALLS, FUNCTION_NODES, record_import
+from phoenixai.utils.cancellation import DeadlineExceeded, raise_if_cancelled, run_subprocess
+
+# Obergrenze der Nebenläufigkeit für Schätzung und Umbau (concurrency_rewrite)
+CONCURRENCY_MAX_WORKERS = int(os.getenv("PHOENIXAI_CONCURRENCY_WORKERS", "8"))
+IO_LATENCY_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "io_latency_runner.py")
+
+# time.sleep gehört nicht dazu: Wartezeiten drosseln meist absichtlich und werden nicht parallelisiert
+IO_CALLS = BLOCKING_CALLS
+IO_CALLS.update({
+    "open": "Datei-I/O", "io.open": "Datei-I/O",
+    "shutil.copy": "Datei-I/O", "shutil.copy2": "Datei-I/O", "shutil.copyfile": "Datei-I/O",
+    "urllib.request.urlretrieve": "HTTP-Anfrage",
+})
+# Methoden von Sitzungsobjekten, die als HTTP-Anfrage gelten; Fabrik -> Klasse (für die Messung)
+SESSION_METHODS = {"get", "post", "put", "patch", "delete", "head", "request"}
+SESSION_FACTORIES = {"requests.Session": "requests.Session", "requests.session": "requests.Session",
+                     "httpx.Client": "httpx.Client"}
+SCOPE_NODES = FUNCTION_NODES + (ast.ClassDef,)
+SIMPLE_STATEMENTS = (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Expr)
+
+
+def _walk(node: ast.AST):
+    """Wie ast.walk, aber ohne in verschachtelte Funktionen und Klassen abzusteigen."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(child for child in ast.iter_child_nodes(current) if not isinstance(child, SCOPE_NODES))
+
+
+def _names(node: ast.AST, ctx: type) -> set:
+    return {n.id for n in _walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ctx)}
+
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.insert(0, node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    return ".".join([node.id] + parts)
+
+
+class ModuleIndex:
+    """Importe, Sitzungsobjekte und blockierende Funktionen eines Moduls."""
+
+    def __init__(self, tree: ast.Module):
+        self.imports: Dict[str, str] = {}
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                record_import(self.imports, node)
+        # Namen (auch self.x), denen eine Sitzung zugewiesen wird -> Klasse: session = requests.Session()
+        self.sessions: Dict[str, str] = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) \
+                    and self.qualified_name(node.value.func) in SESSION_FACTORIES:
+                for target in filter(None, map(_dotted, node.targets)):
+                    self.sessions[target] = SESSION_FACTORIES[self.qualified_name(node.value.func)]
+        # Funktionen des Moduls: Name -> Knoten (Methoden auch als "self.name")
+        self.functions: Dict[str, ast.AST] = {}
+        for node in tree.body:
+            if isinstance(node, FUNCTION_NODES[:2]):
+                self.functions[node.name] = node
+            elif isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, FUNCTION_NODES[:2]):
+                        self.functions[f"self.{item.name}"] = item
+        self.blocking_functions = self._blocking_functions()
+
+    def qualified_name(self, node: ast.AST) -> Optional[str]:
+        dotted = _dotted(node)
+        if dotted is None:
+            return None
+        head, dot, rest = dotted.partition(".")
+        return self.imports.get(head, head) + dot + rest
+
+    def io_call(self, node: ast.Call) -> Optional[str]:
+        """Eigentliches Aufrufziel (z. B. ``requests.get`` oder ``requests.Session.get``), sonst None."""
+        name = self.qualified_name(node.func)
+        if name in IO_CALLS:
+            return name
+        if isinstance(node.func, ast.Attribute) and node.func.attr in SESSION_METHODS \
+                and _dotted(node.func.value) in self.sessions:
+            return f"{self.sessions[_dotted(node.func.value)]}.{node.func.attr}"
+        return None
+
+    def _blocking_functions(self) -> Dict[str, str]:
+        """Funktionen des Moduls, die (auch über andere) blockierende Aufrufe machen -> ein Aufruf darin."""
+        blocking = {}
+        changed = True
+        while changed:
+            changed = False
+            for name, function in self.functions.items():
+                if name in blocking:
+                    continue
+                for node in _walk(function):
+                    if isinstance(node, ast.Call):
+                        found = self.io_call(node) or blocking.get(_dotted(node.func))
+                        if found:
+                            blocking[name] = found
+                            changed = True
+                            break
+        return blocking
+
+    def blocking_calls(self, node: ast.AST) -> List[Dict]:
+        """Blockierende Aufrufe in node: ``line``, ``name`` (Aufruf im Code), ``io`` (eigentlicher Aufruf)."""
+        calls = []
+        for child in _walk(node):
+            if not isinstance(child, ast.Call):
+                continue
+            io = self.io_call(child)
+            if io:
+                calls.append({"line": child.lineno, "name": _dotted(child.func) or io, "io": io})
+            elif _dotted(child.func) in self.blocking_functions:
+                calls.append({"line": child.lineno, "name": f"{_dotted(child.func)}()",
+                              "io": self.blocking_functions[_dotted(child.func)]})
+        return sorted(calls, key=lambda call: call["line"])
+
+
+def _scan(statements: List[ast.stmt], defined: set, assigned: set, carried: set) -> set:
+    """
+    Geht die Anweisungen einer Iteration der Reihe nach durch und trägt in carried die
+    Namen ein, die gelesen werden, bevor sie in dieser Iteration gesetzt wurden, obwohl der
+    Rumpf sie setzt. Gibt die danach sicher gesetzten Namen zurück.
+    """
+    defined = set(defined)
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            carried.update((_names(statement.test, ast.Load) & assigned) - defined)
+            defined = _scan(statement.body, defined, assigned, carried) \
+                & _scan(statement.orelse, defined, assigned, carried)
+        elif isinstance(statement, (ast.With, ast.AsyncWith)):
+            for item in statement.items:
+                carried.update((_names(item.context_expr, ast.Load) & assigned) - defined)
+                if item.optional_vars is not None:
+                    defined |= _names(item.optional_vars, ast.Store)
+            defined = _scan(statement.body, defined, assigned, carried)
+        elif isinstance(statement, (ast.For, ast.AsyncFor, ast.While, ast.Try)):
+            # Rümpfe laufen evtl. gar nicht: Lesezugriffe prüfen, Zuweisungen nicht übernehmen
+            header = statement.iter if isinstance(statement, (ast.For, ast.AsyncFor)) else \
+                getattr(statement, "test", None)
+            if header is not None:
+                carried.update((_names(header, ast.Load) & assigned) - defined)
+            inner = defined | (_names(statement.target, ast.Store) if hasattr(statement, "target") else set())
+            for block in ("body", "orelse", "finalbody"):
+                _scan(getattr(statement, block, []), inner, assigned, carried)
+            for handler in getattr(statement, "handlers", []):
+                _scan(handler.body, inner | ({handler.name} if handler.name else set()), assigned, carried)
+        elif isinstance(statement, ast.AugAssign) and isinstance(statement.target, ast.Name):
+            # total += x ist eine Reduktion; die Prüfung erfolgt in loop_dependencies
+            carried.update((_names(statement.value, ast.Load) & assigned) - defined)
+        elif not isinstance(statement, SCOPE_NODES):
+            carried.update((_names(statement, ast.Load) & assigned) - defined)
+            defined |= _names(statement, ast.Store)
+    return defined
+
+
+def loop_dependencies(loop: ast.AST, index: ModuleIndex) -> Dict:
+    """
+    Gründe, warum die Iterationen einer ``for``-Schleife nicht unabhängig sind, und
+    Hinweise für den Umbau. Leere ``reasons`` bedeuten: parallelisierbar.
+    """
+    reasons, notes = [], []
+    body = [node for statement in loop.body for node in _walk(statement)]
+    for node in body:
+        if isinstance(node, ast.Break):
+            reasons.append(f"Zeile {node.lineno}: break – das Ende hängt von der Reihenfolge ab")
+        elif isinstance(node, ast.Return):
+            reasons.append(f"Zeile {node.lineno}: return in der Schleife")
+        elif isinstance(node, (ast.Yield, ast.YieldFrom)):
+            reasons.append(f"Zeile {node.lineno}: yield – Ergebnisse werden einzeln weitergegeben")
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            reasons.append(f"Zeile {node.lineno}: global/nonlocal")
+        elif isinstance(node, ast.Call):
+            name = index.qualified_name(node.func)
+            if name == "input":
+                reasons.append(f"Zeile {node.lineno}: input() – interaktiv")
+            elif name == "time.sleep":
+                reasons.append(f"Zeile {node.lineno}: time.sleep – vermutlich gewollte Drosselung")
+            elif name == "print" and "print" not in notes:
+                notes.append("print")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Attribute):
+                    reasons.append(f"Zeile {node.lineno}: {ast.unparse(target)} wird in jeder Iteration "
+                                   f"überschrieben")
+
+    assigned = set()
+    for statement in loop.body:
+        assigned |= _names(statement, ast.Store)
+    reductions = {node.target.id for node in body
+                  if isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name)}
+    # Das Ziel von total += … ist ein Store; jedes Load ist ein weiterer Lesezugriff
+    loaded_elsewhere = {node.id for node in body if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+    for name in sorted(reductions & loaded_elsewhere):
+        reasons.append(f"{name} wird aufsummiert und in der Schleife gelesen")
+    if reductions - loaded_elsewhere:
+        notes.append("Reduktion: " + ", ".join(sorted(reductions - loaded_elsewhere)))
+    carried = set()
+    _scan(loop.body, _names(loop.target, ast.Store), assigned - reductions, carried)
+    for name in sorted(carried):
+        reasons.append(f"{name} wird in einer Iteration gesetzt und in der nächsten gelesen")
+    if "print" in notes:
+        notes[notes.index("print")] = "Ausgaben mit print: Reihenfolge beim Umbau erhalten (Ergebnisse geordnet sammeln)"
+    return {"reasons": reasons, "notes": notes}
+
+
+class OpportunityFinder:
+    """Sammelt Kandidaten je Funktion (qualifizierter Name wie in ``CodeIndex``)."""
+
+    def __init__(self, index: ModuleIndex):
+        self.index = index
+        self.opportunities: List[Dict] = []
+
+    def visit_scope(self, statements: List[ast.stmt], name: str, is_async: bool):
+        self._sequences(statements, name, is_async)
+        for statement in statements:
+            self._statement(statement, name, is_async)
+
+    def _statement(self, node: ast.stmt, name: str, is_async: bool):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            qualified = f"{name}.{node.name}" if name != "<module>" else node.name
+            self.visit_scope(node.body, qualified, isinstance(node, ast.AsyncFunctionDef))
+            return
+        if isinstance(node, ast.ClassDef):
+            prefix = f"{name}.{node.name}" if name != "<module>" else node.name
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    self._statement(item, prefix, is_async)
+            return
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            calls = [call for statement in node.body for call in self.index.blocking_calls(statement)]
+            if calls:
+                dependencies = loop_dependencies(node, self.index)
+                self._add("Schleife", node, name, is_async, calls, dependencies["reasons"], dependencies["notes"])
+                if not dependencies["reasons"]:
+                    # Verschachtelte Kandidaten sind im äußeren enthalten
+                    return
+        # Comprehensions dieser Anweisung; die der Rümpfe folgen bei deren Besuch
+        for part in ast.iter_child_nodes(node):
+            if isinstance(part, (ast.stmt, ast.excepthandler)):
+                continue
+            for child in _walk(part):
+                if isinstance(child, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                    self._comprehension(child, name, is_async)
+        for block in ("body", "orelse", "finalbody"):
+            statements = getattr(node, block, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                self.visit_scope(statements, name, is_async)
+        for handler in getattr(node, "handlers", []):
+            self.visit_scope(handler.body, name, is_async)
+
+    def _comprehension(self, node: ast.AST, name: str, is_async: bool):
+        parts = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        calls = [call for part in parts for call in self.index.blocking_calls(part)]
+        if not calls or any(self.index.qualified_name(c.func) in ("input", "time.sleep")
+                            for c in _walk(node) if isinstance(c, ast.Call)):
+            return
+        reasons = []
+        if isinstance(node, ast.GeneratorExp):
+            reasons.append("Generator: Ergebnisse werden erst bei Bedarf berechnet (evtl. nicht alle)")
+        self._add("Comprehension", node, name, is_async, calls, reasons, [])
+
+    def _sequences(self, statements: List[ast.stmt], name: str, is_async: bool):
+        """Folgen unabhängiger Anweisungen mit blockierenden Aufrufen."""
+        group, stored = [], set()
+
+        def flush():
+            if len(group) >= 2:
+                calls = [call for statement in group for call in self.index.blocking_calls(statement)]
+                self._add("Folge", group[0], name, is_async, calls, [], [], end_node=group[-1])
+
+        for statement in statements:
+            calls = self.index.blocking_calls(statement) if isinstance(statement, SIMPLE_STATEMENTS) else []
+            if not calls:
+                flush()
+                group, stored = [], set()
+                continue
+            if (_names(statement, ast.Load) | _names(statement, ast.Store)) & stored:
+                flush()
+                group, stored = [], set()
+            group.append(statement)
+            stored |= _names(statement, ast.Store)
+        flush()
+
+    def _add(self, kind, node, name, is_async, calls, reasons, notes, end_node=None):
+        self.opportunities.append({
+            "kind": kind, "function": name, "async": is_async,
+            "line": node.lineno, "end_line": (end_node or node).end_lineno,
+            "calls": calls, "independent": not reasons, "reasons": reasons, "notes": notes,
+            "estimate": None,
+        })
+
+
+def find_opportunities(code: str) -> Dict:
+    """
+    Statische Suche.
+
+    :return: ``opportunities`` (nach Zeile), ``io_calls`` (eigentliche Aufrufziele, z. B.
+        ``requests.get``, für die Messung) und ``functions`` (erste Zeilen der blockierenden
+        Funktionen des Moduls, die Kandidaten aufrufen; sie werden als Ganzes gemessen).
+    """
+    tree = ast.parse(code)
+    index = ModuleIndex(tree)
+    finder = OpportunityFinder(index)
+    finder.visit_scope(tree.body, "<module>", False)
+    opportunities = sorted(finder.opportunities, key=lambda o: o["line"])
+    io_calls = sorted({call["io"] for o in opportunities for call in o["calls"]})
+    # Wie co_firstlineno: bei Dekoratoren die Zeile des ersten Dekorators
+    functions = sorted({min([node.lineno] + [d.lineno for d in node.decorator_list])
+                        for node in (index.functions.get(call["name"][:-2])
+                                     for o in opportunities for call in o["calls"] if call["name"].endswith("()"))
+                        if node is not None})
+    return {"opportunities": opportunities, "io_calls": io_calls, "functions": functions}
+
+
+def measure_latencies(file_path: str, io_calls: List[str], entry: dict,
+                      timeout: float = PROFILE_TIMEOUT, functions: List[int] = ()) -> dict:
+    """
+    Führt entry im io_latency_runner aus; Ergebnis siehe dort (``sites`` mit int-Zeilen).
+
+    :param functions: Erste Zeilen von Funktionen der Datei, deren Aufrufe als Ganzes gemessen werden.
+    """
+    with tempfile.TemporaryDirectory(prefix="phoenixai_io_") as directory:
+        output = os.path.join(directory, "io.json")
+        cmd = [sys.executable, IO_LATENCY_RUNNER, "--output", output, "--file", os.path.abspath(file_path)]
+        for name in io_calls:
+            cmd += ["--call", "builtins.open" if name == "open" else name]
+        for line in functions:
+            cmd += ["--function", str(line)]
+        cmd += ["--kind", entry["kind"], entry["target"], *entry["args"]]
+        try:
+            result = run_subprocess(cmd, timeout=timeout, capture_output=True, text=True,
+                                    stdin=subprocess.DEVNULL, cwd=entry["cwd"],
+                                    interrupt_grace=PROFILE_INTERRUPT_GRACE)
+        except DeadlineExceeded:
+            raise_if_cancelled()
+            result = None
+        if not os.path.isfile(output):
+            stderr = result.stderr.strip() if result is not None else f"Zeitlimit von {timeout:.0f} s überschritten"
+            return {"status": "fehlgeschlagen", "error": stderr[-2000:], "seconds": None, "sites": {}, "stacks": []}
+        with open(output, encoding="utf-8") as f:
+            measurement = json.load(f)
+    measurement["sites"] = {int(line): site for line, site in measurement["sites"].items()}
+    return measurement
+
+
+def _stacks_of(opportunity: Dict, stacks: List[Dict], claimed: set = frozenset()) -> List[int]:
+    lines = {call["line"] for call in opportunity["calls"]}
+    return [i for i, stack in enumerate(stacks) if i not in claimed and lines & set(stack["lines"])]
+
+
+def estimate(opportunity: Dict, stacks: List[Dict], selected: List[int] = None,
+             workers: int = CONCURRENCY_MAX_WORKERS) -> Optional[Dict]:
+    """
+    Gemessene I/O-Zeit eines Kandidaten und die Zeit bei nebenläufiger Ausführung.
+
+    :param stacks: ``stacks`` der Messung.
+    :param selected: Indizes der zu berücksichtigenden Stapel (Standard: alle des Kandidaten).
+    """
+    selected = _stacks_of(opportunity, stacks) if selected is None else selected
+    if not selected:
+        return None
+    calls = sum(stacks[i]["calls"] for i in selected)
+    seconds = sum(stacks[i]["seconds"] for i in selected)
+    if opportunity["kind"] == "Folge":
+        per_line = {}
+        for i in selected:
+            for line in {call["line"] for call in opportunity["calls"]} & set(stacks[i]["lines"]):
+                per_line[line] = per_line.get(line, 0.0) + stacks[i]["seconds"]
+        parallel = max(per_line.values())
+    else:
+        # Ein einzelner langsamer Aufruf begrenzt den Gewinn, auch wenn der Mittelwert klein ist
+        longest = max(stacks[i]["max"] for i in selected)
+        parallel = max(longest, math.ceil(calls / workers) * seconds / calls)
+    return {"calls": calls, "seconds": seconds, "parallel_seconds": parallel, "saved_seconds": seconds - parallel}
+
+
+def total_savings(opportunities: List[Dict], stacks: List[Dict]) -> float:
+    """Summe der Gewinne unabhängiger Kandidaten, jeder gemessene Aufruf höchstens einmal."""
+    candidates = sorted((o for o in opportunities if o["independent"] and o["estimate"]),
+                        key=lambda o: -o["estimate"]["saved_seconds"])
+    claimed, saved = set(), 0.0
+    for opportunity in candidates:
+        selected = _stacks_of(opportunity, stacks, claimed)
+        part = estimate(opportunity, stacks, selected)
+        if part:
+            saved += part["saved_seconds"]
+            claimed.update(selected)
+    return saved
+
+
+def analyze_concurrency(file_path: str, entry: dict = None, measure: bool = True) -> Dict:
+    """
+    Statische Suche und (mit measure) Messung am Ziel.
+
+    :param entry: Einstiegspunkt für die Messung (Standard: ``PHOENIXAI_CONCURRENCY_ENTRY``,
+        ``PHOENIXAI_PROFILE_ENTRY`` oder die Datei selbst).
+    :return: ``opportunities``, ``io_calls``, ``measurement`` (oder None), ``speedup``
+        (geschätzter Faktor für den ganzen Lauf oder None) und ``text``.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        code = f.read()
+    result = find_opportunities(code)
+    result.update({"file": file_path, "measurement": None, "speedup": None, "entry": None})
+    if measure and result["io_calls"] and any(o["independent"] for o in result["opportunities"]):
+        if entry is None:
+            spec = os.getenv("PHOENIXAI_CONCURRENCY_ENTRY") or os.getenv("PHOENIXAI_PROFILE_ENTRY")
+            base = os.path.dirname(os.path.abspath(file_path))
+            entry = parse_entry_point(spec, cwd=base) if spec else script_entry(file_path)
+        result["entry"] = entry["label"]
+        measurement = result["measurement"] = measure_latencies(file_path, result["io_calls"], entry,
+                                                                functions=result["functions"])
+        for opportunity in result["opportunities"]:
+            opportunity["estimate"] = estimate(opportunity, measurement["stacks"])
+        saved = total_savings(result["opportunities"], measurement["stacks"])
+        total = measurement.get("seconds")
+        if total and saved:
+            result["speedup"] = total / max(total - saved, total * 0.01)
+    result["text"] = format_opportunities(result)
+    return result
+
+
+def _lines(opportunity: Dict) -> str:
+    if opportunity["line"] == opportunity["end_line"]:
+        return f"Zeile {opportunity['line']}"
+    return f"Zeilen {opportunity['line']}–{opportunity['end_line']}"
+
+
+def _describe_calls(calls: List[Dict]) -> str:
+    names = []
+    for call in calls:
+        label = call["name"] if call["name"] == call["io"] else f"{call['name']} → {call['io']}"
+        if label not in names:
+            names.append(label)
+    return ", ".join(names)
+
+
+def format_opportunities(result: Dict) -> str:
+    """Markdown-Report der Kandidaten samt Messung und Schätzung."""
+    lines = [f"# Nebenläufigkeit: {os.path.basename(result['file'])}", ""]
+    opportunities = result["opportunities"]
+    if not opportunities:
+        return "\n".join(lines + ["Keine blockierenden Aufrufe in Schleifen oder Folgen gefunden.", ""])
+    measurement = result["measurement"]
+    if measurement:
+        lines.append(f"Messung mit `{result['entry']}`: Status {measurement['status']}"
+                     + (f", Laufzeit {measurement['seconds']:.3f} s" if measurement.get("seconds") else ""))
+        if measurement.get("error"):
+            lines += ["", "```", measurement["error"].strip(), "```"]
+        if result["speedup"]:
+            lines.append(f"Geschätzte Beschleunigung des Laufs mit {CONCURRENCY_MAX_WORKERS} Threads: "
+                         f"bis zu {result['speedup']:.2f}x")
+        lines.append("")
+    independent = [o for o in opportunities if o["independent"]]
+    lines += [f"{len(independent)} von {len(opportunities)} Kandidaten sind unabhängig.", ""]
+    for o in opportunities:
+        verdict = "parallelisierbar" if o["independent"] else "abhängig"
+        lines.append(f"## {o['kind']} {_lines(o)} in `{o['function']}` ({verdict})")
+        lines.append("")
+        lines.append(f"- Aufrufe: {_describe_calls(o['calls'])}")
+        if o["async"]:
+            lines.append("- async-Funktion: asyncio.gather mit Semaphore statt Threads")
+        for reason in o["reasons"]:
+            lines.append(f"- Abhängigkeit: {reason}")
+        for note in o["notes"]:
+            lines.append(f"- Hinweis: {note}")
+        if measurement and any(call["name"] == "open" for call in o["calls"]):
+            lines.append("- Hinweis: bei `open` direkt im Kandidaten ist nur das Öffnen gemessen, "
+                         "nicht Lesen und Schreiben")
+        if o["estimate"]:
+            e = o["estimate"]
+            lines.append(f"- Gemessen: {e['calls']} Aufrufe, {e['seconds']:.3f} s; nebenläufig ≈ "
+                         f"{e['parallel_seconds']:.3f} s (−{e['saved_seconds']:.3f} s)")
+        elif measurement:
+            lines.append("- Gemessen: keine Aufrufe während des Laufs")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def opportunities_for_prompt(opportunities: List[Dict]) -> str:
+    """Kandidaten einer Funktion als kompakte Liste für einen LLM-Prompt."""
+    lines = []
+    for o in opportunities:
+        line = f"- {o['kind']} {_lines(o)}: {_describe_calls(o['calls'])}"
+        if o["notes"]:
+            line += f" ({'; '.join(o['notes'])})"
+        if o["estimate"]:
+            line += f"; gemessen {o['estimate']['calls']} Aufrufe in {o['estimate']['seconds']:.2f} s"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+"""
+Misst Anzahl und Dauer blockierender Aufrufe (Netzwerk, Subprozesse, Dateien) je Zeile
+einer Datei, während ein Ziel läuft.
+
+Wird von ``concurrency_analysis.measure_latencies`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul). Nur Standardbibliothek.
+
+    python io_latency_runner.py --output io.json --file main.py --call requests.get \
+        --call open --function 12 --kind script main.py
+
+Die mit ``--call`` genannten Funktionen (``modul.name``; eingebaute wie ``open`` ohne
+Modul) werden vor dem Start des Ziels durch eine messende Hülle ersetzt, auch für spätere
+``from modul import name``. Jeder Aufruf zählt für alle Zeilen der Datei auf dem Stapel,
+also auch für die Zeile in der Schleife, die eine Hilfsfunktion mit dem eigentlichen
+Aufruf aufruft. Von Tests ersetzte (gemockte) Funktionen werden nicht gemessen.
+
+Mit ``--function`` (erste Zeile einer Funktion der Datei) wird zusätzlich jeder Aufruf
+dieser Funktion als Ganzes gemessen (über ``sys.setprofile``), etwa ``fetch()``, das
+``open`` aufruft und dann liest. Innerhalb einer so gemessenen Funktion zählen weder
+die ``--call``-Aufrufe noch verschachtelte gemessene Funktionen ein zweites Mal.
+
+Ergebnis: ``{"status", "error", "seconds", "patched", "missing", "sites": {Zeile: {"calls", "seconds", "max",
+"names"}}, "stacks": [{"lines", "calls", "seconds", "max"}]}``; ``max`` ist der längste einzelne Aufruf.
+``stacks`` fasst Aufrufe mit denselben Zeilen auf dem Stapel zusammen, damit sich geschachtelte Kandidaten
+nicht doppelt zählen.
+Auch bei Exceptions, ``sys.exit`` und SIGINT (Zeitlimit) wird das Ergebnis geschrieben.
+"""
+
+import argparse
+import builtins
+import functools
+import importlib
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import traceback
+
+
+class LatencyRecorder:
+    def __init__(self, file_path, functions=()):
+        self.file_path = os.path.normcase(os.path.abspath(file_path))
+        # Erste Zeilen der Funktionen der Datei, deren Aufrufe als Ganzes gemessen werden
+        self.functions = set(functions)
+        self.sites = {}
+        self.stacks = {}
+        self._files = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _matches(self, filename) -> bool:
+        result = self._files.get(filename)
+        if result is None:
+            result = self._files[filename] = os.path.normcase(os.path.abspath(filename)) == self.file_path
+        return result
+
+    def record(self, name, seconds, frame):
+        lines = set()
+        while frame is not None:
+            if self._matches(frame.f_code.co_filename):
+                lines.add(frame.f_lineno)
+            frame = frame.f_back
+        with self._lock:
+            stack = self.stacks.setdefault(tuple(sorted(lines)), {"calls": 0, "seconds": 0.0, "max": 0.0})
+            stack["calls"] += 1
+            stack["seconds"] += seconds
+            stack["max"] = max(stack["max"], seconds)
+            for line in lines:
+                site = self.sites.setdefault(line, {"calls": 0, "seconds": 0.0, "max": 0.0, "names": {}})
+                site["calls"] += 1
+                site["seconds"] += seconds
+                site["max"] = max(site["max"], seconds)
+                site["names"][name] = site["names"].get(name, 0) + 1
+
+    def profile(self, frame, event, arg):
+        """Misst die äußersten Aufrufe der Funktionen aus ``functions`` (auch bei Exceptions)."""
+        if event not in ("call", "return"):
+            return
+        code = frame.f_code
+        if code.co_firstlineno not in self.functions or not self._matches(code.co_filename):
+            return
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if event == "call":
+            local.depth = depth + 1
+            if depth == 0:
+                local.start = time.perf_counter()
+        elif depth:
+            local.depth = depth - 1
+            if depth == 1:
+                self.record(f"{code.co_name}()", time.perf_counter() - local.start, frame.f_back)
+
+    def wrap(self, name, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if getattr(self._local, "depth", 0):
+                # Zählt schon für die umgebende gemessene Funktion
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start, sys._getframe(1))
+
+        return wrapper
+
+
+def _resolve(name):
+    """(Objekt, Attribut) für ``modul.name`` bzw. ``modul.Klasse.name``; None, wenn nicht importierbar."""
+    if "." not in name:
+        return (builtins, name) if hasattr(builtins, name) else None
+    parts = name.split(".")
+    for split in range(len(parts) - 1, 0, -1):
+        try:
+            owner = importlib.import_module(".".join(parts[:split]))
+        except ImportError:
+            continue
+        try:
+            for part in parts[split:-1]:
+                owner = getattr(owner, part)
+        except AttributeError:
+            return None
+        return (owner, parts[-1]) if hasattr(owner, parts[-1]) else None
+    return None
+
+
+def _run_target(kind, target, args):
+    if kind in ("module", "pytest"):
+        # Wie bei "python -m": das Arbeitsverzeichnis statt des Ordners dieses Runners
+        sys.path[0] = os.getcwd()
+    if kind == "module":
+        sys.argv = [target, *args]
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+    elif kind == "pytest":
+        import pytest
+
+        pytest.main(["-q", "-p", "no:cacheprovider", target, *args])
+    else:
+        sys.argv = [target, *args]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+        runpy.run_path(target, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dauer blockierender Aufrufe je Zeile messen")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--file", required=True, help="Datei, deren Zeilen gezählt werden")
+    parser.add_argument("--call", action="append", required=True, help="zu messende Funktion (mehrfach)")
+    parser.add_argument("--function", type=int, action="append", default=[],
+                        help="erste Zeile einer Funktion der Datei, die als Ganzes gemessen wird (mehrfach)")
+    parser.add_argument("--kind", choices=["script", "module", "pytest"], default="script")
+    parser.add_argument("target")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    recorder = LatencyRecorder(options.file, options.function)
+    result = {"status": "ok", "error": None, "seconds": None, "patched": [], "missing": []}
+    for name in options.call:
+        resolved = _resolve(name)
+        if resolved is None:
+            result["missing"].append(name)
+            continue
+        owner, attribute = resolved
+        setattr(owner, attribute, recorder.wrap(name, getattr(owner, attribute)))
+        result["patched"].append(name)
+
+    if recorder.functions:
+        threading.setprofile(recorder.profile)
+        sys.setprofile(recorder.profile)
+    start = time.perf_counter()
+    try:
+        _run_target(options.kind, options.target, options.args)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            result["status"] = f"sys.exit({e.code})"
+    except KeyboardInterrupt:
+        result["status"] = "abgebrochen (Zeitlimit)"
+    except BaseException:
+        result["status"] = "Exception"
+        result["error"] = traceback.format_exc(limit=5)
+    finally:
+        result["seconds"] = time.perf_counter() - start
+        sys.setprofile(None)
+        threading.setprofile(None)
+        with recorder._lock:
+            result["sites"] = {str(line): site for line, site in sorted(recorder.sites.items())}
+            result["stacks"] = [{"lines": list(lines), **stack} for lines, stack in recorder.stacks.items() if lines]
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Zeilen-Profiler: führt ein Profilierungsziel aus und misst für ausgewählte Dateien
+je Zeile, wie oft sie ausgeführt wurde und wie viel Zeit auf sie entfällt.
+
+Wird von ``performance_analysis.analyze_lines`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul). Nur Standardbibliothek.
+
+    python line_runner.py --output lines.json --include src --kind script main.py arg1
+
+Ab Python 3.12 wird ``sys.monitoring`` (PEP 669) genutzt: Für Code außerhalb der
+``--include``-Pfade meldet der Callback ``DISABLE``, danach kostet dieser Code
+nichts mehr. Ältere Interpreter fallen auf ``sys.settrace`` zurück (deutlich langsamer).
+
+Die Zeit einer Zeile reicht bis zum nächsten Zeilenereignis derselben Funktion bzw.
+bis zu deren Rückkehr; Aufrufe aus der Zeile heraus sind also enthalten (inklusive
+Zeit, wie bei line_profiler). Standardbibliothek und installierte Pakete werden nie
+erfasst. Auch bei Exceptions, ``sys.exit`` und SIGINT (Zeitlimit) wird das Ergebnis
+geschrieben.
+"""
+
+import argparse
+import json
+import linecache
+import os
+import runpy
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+
+EXCLUDED_PATHS = tuple({os.path.abspath(sysconfig.get_paths()[name]) for name in ("stdlib", "purelib", "platlib")})
+RUNNER_FILE = os.path.abspath(__file__)
+
+
+class LineProfiler:
+    def __init__(self, include):
+        self.include = tuple(os.path.abspath(path) for path in include)
+        # (Dateiname, Zeile) -> [Ausführungen, Nanosekunden]
+        self.stats = {}
+        self.engine = "sys.monitoring" if hasattr(sys, "monitoring") else "settrace"
+        self._selected = {}
+        self._stacks = {}
+
+    def selected(self, filename: str) -> bool:
+        result = self._selected.get(filename)
+        if result is None:
+            path = os.path.abspath(filename)
+            result = (not filename.startswith("<") and path != RUNNER_FILE
+                      and path.startswith(self.include) and not path.startswith(EXCLUDED_PATHS))
+            self._selected[filename] = result
+        return result
+
+    # Gemeinsame Buchführung: je Thread ein Stapel [code, aktuelle Zeile, Startzeit der Zeile]
+
+    def _stack(self) -> list:
+        ident = threading.get_ident()
+        stack = self._stacks.get(ident)
+        if stack is None:
+            stack = self._stacks[ident] = []
+        return stack
+
+    def _charge(self, entry, now):
+        if entry[1]:
+            self.stats[(entry[0].co_filename, entry[1])][1] += now - entry[2]
+
+    def enter(self, code):
+        self._stack().append([code, 0, 0])
+
+    def line(self, code, lineno):
+        if not lineno:
+            # Leere Module melden Zeile 0
+            return
+        now = time.perf_counter_ns()
+        stack = self._stack()
+        if not stack or stack[-1][0] is not code:
+            stack.append([code, 0, 0])
+        top = stack[-1]
+        self._charge(top, now)
+        top[1], top[2] = lineno, now
+        stat = self.stats.get((code.co_filename, lineno))
+        if stat is None:
+            stat = self.stats[(code.co_filename, lineno)] = [0, 0]
+        stat[0] += 1
+
+    def leave(self, code):
+        stack = self._stack()
+        if stack and stack[-1][0] is code:
+            self._charge(stack.pop(), time.perf_counter_ns())
+
+    def finish(self):
+        """Rechnet die Zeilen noch laufender Funktionen ab (z. B. nach SIGINT)."""
+        now = time.perf_counter_ns()
+        for stack in self._stacks.values():
+            while stack:
+                self._charge(stack.pop(), now)
+
+    # sys.monitoring (Python 3.12+)
+
+    def start(self):
+        if self.engine == "settrace":
+            threading.settrace(self._trace)
+            sys.settrace(self._trace)
+            return
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.use_tool_id(monitoring.PROFILER_ID, "phoenixai-lines")
+        for event, callback in ((events.PY_START, self._on_start), (events.PY_RESUME, self._on_start),
+                                (events.PY_RETURN, self._on_return), (events.PY_YIELD, self._on_return),
+                                (events.PY_UNWIND, self._on_unwind), (events.LINE, self._on_line)):
+            monitoring.register_callback(monitoring.PROFILER_ID, event, callback)
+        monitoring.set_events(monitoring.PROFILER_ID, events.PY_START | events.PY_RESUME | events.PY_RETURN
+                              | events.PY_YIELD | events.PY_UNWIND | events.LINE)
+
+    def stop(self):
+        if self.engine == "settrace":
+            sys.settrace(None)
+            threading.settrace(None)
+        else:
+            sys.monitoring.set_events(sys.monitoring.PROFILER_ID, 0)
+            sys.monitoring.free_tool_id(sys.monitoring.PROFILER_ID)
+        self.finish()
+
+    def _on_start(self, code, offset):
+        if not self.selected(code.co_filename):
+            return sys.monitoring.DISABLE
+        self.enter(code)
+
+    def _on_return(self, code, offset, value):
+        if not self.selected(code.co_filename):
+            return sys.monitoring.DISABLE
+        self.leave(code)
+
+    def _on_unwind(self, code, offset, exception):
+        # PY_UNWIND lässt sich nicht je Stelle abschalten
+        if self.selected(code.co_filename):
+            self.leave(code)
+
+    def _on_line(self, code, lineno):
+        if not self.selected(code.co_filename):
+            return sys.monitoring.DISABLE
+        self.line(code, lineno)
+
+    # sys.settrace (Fallback vor 3.12)
+
+    def _trace(self, frame, event, arg):
+        if event != "call" or not self.selected(frame.f_code.co_filename):
+            return None
+        self.enter(frame.f_code)
+        return self._trace_local
+
+    def _trace_local(self, frame, event, arg):
+        if event == "line":
+            self.line(frame.f_code, frame.f_lineno)
+        elif event == "return":
+            self.leave(frame.f_code)
+        return self._trace_local
+
+    def result(self) -> dict:
+        files = {}
+        for (filename, lineno), (hits, ns) in self.stats.items():
+            entry = files.setdefault(os.path.abspath(filename), {"lines": {}})
+            entry["lines"][str(lineno)] = {"hits": hits, "time_ns": ns}
+        for path, entry in files.items():
+            entry["source"] = linecache.getlines(path)
+        return files
+
+
+def _run_target(kind, target, args):
+    if kind == "module":
+        sys.argv = [target, *args]
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+    elif kind == "pytest":
+        import pytest
+
+        pytest.main(["-q", "-p", "no:cacheprovider", target, *args])
+    else:
+        sys.argv = [target, *args]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+        runpy.run_path(target, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeilen-Profil eines Profilierungsziels")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--include", action="append", default=[],
+                        help="Datei oder Verzeichnis, dessen Zeilen erfasst werden (mehrfach; Standard: cwd)")
+    parser.add_argument("--kind", choices=["script", "module", "pytest"], default="script")
+    parser.add_argument("target")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    profiler = LineProfiler(options.include or [os.getcwd()])
+    result = {"target": options.target, "kind": options.kind, "engine": profiler.engine,
+              "status": "ok", "error": None}
+    started = time.perf_counter_ns()
+    profiler.start()
+    try:
+        _run_target(options.kind, options.target, options.args)
+    except SystemExit as e:
+        result["status"] = f"sys.exit({e.code})"
+    except KeyboardInterrupt:
+        result["status"] = "abgebrochen (Zeitlimit)"
+    except BaseException:
+        result["status"] = "Exception"
+        result["error"] = traceback.format_exc(limit=5)
+    finally:
+        profiler.stop()
+        result["elapsed_ns"] = time.perf_counter_ns() - started
+        result["files"] = profiler.result()
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Führt ein Profilierungsziel unter tracemalloc aus und schreibt die Ergebnisse als JSON.
+
+Wird von ``performance_analysis.analyze_memory`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul), damit PhoenixAI im Zielprozess weder
+importiert werden muss noch Speicher belegt. Nur Standardbibliothek.
+
+    python memory_runner.py --output mem.json --top 15 --kind script main.py arg1
+
+Erfasst werden:
+- aktueller und höchster von Python belegter Speicher (tracemalloc),
+- die Top-N Allokationsstellen (Datei:Zeile, Größe, Anzahl) am Ende des Laufs,
+- der Unterschied zwischen einem Snapshot vor dem Start des Ziels und einem am
+  Ende (Wachstum je Stelle).
+
+Auch bei Exceptions, ``sys.exit`` und SIGINT (Zeitlimit) wird das Ergebnis geschrieben.
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import traceback
+import tracemalloc
+
+FRAME_LIMIT = 1
+# Kleinere Zuwächse je Stelle werden nicht einzeln aufgeführt (zählen aber zur Summe)
+MIN_GROWTH_BYTES = 1024
+
+
+def _filters():
+    return [
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, runpy.__file__),
+        tracemalloc.Filter(False, "<frozen *>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+
+def _site(traceback_):
+    frame = traceback_[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _run_target(kind, target, args):
+    if kind == "module":
+        sys.argv = [target, *args]
+        return runpy.run_module(target, run_name="__main__", alter_sys=True)
+    if kind == "pytest":
+        import pytest
+
+        return {"exit_code": pytest.main(["-q", "-p", "no:cacheprovider", target, *args])}
+    sys.argv = [target, *args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+    return runpy.run_path(target, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tracemalloc-Lauf eines Profilierungsziels")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--kind", choices=["script", "module", "pytest"], default="script")
+    parser.add_argument("target")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    result = {"target": options.target, "kind": options.kind, "status": "ok", "error": None}
+    tracemalloc.start(FRAME_LIMIT)
+    start_snapshot = tracemalloc.take_snapshot().filter_traces(_filters())
+    namespace = None
+    try:
+        # Der Namensraum hält die Objekte des Ziels bis zum End-Snapshot am Leben
+        namespace = _run_target(options.kind, options.target, options.args)
+    except SystemExit as e:
+        result["status"] = f"sys.exit({e.code})"
+    except KeyboardInterrupt:
+        result["status"] = "abgebrochen (Zeitlimit)"
+    except BaseException:
+        result["status"] = "Exception"
+        result["error"] = traceback.format_exc(limit=5)
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        end_snapshot = tracemalloc.take_snapshot().filter_traces(_filters())
+        tracemalloc.stop()
+        top = end_snapshot.statistics("lineno")[: options.top]
+        growth = [
+            stat for stat in end_snapshot.compare_to(start_snapshot, "lineno") if stat.size_diff > 0
+        ]
+        result.update({
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"site": _site(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in top
+            ],
+            "growth": [
+                {"site": _site(stat.traceback), "size_diff_bytes": stat.size_diff,
+                 "count_diff": stat.count_diff}
+                for stat in growth[: options.top] if stat.size_diff >= MIN_GROWTH_BYTES
+            ],
+            "total_growth_bytes": sum(stat.size_diff for stat in growth),
+        })
+        del namespace
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,13 @@ import os
 import datetime
 
 import typing_extensions
-import google.generativeai as genai
 
 from phoenixai.pipeline_analysis.report_storage import save_report_generic
 from phoenixai.utils.base_prompt_handling import (
+    call_structured_llm,
     read_file,
-    load_llm_model,
 )
+from phoenixai.utils.prompt_minify import minify_for_action
 
 # Neues Schema für strukturierte LLM-Ausgabe
 class NameChange(typing_extensions.TypedDict):
@@ -34,30 +34,6 @@ def extract_line_numbers(code_content: str, names: List[str]) -> dict:
     return name_lines
 
 
-def call_structured_llm(prompt: str, response_schema, temperature: float = 0.3) -> str:
-    try:
-        model = load_llm_model("gemini-1.5-flash")
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=temperature,
-                response_mime_type="application/json",
-                response_schema=response_schema,
-            ),
-        )
-
-        if response and response.candidates:
-            raw_text = response.candidates[0].content.parts[0].text
-            return raw_text
-
-        logging.error("Keine validen Ergebnisse vom LLM erhalten.")
-        return "[]"
-
-    except Exception as e:
-        logging.error(f"Fehler beim Aufrufen des LLM für strukturierte Ausgabe: {e}")
-        return "[]"
-
-
 class NameChecker:
     def __init__(self, file_path: str):
         self.file_path = file_path
@@ -73,6 +49,8 @@ class NameChecker:
     # <<< ENDE HINZUGEFÜGT >>>
 
     def analyze_names(self, code_content: str) -> Optional[List[NameChange]]:
+        # Die Zeilennummern werden später über die Namen im Originalcode bestimmt
+        code_content = minify_for_action(code_content, "Name Checker").text
         prompt = f"""
 Analysiere den folgenden Python-Code und identifiziere nichtssagende Funktions-, Method- und Klassennamen.
 Für jede identifizierte Variable, Funktion, Methode oder Klasse, gib das alte Name, das empfohlene neue Name und eine Begründung an.
@@ -104,6 +82,9 @@ Hier ist der gesamte Code:
 
         try:
             response = call_structured_llm(prompt, schema)
+            if response is None:
+                logging.error("Keine Antwort vom LLM erhalten.")
+                return None
             suggestions = json.loads(response)
 
             if isinstance(suggestions, list):
@@ -2,85 +2,708 @@
 """
 Analysiert die Performance einer Python-Datei oder eines Ordners und gibt Empfehlungen zur Verbesserung.
 Verwendete Tools:
-- cProfile (für CPU-Analyse)
-- memory_profiler (für Speicheranalyse)
+- cProfile (für CPU-Analyse) oder ein Sampling-Profiler mit Flame Graph
+  (``PHOENIXAI_PROFILE_MODE=sampling|both``, siehe sampling_runner.py)
+- ein Zeilen-Profiler auf Basis von ``sys.monitoring`` (``PHOENIXAI_LINE_PROFILE=1``,
+  siehe line_runner.py)
+- memory_profiler (RSS-Verlauf) und tracemalloc (Allokationsstellen, Wachstum; siehe memory_runner.py)
+- eine empirische Komplexitätsschätzung für ausgewählte Funktionen
+  (``PHOENIXAI_COMPLEXITY_FUNCTIONS``, siehe arg_recorder.py und scaling_runner.py)
 - Scalene (detaillierte CPU- und Speicheranalyse)
 - VizTracer (Tracing für Funktionsaufrufe)
+
+Jedes Ziel läuft in einem eigenen Subprozess (``python -m cProfile -o ...``) mit
+Zeitlimit und geschlossenem stdin – ein Skript, das auf ``input()`` wartet,
+``sys.exit`` aufruft oder globalen Zustand verändert, betrifft PhoenixAI selbst
+nicht. Beim Zeitlimit bekommt der Prozess erst SIGINT, damit cProfile das Profil
+bis dahin noch schreibt. Als Einstiegspunkt dient ein Skript, ein Modul
+(``module:paket.modul``) oder ein pytest-Knoten (``pytest:tests/test_x.py::test_y``).
+Im Verzeichnis-Modus laufen mehrere Dateien parallel; die rohen ``.pstats``-Dateien
+die Speicherdaten (``.memory.json``) und die Flame Graphs (``.svg``, ``.speedscope.json``) werden neben dem Markdown-Report abgelegt.
 """
 
+import contextvars
+import json
+import math
 import os
+import pickle
+import shlex
+import signal
 import subprocess
-import cProfile
+import sys
+import tempfile
+import urllib.parse
 import pstats
 import io
+from concurrent.futures import ThreadPoolExecutor
 from memory_profiler import memory_usage
 
-def analyze_cpu(file_path: str) -> str:
-    pr = cProfile.Profile()
+from phoenixai.utils.cancellation import DeadlineExceeded, raise_if_cancelled, remaining_time, run_subprocess
+from phoenixai.pipeline_analysis.static_performance import analyze_paths, flatten
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.flamegraph import read_collapsed, render_svg, to_speedscope, top_functions
+from phoenixai.utils.tracing import span
+
+# Zeitlimit pro profiliertem Ziel in Sekunden
+PROFILE_TIMEOUT = float(os.getenv("PHOENIXAI_PROFILE_TIMEOUT", "60"))
+# Parallel profilierte Ziele; gleichzeitige Läufe verfälschen die Zeiten etwas (1 = exakt)
+PROFILE_WORKERS = int(os.getenv("PHOENIXAI_PROFILE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Sekunden zwischen SIGINT und hartem Beenden beim Zeitlimit
+PROFILE_INTERRUPT_GRACE = 5.0
+MEMORY_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_runner.py")
+# Anzahl der Allokationsstellen im Report und im JSON
+MEMORY_TOP_N = int(os.getenv("PHOENIXAI_MEMORY_TOP", "15"))
+MEMORY_TIMELINE_POINTS = 60
+# Ab diesem Wachstum zwischen Start und Ende wird gewarnt
+MEMORY_GROWTH_WARN_MIB = float(os.getenv("PHOENIXAI_MEMORY_GROWTH_MIB", "1"))
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+# "cprofile" (deterministisch), "sampling" (Stapel-Samples, Flame Graph) oder "both"
+PROFILE_MODE = os.getenv("PHOENIXAI_PROFILE_MODE", "cprofile").strip().lower()
+SAMPLING_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sampling_runner.py")
+SAMPLING_HZ = float(os.getenv("PHOENIXAI_SAMPLING_HZ", "100"))
+# "wall" (inklusive Wartezeit, alle Threads) oder "cpu" (nur POSIX)
+SAMPLING_CLOCK = os.getenv("PHOENIXAI_SAMPLING_CLOCK", "wall").strip().lower()
+# Zeilen-Profil (sys.monitoring) zusätzlich erstellen
+LINE_PROFILE = os.getenv("PHOENIXAI_LINE_PROFILE", "0") == "1"
+# Erfasste Dateien/Ordner (os.pathsep-getrennt, relativ zum Arbeitsverzeichnis des Ziels; Standard: dieses)
+LINE_PROFILE_INCLUDE = [p for p in os.getenv("PHOENIXAI_LINE_PROFILE_INCLUDE", "").split(os.pathsep) if p]
+LINE_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "line_runner.py")
+HOT_LINES = 15
+# Empirische Komplexität: Funktionen der Datei (kommagetrennt, "*" = alle mit aufgezeichneten Aufrufen; leer = aus)
+COMPLEXITY_FUNCTIONS = [name.strip() for name in os.getenv("PHOENIXAI_COMPLEXITY_FUNCTIONS", "").split(",")
+                        if name.strip()]
+# Zeitbudget der Skalierungsläufe je Funktion in Sekunden
+COMPLEXITY_BUDGET = float(os.getenv("PHOENIXAI_COMPLEXITY_BUDGET", "10"))
+# Ab diesem Exponenten ist eine Funktion wahrscheinlich O(n²) oder schlechter
+COMPLEXITY_FLAG_EXPONENT = 1.5
+# Vergrößert eine Methode bei jedem Aufruf den Zustand, nach dem ihre Kosten wachsen (self.data), kosten n Aufrufe O(n^(k+1))
+COMPLEXITY_STATE_EXPONENT = 0.75
+# Angepasst wird an die größten Messpunkte (feste Kosten verzerren kleine Größen)
+COMPLEXITY_FIT_POINTS = 5
+ARG_RECORDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arg_recorder.py")
+SCALING_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scaling_runner.py")
+RECORD_MAX_CASES = 5
+# Statische Suche nach Performance-Mustern (static_performance) als Teil der Analyse
+STATIC_PERF = os.getenv("PHOENIXAI_STATIC_PERF", "1") == "1"
+# Höchstens so viele konkrete Funde als Empfehlungen; alle stehen im Abschnitt des Reports
+STATIC_RECOMMENDATIONS = 10
+
+
+def parse_entry_point(spec: str, cwd: str = None) -> dict:
+    """
+    Zerlegt eine Einstiegspunkt-Angabe:
+
+    - ``pfad/skript.py [args]`` – Skript (relativ zu cwd; Arbeitsverzeichnis: cwd bzw. Ordner des Skripts)
+    - ``module:paket.modul [args]`` – wie ``python -m paket.modul``
+    - ``pytest:tests/test_x.py::test_y [args]`` – ein pytest-Knoten oder eine Testdatei
+    """
+    kind, _, rest = spec.partition(":") if spec.startswith(("module:", "pytest:")) else ("script", "", spec)
+    target, *args = shlex.split(rest, posix=os.name == "posix")
+    if kind == "script":
+        return script_entry(target, args, cwd, label=spec)
+    return {"kind": kind, "target": target, "args": args, "cwd": cwd or os.getcwd(), "label": spec}
+
+
+def script_entry(file_path: str, args: list = None, cwd: str = None, label: str = None) -> dict:
+    target = os.path.abspath(os.path.join(cwd, file_path) if cwd else file_path)
+    return {"kind": "script", "target": target, "args": args or [],
+            "cwd": cwd or os.path.dirname(target), "label": label or file_path}
+
+
+def entry_point_command(entry: dict) -> list:
+    """Argumente für den Python-Interpreter (ohne ihn selbst)."""
+    if entry["kind"] == "module":
+        return ["-m", entry["target"], *entry["args"]]
+    if entry["kind"] == "pytest":
+        return ["-m", "pytest", "-q", "-p", "no:cacheprovider", entry["target"], *entry["args"]]
+    return [entry["target"], *entry["args"]]
+
+
+def _tail(text: str, lines: int = 15) -> str:
+    return "\n".join((text or "").strip().splitlines()[-lines:])
+
+
+def analyze_cpu(entry: dict, pstats_path: str, timeout: float = PROFILE_TIMEOUT) -> str:
+    cmd = [sys.executable, "-m", "cProfile", "-o", pstats_path, *entry_point_command(entry)]
+    stderr = ""
     try:
-        pr.runctx("exec(open(file_path).read())", globals(), locals())
-    except Exception as e:
-        return f"Fehler beim Ausführen der Datei: {e}"
+        result = run_subprocess(cmd, timeout=timeout, capture_output=True, text=True,
+                                stdin=subprocess.DEVNULL, cwd=entry["cwd"],
+                                interrupt_grace=PROFILE_INTERRUPT_GRACE)
+        status = f"Exit-Code {result.returncode}"
+        if result.returncode:
+            stderr = result.stderr
+    except DeadlineExceeded:
+        # Nur das eigene Zeitlimit wird hier behandelt, ein Abbruch des ganzen Schritts nicht
+        raise_if_cancelled()
+        status = f"Zeitlimit von {timeout:.0f} s überschritten – Profil bis zum Abbruch"
+    if not os.path.isfile(pstats_path):
+        return f"Fehler beim Ausführen der Datei ({status}):\n{_tail(stderr)}"
     stream = io.StringIO()
-    stats = pstats.Stats(pr, stream=stream).sort_stats("cumulative")
+    stats = pstats.Stats(pstats_path, stream=stream).sort_stats("cumulative")
     stats.print_stats(10)
-    return stream.getvalue()
+    output = f"{status}\n{stream.getvalue()}"
+    if stderr:
+        output += f"\nFehlerausgabe des Ziels:\n{_tail(stderr)}"
+    return output
+
+def analyze_sampling(entry: dict, base_path: str, timeout: float = PROFILE_TIMEOUT) -> dict:
+    """
+    Profiliert das Ziel mit dem Sampling-Runner (ohne den Overhead von cProfile) und legt
+    neben base_path ab: ``.collapsed`` (Stapel), ``.svg`` (Flame Graph) und
+    ``.speedscope.json``.
+
+    :return: {"text", "collapsed_path", "svg_path", "speedscope_path"}; die Pfade sind None,
+        wenn keine Samples entstanden sind.
+    """
+    collapsed_path = base_path + ".collapsed"
+    cmd = [sys.executable, SAMPLING_RUNNER, "--output", collapsed_path, "--hz", str(SAMPLING_HZ),
+           "--clock", SAMPLING_CLOCK, "--kind", entry["kind"], entry["target"], *entry["args"]]
+    result = {"text": "", "collapsed_path": None, "svg_path": None, "speedscope_path": None}
+    stderr = ""
+    try:
+        completed = run_subprocess(cmd, timeout=timeout, capture_output=True, text=True,
+                                   stdin=subprocess.DEVNULL, cwd=entry["cwd"],
+                                   interrupt_grace=PROFILE_INTERRUPT_GRACE)
+        stderr = completed.stderr
+        status = next((line[len("[Sampling] "):] for line in reversed(stderr.splitlines())
+                       if line.startswith("[Sampling] ")), f"Exit-Code {completed.returncode}")
+    except DeadlineExceeded:
+        raise_if_cancelled()
+        status = f"Zeitlimit von {timeout:.0f} s überschritten – Samples bis zum Abbruch"
+    samples = read_collapsed(collapsed_path) if os.path.isfile(collapsed_path) else None
+    if not samples:
+        result["text"] = f"Fehler beim Sampling ({status}):\n{_tail(stderr)}"
+        return result
+
+    name = os.path.basename(entry["label"])
+    result["collapsed_path"] = collapsed_path
+    result["svg_path"] = base_path + ".svg"
+    with open(result["svg_path"], "w", encoding="utf-8") as f:
+        f.write(render_svg(samples, f"{name} – {SAMPLING_CLOCK}, {SAMPLING_HZ:g} Hz"))
+    result["speedscope_path"] = base_path + ".speedscope.json"
+    with open(result["speedscope_path"], "w", encoding="utf-8") as f:
+        json.dump(to_speedscope(samples, name, 1000.0 / SAMPLING_HZ), f)
+
+    total = sum(samples.values())
+    lines = [status, "", f"{'eigen':>7} {'gesamt':>7}  Funktion"]
+    for label, own, inclusive in top_functions(samples):
+        lines.append(f"{100 * own / total:>6.1f}% {100 * inclusive / total:>6.1f}%  {label}")
+    result["text"] = "\n".join(lines)
+    return result
+
+
+def hot_lines(files: dict, limit: int = HOT_LINES) -> list:
+    """[(Dateiname, Zeile, Ausführungen, Nanosekunden, Quelltext), ...] nach Zeit absteigend."""
+    rows = []
+    for filename, entry in files.items():
+        source = entry.get("source", [])
+        for lineno, stat in entry["lines"].items():
+            line = int(lineno)
+            text = source[line - 1].strip() if 0 < line <= len(source) else ""
+            rows.append((filename, line, stat["hits"], stat["time_ns"], text))
+    rows.sort(key=lambda row: -row[3])
+    return rows[:limit]
+
+
+def analyze_lines(entry: dict, base_path: str, timeout: float = PROFILE_TIMEOUT) -> dict:
+    """
+    Zeilen-Profil des Ziels mit dem line_runner (``sys.monitoring``, vor 3.12 ``settrace``).
+    Die Rohdaten samt Quelltext landen in ``<base_path>.lines.json``.
+
+    :return: {"text", "path"}; path ist None, wenn der Lauf nichts geschrieben hat.
+    """
+    lines_path = base_path + ".lines.json"
+    cmd = [sys.executable, LINE_RUNNER, "--output", lines_path, "--kind", entry["kind"]]
+    for include in LINE_PROFILE_INCLUDE:
+        cmd += ["--include", os.path.join(entry["cwd"], include)]
+    cmd += [entry["target"], *entry["args"]]
+    stderr = ""
+    try:
+        completed = run_subprocess(cmd, timeout=timeout, capture_output=True, text=True,
+                                   stdin=subprocess.DEVNULL, cwd=entry["cwd"],
+                                   interrupt_grace=PROFILE_INTERRUPT_GRACE)
+        stderr = completed.stderr
+    except DeadlineExceeded:
+        raise_if_cancelled()
+    if not os.path.isfile(lines_path):
+        return {"text": f"Fehler beim Zeilen-Profil:\n{_tail(stderr)}", "path": None}
+
+    with open(lines_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    elapsed = data["elapsed_ns"] or 1
+    lines = [f"Status: {data['status']} ({data['engine']}, {elapsed / 1e9:.2f} s)", "",
+             f"{'Zeit':>10} {'Anteil':>7} {'Aufrufe':>9}  Zeile"]
+    for filename, line, hits, ns, text in hot_lines(data["files"]):
+        location = os.path.relpath(filename, entry["cwd"]) if filename.startswith(entry["cwd"]) else filename
+        lines.append(f"{ns / 1e6:>8.1f}ms {100 * ns / elapsed:>6.1f}% {hits:>9}  {location}:{line}  {text[:60]}")
+    if data.get("error"):
+        lines += ["", data["error"].strip()]
+    return {"text": "\n".join(lines), "path": lines_path}
+
+
+def module_location(file_path: str) -> tuple:
+    """
+    Verzeichnis für ``sys.path`` und Modulname einer Datei. Übergeordnete Ordner mit
+    ``__init__.py`` gehören zum Modulnamen (wie beim ``prepend``-Importmodus von pytest).
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    parts = [os.path.splitext(os.path.basename(file_path))[0]]
+    while os.path.isfile(os.path.join(directory, "__init__.py")):
+        parts.insert(0, os.path.basename(directory))
+        directory = os.path.dirname(directory)
+    return directory, ".".join(parts)
+
+
+def record_arguments(file_path: str, functions: list, entry: dict, max_cases: int = RECORD_MAX_CASES,
+                     timeout: float = PROFILE_TIMEOUT) -> dict:
+    """
+    Führt den Einstiegspunkt unter arg_recorder.py aus und sammelt die Argumente echter Aufrufe.
+
+    :param functions: CodeIndex-Einträge der Funktionen (``qualified_name``, ``start_line``).
+    :return: Name -> {"cases": [Pickle von (args, kwargs)], "calls", "skipped"}; leer, wenn der Lauf scheitert.
+    """
+    with tempfile.TemporaryDirectory(prefix="phoenixai_record_") as directory:
+        output = os.path.join(directory, "arguments.pickle")
+        cmd = [sys.executable, ARG_RECORDER, "--output", output, "--file", os.path.abspath(file_path),
+               "--max-cases", str(max_cases), "--kind", entry["kind"]]
+        for function in functions:
+            cmd += ["--function", f"{function['qualified_name']}:{function['start_line']}"]
+        cmd += [entry["target"], *entry["args"]]
+        stderr = ""
+        try:
+            completed = run_subprocess(cmd, timeout=timeout, capture_output=True, text=True,
+                                       stdin=subprocess.DEVNULL, cwd=entry["cwd"],
+                                       interrupt_grace=PROFILE_INTERRUPT_GRACE)
+            stderr = completed.stderr
+        except DeadlineExceeded:
+            # Bis zum Zeitlimit aufgezeichnete Argumente bleiben nutzbar
+            raise_if_cancelled()
+        if not os.path.isfile(output):
+            print(f"Argumentaufzeichnung fehlgeschlagen:\n{_tail(stderr)}")
+            return {}
+        with open(output, "rb") as f:
+            return pickle.load(f)
+
+
+def fit_exponent(points: list, fit_points: int = COMPLEXITY_FIT_POINTS) -> dict:
+    """
+    Passt ``t = c · n^k`` per Kleinste-Quadrate-Gerade im log-log-Raum an die größten Messpunkte an.
+
+    :param points: [[n, Sekunden, Läufe], ...] aufsteigend nach n.
+    :return: {"exponent", "r2", "used"} oder None bei weniger als drei brauchbaren Punkten.
+    """
+    usable = [(math.log(n), math.log(t)) for n, t, *_ in points if n > 0 and t > 0][-fit_points:]
+    if len(usable) < 3:
+        return None
+    mean_x = sum(x for x, _ in usable) / len(usable)
+    mean_y = sum(y for _, y in usable) / len(usable)
+    sxx = sum((x - mean_x) ** 2 for x, _ in usable)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in usable)
+    syy = sum((y - mean_y) ** 2 for _, y in usable)
+    if not sxx:
+        return None
+    slope = sxy / sxx
+    r2 = (sxy * sxy / (sxx * syy)) if syy else 1.0
+    return {"exponent": slope, "r2": r2, "used": len(usable)}
+
+
+def complexity_class(exponent: float) -> str:
+    if exponent < 0.25:
+        return "O(1)"
+    if exponent < 0.75:
+        return "sublinear"
+    if exponent < 1.25:
+        return "O(n)"
+    if exponent < 1.6:
+        return "O(n log n) … O(n^1.5)"
+    if exponent < 2.5:
+        return "O(n²)"
+    return f"O(n^{round(exponent)})"
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
 
-def analyze_memory(file_path: str) -> str:
+def analyze_complexity(file_path: str, functions: list, entry: dict, base_path: str) -> dict:
+    """
+    Empirische Komplexität: zeichnet Argumente der Funktionen beim Lauf von entry auf, vergrößert
+    sie schrittweise (scaling_runner.py) und passt je Funktion einen Exponenten an.
+
+    :param functions: Qualifizierte Namen; ``["*"]`` für alle Funktionen der Datei mit aufgezeichneten Aufrufen.
+    :return: {"text", "path", "findings"}; findings enthält die auffälligen Funktionen.
+    """
+    index = CodeIndex.from_file(file_path)
+    selected = index.functions() if functions == ["*"] else [index.get(n) for n in functions if n in index]
+    if not selected:
+        return {"text": "Keine der angegebenen Funktionen in der Datei gefunden.", "path": None, "findings": []}
+    records = record_arguments(file_path, selected, entry)
+    names = [e["qualified_name"] for e in selected
+             if functions != ["*"] or records.get(e["qualified_name"], {}).get("cases")]
+    if not names:
+        return {"text": f"Keine Aufrufe der Funktionen beim Lauf von {entry['label']} aufgezeichnet.",
+                "path": None, "findings": []}
+
+    result_path = base_path + ".complexity.json"
+    import_path, module = module_location(file_path)
+    stderr = ""
+    with tempfile.TemporaryDirectory(prefix="phoenixai_scaling_") as directory:
+        inputs = os.path.join(directory, "arguments.pickle")
+        with open(inputs, "wb") as f:
+            pickle.dump(records, f)
+        cmd = [sys.executable, SCALING_RUNNER, "--inputs", inputs, "--file", os.path.abspath(file_path),
+               "--module", module, "--import-path", import_path, "--budget", str(COMPLEXITY_BUDGET),
+               "--output", result_path]
+        for name in names:
+            cmd += ["--function", name]
+        try:
+            completed = run_subprocess(cmd, timeout=COMPLEXITY_BUDGET * 2 * len(names) + PROFILE_TIMEOUT,
+                                       capture_output=True, text=True, stdin=subprocess.DEVNULL,
+                                       cwd=entry["cwd"], interrupt_grace=PROFILE_INTERRUPT_GRACE)
+            stderr = completed.stderr
+        except DeadlineExceeded:
+            raise_if_cancelled()
+    if not os.path.isfile(result_path):
+        return {"text": f"Fehler bei den Skalierungsläufen:\n{_tail(stderr)}", "path": None, "findings": []}
+
+    with open(result_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    lines, findings = [], []
+    for name in names:
+        measured = data["functions"].get(name)
+        record = records.get(name, {})
+        if measured is None:
+            lines += [f"{name}: nicht gemessen", ""]
+            continue
+        fit = fit_exponent(measured["points"])
+        measured["fit"] = fit
+        header = f"{name}: {measured['status']}"
+        if fit:
+            header = f"{name}: Exponent {fit['exponent']:.2f} (R² {fit['r2']:.2f}) → {complexity_class(fit['exponent'])}"
+            reason = None
+            if fit["exponent"] >= COMPLEXITY_FLAG_EXPONENT:
+                reason = f"wahrscheinlich {complexity_class(fit['exponent'])} in {', '.join(measured['scaled'])}"
+            elif measured.get("grows") and fit["exponent"] >= COMPLEXITY_STATE_EXPONENT:
+                reason = (f"jeder Aufruf vergrößert {', '.join(measured['grows'])} und kostet "
+                          f"{complexity_class(fit['exponent'])} – n Aufrufe kosten {complexity_class(fit['exponent'] + 1)}")
+            if reason:
+                header += f"  ⚠ {reason}"
+                findings.append({"name": name, "exponent": fit["exponent"], "reason": reason})
+        lines.append(header)
+        lines.append(f"  {record.get('calls', 0)} Aufrufe aufgezeichnet; skaliert: {', '.join(measured['scaled']) or '–'}")
+        if measured["input"]:
+            lines.append(f"  Eingabe: ({measured['input']})")
+        if measured["points"]:
+            lines.append("  " + " · ".join(f"n={n}: {_duration(t)}" for n, t, _ in measured["points"]))
+        if measured["error"]:
+            lines.append("  " + measured["error"].strip().replace("\n", "\n  "))
+        lines.append("")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return {"text": "\n".join(lines).rstrip(), "path": result_path, "findings": findings}
+
+
+def _mib(size_bytes: float) -> str:
+    if abs(size_bytes) < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KiB"
+    return f"{size_bytes / 1024 / 1024:.2f} MiB"
+
+
+def downsample_timeline(samples: list, points: int = MEMORY_TIMELINE_POINTS) -> list:
+    """
+    Reduziert [(Sekunden, MiB), ...] auf höchstens points Einträge; je Intervall zählt
+    das Maximum, damit kurze Spitzen sichtbar bleiben.
+    """
+    if len(samples) <= points:
+        return [[round(t, 2), round(m, 2)] for t, m in samples]
+    size = len(samples) / points
+    timeline = []
+    for i in range(points):
+        bucket = samples[int(i * size):int((i + 1) * size)] or samples[-1:]
+        t, m = max(bucket, key=lambda sample: sample[1])
+        timeline.append([round(t, 2), round(m, 2)])
+    return timeline
+
+
+def _sparkline(values: list) -> str:
+    low, high = min(values), max(values)
+    span_ = (high - low) or 1.0
+    return "".join(SPARK_CHARS[int((v - low) / span_ * (len(SPARK_CHARS) - 1))] for v in values)
+
+
+def _stop_gracefully(process: subprocess.Popen):
+    """SIGINT, damit der Runner seine Ergebnisse noch schreibt; danach hart beenden."""
+    if process.poll() is not None:
+        return
     try:
-        cmd = ["python", file_path]
-        mem_usage = memory_usage(proc=(subprocess.Popen, (cmd,)), interval=0.1, timeout=60)
-        if mem_usage:
-            avg_memory = sum(mem_usage) / len(mem_usage)
-            return f"Durchschnittliche Speichernutzung: {avg_memory:.2f} MiB"
-        else:
-            return "Keine Speicherdaten erfasst."
-    except Exception as e:
-        return f"Fehler bei der Speicheranalyse: {e}"
-
-def generate_recommendations(cpu_output: str, memory_output: str) -> str:
-    recommendations = []
+        process.send_signal(signal.SIGINT if os.name == "posix" else signal.CTRL_BREAK_EVENT)
+        process.wait(timeout=PROFILE_INTERRUPT_GRACE)
+    except (subprocess.TimeoutExpired, OSError, ValueError):
+        process.kill()
+        process.wait()
+
+
+def analyze_memory(entry: dict, sidecar_path: str, timeout: float = PROFILE_TIMEOUT) -> dict:
+    """
+    Misst den RSS-Verlauf des Ziels (memory_profiler, alle 0,1 s) und lässt es im
+    memory_runner unter tracemalloc laufen (Allokationsstellen, Wachstum Start → Ende).
+
+    Das Ergebnis wird zusätzlich als JSON nach sidecar_path geschrieben.
+    """
+    cmd = [sys.executable, MEMORY_RUNNER, "--output", sidecar_path, "--top", str(MEMORY_TOP_N),
+           "--kind", entry["kind"], entry["target"], *entry["args"]]
+    creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == "nt" else 0
+    process = None
+    memory = {"target": entry["label"], "status": None, "error": None}
+    # stderr in eine Datei statt in eine Pipe: eine volle Pipe würde das Ziel bis zum Zeitlimit blockieren
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=stderr, cwd=entry["cwd"], creationflags=creationflags)
+            samples = memory_usage(proc=process, interval=0.1, timeout=remaining_time(timeout),
+                                   timestamps=True)
+        except Exception as e:
+            memory["error"] = f"Fehler bei der Speicheranalyse: {e}"
+            samples = []
+        finally:
+            # memory_usage misst nur bis zum Zeitlimit, der Prozess läuft sonst weiter
+            if process is not None:
+                _stop_gracefully(process)
+        if process is not None and process.returncode and not os.path.isfile(sidecar_path):
+            stderr.seek(0)
+            memory["error"] = f"Fehler bei der Speicheranalyse: {_tail(stderr.read().decode(errors='replace'))}"
+
+    if os.path.isfile(sidecar_path):
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            memory.update({key: value for key, value in json.load(f).items() if key != "target"})
+    if samples:
+        start = samples[0][1]
+        rss = [(t - start, m) for m, t in samples]
+        values = [m for _, m in rss]
+        memory["rss"] = {
+            "interval_seconds": 0.1,
+            "duration_seconds": round(rss[-1][0], 2),
+            "peak_mib": round(max(values), 2),
+            "average_mib": round(sum(values) / len(values), 2),
+            "timeline": downsample_timeline(rss),
+        }
+    memory["growth_flagged"] = memory.get("total_growth_bytes", 0) >= MEMORY_GROWTH_WARN_MIB * 1024 * 1024
+    with open(sidecar_path, "w", encoding="utf-8") as f:
+        json.dump(memory, f, indent=2)
+    return memory
+
+
+def format_memory_profile(memory: dict, base_dir: str = None) -> str:
+    """Textfassung der Speicheranalyse für den Report."""
+    if memory.get("error") and "rss" not in memory and "top" not in memory:
+        return memory["error"]
+
+    def site(text):
+        path, _, line = text.rpartition(":")
+        if base_dir and os.path.isabs(path) and path.startswith(os.path.abspath(base_dir)):
+            path = os.path.relpath(path, base_dir)
+        return f"{path}:{line}"
+
+    lines = [f"Status: {memory.get('status') or 'unbekannt'}"]
+    rss = memory.get("rss")
+    if rss:
+        lines.append(f"RSS: Spitze {rss['peak_mib']:.2f} MiB, Durchschnitt {rss['average_mib']:.2f} MiB, "
+                     f"Laufzeit {rss['duration_seconds']:.1f} s")
+        values = [m for _, m in rss["timeline"]]
+        lines.append(f"Verlauf: {_sparkline(values)}  ({min(values):.1f}–{max(values):.1f} MiB, "
+                     f"{len(values)} Punkte, Maximum je Intervall)")
+    else:
+        lines.append("Keine RSS-Daten erfasst.")
+    if "peak_bytes" in memory:
+        lines.append(f"tracemalloc: aktuell {_mib(memory['current_bytes'])}, Spitze {_mib(memory['peak_bytes'])}")
+        lines.append("")
+        lines.append("Top-Allokationsstellen (am Ende belegt):")
+        lines.append(f"  {'Größe':>12} {'Anzahl':>9}  Stelle")
+        for stat in memory.get("top", []):
+            lines.append(f"  {_mib(stat['size_bytes']):>12} {stat['count']:>9}  {site(stat['site'])}")
+        flag = "  ⚠ über der Schwelle" if memory.get("growth_flagged") else ""
+        lines.append("")
+        lines.append(f"Wachstum Start → Ende: +{_mib(memory.get('total_growth_bytes', 0))}{flag}")
+        for stat in memory.get("growth", []):
+            lines.append(f"  {'+' + _mib(stat['size_diff_bytes']):>12} {stat['count_diff']:>+9}  {site(stat['site'])}")
+    if memory.get("error"):
+        lines.append("")
+        lines.append(memory["error"].strip())
+    return "\n".join(lines)
+
+
+def _location(finding: dict, base_dir: str = None) -> str:
+    path = os.path.relpath(finding["file"], base_dir) if base_dir else os.path.basename(finding["file"])
+    return f"{path}:{finding['line']}"
+
+
+def format_static_findings(findings: list, base_dir: str = None) -> str:
+    if not findings:
+        return "Keine Funde."
+    return "\n".join(f"{_location(f, base_dir)} [{f['rule']}] {f['function']}: {f['message']}" for f in findings)
+
+
+def generate_recommendations(cpu_output: str, memory_output: str, memory: dict = None, findings: list = None,
+                             complexity: dict = None, base_dir: str = None) -> str:
+    """
+    Empfehlungen aus den Messungen. Konkrete Stellen (statische Funde, auffällige
+    Komplexität) stehen vorne; die allgemeinen Hinweise nur, wenn es keine gibt.
+
+    :param findings: Funde von ``static_performance`` (Warnungen zuerst).
+    :param complexity: Ergebnis von ``analyze_complexity``.
+    """
+    findings = [f for f in findings or [] if f["rule"] != "SYNTAX"]
+    recommendations = [f"`{_location(f, base_dir)}` ({f['function']}): {f['message']}. {f['hint']}".rstrip()
+                       for f in findings[:STATIC_RECOMMENDATIONS]]
+    if len(findings) > STATIC_RECOMMENDATIONS:
+        recommendations.append(f"… {len(findings) - STATIC_RECOMMENDATIONS} weitere statische Funde, "
+                               f"siehe Abschnitt „Statische Performance-Muster“.")
+    for finding in (complexity or {}).get("findings", []):
+        recommendations.append(f"{finding['name']}: {finding['reason']} (Exponent {finding['exponent']:.2f}); "
+                               f"prüfen Sie Suchen in Listen, Verkettung in Schleifen und verschachtelte Schleifen.")
+    concrete = bool(recommendations)
     if "Fehler" in cpu_output:
         recommendations.append("Überprüfen Sie den Code auf Ausführungsfehler während der CPU-Analyse.")
-    else:
+    elif not concrete:
         recommendations.append("Analysieren Sie die cProfile-Ausgabe, um Engpässe im Code zu identifizieren.")
     if "Fehler" in memory_output:
         recommendations.append("Stellen Sie sicher, dass die Speicheranalyse korrekt durchgeführt wird.")
-    else:
+    elif memory and memory.get("growth_flagged") and memory.get("growth"):
+        recommendations.append(
+            f"Der Speicher wächst bis zum Ende um {_mib(memory['total_growth_bytes'])}; prüfen Sie vor allem "
+            f"{memory['growth'][0]['site']} auf Caches oder Listen, die nie geleert werden.")
+    elif not concrete:
         recommendations.append("Falls die Speichernutzung hoch ist, erwägen Sie Optimierungen wie Caching oder eine Speicherbereinigung.")
-    recommendations.append("Erwägen Sie Parallelisierung oder asynchrone Programmierung, falls die CPU-Auslastung hoch ist.")
+    if not concrete:
+        recommendations.append("Erwägen Sie Parallelisierung oder asynchrone Programmierung, falls die CPU-Auslastung hoch ist.")
     return "\n".join(f"- {rec}" for rec in recommendations)
 
 
-def analyze_file(file_path: str) -> dict:
-    analysis = {}
-    analysis["cpu_profile"] = analyze_cpu(file_path)
-    analysis["memory_profile"] = analyze_memory(file_path)
+def analyze_file(entry: dict, pstats_path: str) -> dict:
+    base_path = pstats_path[:-len(".pstats")]
+    memory_path = base_path + ".memory.json"
+    analysis = {"pstats_path": pstats_path, "memory_path": memory_path, "cpu_profile": ""}
+    if PROFILE_MODE != "sampling":
+        with span("cProfile", "profiling", path=entry["label"]):
+            analysis["cpu_profile"] = analyze_cpu(entry, pstats_path)
+    if PROFILE_MODE in ("sampling", "both"):
+        with span("sampling", "profiling", path=entry["label"]):
+            analysis["sampling"] = analyze_sampling(entry, base_path)
+    if LINE_PROFILE:
+        with span("line profile", "profiling", path=entry["label"]):
+            analysis["lines"] = analyze_lines(entry, base_path)
+    with span("memory_profiler", "profiling", path=entry["label"]):
+        analysis["memory"] = analyze_memory(entry, memory_path)
+    analysis["memory_profile"] = format_memory_profile(analysis["memory"], entry["cwd"])
     analysis["recommendations"] = generate_recommendations(
-        analysis["cpu_profile"],
-        analysis["memory_profile"]
+        analysis["cpu_profile"] or analysis.get("sampling", {}).get("text", ""),
+        analysis["memory_profile"],
+        analysis["memory"]
     )
+    if not os.path.isfile(pstats_path):
+        analysis["pstats_path"] = None
     return analysis
 
 
-def analyze_target(target_path: str) -> dict:
-    results = {}
-    if os.path.isfile(target_path) and target_path.endswith(".py"):
-        print(f"Analysiere Datei: {target_path}")
-        results[target_path] = analyze_file(target_path)
+def _pstats_name(label: str, prefix: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in label.strip(os.sep + "/"))
+    return f"{prefix}_{safe}.pstats" if prefix else f"{safe}.pstats"
+
+
+def analyze_target(target_path: str, entry_point: str = None, pstats_dir: str = None,
+                   pstats_prefix: str = "", complexity_functions: list = None) -> dict:
+    """
+    Profiliert eine Datei, alle Python-Dateien eines Ordners (parallel) oder einen
+    expliziten Einstiegspunkt (siehe ``parse_entry_point``).
+
+    :param entry_point: Einstiegspunkt statt target_path, z. B. ``pytest:tests``; relative
+        Pfade beziehen sich auf target_path (bzw. dessen Ordner).
+    :param pstats_dir: Ablage der ``.pstats``-Dateien (Standard: temporäres Verzeichnis).
+    :param pstats_prefix: Namenspräfix der ``.pstats``-Dateien, z. B. der Report-Name.
+    :param complexity_functions: Funktionen für die Komplexitätsschätzung (nur bei einer Datei;
+        Standard: ``PHOENIXAI_COMPLEXITY_FUNCTIONS``).
+    :return: Bezeichnung des Ziels -> Analyse (inklusive ``pstats_path`` und, mit
+        ``PHOENIXAI_STATIC_PERF``, den statischen Funden unter ``static``).
+    """
+    entries = []
+    if entry_point:
+        base = target_path if os.path.isdir(target_path) else os.path.dirname(os.path.abspath(target_path))
+        entries.append(parse_entry_point(entry_point, cwd=base))
+    elif os.path.isfile(target_path) and target_path.endswith(".py"):
+        entries.append(script_entry(target_path))
     elif os.path.isdir(target_path):
         for root, _, files in os.walk(target_path):
             for file in files:
                 if file.endswith(".py"):
                     file_path = os.path.join(root, file)
-                    print(f"Analysiere Datei: {file_path}")
-                    results[file_path] = analyze_file(file_path)
+                    entries.append(script_entry(file_path))
     else:
         print("Bitte geben Sie eine gültige Python-Datei oder ein Verzeichnis an.")
+        return {}
+
+    pstats_dir = pstats_dir or tempfile.mkdtemp(prefix="phoenixai_profile_")
+    os.makedirs(pstats_dir, exist_ok=True)
+    workers = max(1, min(PROFILE_WORKERS, len(entries)))
+    print(f"Profiliere {len(entries)} Ziel(e) in {workers} parallelen Prozess(en), "
+          f"Zeitlimit {PROFILE_TIMEOUT:.0f} s je Ziel.")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Jeder Lauf sieht das CancellationToken des Pipeline-Schritts
+        futures = {}
+        for entry in entries:
+            print(f"Analysiere Datei: {entry['label']}")
+            pstats_path = os.path.join(pstats_dir, _pstats_name(
+                os.path.relpath(entry["label"], target_path) if os.path.isdir(target_path) and not entry_point
+                else os.path.basename(entry["label"]), pstats_prefix))
+            futures[entry["label"]] = executor.submit(contextvars.copy_context().run,
+                                                      analyze_file, entry, pstats_path)
+        results = {label: future.result() for label, future in futures.items()}
+
+    complexity_functions = COMPLEXITY_FUNCTIONS if complexity_functions is None else complexity_functions
+    if complexity_functions and os.path.isfile(target_path) and target_path.endswith(".py"):
+        # Aufgezeichnet wird beim Lauf des (einzigen) Profilierungsziels
+        entry = entries[0]
+        analysis = results[entry["label"]]
+        with span("complexity", "profiling", path=target_path):
+            analysis["complexity"] = analyze_complexity(target_path, complexity_functions, entry,
+                                                        analysis["memory_path"][:-len(".memory.json")])
+
+    if STATIC_PERF:
+        # Einstiegspunkte (z. B. Tests) lassen sich keiner Datei zuordnen: dort zählen alle Funde
+        with span("static analysis", "profiling", path=target_path):
+            by_file = {os.path.abspath(file): findings for file, findings in analyze_paths([target_path]).items()}
+        base_dir = target_path if os.path.isdir(target_path) else os.path.dirname(os.path.abspath(target_path))
+        for entry in entries:
+            analysis = results[entry["label"]]
+            if entry_point:
+                analysis["static"] = flatten(by_file)
+            else:
+                analysis["static"] = flatten({entry["target"]: by_file.get(entry["target"], [])})
+            analysis["static_base"] = base_dir
+
+    for entry in entries:
+        analysis = results[entry["label"]]
+        if analysis.get("static") or analysis.get("complexity", {}).get("findings"):
+            analysis["recommendations"] = generate_recommendations(
+                analysis["cpu_profile"] or analysis.get("sampling", {}).get("text", ""),
+                analysis["memory_profile"], analysis["memory"], analysis.get("static"),
+                analysis.get("complexity"), analysis.get("static_base"))
     return results
 
 
-def generate_report(results: dict, output_file: str = None) -> None:
+def _report_link(path: str, reports_dir: str = None, route: str = "raw_report") -> str:
+    """Markdown-Link auf die Web-Ansicht (view_report) bzw. den Download (raw_report)."""
+    if not reports_dir:
+        return f"`{path}`"
+    rel = os.path.relpath(path, reports_dir).replace(os.sep, "/")
+    return f"[{os.path.basename(path)}](/{route}?report={urllib.parse.quote(rel)})"
+
+
+def generate_report(results: dict, output_file: str = None, reports_dir: str = None) -> None:
     """
     Erzeugt für jede analysierte Python-Datei einen Performance-Report in einer
     hierarchischen Verzeichnisstruktur. Die Struktur soll folgendermaßen aussehen:
@@ -92,6 +715,8 @@ def generate_report(results: dict, output_file: str = None) -> None:
 
     Für jede Analyse wird eine neue Version mit Zeitstempel erzeugt. Wird output_file nicht
     angegeben, wird der Reportpfad automatisch anhand der analysierten Datei ermittelt.
+    Mit reports_dir werden die ``.pstats``-Dateien, Flame Graphs und Rohdaten als Link auf
+    die Web-Ansicht eingetragen.
     """
     import datetime
     # Falls output_file nicht vorgegeben ist, muss für jede Datei separat gespeichert werden.
@@ -104,14 +729,48 @@ def generate_report(results: dict, output_file: str = None) -> None:
         f.write("# Performance Analysis Report\n\n")
         for file_path, analysis in results.items():
             f.write(f"## Datei: {file_path}\n\n")
-            f.write("### CPU Profiling (cProfile)\n")
-            f.write("```\n")
-            f.write(analysis["cpu_profile"])
-            f.write("\n```\n\n")
-            f.write("### Memory Profiling\n")
+            if analysis["cpu_profile"]:
+                f.write("### CPU Profiling (cProfile)\n")
+                f.write("```\n")
+                f.write(analysis["cpu_profile"])
+                f.write("\n```\n\n")
+                if analysis.get("pstats_path"):
+                    f.write(f"Rohdaten: {_report_link(analysis['pstats_path'], reports_dir, 'view_report')}\n\n")
+            if analysis.get("sampling"):
+                sampling = analysis["sampling"]
+                f.write(f"### CPU Sampling ({SAMPLING_CLOCK}, {SAMPLING_HZ:g} Hz)\n")
+                f.write("```\n")
+                f.write(sampling["text"])
+                f.write("\n```\n\n")
+                if sampling["svg_path"]:
+                    f.write(f"Flame Graph: {_report_link(sampling['svg_path'], reports_dir, 'view_report')} · "
+                            f"speedscope: {_report_link(sampling['speedscope_path'], reports_dir)} · "
+                            f"Stapel: {_report_link(sampling['collapsed_path'], reports_dir)}\n\n")
+            if analysis.get("lines"):
+                f.write("### Zeilen-Hotspots (inklusive Aufrufe)\n")
+                f.write("```\n")
+                f.write(analysis["lines"]["text"])
+                f.write("\n```\n\n")
+                if analysis["lines"]["path"]:
+                    f.write(f"Annotierter Quelltext: {_report_link(analysis['lines']['path'], reports_dir, 'view_report')}\n\n")
+            if analysis.get("complexity"):
+                f.write("### Empirische Komplexität (skalierte aufgezeichnete Eingaben)\n")
+                f.write("```\n")
+                f.write(analysis["complexity"]["text"])
+                f.write("\n```\n\n")
+                if analysis["complexity"]["path"]:
+                    f.write(f"Rohdaten: {_report_link(analysis['complexity']['path'], reports_dir)}\n\n")
+            if "static" in analysis:
+                f.write("### Statische Performance-Muster\n")
+                f.write("```\n")
+                f.write(format_static_findings(analysis["static"], analysis.get("static_base")))
+                f.write("\n```\n\n")
+            f.write("### Memory Profiling (RSS + tracemalloc)\n")
             f.write("```\n")
             f.write(analysis["memory_profile"])
             f.write("\n```\n\n")
+            if analysis.get("memory_path"):
+                f.write(f"Rohdaten: {_report_link(analysis['memory_path'], reports_dir)}\n\n")
             f.write("### Empfehlungen zur Performance-Optimierung\n")
             f.write(analysis["recommendations"])
             f.write("\n\n---\n\n")
@@ -2,7 +2,12 @@ import os
 import subprocess
 
 from phoenixai.pipeline_analysis.name_checker import NameChecker
-from phoenixai.pipeline_analysis.performance_analysis import analyze_target, generate_report
+from phoenixai.pipeline_analysis.concurrency_analysis import analyze_concurrency
+from phoenixai.pipeline_analysis.performance_analysis import COMPLEXITY_FUNCTIONS, analyze_target, generate_report
+from phoenixai.pipeline_analysis.report_storage import versioned_report_path
+from phoenixai.pipeline_analysis.static_performance import analyze_paths, flatten, format_findings
+from phoenixai.utils.cancellation import run_subprocess
+from phoenixai.utils.tracing import span
 
 
 def run_analyze_arch(file_path):
@@ -14,10 +19,11 @@ def run_analyze_arch(file_path):
     output_file = os.path.join(output_path, "module_dependencies.svg")
 
     try:
-        result = subprocess.run(["python", "-m", "pydeps", file_path, "-o", output_file, "--max-bacon=2"],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                text=True)
+        with span("subprocess: pydeps", "subprocess", path=file_path):
+            result = run_subprocess(["python", "-m", "pydeps", file_path, "-o", output_file, "--max-bacon=2"],
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE,
+                                    text=True)
 
         if result.returncode == 0:
             print(f"[Analysis] Pydeps erfolgreich ausgeführt. Graph gespeichert unter {output_file}")
@@ -45,7 +51,7 @@ def run_script4(file_path):
     print(f"[Analysis] Skript 4 auf: {file_path}")
 
 
-def run_performance_analysis(file_path: str):
+def run_performance_analysis(file_path: str, entry_point: str = None, complexity_functions: list = None):
     """
     Führt die Performance-Analyse für die gegebene Datei durch und speichert den Report
     in einer hierarchischen Verzeichnisstruktur:
@@ -54,41 +60,121 @@ def run_performance_analysis(file_path: str):
           Performance/
               <Dateiname ohne Extension>/
                   performance_report_v<version>_<timestamp>.md
-
+                  performance_report_v<version>_<timestamp>_<Ziel>.pstats
+
+    Jedes Ziel läuft isoliert in einem Subprozess; der Einstiegspunkt kann über
+    entry_point bzw. ``PHOENIXAI_PROFILE_ENTRY`` gesetzt werden (z. B. ``pytest:tests``).
+    Mit ``PHOENIXAI_PROFILE_MODE=sampling`` (oder ``both``) entstehen zusätzlich ein
+    Flame Graph (``.svg``) und ein speedscope-Profil für lang laufende Ziele. Mit
+    complexity_functions (bzw. ``PHOENIXAI_COMPLEXITY_FUNCTIONS``) enthält der Report
+    zusätzlich die empirische Komplexität dieser Funktionen.
     Anschließend wird der Report über die Flask-Anwendung angezeigt.
     """
     import datetime, os
     print(f"[Analysis] Performance-Analyse auf: {file_path}")
-    results = analyze_target(file_path)
 
     # Erzeuge den Pfad zum Reports-Verzeichnis
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    reports_dir = os.path.join(base_dir, "..", "reports", "Performance")
+    reports_root = os.path.join(base_dir, "..", "reports")
+    reports_dir = os.path.join(reports_root, "Performance")
     if not os.path.exists(reports_dir):
         os.makedirs(reports_dir)
 
     # Erzeuge einen Unterordner für die analysierte Datei (ohne Extension)
-    file_base = os.path.splitext(os.path.basename(file_path))[0]
+    file_base = os.path.splitext(os.path.basename(os.path.normpath(file_path)))[0]
     file_report_dir = os.path.join(reports_dir, file_base)
     if not os.path.exists(file_report_dir):
         os.makedirs(file_report_dir)
 
     # Bestimme die nächste Versionsnummer basierend auf vorhandenen Reports
-    existing_files = [f for f in os.listdir(file_report_dir) if f.startswith("performance_report")]
+    existing_files = [f for f in os.listdir(file_report_dir)
+                      if f.startswith("performance_report") and f.endswith(".md")]
     version = len(existing_files) + 1
 
     # Erzeuge den Zeitstempel
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     # Erzeuge den neuen Report-Namen
-    report_filename = f"performance_report_v{version}_{timestamp}.md"
-    report_path = os.path.join(file_report_dir, report_filename)
+    report_name = f"performance_report_v{version}_{timestamp}"
+    report_path = os.path.join(file_report_dir, f"{report_name}.md")
 
-    generate_report(results, report_path)
+    entry_point = entry_point or os.getenv("PHOENIXAI_PROFILE_ENTRY") or None
+    results = analyze_target(file_path, entry_point=entry_point, pstats_dir=file_report_dir,
+                             pstats_prefix=report_name, complexity_functions=complexity_functions)
+    generate_report(results, report_path, reports_dir=reports_root)
     print(f"[Analysis] Report gespeichert unter: {report_path}")
 
+def run_complexity_analysis(file_path):
+    """
+    Performance-Analyse samt empirischer Komplexität für ausgewählte Funktionen: ihre
+    Argumente werden beim Lauf des Profilierungsziels aufgezeichnet, schrittweise vergrößert
+    und die Laufzeiten im log-log-Raum angepasst (Abschnitt im Performance-Report).
+    """
+    print(f"[Analysis] Komplexitätsschätzung auf: {file_path}")
+    functions = COMPLEXITY_FUNCTIONS
+    if not functions:
+        import tkinter as tk
+        from phoenixai.pipeline_transformation.refactor import FunctionSelectionDialog, extract_functions
+
+        root = tk.Tk()
+        root.withdraw()
+        dialog = FunctionSelectionDialog(root, extract_functions(file_path),
+                                         title="Funktionen für die Komplexitätsschätzung")
+        functions = dialog.result or []
+        root.destroy()
+    if not functions:
+        print("[Analysis] Keine Funktionen ausgewählt.")
+        return
+    run_performance_analysis(file_path, complexity_functions=functions)
+
+
+def run_static_performance(file_path):
+    """
+    Statische Suche nach Performance-Mustern in einer Datei oder (parallel) in allen
+    Python-Dateien eines Ordners, ohne den Code auszuführen. Speichert einen Markdown-Report
+    und die Funde als JSON (für LLM-Transformationen) unter ``reports/Static_Performance``.
+    """
+    import json
+    print(f"[Analysis] Statische Performance-Muster auf: {file_path}")
+    with span("static analysis", "profiling", path=file_path):
+        findings = analyze_paths([file_path])
+    report_path, _ = versioned_report_path("Static_Performance", file_path)
+    base_dir = file_path if os.path.isdir(file_path) else os.path.dirname(os.path.abspath(file_path))
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(format_findings(findings, base_dir))
+    with open(report_path[:-len(".md")] + ".json", "w", encoding="utf-8") as f:
+        json.dump(flatten(findings), f, indent=2, ensure_ascii=False)
+    count = sum(len(file_findings) for file_findings in findings.values())
+    print(f"[Analysis] {count} Fund(e) in {len(findings)} Datei(en); Report gespeichert unter: {report_path}")
+    return f"Report: {report_path}"
+
+
+def run_concurrency_analysis(file_path):
+    """
+    Sucht unabhängige blockierende Aufrufe (Netzwerk, Subprozesse, Dateien) in Schleifen
+    und Folgen, misst ihre Dauer beim Lauf des Ziels (``PHOENIXAI_CONCURRENCY_ENTRY`` bzw.
+    ``PHOENIXAI_PROFILE_ENTRY``) und schätzt den Gewinn durch Nebenläufigkeit. Speichert
+    einen Markdown-Report und die Kandidaten als JSON unter ``reports/Concurrency``.
+    """
+    import json
+    print(f"[Analysis] Nebenläufigkeit auf: {file_path}")
+    with span("concurrency analysis", "profiling", path=file_path):
+        result = analyze_concurrency(file_path)
+    report_path, _ = versioned_report_path("Concurrency", file_path)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(result["text"])
+    with open(report_path[:-len(".md")] + ".json", "w", encoding="utf-8") as f:
+        json.dump({key: value for key, value in result.items() if key != "text"}, f, indent=2, ensure_ascii=False)
+    independent = sum(o["independent"] for o in result["opportunities"])
+    print(f"[Analysis] {independent} unabhängige Kandidat(en); Report gespeichert unter: {report_path}")
+    return f"Report: {report_path}"
+
+
 analysis_actions = {
     "Name Checker": run_name_checker,
     "SonarQube": run_script4,
     "Performance": run_performance_analysis,
+    "Complexity": run_complexity_analysis,
+    "Performance Patterns": run_static_performance,
+    "Concurrency": run_concurrency_analysis,
     "Architecture": run_analyze_arch,
 }
@@ -3,42 +3,57 @@ import datetime
 import uuid
 import json
 
-def save_report_generic(report_content, analysis_type, target_file_path):
+def reports_base_dir():
+    """Basis-Reports-Verzeichnis (eine Ebene oberhalb dieses Moduls)."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "reports")
+
+
+def versioned_report_path(analysis_type, target_file_path, extension="md", prefix=None):
     """
-    Speichert den Report in einer hierarchischen Verzeichnisstruktur:
+    Ermittelt den nächsten versionierten Pfad in der Report-Struktur:
 
       reports/
           <Analysis_Type>/
               <Dateiname ohne Extension>/
-                  <analysis_type>_report_v<version>_<timestamp>.md
+                  <prefix>_v<version>_<timestamp>.<extension>
 
-    Zusätzlich wird ein eindeutiger Report-ID generiert und in einer Mapping-Datei gespeichert.
-    Die Mapping-Datei (report_mapping.json) speichert eine Zuordnung von Report-ID zu
-    dem relativen Pfad der Report-Datei.
+    Ohne prefix wird "<analysis_type>_report" verwendet. Gibt (Pfad, Zeitstempel) zurück.
     """
-    # Basis-Reports-Verzeichnis (eine Ebene oberhalb dieses Moduls)
-    base_reports_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "reports")
-    analysis_dir = os.path.join(base_reports_dir, analysis_type)
-    if not os.path.exists(analysis_dir):
-        os.makedirs(analysis_dir)
+    analysis_dir = os.path.join(reports_base_dir(), analysis_type)
 
     # Bestimme den Basisnamen der analysierten Datei (ohne Erweiterung)
-    file_base = os.path.splitext(os.path.basename(target_file_path))[0]
+    file_base = os.path.splitext(os.path.basename(os.path.normpath(target_file_path)))[0]
     file_report_dir = os.path.join(analysis_dir, file_base)
-    if not os.path.exists(file_report_dir):
-        os.makedirs(file_report_dir)
+    os.makedirs(file_report_dir, exist_ok=True)
 
     # Erstelle einen einheitlichen Präfix für den Report-Dateinamen
-    prefix = f"{analysis_type.lower()}_report"
+    prefix = prefix or f"{analysis_type.lower()}_report"
     # Bestimme die nächste Versionsnummer basierend auf vorhandenen Reports
-    existing_files = [f for f in os.listdir(file_report_dir) if f.startswith(prefix)]
+    existing_files = [f for f in os.listdir(file_report_dir)
+                      if f.startswith(prefix) and f.endswith(f".{extension}")]
     version = len(existing_files) + 1
 
     # Erzeuge den Zeitstempel
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    # Erzeuge den neuen Report-Namen
-    new_report_filename = f"{prefix}_v{version}_{timestamp}.md"
-    new_report_path = os.path.join(file_report_dir, new_report_filename)
+    new_report_filename = f"{prefix}_v{version}_{timestamp}.{extension}"
+    return os.path.join(file_report_dir, new_report_filename), timestamp
+
+
+def save_report_generic(report_content, analysis_type, target_file_path):
+    """
+    Speichert den Report in einer hierarchischen Verzeichnisstruktur:
+
+      reports/
+          <Analysis_Type>/
+              <Dateiname ohne Extension>/
+                  <analysis_type>_report_v<version>_<timestamp>.md
+
+    Zusätzlich wird ein eindeutiger Report-ID generiert und in einer Mapping-Datei gespeichert.
+    Die Mapping-Datei (report_mapping.json) speichert eine Zuordnung von Report-ID zu
+    dem relativen Pfad der Report-Datei.
+    """
+    base_reports_dir = reports_base_dir()
+    new_report_path, timestamp = versioned_report_path(analysis_type, target_file_path)
 
     # Falls report_content eine Liste ist, in einen String umwandeln
     if isinstance(report_content, list):
@@ -0,0 +1,156 @@
+"""
+Sampling-Profiler: führt ein Profilierungsziel aus und zählt in festen Abständen
+dessen Aufrufstapel. Ergebnis ist eine Datei im "collapsed stack"-Format
+(``rahmen;rahmen;rahmen anzahl`` je Zeile), wie sie flamegraph.pl, speedscope und
+``phoenixai.utils.flamegraph`` lesen.
+
+Wird von ``performance_analysis.analyze_sampling`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul). Nur Standardbibliothek.
+
+    python sampling_runner.py --output out.collapsed --hz 100 --clock wall --kind script main.py arg1
+
+Im Gegensatz zu cProfile wird nicht jeder Aufruf verfolgt; der Code des Ziels läuft
+unverändert schnell, nur alle 1/hz Sekunden wird ein Stapel gelesen. Zwei Uhren:
+
+- ``wall``: ein Hilfsthread liest per ``sys._current_frames()`` die Stapel aller
+  Threads des Ziels (Wartezeiten wie ``sleep`` oder I/O sind sichtbar; alle Plattformen),
+- ``cpu``: ``setitimer(ITIMER_PROF)`` und ein SIGPROF-Handler im Hauptthread
+  (nur verbrauchte CPU-Zeit; nur POSIX).
+
+Auch bei Exceptions, ``sys.exit`` und SIGINT (Zeitlimit) wird das Ergebnis geschrieben.
+"""
+
+import argparse
+import os
+import runpy
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+RUNNER_FILES = {os.path.abspath(path) for path in (__file__, runpy.__file__, threading.__file__)}
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_runner(code) -> bool:
+    return code.co_filename in RUNNER_FILES or code.co_filename.startswith("<frozen ")
+
+
+def _stack(frame) -> tuple:
+    """Rahmen von außen nach innen; die äußeren Rahmen von Runner, runpy und Thread-Start entfallen."""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    start = 0
+    while start < len(codes) and _is_runner(codes[start]):
+        start += 1
+    return tuple(_label(code) for code in codes[start:])
+
+
+class Sampler:
+    def __init__(self, hz: float, clock: str):
+        self.interval = 1.0 / hz
+        self.clock = clock
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._switch_interval = None
+
+    def start(self):
+        if self.clock == "cpu":
+            signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            # Der Hilfsthread bekommt den GIL sonst erst beim nächsten freiwilligen Abgeben
+            # (z. B. sleep) – die Samples würden sich dort häufen statt im rechnenden Code
+            self._switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(self._switch_interval, self.interval / 20))
+            self._thread = threading.Thread(target=self._sample_threads, name="sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self.clock == "cpu":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_IGN)
+        else:
+            self._stop.set()
+            self._thread.join()
+            sys.setswitchinterval(self._switch_interval)
+
+    def _on_signal(self, signum, frame):
+        stack = _stack(frame)
+        if stack:
+            self.samples[stack] += 1
+
+    def _sample_threads(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = _stack(frame)
+                if stack:
+                    # Getrennte Wurzeln je Thread, der Hauptthread ohne Präfix
+                    name = names.get(ident, str(ident))
+                    self.samples[stack if name == "MainThread" else (f"[{name}]",) + stack] += 1
+
+
+def _run_target(kind, target, args):
+    if kind == "module":
+        sys.argv = [target, *args]
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+    elif kind == "pytest":
+        import pytest
+
+        pytest.main(["-q", "-p", "no:cacheprovider", target, *args])
+    else:
+        sys.argv = [target, *args]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+        runpy.run_path(target, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampling-Profil eines Profilierungsziels")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--hz", type=float, default=100.0)
+    parser.add_argument("--clock", choices=["wall", "cpu"], default="wall")
+    parser.add_argument("--kind", choices=["script", "module", "pytest"], default="script")
+    parser.add_argument("target")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    options = parser.parse_args()
+
+    clock = options.clock if hasattr(signal, "setitimer") else "wall"
+    sampler = Sampler(options.hz, clock)
+    status = "ok"
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        _run_target(options.kind, options.target, options.args)
+    except SystemExit as e:
+        status = f"sys.exit({e.code})"
+    except KeyboardInterrupt:
+        status = "abgebrochen (Zeitlimit)"
+    except BaseException:
+        status = "Exception"
+        traceback.print_exc(limit=5)
+    finally:
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        with open(options.output, "w", encoding="utf-8") as f:
+            for stack, count in sampler.samples.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        # Metadaten für den Aufrufer auf stderr, das collapsed-Format bleibt rein
+        print(f"[Sampling] {status}; {sum(sampler.samples.values())} Samples in {elapsed:.1f} s "
+              f"({clock}, {options.hz:g} Hz)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
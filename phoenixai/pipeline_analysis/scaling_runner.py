@@ -0,0 +1,267 @@
+"""
+Skalierungsläufe für die empirische Komplexitätsschätzung: ruft Funktionen mit
+aufgezeichneten Argumenten auf, die schrittweise vergrößert werden, und misst die Zeit.
+
+Wird von ``performance_analysis.analyze_complexity`` als eigener Prozess über den
+Dateipfad gestartet (nicht als Modul). Nur Standardbibliothek.
+
+    python scaling_runner.py --inputs args.pickle --file work.py --module work \
+        --import-path . --function dedupe --output scaling.json
+
+Die Eingaben stammen aus ``arg_recorder.py``. Je Funktion wird der größte aufgezeichnete
+Fall gewählt; vergrößert werden alle eingebauten Container (list, tuple, dict, set, str,
+bytes) unter den Argumenten sowie solche Container in den Attributen von Objekten (bei
+Methoden z. B. ``self.data``). Beim Vervielfältigen werden Zahlen verschoben und Strings
+ergänzt, damit die Werte verschieden bleiben (sonst würde z. B. eine Deduplizierung nicht
+mitwachsen). Jeder Aufruf bekommt eine frische Kopie; je Größe zählt die kürzeste Zeit.
+Die Größen verdoppeln sich, bis ein Aufruf ``MAX_CALL_SECONDS`` oder die Funktion ihr
+Zeitbudget überschreitet.
+
+Ergebnis: ``{"functions": {Name: {"status", "error", "input", "scaled", "grows", "points": [[n, s, Läufe]]}}}``,
+wobei ``grows`` die skalierten Container nennt, die ein Aufruf selbst vergrößert (z. B. ``self.data``);
+die Datei wird nach jeder Funktion neu geschrieben, damit bei einem Abbruch Teilergebnisse bleiben.
+"""
+
+import argparse
+import copy
+import importlib
+import importlib.util
+import io
+import json
+import os
+import pickle
+import reprlib
+import sys
+import time
+import traceback
+
+SCALED_TYPES = (list, tuple, dict, set, frozenset, str, bytes)
+MIN_SIZE = 16
+MAX_SIZE = 1 << 20
+MAX_CALL_SECONDS = 0.5
+# Je Größe: so oft messen, bis MIN_ROUND_SECONDS erreicht sind (mindestens MIN_RUNS, höchstens MAX_RUNS)
+MIN_ROUND_SECONDS = 0.05
+MIN_RUNS = 3
+MAX_RUNS = 200
+
+_repr = reprlib.Repr()
+_repr.maxstring = 40
+_repr.maxother = 60
+
+
+class TargetUnpickler(pickle.Unpickler):
+    """Löst ``__main__`` auf das Zielmodul auf (Aufzeichnung über ``python skript.py``)."""
+
+    def __init__(self, file, module):
+        super().__init__(file)
+        self.module = module
+
+    def find_class(self, module, name):
+        if module == "__main__":
+            target = self.module
+            for part in name.split("."):
+                target = getattr(target, part)
+            return target
+        return super().find_class(module, name)
+
+
+def _loads(data, module):
+    return TargetUnpickler(io.BytesIO(data), module).load()
+
+
+def _shift(value, round_number, offset):
+    """Ein Element für die round_number-te Kopie, verschieden vom Original."""
+    if round_number == 0:
+        return value
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value + round_number * offset
+    if isinstance(value, str):
+        return f"{value}#{round_number}"
+    if isinstance(value, bytes):
+        return value + b"#%d" % round_number
+    return copy.deepcopy(value)
+
+
+def _offset(items):
+    numbers = [x for x in items if isinstance(x, (int, float)) and not isinstance(x, bool)]
+    return (max(numbers) - min(numbers) + 1) if numbers else 1
+
+
+def scale_container(value, factor):
+    """Der Container, factor-mal so groß (Elemente verschoben, siehe ``_shift``)."""
+    if isinstance(value, (str, bytes)):
+        return value * factor
+    if isinstance(value, dict):
+        offset = _offset(value)
+        return {_shift(k, r, offset): copy.deepcopy(v) for r in range(factor) for k, v in value.items()}
+    offset = _offset(value)
+    items = [_shift(x, r, offset) for r in range(factor) for x in value]
+    return type(value)(items) if not isinstance(value, list) else items
+
+
+def scalable_parts(args, kwargs):
+    """Pfade (z. B. ``items`` oder ``self.data``) und Größen aller skalierbaren Container."""
+    parts = []
+
+    def visit(value, path):
+        if isinstance(value, SCALED_TYPES):
+            if len(value):
+                parts.append((path, len(value)))
+        elif hasattr(value, "__dict__") and not isinstance(value, type):
+            for name, attribute in vars(value).items():
+                if isinstance(attribute, SCALED_TYPES) and len(attribute):
+                    parts.append((f"{path}.{name}", len(attribute)))
+
+    for index, value in enumerate(args):
+        visit(value, f"arg{index}")
+    for name, value in kwargs.items():
+        visit(value, name)
+    return parts
+
+
+def scaled_arguments(args, kwargs, factor):
+    """Kopie der Argumente, in der alle skalierbaren Container factor-mal so groß sind."""
+
+    def scale(value):
+        if isinstance(value, SCALED_TYPES):
+            return scale_container(value, factor) if len(value) else value
+        if hasattr(value, "__dict__") and not isinstance(value, type):
+            value = copy.deepcopy(value)
+            for name, attribute in vars(value).items():
+                if isinstance(attribute, SCALED_TYPES) and len(attribute):
+                    setattr(value, name, scale_container(attribute, factor))
+        return value
+
+    return tuple(scale(v) for v in args), {k: scale(v) for k, v in kwargs.items()}
+
+
+def _names(function, parts):
+    """Ersetzt argN durch die Parameternamen der Funktion."""
+    code = getattr(function, "__code__", None)
+    names = code.co_varnames[:code.co_argcount] if code else ()
+    result = []
+    for path, _ in parts:
+        head, dot, rest = path.partition(".")
+        if head.startswith("arg") and head[3:].isdigit() and int(head[3:]) < len(names):
+            head = names[int(head[3:])]
+        result.append(head + dot + rest)
+    return result
+
+
+def _describe(value):
+    """Kurzdarstellung; Objekte ohne eigenes __repr__ mit ihren Attributen."""
+    if type(value).__repr__ is object.__repr__ and hasattr(value, "__dict__"):
+        attributes = ", ".join(f"{k}={_repr.repr(v)}" for k, v in vars(value).items())
+        return f"{type(value).__name__}({attributes})"
+    return _repr.repr(value)
+
+
+def growing_parts(function, args, kwargs):
+    """Pfade der Container, die ein Aufruf vergrößert (auf einer Kopie der Argumente)."""
+    call_args, call_kwargs = copy.deepcopy((args, kwargs))
+    before = dict(scalable_parts(call_args, call_kwargs))
+    function(*call_args, **call_kwargs)
+    after = dict(scalable_parts(call_args, call_kwargs))
+    return [path for path, size in after.items() if size > before.get(path, 0)]
+
+
+def time_call(function, args, kwargs):
+    """Kürzeste Zeit eines Aufrufs über mehrere Läufe mit je frischer Kopie der Argumente."""
+    best, runs, spent = float("inf"), 0, 0.0
+    while runs < MAX_RUNS and (runs < MIN_RUNS or spent < MIN_ROUND_SECONDS):
+        call_args, call_kwargs = copy.deepcopy((args, kwargs))
+        start = time.perf_counter()
+        function(*call_args, **call_kwargs)
+        elapsed = time.perf_counter() - start
+        best, runs, spent = min(best, elapsed), runs + 1, spent + elapsed
+        if elapsed > MAX_CALL_SECONDS:
+            break
+    return best, runs
+
+
+def measure_function(function, cases, budget, result):
+    """Füllt result schrittweise, damit bei einem Abbruch die bisherigen Punkte bleiben."""
+    if not cases:
+        result["status"] = "keine Aufrufe aufgezeichnet"
+        return
+    args, kwargs = max(cases, key=lambda case: sum(size for _, size in scalable_parts(*case)))
+    parts = scalable_parts(args, kwargs)
+    result["input"] = ", ".join([_describe(a) for a in args] + [f"{k}={_describe(v)}" for k, v in kwargs.items()])
+    if not parts:
+        result["status"] = "keine skalierbaren Argumente"
+        return
+    result["scaled"] = _names(function, parts)
+    result["grows"] = _names(function, [(path, 0) for path in growing_parts(function, args, kwargs)])
+    base = sum(size for _, size in parts)
+    factor = max(1, -(-MIN_SIZE // base))
+    started = time.perf_counter()
+    while base * factor <= MAX_SIZE:
+        scaled_args, scaled_kwargs = scaled_arguments(args, kwargs, factor)
+        seconds, runs = time_call(function, scaled_args, scaled_kwargs)
+        size = sum(size for _, size in scalable_parts(scaled_args, scaled_kwargs))
+        result["points"].append([size, seconds, runs])
+        if seconds > MAX_CALL_SECONDS or time.perf_counter() - started > budget:
+            break
+        factor *= 2
+
+
+def load_target(file_path, module_name, import_path):
+    if import_path not in sys.path:
+        sys.path.insert(0, import_path)
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        # Einzelnes Skript außerhalb eines Pakets
+        spec = importlib.util.spec_from_file_location(module_name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skalierungsläufe für die Komplexitätsschätzung")
+    parser.add_argument("--inputs", required=True, help="Ergebnis von arg_recorder.py")
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--module", required=True)
+    parser.add_argument("--import-path", required=True)
+    parser.add_argument("--function", action="append", required=True)
+    parser.add_argument("--budget", type=float, default=10.0, help="Sekunden je Funktion")
+    parser.add_argument("--output", required=True)
+    options = parser.parse_args()
+
+    data = {"functions": {}}
+
+    def write():
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    module = load_target(os.path.abspath(options.file), options.module, os.path.abspath(options.import_path))
+    with open(options.inputs, "rb") as f:
+        records = pickle.load(f)
+    try:
+        for name in options.function:
+            entry = {"status": "ok", "error": None, "input": None, "scaled": [], "grows": [], "points": []}
+            try:
+                function = module
+                for part in name.split("."):
+                    function = getattr(function, part)
+                cases = [_loads(case, module) for case in records.get(name, {}).get("cases", [])]
+                measure_function(function, cases, options.budget, entry)
+            except KeyboardInterrupt:
+                entry["status"] = "abgebrochen (Zeitlimit)"
+                data["functions"][name] = entry
+                break
+            except Exception:
+                entry["status"] = "Exception"
+                entry["error"] = traceback.format_exc(limit=3)
+            data["functions"][name] = entry
+            write()
+    finally:
+        write()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+# static_performance.py
+"""
+Statische Suche nach Performance-Mustern (Regel-Engine).
+
+Jedes Modul wird genau einmal geparst und in einem einzigen AST-Durchlauf besucht. Der
+Besucher führt Buch über den Kontext (umgebende Schleifen, Funktion, Importe, bekannte
+Listen/Strings pro Funktion); für jeden Knoten laufen die Regeln, die für seinen Typ
+registriert sind. Gefunden werden z. B. Listenverkettung und ``str +=`` in Schleifen,
+``x in liste`` in Schleifen, ``list.pop(0)``, Regex-Kompilierung in Schleifen,
+verschachtelte Schleifen über dieselbe Sammlung und blockierende I/O nacheinander in
+Schleifen.
+
+Regeln werden über ``register_rule`` eingehängt (auch aus eigenen Modulen, die über
+``PHOENIXAI_PERF_RULE_MODULES`` geladen werden, damit sie auch in den Worker-Prozessen
+vorhanden sind). Mehrere Dateien werden parallel in einem Prozesspool analysiert.
+
+Ein Fund ist ein dict (``rule``, ``title``, ``severity``, ``file``, ``line``, ``col``,
+``function``, ``message``, ``hint``, ``snippet``) und lässt sich als JSON speichern bzw.
+über ``findings_for_prompt`` an LLM-Transformationen weitergeben.
+
+Aufruf über die Kommandozeile:
+
+    python -m phoenixai.pipeline_analysis.static_performance <Datei oder Ordner> [--json funde.json]
+"""
+
+import argparse
+import ast
+import importlib
+import json
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+STATIC_PERF_WORKERS = int(os.getenv("PHOENIXAI_STATIC_PERF_WORKERS", str(os.cpu_count() or 1)))
+# Ab so vielen gleichen Methoden-Lookups (a.b.c()) in einer Schleife wird ein Hinweis erzeugt
+REPEATED_LOOKUP_MIN = 3
+SEVERITY_ORDER = {"warning": 0, "info": 1}
+SKIPPED_DIRS = {".git", ".venv", "venv", "__pycache__", ".idea", ".tox", "node_modules", ".mypy_cache"}
+
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+COMPREHENSION_NODES = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+REGEX_FUNCTIONS = {"re.compile", "re.match", "re.search", "re.fullmatch", "re.findall", "re.finditer",
+                   "re.sub", "re.subn", "re.split"}
+# Blockierende Aufrufe, die sich in Schleifen meist parallelisieren oder bündeln lassen
+# (ohne time.sleep: Wartezeiten in Schleifen sind meist gewollte Drosselung, Retry oder Backoff)
+BLOCKING_CALLS = {
+    "requests.get": "HTTP-Anfrage", "requests.post": "HTTP-Anfrage", "requests.put": "HTTP-Anfrage",
+    "requests.patch": "HTTP-Anfrage", "requests.delete": "HTTP-Anfrage", "requests.head": "HTTP-Anfrage",
+    "requests.request": "HTTP-Anfrage", "urllib.request.urlopen": "HTTP-Anfrage",
+    "httpx.get": "HTTP-Anfrage", "httpx.post": "HTTP-Anfrage",
+    "socket.create_connection": "Socket-Verbindung",
+    "subprocess.run": "Subprozess", "subprocess.call": "Subprozess", "subprocess.check_call": "Subprozess",
+    "subprocess.check_output": "Subprozess",
+}
+
+# Regeln in Registrierungsreihenfolge
+RULES: List[Dict] = []
+
+
+def register_rule(code: str, title: str, node_types: tuple, severity: str = "warning", hint: str = "",
+                  event: str = "enter") -> Callable:
+    """
+    Registriert eine Regel (Dekorator).
+
+    Die Regel wird als ``rule(node, context)`` für jeden Knoten der angegebenen Typen
+    aufgerufen – bei ``event="enter"`` beim Betreten, bei ``"leave"`` nach dem Besuch der
+    Kinder (z. B. um in ``context.loop`` Gesammeltes auszuwerten). Sie gibt None, eine
+    Meldung (Fund am Knoten) oder eine Liste von ``(Knoten, Meldung)`` zurück.
+
+    :param code: Regel-Code, z. B. ``"PERF101"`` (mehrere Regeln dürfen sich einen Code teilen).
+    :param severity: "warning" oder "info".
+    :param hint: Allgemeiner Verbesserungsvorschlag.
+    """
+    def decorator(rule):
+        RULES.append({"code": code, "title": title, "node_types": node_types, "severity": severity,
+                      "hint": hint, "event": event, "function": rule})
+        return rule
+    return decorator
+
+
+def _load_rule_plugins():
+    for module in os.getenv("PHOENIXAI_PERF_RULE_MODULES", "").split(","):
+        if module.strip():
+            importlib.import_module(module.strip())
+
+
+class RuleContext:
+    """Zustand des Durchlaufs, den die Regeln lesen können."""
+
+    def __init__(self, file_path: str, code: str):
+        self.file_path = file_path
+        self.lines = code.splitlines()
+        # lokaler Name -> voll qualifizierter Name (import re as r -> {"r": "re"})
+        self.imports: Dict[str, str] = {}
+        # Stapel der umgebenden Schleifen; jede Ebene ist ein dict mit "node" und Platz für Regeln
+        self.loops: List[Dict] = []
+        self.functions: List[str] = []
+        # Je Funktion: Name -> "list", "str", "set", "dict"
+        self.kinds: List[Dict[str, str]] = [{}]
+
+    @property
+    def in_loop(self) -> bool:
+        return bool(self.loops)
+
+    @property
+    def loop(self) -> Optional[Dict]:
+        return self.loops[-1] if self.loops else None
+
+    @property
+    def function(self) -> str:
+        return ".".join(self.functions) or "<module>"
+
+    def kind_of(self, node: ast.AST) -> Optional[str]:
+        """Bekannter Typ eines Namens (aus Zuweisungen und Annotationen der Funktion)."""
+        return self.kinds[-1].get(node.id) if isinstance(node, ast.Name) else None
+
+    def qualified_name(self, node: ast.AST) -> Optional[str]:
+        """Voll qualifizierter Name eines Aufrufziels, z. B. ``requests.get`` oder ``re.compile``."""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.insert(0, node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        parts.insert(0, self.imports.get(node.id, node.id))
+        return ".".join(parts)
+
+
+def record_import(imports: Dict[str, str], node: ast.AST):
+    """Trägt die Namen einer Import-Anweisung in imports ein (lokaler Name -> qualifizierter Name)."""
+    if isinstance(node, ast.Import):
+        for alias in node.names:
+            imports[alias.asname or alias.name.split(".")[0]] = alias.name if alias.asname else alias.name.split(".")[0]
+    elif isinstance(node, ast.ImportFrom) and node.module:
+        for alias in node.names:
+            imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
+
+def _value_kind(node: ast.AST) -> Optional[str]:
+    if isinstance(node, (ast.List, ast.ListComp)):
+        return "list"
+    if isinstance(node, (ast.Set, ast.SetComp)):
+        return "set"
+    if isinstance(node, (ast.Dict, ast.DictComp)):
+        return "dict"
+    if isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+        return "str"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("list", "set", "dict", "str"):
+        return node.func.id
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "sorted":
+        return "list"
+    return None
+
+
+def _annotation_kind(node: Optional[ast.AST]) -> Optional[str]:
+    if isinstance(node, ast.Subscript):
+        node = node.value
+    name = node.id if isinstance(node, ast.Name) else node.attr if isinstance(node, ast.Attribute) else None
+    return {"list": "list", "List": "list", "str": "str", "set": "set", "Set": "set",
+            "dict": "dict", "Dict": "dict"}.get(name)
+
+
+class PerformanceVisitor:
+    """Ein Durchlauf über den AST eines Moduls; ruft die passenden Regeln je Knoten auf."""
+
+    def __init__(self, context: RuleContext, rules: List[Dict]):
+        self.context = context
+        self.findings: List[Dict] = []
+        self.enter_rules: Dict[type, List[Dict]] = {}
+        self.leave_rules: Dict[type, List[Dict]] = {}
+        for rule in rules:
+            table = self.enter_rules if rule["event"] == "enter" else self.leave_rules
+            for node_type in rule["node_types"]:
+                table.setdefault(node_type, []).append(rule)
+
+    def _apply(self, table, node):
+        for rule in table.get(type(node), ()):
+            result = rule["function"](node, self.context)
+            if not result:
+                continue
+            for target, message in ([(node, result)] if isinstance(result, str) else result):
+                self.findings.append(self._finding(rule, target, message))
+
+    def _finding(self, rule: Dict, node: ast.AST, message: str) -> Dict:
+        line = getattr(node, "lineno", 0)
+        return {"rule": rule["code"], "title": rule["title"], "severity": rule["severity"],
+                "file": self.context.file_path, "line": line, "col": getattr(node, "col_offset", 0),
+                "function": self.context.function, "message": message, "hint": rule["hint"],
+                "snippet": self.context.lines[line - 1].strip() if 0 < line <= len(self.context.lines) else ""}
+
+    def visit(self, node: ast.AST):
+        self._apply(self.enter_rules, node)
+        self._track(node)
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            # Ziel und Iterable werden einmal ausgewertet, nur Rumpf läuft je Iteration
+            self.visit(node.target)
+            self.visit(node.iter)
+            self._in_loop(node, node.body)
+            self._visit_all(node.orelse)
+        elif isinstance(node, ast.While):
+            self._in_loop(node, [node.test, *node.body])
+            self._visit_all(node.orelse)
+        elif isinstance(node, COMPREHENSION_NODES):
+            generators = node.generators
+            self.visit(generators[0].iter)
+            parts = [generators[0].target, *generators[0].ifs]
+            for generator in generators[1:]:
+                parts += [generator.iter, generator.target, *generator.ifs]
+            parts += [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+            self._in_loop(node, parts)
+        elif isinstance(node, FUNCTION_NODES):
+            self._in_function(node)
+        elif isinstance(node, ast.ClassDef):
+            self._visit_all(node.decorator_list + node.bases)
+            self.context.functions.append(node.name)
+            self._visit_all(node.body)
+            self.context.functions.pop()
+        else:
+            self._visit_all(ast.iter_child_nodes(node))
+        if not isinstance(node, LOOP_NODES + COMPREHENSION_NODES):
+            self._apply(self.leave_rules, node)
+
+    def _visit_all(self, nodes: Iterable[ast.AST]):
+        for child in nodes:
+            self.visit(child)
+
+    def _in_loop(self, node: ast.AST, parts: List[ast.AST]):
+        self.context.loops.append({"node": node})
+        self._visit_all(parts)
+        # leave-Regeln einer Schleife sehen noch ihre eigene Ebene in context.loop
+        self._apply(self.leave_rules, node)
+        self.context.loops.pop()
+
+    def _in_function(self, node: ast.AST):
+        context = self.context
+        arguments = node.args
+        self._visit_all([*arguments.defaults, *(d for d in arguments.kw_defaults if d)])
+        if not isinstance(node, ast.Lambda):
+            self._visit_all(node.decorator_list)
+        # Der Rumpf einer Funktion läuft nicht je Iteration einer umgebenden Schleife
+        saved_loops, context.loops = context.loops, []
+        context.functions.append(getattr(node, "name", "<lambda>"))
+        kinds = {}
+        for argument in [*arguments.posonlyargs, *arguments.args, *arguments.kwonlyargs]:
+            kind = _annotation_kind(argument.annotation)
+            if kind:
+                kinds[argument.arg] = kind
+        context.kinds.append(kinds)
+        self._visit_all(node.body if isinstance(node.body, list) else [node.body])
+        context.kinds.pop()
+        context.functions.pop()
+        context.loops = saved_loops
+
+    def _track(self, node: ast.AST):
+        """Importe und bekannte Typen von Namen; läuft nach den Regeln des Knotens."""
+        context = self.context
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            record_import(context.imports, node)
+        elif isinstance(node, ast.Assign):
+            kind = _value_kind(node.value)
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    if kind:
+                        context.kinds[-1][target.id] = kind
+                    else:
+                        context.kinds[-1].pop(target.id, None)
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            kind = _annotation_kind(node.annotation) or (_value_kind(node.value) if node.value else None)
+            if kind:
+                context.kinds[-1][node.target.id] = kind
+
+
+# ===================== Regeln =====================
+
+def _same(a: ast.AST, b: ast.AST) -> bool:
+    # ast.dump unterscheidet Store/Load, der Quelltext nicht
+    return ast.unparse(a) == ast.unparse(b)
+
+
+def _source(node: ast.AST) -> str:
+    return ast.unparse(node)
+
+
+@register_rule("PERF101", "Listenverkettung in Schleife oder wachsendem Zustand", (ast.Assign,),
+               hint="list.append/extend ändern die Liste in-place (amortisiert O(1) statt O(n) je Verkettung).")
+def list_concatenation_in_loop(node, context):
+    if len(node.targets) != 1:
+        return None
+    target, value = node.targets[0], node.value
+    if not (isinstance(value, ast.BinOp) and isinstance(value.op, ast.Add) and _same(value.left, target)
+            and (isinstance(value.right, (ast.List, ast.ListComp)) or context.kind_of(target) == "list")):
+        return None
+    if context.in_loop:
+        return f"{_source(target)} = {_source(target)} + … kopiert die ganze Liste in jeder Iteration"
+    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self":
+        # Wachsender Objektzustand: n Aufrufe der Methode kosten zusammen O(n²)
+        return f"{_source(target)} = {_source(target)} + … kopiert die ganze Liste bei jedem Aufruf"
+    return None
+
+
+def _reset_in_loop(name: str, loop: ast.AST, line: int) -> bool:
+    """Ob name im Rumpf der Schleife vor line neu gesetzt wird (dann wächst der Wert nicht über Iterationen)."""
+    def names(node):
+        return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+    if isinstance(loop, (ast.For, ast.AsyncFor)) and name in names(loop.target):
+        return True
+    for statement in getattr(loop, "body", []):
+        for node in ast.walk(statement):
+            if isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None and node.lineno < line:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                if any(isinstance(t, ast.Name) and t.id == name for t in targets) and name not in names(node.value):
+                    return True
+    return False
+
+
+@register_rule("PERF102", "String-Verkettung in Schleife", (ast.AugAssign, ast.Assign),
+               hint="Teile in einer Liste sammeln und einmal mit ''.join(...) verbinden.")
+def string_concatenation_in_loop(node, context):
+    if not context.in_loop:
+        return None
+    if isinstance(node, ast.AugAssign):
+        target, op, added = node.target, node.op, node.value
+    elif len(node.targets) == 1 and isinstance(node.value, ast.BinOp) and _same(node.value.left, node.targets[0]):
+        target, op, added = node.targets[0], node.value.op, node.value.right
+    else:
+        return None
+    if not isinstance(op, ast.Add) or not isinstance(target, ast.Name):
+        return None
+    if _reset_in_loop(target.id, context.loop["node"], node.lineno):
+        # Jede Iteration beginnt mit einem neuen String: nicht quadratisch über die Schleife
+        return None
+    if context.kind_of(target) == "str" or _value_kind(added) == "str" or (
+            isinstance(added, ast.BinOp) and any(_value_kind(side) == "str" for side in (added.left, added.right))):
+        return f"{target.id} += … erzeugt in jeder Iteration einen neuen String (quadratisch in der Länge)"
+    return None
+
+
+@register_rule("PERF103", "Mitgliedschaftstest in Liste innerhalb einer Schleife", (ast.Compare,),
+               hint="Für wiederholte Tests ein set (bzw. dict) verwenden: O(1) statt O(n) je Test.")
+def list_membership_in_loop(node, context):
+    if not context.in_loop:
+        return None
+    for op, comparator in zip(node.ops, node.comparators):
+        if isinstance(op, (ast.In, ast.NotIn)) and (
+                isinstance(comparator, (ast.List, ast.ListComp)) and len(getattr(comparator, "elts", [None] * 9)) > 8
+                or context.kind_of(comparator) == "list"):
+            return f"'{_source(node)}' durchsucht die Liste linear in jeder Iteration"
+    return None
+
+
+@register_rule("PERF104", "len() in Schleifenbedingung", (ast.While,), severity="info",
+               hint="Ändert sich die Länge im Rumpf nicht, len() einmal vor der Schleife berechnen.")
+def len_in_while_condition(node, context):
+    for call in ast.walk(node.test):
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == "len":
+            return f"'{_source(node.test)}' ruft len() bei jeder Iteration erneut auf"
+    return None
+
+
+@register_rule("PERF105", "Wiederholte Attribut-Lookups in Schleife", (ast.Call,), severity="info")
+def count_method_lookups(node, context):
+    """Zählt a.b.c()-Aufrufe je Schleife; ausgewertet wird beim Verlassen der Schleife."""
+    if context.in_loop and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Attribute):
+        lookups = context.loop.setdefault("lookups", Counter())
+        lookups[_source(node.func)] += 1
+        context.loop.setdefault("first_lookup", {}).setdefault(_source(node.func), node)
+    return None
+
+
+@register_rule("PERF105", "Wiederholte Attribut-Lookups in Schleife", LOOP_NODES, severity="info",
+               hint="Die gebundene Methode vor der Schleife einer lokalen Variable zuweisen "
+                    "(z. B. append = self.items.append).", event="leave")
+def repeated_method_lookups(node, context):
+    counts = context.loop.get("lookups")
+    if not counts:
+        return None
+    first = context.loop["first_lookup"]
+    return [(first[chain], f"{chain} wird {count}× je Iteration nachgeschlagen")
+            for chain, count in counts.items() if count >= REPEATED_LOOKUP_MIN]
+
+
+@register_rule("PERF106", "list.pop(0) / list.insert(0, …)", (ast.Call,),
+               hint="collections.deque bietet popleft()/appendleft() in O(1).")
+def pop_front(node, context):
+    if not isinstance(node.func, ast.Attribute) or not node.args:
+        return None
+    first = node.args[0]
+    if not (isinstance(first, ast.Constant) and first.value == 0 and not isinstance(first.value, bool)):
+        return None
+    if (node.func.attr == "pop" and len(node.args) == 1) or (node.func.attr == "insert" and len(node.args) == 2):
+        owner = node.func.value
+        kind = context.kind_of(owner)
+        if context.qualified_name(owner) == "sys.path":
+            return None
+        # Einzelne Aufrufe außerhalb von Schleifen nur bei sicher bekannten Listen
+        if kind == "list" or (kind is None and context.in_loop):
+            return f"{_source(node)} verschiebt alle übrigen Elemente (O(n))"
+    return None
+
+
+@register_rule("PERF107", "Regulärer Ausdruck in Schleife", (ast.Call,),
+               hint="Das Muster einmal mit re.compile(...) vor der Schleife (oder auf Modulebene) übersetzen.")
+def regex_in_loop(node, context):
+    if not context.in_loop:
+        return None
+    name = context.qualified_name(node.func)
+    if name == "re.compile":
+        return f"{_source(node)} übersetzt das Muster in jeder Iteration"
+    if name in REGEX_FUNCTIONS and node.args and not isinstance(node.args[0], ast.Constant):
+        # Konstante Muster trifft der interne Cache von re; dynamische werden ggf. neu übersetzt
+        return f"{name}() mit dynamischem Muster in jeder Iteration"
+    return None
+
+
+def _collection(iterable: ast.AST) -> Optional[ast.AST]:
+    """Die durchlaufene Sammlung: x bei x, enumerate(x), range(len(x)) und sorted(x)."""
+    while isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.args and \
+            iterable.func.id in ("enumerate", "range", "len", "sorted", "reversed"):
+        iterable = iterable.args[0]
+    return iterable if isinstance(iterable, (ast.Name, ast.Attribute)) else None
+
+
+def _loop_iterables(node: ast.AST) -> List[ast.AST]:
+    if isinstance(node, COMPREHENSION_NODES):
+        return [generator.iter for generator in node.generators]
+    return [node.iter] if isinstance(node, (ast.For, ast.AsyncFor)) else []
+
+
+@register_rule("PERF108", "Verschachtelte Schleifen über dieselbe Sammlung", (ast.For, ast.AsyncFor) + COMPREHENSION_NODES,
+               hint="Quadratischer Aufwand: einen dict/set-Index aufbauen oder sortieren und einmal durchlaufen.")
+def nested_loops_same_collection(node, context):
+    iterables = _loop_iterables(node)
+    # Äußere Ebenen: umgebende Schleifen; bei Comprehensions zusätzlich die vorderen Generatoren
+    outer = [collection for loop in context.loops for collection in map(_collection, _loop_iterables(loop["node"]))]
+    for iterable in iterables:
+        collection = _collection(iterable)
+        if collection is not None and any(o is not None and _same(o, collection) for o in outer):
+            return f"Schleife über {_source(collection)} innerhalb einer Schleife über dieselbe Sammlung (O(n²))"
+        outer.append(collection)
+    return None
+
+
+@register_rule("PERF109", "Blockierende I/O nacheinander in Schleife", (ast.Call,),
+               hint="Unabhängige Aufrufe parallelisieren (concurrent.futures.ThreadPoolExecutor, asyncio) "
+                    "oder bündeln (executemany, Batch-API).")
+def blocking_io_in_loop(node, context):
+    if not context.in_loop:
+        return None
+    name = context.qualified_name(node.func)
+    if name in BLOCKING_CALLS:
+        return f"{BLOCKING_CALLS[name]} ({name}) wird in jeder Iteration blockierend nacheinander ausgeführt"
+    if isinstance(node.func, ast.Attribute) and node.func.attr == "execute":
+        return f"{_source(node.func)}() setzt je Iteration eine einzelne Datenbankabfrage ab"
+    return None
+
+
+# ===================== Ausführung =====================
+
+def analyze_source(code: str, file_path: str = "<string>", rules: List[Dict] = None) -> List[Dict]:
+    """Analysiert Quelltext; Syntaxfehler ergeben einen einzelnen Fund mit Regel ``SYNTAX``."""
+    try:
+        tree = ast.parse(code, filename=file_path)
+    except SyntaxError as e:
+        return [{"rule": "SYNTAX", "title": "Syntaxfehler", "severity": "info", "file": file_path,
+                 "line": e.lineno or 0, "col": e.offset or 0, "function": "<module>", "message": str(e.msg),
+                 "hint": "", "snippet": (e.text or "").strip()}]
+    visitor = PerformanceVisitor(RuleContext(file_path, code), RULES if rules is None else rules)
+    visitor.visit(tree)
+    return sorted(visitor.findings, key=lambda f: (f["line"], f["col"], f["rule"]))
+
+
+def analyze_file(file_path: str) -> List[Dict]:
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        return analyze_source(f.read(), file_path)
+
+
+def python_files(path: str) -> List[str]:
+    if os.path.isfile(path):
+        return [path] if path.endswith(".py") else []
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+        files += [os.path.join(root, name) for name in sorted(names) if name.endswith(".py")]
+    return files
+
+
+def _init_worker():
+    _load_rule_plugins()
+
+
+def analyze_paths(paths: Iterable[str], workers: int = STATIC_PERF_WORKERS) -> Dict[str, List[Dict]]:
+    """
+    Analysiert Dateien und Ordner (rekursiv) parallel in einem Prozesspool.
+
+    :return: Dateipfad -> Funde (nur Dateien mit Funden).
+    """
+    files = [file for path in paths for file in python_files(path)]
+    if len(files) < 2 or workers <= 1:
+        results = map(analyze_file, files)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files)), mp_context=multiprocessing.get_context(),
+                                 initializer=_init_worker) as pool:
+            results = list(pool.map(analyze_file, files, chunksize=8))
+    return {file: findings for file, findings in zip(files, results) if findings}
+
+
+def flatten(findings_by_file: Dict[str, List[Dict]]) -> List[Dict]:
+    """Alle Funde, Warnungen zuerst."""
+    findings = [f for file_findings in findings_by_file.values() for f in file_findings]
+    return sorted(findings, key=lambda f: (SEVERITY_ORDER.get(f["severity"], 9), f["file"], f["line"]))
+
+
+def findings_for_prompt(findings: List[Dict], start_line: int = None, end_line: int = None) -> str:
+    """
+    Funde als kompakte Liste für einen LLM-Prompt, optional auf einen Zeilenbereich
+    (z. B. eine Funktion) beschränkt. Leer, wenn es keine Funde gibt.
+    """
+    selected = [f for f in findings if f["rule"] != "SYNTAX"
+                and (start_line is None or start_line <= f["line"] <= (end_line or start_line))]
+    return "\n".join(f"- Zeile {f['line']} [{f['rule']}] {f['message']}. {f['hint']}".rstrip() for f in selected)
+
+
+def format_findings(findings_by_file: Dict[str, List[Dict]], base_dir: str = None) -> str:
+    """Markdown-Report: Übersicht je Regel und Funde je Datei."""
+    findings = flatten(findings_by_file)
+    lines = ["# Statische Performance-Analyse", ""]
+    if not findings:
+        return "\n".join(lines + ["Keine Funde.", ""])
+    lines += ["| Regel | Titel | Schwere | Funde |", "|---|---|---|---|"]
+    titles = {f["rule"]: (f["title"], f["severity"]) for f in findings}
+    for rule, count in sorted(Counter(f["rule"] for f in findings).items()):
+        lines.append(f"| {rule} | {titles[rule][0]} | {titles[rule][1]} | {count} |")
+    lines.append("")
+    for file, file_findings in sorted(findings_by_file.items()):
+        name = os.path.relpath(file, base_dir) if base_dir else file
+        lines += [f"## {name}", ""]
+        for f in file_findings:
+            lines.append(f"- **{f['rule']}** Zeile {f['line']} (`{f['function']}`): {f['message']}  ")
+            lines.append(f"  `{f['snippet']}`" + (f" – {f['hint']}" if f["hint"] else ""))
+        lines.append("")
+    return "\n".join(lines)
+
+
+_load_rule_plugins()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statische Suche nach Performance-Mustern")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--json", help="Funde zusätzlich als JSON speichern")
+    parser.add_argument("--workers", type=int, default=STATIC_PERF_WORKERS)
+    options = parser.parse_args()
+    findings = analyze_paths(options.paths, options.workers)
+    print(format_findings(findings, os.getcwd()))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(flatten(findings), f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,42 @@
 """This module provides functions to automatically generate and insert docstrings into Python code using an LLM."""
 
 import ast
-import astor
+import inspect
+import json
+import os
+from phoenixai.pipeline_transformation.docstring_compliance import (
+    MODULE_KEY,
+    find_noncompliant_docstrings,
+)
 from phoenixai.utils.base_prompt_handling import (
+    STRUCTURED_OUTPUT,
     call_llm,
+    call_structured_llm,
     read_file,
     save_code_to_file,
     trim_code,
 )
-
-
-def _generate_docstring_prompt(code_snippet):
-    """Generates a prompt for the LLM to create docstrings for a given Python code snippet.
-
-    Args:
-        code_snippet (str): The Python code snippet for which to generate docstrings.
-
-    Returns:
-        str: The formatted prompt for the LLM."""
-    return f"""
-You are tasked with creating **only docstrings** for the provided Python code.
-Do not execute or modify the code itself. Do not explain anything or provide additional commentary.
-
-**Your task:**
-
-1. **Create or update the module-level docstring** if it is missing or incomplete.
-   - The module-level docstring must summarize the purpose of the file and provide any necessary contextual information.
-   - It must always appear as the first statement in the file.
-
-2. For each function, method, or class in the file, generate or improve their docstrings, ensuring they follow the **Google-style format** as outlined below.
-
----
-
-### Google Docstring Guidelines:
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.cancellation import OperationCancelled
+from phoenixai.utils.span_patch import SourcePatch
+
+# Obergrenze für den Code-Anteil eines Batch-Prompts (Zeichen)
+DOCSTRING_BATCH_CHARS = int(os.getenv("PHOENIXAI_DOCSTRING_BATCH_CHARS", "12000"))
+
+# Strukturierte Antwort: nur die Docstrings je qualifiziertem Namen statt des ganzen Codes
+DOCSTRING_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "qualified_name": {"type": "string"},
+            "docstring": {"type": "string"},
+        },
+        "required": ["qualified_name", "docstring"],
+    },
+}
+
+GOOGLE_DOCSTRING_GUIDELINES = """### Google Docstring Guidelines:
 
 #### **Module Docstrings**
 - The module docstring summarizes the purpose of the file, including its contents and usage.
@@ -81,7 +85,32 @@ def example_function(param1: str, param2: int) -> bool:
     Raises:
         ValueError: If a certain error condition occurs.
     ""\"
-    pass
+    pass"""
+
+
+def _generate_docstring_prompt(code_snippet):
+    """Generates a prompt for the LLM to create docstrings for a given Python code snippet.
+
+    Args:
+        code_snippet (str): The Python code snippet for which to generate docstrings.
+
+    Returns:
+        str: The formatted prompt for the LLM."""
+    return f"""
+You are tasked with creating **only docstrings** for the provided Python code.
+Do not execute or modify the code itself. Do not explain anything or provide additional commentary.
+
+**Your task:**
+
+1. **Create or update the module-level docstring** if it is missing or incomplete.
+   - The module-level docstring must summarize the purpose of the file and provide any necessary contextual information.
+   - It must always appear as the first statement in the file.
+
+2. For each function, method, or class in the file, generate or improve their docstrings, ensuring they follow the **Google-style format** as outlined below.
+
+---
+
+{GOOGLE_DOCSTRING_GUIDELINES}
 
 ### Output Requirements:
 
@@ -95,61 +124,177 @@ Here is the Python code:
 """
 
 
-def _update_module_docstring(original_ast, llm_ast):
-    """Updates the module docstring in the AST, if present, or adds one if none exists.
+def _generate_incremental_docstring_prompt(skeleton, problems, structured=False):
+    """Generates a prompt for the LLM to write docstrings only for the listed definitions.
 
     Args:
+        skeleton (str): The reduced code containing only the definitions to document.
+        problems (dict): Qualified name -> list of problems found by the compliance pre-pass.
+        structured (bool): Ask for a JSON list of docstrings instead of the excerpt with docstrings.
+
+    Returns:
+        str: The formatted prompt for the LLM."""
+    listing = "\n".join(
+        f"- {name}{' (the module docstring)' if name == MODULE_KEY else ''}: {'; '.join(issues)}"
+        for name, issues in problems.items()
+    )
+    if structured:
+        output_requirements = f"""1. Respond with a JSON list containing one object per listed definition.
+2. `qualified_name` must be exactly the name from the list above (`{MODULE_KEY}` for the module docstring).
+3. `docstring` contains only the docstring text: no surrounding quotes, no indentation, no code.
+4. Ensure all docstrings adhere to the Google-style format and document every parameter of the signature."""
+    else:
+        output_requirements = """1. Do **not** modify the code itself—only add or replace the docstrings of the listed definitions.
+2. Keep the structure of the excerpt, including classes, signatures and `...` placeholders.
+3. Ensure all docstrings adhere to the Google-style format and document every parameter of the signature.
+4. Respond **only** with the excerpt and its docstrings, so that I can copy your entire output without any adaptations."""
+    return f"""
+You are tasked with creating **only docstrings** for some definitions of a Python file.
+Do not execute or modify the code itself. Do not explain anything or provide additional commentary.
+
+The code below is an excerpt of the file: it contains only the definitions that need new docstrings
+and the classes enclosing them. A body of `...` is a placeholder for code that was left out.
+
+**Write or fix the docstrings of exactly these definitions (the problems found are listed):**
+{listing}
+
+---
+
+{GOOGLE_DOCSTRING_GUIDELINES}
+
+### Output Requirements:
+
+{output_requirements}
+
+Here is the code excerpt:
+{skeleton}
+"""
+
+
+def _definition_header(index, entry):
+    """Returns the header lines of a definition (decorators and signature, without docstring and body).
+
+    Args:
+        index (CodeIndex): Index of the code.
+        entry (dict): The index entry of the definition.
+
+    Returns:
+        tuple: The header lines and the indentation of the body, or (all lines, None) for one-line definitions."""
+    node = entry["node"]
+    if node.body[0].lineno == node.lineno:
+        return index.lines[entry["start_line"] - 1 : entry["end_line"]], None
+    header = index.lines[entry["start_line"] - 1 : node.body[0].lineno - 1]
+    body_line = index.lines[node.body[0].lineno - 1]
+    return header, body_line[: len(body_line) - len(body_line.lstrip())]
+
+
+def _build_skeleton(index, targets):
+    """Builds the code excerpt for a batch: full source for target functions, headers and stubs around them.
+
+    Args:
+        index (CodeIndex): Index of the code.
+        targets (set): Qualified names (and ``MODULE_KEY``) that need docstrings.
+
+    Returns:
+        str: The excerpt, which is valid Python code."""
+    lines = []
+
+    def children(prefix):
+        return [
+            entry
+            for name, entry in index.entries.items()
+            if name.startswith(prefix) and "." not in name[len(prefix) :]
+        ]
+
+    def contains_target(name):
+        return any(target.startswith(name + ".") for target in targets)
+
+    def emit(entry, stub_others):
+        name = entry["qualified_name"]
+        relevant = name in targets or contains_target(name)
+        if not relevant and not stub_others:
+            return
+        header, body_indent = _definition_header(index, entry)
+        if (entry["kind"] != "class" and relevant) or body_indent is None:
+            lines.extend(index.lines[entry["start_line"] - 1 : entry["end_line"]])
+            return
+        lines.extend(header)
+        before = len(lines)
+        if entry["kind"] == "class":
+            for child in children(name + "."):
+                emit(child, stub_others=name in targets)
+        if len(lines) == before:
+            lines.append(f"{body_indent}...\n")
+
+    if MODULE_KEY in targets:
+        # Für den Modul-Docstring reichen die Imports und die Signaturen der obersten Ebene
+        for node in index.tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                lines.extend(index.lines[node.lineno - 1 : node.end_lineno])
+    for entry in children(""):
+        emit(entry, stub_others=MODULE_KEY in targets)
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+
+
+def _batch_targets(index, problems, max_chars=DOCSTRING_BATCH_CHARS):
+    """Groups the non-compliant definitions into batches whose excerpt stays below max_chars.
+
+    Args:
+        index (CodeIndex): Index of the code.
+        problems (dict): Qualified name -> list of problems.
+        max_chars (int): Upper bound for the excerpt of one batch.
+
+    Returns:
+        list: Tuples of (problems of the batch, excerpt)."""
+    batches = []
+    current = {}
+    for name, issues in problems.items():
+        candidate = {**current, name: issues}
+        if current and len(_build_skeleton(index, set(candidate))) > max_chars:
+            batches.append((current, _build_skeleton(index, set(current))))
+            candidate = {name: issues}
+        current = candidate
+    if current:
+        batches.append((current, _build_skeleton(index, set(current))))
+    return batches
+
+
+def _update_module_docstring(patch, original_ast, llm_ast):
+    """Updates the module docstring in the original code, if present, or adds one if none exists.
+
+    Args:
+        patch (SourcePatch): The patch collecting the changes to the original code.
         original_ast (ast.Module): The original AST of the code.
         llm_ast (ast.Module): The AST of the code generated by the LLM."""
-    llm_module_docstring = None
-    if (
-        isinstance(llm_ast.body[0], ast.Expr)
-        and isinstance(llm_ast.body[0].value, ast.Constant)
-        and isinstance(llm_ast.body[0].value.value, str)
-    ):
-        llm_module_docstring = llm_ast.body[0].value.value
+    llm_module_docstring = ast.get_docstring(llm_ast)
     if llm_module_docstring:
-        if (
-            isinstance(original_ast.body[0], ast.Expr)
-            and isinstance(original_ast.body[0].value, ast.Constant)
-            and isinstance(original_ast.body[0].value.value, str)
-        ):
-            original_ast.body[0] = ast.Expr(
-                value=ast.Constant(value=llm_module_docstring)
-            )
-        else:
-            original_ast.body.insert(
-                0, ast.Expr(value=ast.Constant(value=llm_module_docstring))
-            )
+        patch.set_docstring(original_ast, llm_module_docstring)
+
 
+def _update_function_and_class_docstrings(patch, original_index, llm_index, only=None):
+    """Updates the docstrings of functions, methods and classes, matched by their qualified names.
 
-def _update_function_and_class_docstrings(original_ast, llm_ast):
-    """Updates the docstrings of functions and classes in the AST."""
-    for node in original_ast.body:
-        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-            for llm_node in llm_ast.body:
-                if (
-                    isinstance(llm_node, (ast.FunctionDef, ast.ClassDef))
-                    and node.name == llm_node.name
-                ):
-                    if new_docstring := ast.get_docstring(llm_node):
-                        node.body = [
-                            ast.Expr(value=ast.Constant(value=new_docstring))
-                        ] + [
-                            n
-                            for n in node.body
-                            if not isinstance(n, ast.Expr)
-                            or not isinstance(n.value, ast.Constant)
-                            or not isinstance(n.value.value, str)
-                        ]
-
-
-def _insert_docstrings_to_code(original_code, llm_response):
+    Args:
+        patch (SourcePatch): The patch collecting the changes to the original code.
+        original_index (CodeIndex): Index of the original code.
+        llm_index (CodeIndex): Index of the code generated by the LLM.
+        only (set, optional): Restricts the update to these qualified names."""
+    for qualified_name, entry in original_index.entries.items():
+        if qualified_name not in llm_index or (only is not None and qualified_name not in only):
+            continue
+        if new_docstring := ast.get_docstring(llm_index.get(qualified_name)["node"]):
+            patch.set_docstring(entry["node"], new_docstring)
+
+
+def _insert_docstrings_to_code(original_code, llm_response, only=None):
     """Inserts the generated docstrings into the original code or replaces existing docstrings.
 
+    Only the docstring literals are changed; comments and formatting of the remaining code stay untouched.
+
     Args:
         original_code (str): The original Python code.
         llm_response (str): The LLM's response containing the generated docstrings.
+        only (set, optional): Restricts the update to these qualified names (``MODULE_KEY`` for the module).
 
     Returns:
         str: The updated code with the inserted docstrings.
@@ -158,45 +303,103 @@ def _insert_docstrings_to_code(original_code, llm_response):
         RuntimeError: If there's an error during docstring insertion or if the LLM response is invalid.
     """
     try:
-        original_ast = ast.parse(original_code)
+        original_index = CodeIndex(original_code)
         try:
-            llm_ast = ast.parse(llm_response)
+            llm_index = CodeIndex(llm_response)
         except SyntaxError as parse_error:
             raise RuntimeError(
                 f"[Docstring-Updater] Ungültiger LLM-Code: {llm_response}"
             ) from parse_error
-        _update_module_docstring(original_ast, llm_ast)
-        _update_function_and_class_docstrings(original_ast, llm_ast)
-        return astor.to_source(original_ast)
+        patch = SourcePatch(original_code)
+        if only is None or MODULE_KEY in only:
+            _update_module_docstring(patch, original_index.tree, llm_index.tree)
+        _update_function_and_class_docstrings(patch, original_index, llm_index, only)
+        return patch.apply()
     except Exception as e:
         raise RuntimeError(
             f"[Docstring-Updater] Fehler beim Einfügen der Docstrings: {e}"
         ) from e
 
 
-def process_file_for_docstrings(file_path, max_retries=5):
-    """Complete process for generating and inserting docstrings with retry logic.
+def _apply_docstring_updates(original_code, updates, only=None):
+    """Inserts docstrings from a structured LLM response (``{qualified_name, docstring}`` objects).
 
     Args:
-        file_path (str): Path to the Python file.
+        original_code (str): The original Python code.
+        updates (list): The parsed JSON response of the LLM.
+        only (set, optional): Restricts the update to these qualified names (``MODULE_KEY`` for the module).
+
+    Returns:
+        str: The updated code with the inserted docstrings.
+
+    Raises:
+        RuntimeError: If the response is not a list or contains no docstring for a requested definition.
+    """
+    if not isinstance(updates, list):
+        raise RuntimeError("[Docstring-Updater] Das LLM antwortete nicht mit einer Liste.")
+    index = CodeIndex(original_code)
+    patch = SourcePatch(original_code)
+    matched = 0
+    for update in updates:
+        if not isinstance(update, dict):
+            continue
+        name = update.get("qualified_name")
+        text = (update.get("docstring") or "").strip()
+        if not text or (only is not None and name not in only):
+            continue
+        node = index.tree if name == MODULE_KEY else index.entries.get(name, {}).get("node")
+        if node is None:
+            continue
+        # Manche Antworten enthalten trotz Anweisung die Anführungszeichen
+        for quotes in ('"""', "'''"):
+            if text.startswith(quotes) and text.endswith(quotes) and len(text) >= 6:
+                text = text[3:-3]
+        patch.set_docstring(node, inspect.cleandoc(text))
+        matched += 1
+    if not matched:
+        raise RuntimeError(
+            "[Docstring-Updater] Die Antwort enthält keine Docstrings für die angefragten Definitionen."
+        )
+    return patch.apply()
+
+
+def _request_docstrings(prompt, apply, max_retries, structured=False):
+    """Calls the LLM until its response can be applied, with retry logic.
+
+    Args:
+        prompt (str): The prompt for the LLM.
+        apply (Callable): Inserts the docstrings of the trimmed code (or, if structured, the parsed JSON list)
+            and returns the updated code.
         max_retries (int): Maximum number of retries for LLM calls.
+        structured (bool): Request a JSON response with ``DOCSTRING_SCHEMA``.
+
+    Returns:
+        str: The updated code.
 
     Raises:
         RuntimeError: If maximum retries are exceeded without successful docstring generation.
     """
-    original_code = read_file(file_path)
-    prompt = _generate_docstring_prompt(original_code)
     last_llm_response = None
     for attempt in range(1, max_retries + 1):
         try:
             print(f"[Docstring-Updater] Versuch {attempt}: LLM wird aufgerufen...")
+            if structured:
+                last_llm_response = call_structured_llm(prompt, DOCSTRING_SCHEMA)
+                if last_llm_response is None:
+                    print(f"[Docstring-Updater] [Fehler] Keine Antwort vom LLM bei Versuch {attempt}")
+                    continue
+                return apply(json.loads(last_llm_response))
             llm_response = call_llm(prompt)
             last_llm_response = llm_response
             trimmed_code = trim_code(llm_response)
             ast.parse(trimmed_code)
-            updated_code = _insert_docstrings_to_code(original_code, trimmed_code)
-            save_code_to_file(file_path, updated_code)
-            break
+            return apply(trimmed_code)
+        except OperationCancelled:
+            raise
+        except json.JSONDecodeError as e:
+            print(
+                f"[Docstring-Updater] [Fehler] Ungültiges JSON vom LLM bei Versuch {attempt}: {e}"
+            )
         except SyntaxError as e:
             print(
                 f"[Docstring-Updater] [Fehler] Syntaxfehler im LLM-Code bei Versuch {attempt}: {e}"
@@ -208,16 +411,66 @@ def process_file_for_docstrings(file_path, max_retries=5):
             print(
                 f"[Docstring-Updater] [Fehler] Unerwarteter Fehler bei Versuch {attempt}: {e}"
             )
-        if attempt == max_retries:
-            with open(
-                "[Docstring-Updater]  last_failed_llm_response.txt",
-                "w",
-                encoding="utf-8",
-            ) as f:
-                f.write(
-                    last_llm_response
-                    or "[Docstring-Updater]  Keine gültige Antwort erhalten."
-                )
-            raise RuntimeError(
-                "[Docstring-Updater]  Fehler: Maximale Anzahl an LLM-Aufrufen erreicht, ohne gültige Docstrings zu erhalten."
-            )
+    with open(
+        "[Docstring-Updater]  last_failed_llm_response.txt",
+        "w",
+        encoding="utf-8",
+    ) as f:
+        f.write(
+            last_llm_response or "[Docstring-Updater]  Keine gültige Antwort erhalten."
+        )
+    raise RuntimeError(
+        "[Docstring-Updater]  Fehler: Maximale Anzahl an LLM-Aufrufen erreicht, ohne gültige Docstrings zu erhalten."
+    )
+
+
+def process_file_for_docstrings(
+    file_path, max_retries=5, incremental=True, structured=STRUCTURED_OUTPUT
+):
+    """Complete process for generating and inserting docstrings with retry logic.
+
+    In incremental mode a pre-pass checks every docstring against the Google style; only missing or
+    non-compliant definitions are sent to the LLM, grouped into batches. With structured output the
+    LLM answers with the docstrings per qualified name only instead of echoing the code.
+
+    Args:
+        file_path (str): Path to the Python file.
+        max_retries (int): Maximum number of retries for LLM calls.
+        incremental (bool): Send only non-compliant definitions instead of the whole file.
+        structured (bool): Request JSON docstrings (incremental mode only).
+
+    Raises:
+        RuntimeError: If maximum retries are exceeded without successful docstring generation.
+    """
+    original_code = read_file(file_path)
+    if not incremental:
+        updated_code = _request_docstrings(
+            _generate_docstring_prompt(original_code),
+            lambda llm_code: _insert_docstrings_to_code(original_code, llm_code),
+            max_retries,
+        )
+        save_code_to_file(file_path, updated_code)
+        return
+    problems = find_noncompliant_docstrings(original_code)
+    if not problems:
+        print(f"[Docstring-Updater] Alle Docstrings sind bereits vollständig: {file_path}")
+        return
+    index = CodeIndex(original_code)
+    batches = _batch_targets(index, problems)
+    print(
+        f"[Docstring-Updater] {len(problems)} von {len(index.entries) + 1} Definitionen "
+        f"brauchen Docstrings ({len(batches)} Batch(es))."
+    )
+    updated_code = original_code
+    insert = _apply_docstring_updates if structured else _insert_docstrings_to_code
+    for batch, skeleton in batches:
+        prompt = _generate_incremental_docstring_prompt(skeleton, batch, structured)
+        updated_code = _request_docstrings(
+            prompt,
+            lambda response, code=updated_code, names=set(batch): insert(
+                code, response, only=names
+            ),
+            max_retries,
+            structured,
+        )
+    save_code_to_file(file_path, updated_code)
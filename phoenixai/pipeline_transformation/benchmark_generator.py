@@ -0,0 +1,357 @@
+"""Generates calibrated ``timeit`` micro-benchmarks for selected functions ("Generate Benchmarks").
+
+Whole-program timings are noisy and slow; a micro-benchmark times one function with
+realistic inputs in isolation. For every selected function this transform
+
+1. records the arguments of real calls while the project's tests run
+   (``PHOENIXAI_BENCHMARK_RECORD``, default ``pytest:tests`` when a ``tests`` folder
+   exists), keeping up to ``BENCHMARK_MAX_CASES`` distinct picklable argument sets,
+2. asks the LLM for representative literal inputs if nothing could be recorded,
+3. writes ``bench_<module>_<function>.py`` plus the pickled inputs into
+   ``<project>/<PHOENIXAI_BENCHMARK_DIR>`` (default ``benchmarks/phoenixai``) together
+   with ``run_benchmarks.py`` (a copy of ``benchmark_runner.py``, standard library only),
+4. calibrates the calls per timing round once with ``Timer.autorange`` and stores the
+   numbers in the benchmark file; cases whose call raises are dropped.
+
+The benchmarks are artifacts, not source changes: in a transactional pipeline run they
+are written to the original project rather than into the overlay view (which only carries
+Python files back) and are calibrated against the code on disk.
+
+The benchmarks run headlessly (``python benchmarks/phoenixai/run_benchmarks.py``) and are
+registered as a benchmark source of the performance gate (``utils.perf_gate``).
+Functions are selected in a dialog, or headlessly via ``PHOENIXAI_BENCHMARK_FUNCTIONS``
+(comma-separated qualified names).
+"""
+
+import ast
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import tkinter as tk
+from typing import Dict, List, Optional
+
+from phoenixai.pipeline_analysis.performance_analysis import (
+    module_location,
+    parse_entry_point,
+    record_arguments,
+)
+from phoenixai.pipeline_transformation.refactor import (
+    FunctionSelectionDialog,
+    extract_functions,
+)
+from phoenixai.utils.base_prompt_handling import call_llm, trim_code
+from phoenixai.utils.cancellation import (
+    DeadlineExceeded,
+    raise_if_cancelled,
+    run_subprocess,
+)
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.overlay import find_project_root, original_path
+from phoenixai.utils.perf_gate import register_benchmark_source
+from phoenixai.utils.tracing import span
+
+BENCHMARK_DIR = os.getenv(
+    "PHOENIXAI_BENCHMARK_DIR", os.path.join("benchmarks", "phoenixai")
+)
+BENCHMARK_MAX_CASES = int(os.getenv("PHOENIXAI_BENCHMARK_MAX_CASES", "5"))
+BENCHMARK_REPEAT = int(os.getenv("PHOENIXAI_BENCHMARK_REPEAT", "7"))
+# Time limit for recording (the whole test run) and for calibration, in seconds
+BENCHMARK_TIMEOUT = float(os.getenv("PHOENIXAI_BENCHMARK_TIMEOUT", "300"))
+BENCHMARK_LLM_CASES = 3
+RUNNER_TEMPLATE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark_runner.py"
+)
+RUNNER_NAME = "run_benchmarks.py"
+
+BENCHMARK_FILE_TEMPLATE = '''"""Micro-benchmark for {name} (generated by PhoenixAI).
+
+Inputs: {count} case(s), {origin}.
+Run: python {run_path}
+"""
+
+from run_benchmarks import Benchmark, main
+
+BENCHMARK = Benchmark(
+    name={name!r},
+    module={module!r},
+    qualname={qualname!r},
+    inputs={inputs!r},
+    import_path={import_path!r},
+    numbers={numbers!r},
+    repeat={repeat!r},
+)
+
+if __name__ == "__main__":
+    main([BENCHMARK])
+'''
+
+
+def select_benchmark_functions(file_path: str) -> List[str]:
+    """Qualified names of the functions to benchmark (environment variable or dialog)."""
+    configured = os.getenv("PHOENIXAI_BENCHMARK_FUNCTIONS")
+    if configured is not None:
+        return [name.strip() for name in configured.split(",") if name.strip()]
+    root = tk.Tk()
+    root.withdraw()
+    dialog = FunctionSelectionDialog(
+        root, extract_functions(file_path), title="Funktionen für Micro-Benchmarks"
+    )
+    selected = dialog.result if dialog.result is not None else []
+    root.destroy()
+    return selected
+
+
+def _record_entry(root: str) -> Optional[Dict]:
+    spec = os.getenv("PHOENIXAI_BENCHMARK_RECORD")
+    if spec is None and os.path.isdir(os.path.join(root, "tests")):
+        spec = "pytest:tests"
+    return parse_entry_point(spec, cwd=root) if spec else None
+
+
+def create_input_prompt(function_code: str, name: str, count: int) -> str:
+    """Creates the prompt asking for representative literal inputs of a function."""
+    return f"""
+Für die Funktion `{name}` soll ein Micro-Benchmark erstellt werden.
+
+```python
+{function_code}
+```
+
+### Aufgabe:
+Schlage {count} unterschiedliche, realistische Eingaben für typische Aufrufe vor.
+1. Antworte **nur** mit einem Python-Literal: einer Liste von Paaren `(args, kwargs)`,
+   wobei `args` ein Tupel der Positionsargumente und `kwargs` ein dict ist.
+2. Nur Literale (Zahlen, Strings, Bytes, Tupel, Listen, Dicts, Sets, None, True/False),
+   keine Funktionsaufrufe, keine Variablen.
+3. Die Eingaben sollen gültig sein (kein Aufruf darf eine Exception auslösen) und groß genug,
+   dass ein Aufruf messbar Arbeit macht.
+"""
+
+
+def propose_inputs(index: CodeIndex, name: str) -> List[bytes]:
+    """Asks the LLM for literal inputs; returns pickled ``(args, kwargs)`` tuples.
+
+    Methods need an instance, which a literal cannot provide; only static and class
+    methods are supported.
+    """
+    entry = index.get(name)
+    decorators = {
+        getattr(d, "id", getattr(d, "attr", None)) for d in entry["node"].decorator_list
+    }
+    if entry["kind"] == "method" and not decorators & {"staticmethod", "classmethod"}:
+        print(f"[Benchmark] {name}: no recorded calls, and methods need an instance.")
+        return []
+    response = trim_code(
+        call_llm(create_input_prompt(index.source(name), name, BENCHMARK_LLM_CASES))
+        or ""
+    )
+    try:
+        proposals = ast.literal_eval(response.strip())
+    except (ValueError, SyntaxError) as error:
+        print(f"[Benchmark] {name}: unusable LLM inputs ({error}).")
+        return []
+    cases = []
+    for proposal in proposals if isinstance(proposals, (list, tuple)) else []:
+        if (
+            isinstance(proposal, (list, tuple))
+            and len(proposal) == 2
+            and isinstance(proposal[1], dict)
+        ):
+            cases.append(pickle.dumps((tuple(proposal[0]), proposal[1])))
+    return cases[:BENCHMARK_MAX_CASES]
+
+
+def _write_benchmark(directory: str, settings: Dict) -> str:
+    with open(os.path.join(directory, settings["inputs"]), "wb") as f:
+        pickle.dump(settings["cases"], f)
+    path = os.path.join(directory, settings["file_name"])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            BENCHMARK_FILE_TEMPLATE.format(count=len(settings["cases"]), **settings)
+        )
+    return path
+
+
+def calibrate(path: str, root: str) -> Optional[List[Dict]]:
+    """Runs a benchmark file with ``--calibrate``; None if the file itself fails."""
+    with tempfile.TemporaryDirectory(prefix="phoenixai_bench_") as directory:
+        output = os.path.join(directory, "calibration.json")
+        stderr = ""
+        try:
+            completed = run_subprocess(
+                [sys.executable, path, "--calibrate", output],
+                timeout=BENCHMARK_TIMEOUT,
+                capture_output=True,
+                text=True,
+                stdin=subprocess.DEVNULL,
+                cwd=root,
+            )
+            stderr = completed.stderr
+        except DeadlineExceeded:
+            raise_if_cancelled()
+        if not os.path.isfile(output):
+            print(f"[Benchmark] Calibration failed: {stderr.strip()[-300:]}")
+            return None
+        with open(output, "r", encoding="utf-8") as f:
+            return next(iter(json.load(f).values()), [])
+
+
+def generate_benchmark(
+    root: str, file_path: str, name: str, cases: List[bytes], origin: str
+) -> Optional[str]:
+    """Writes and calibrates the benchmark of one function.
+
+    Args:
+        root (str): The project root.
+        file_path (str): The file defining the function.
+        name (str): The qualified name of the function.
+        cases (List[bytes]): Pickled ``(args, kwargs)`` tuples.
+        origin (str): Where the inputs come from (for the file's docstring).
+
+    Returns:
+        Optional[str]: Path of the benchmark file, or None if no case survived calibration.
+    """
+    directory = os.path.join(root, BENCHMARK_DIR)
+    import_dir, module = module_location(file_path)
+    safe_name = f"{module}_{name}".replace(".", "_")
+    settings = {
+        "name": f"{module}.{name}",
+        "module": module,
+        "qualname": name,
+        "file_name": f"bench_{safe_name}.py",
+        "inputs": f"inputs/{module}.{name}.pickle",
+        "import_path": os.path.relpath(import_dir, directory).replace(os.sep, "/"),
+        "run_path": os.path.join(BENCHMARK_DIR, f"bench_{safe_name}.py").replace(
+            os.sep, "/"
+        ),
+        "numbers": [],
+        "repeat": BENCHMARK_REPEAT,
+        "cases": cases,
+        "origin": origin,
+    }
+    path = _write_benchmark(directory, settings)
+    with span("calibrate benchmark", "profiling", function=name):
+        calibration = calibrate(path, root) or []
+    for case, result in zip(cases, calibration):
+        if "error" in result:
+            print(f"[Benchmark] {name}: dropped input ({result['error']})")
+    kept = [
+        (case, result["number"])
+        for case, result in zip(cases, calibration)
+        if "number" in result
+    ]
+    if not kept:
+        os.remove(path)
+        os.remove(os.path.join(directory, settings["inputs"]))
+        return None
+    settings["cases"] = [case for case, _ in kept]
+    settings["numbers"] = [number for _, number in kept]
+    return _write_benchmark(directory, settings)
+
+
+def generate_benchmarks(
+    file_path: str, functions: Optional[List[str]] = None
+) -> List[Dict]:
+    """Generates micro-benchmarks for the selected functions of a file.
+
+    Args:
+        file_path (str): The Python file.
+        functions (Optional[List[str]]): Qualified names; selected interactively if None.
+
+    Returns:
+        List[Dict]: Per function ``name``, ``origin`` of the inputs and ``path`` of the
+        benchmark file (None if none could be created).
+    """
+    functions = (
+        functions if functions is not None else select_benchmark_functions(file_path)
+    )
+    if not functions:
+        print("[Benchmark] No functions selected.")
+        return []
+    index = CodeIndex.from_file(file_path)
+    unknown = [name for name in functions if name not in index]
+    if unknown:
+        print(f"[Benchmark] Unknown functions ignored: {', '.join(unknown)}")
+    functions = [name for name in functions if name in index]
+
+    root = find_project_root(file_path)
+    entry = _record_entry(root)
+    recorded: Dict[str, List[bytes]] = {}
+    if entry is None:
+        print(
+            "[Benchmark] No tests to record arguments from – asking the LLM for inputs."
+        )
+    elif functions:
+        print(f"[Benchmark] Recording arguments while running {entry['label']}")
+        with span("record arguments", "subprocess", path=entry["label"]):
+            records = record_arguments(
+                file_path,
+                [index.get(name) for name in functions],
+                entry,
+                BENCHMARK_MAX_CASES,
+                BENCHMARK_TIMEOUT,
+            )
+        for name, record in records.items():
+            print(
+                f"[Benchmark] {name}: {record['calls']} calls recorded, "
+                f"{len(record['cases'])} distinct input(s), {record['skipped']} not picklable"
+            )
+            recorded[name] = record["cases"]
+
+    # Written next to the original file, also when running in an overlay view
+    target_file = original_path(file_path)
+    target_root = find_project_root(target_file)
+    directory = os.path.join(target_root, BENCHMARK_DIR)
+    os.makedirs(os.path.join(directory, "inputs"), exist_ok=True)
+    shutil.copyfile(RUNNER_TEMPLATE, os.path.join(directory, RUNNER_NAME))
+    summary = []
+    for name in functions:
+        cases = recorded.get(name)
+        origin = f"recorded while running {entry['label']}" if cases else None
+        if not cases:
+            cases = propose_inputs(index, name)
+            origin = "proposed by the LLM"
+        path = (
+            generate_benchmark(target_root, target_file, name, cases, origin)
+            if cases
+            else None
+        )
+        summary.append({"name": name, "origin": origin if path else None, "path": path})
+
+    print("[Benchmark] Summary:")
+    for item in summary:
+        result = (
+            os.path.relpath(item["path"], target_root) + f" ({item['origin']})"
+            if item["path"]
+            else "no usable inputs"
+        )
+        print(f"  {item['name']:<40} {result}")
+    if any(item["path"] for item in summary):
+        print(
+            f"[Benchmark] Run: python {os.path.join(BENCHMARK_DIR, RUNNER_NAME)} (in {target_root})"
+        )
+    return summary
+
+
+@register_benchmark_source
+def generated_benchmarks(root: str, file_path: str) -> List[Dict]:
+    """Benchmark source for the performance gate: all generated micro-benchmarks."""
+    if not os.path.isfile(os.path.join(root, BENCHMARK_DIR, RUNNER_NAME)):
+        return []
+    # Relative path: with the overlay, the gate runs in the project's view
+    return [
+        {
+            "name": "micro-benchmarks",
+            "kind": "json",
+            "command": [
+                sys.executable,
+                os.path.join(BENCHMARK_DIR, RUNNER_NAME),
+                "--json",
+                "{json}",
+            ],
+        }
+    ]
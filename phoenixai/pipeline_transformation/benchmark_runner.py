@@ -0,0 +1,175 @@
+"""Runner for the micro-benchmarks generated by "Generate Benchmarks".
+
+``benchmark_generator`` copies this file into the target project as
+``<benchmark dir>/run_benchmarks.py``; it must therefore only use the standard library.
+Every generated ``bench_*.py`` next to it defines one ``BENCHMARK`` and imports this
+module, so both run headlessly::
+
+    python benchmarks/phoenixai/run_benchmarks.py               # all benchmarks
+    python benchmarks/phoenixai/bench_work_dedupe.py            # a single one
+    python benchmarks/phoenixai/run_benchmarks.py --json out.json
+
+Each input case is timed with ``timeit``: ``repeat`` rounds of ``number`` calls, where
+``number`` was calibrated once with ``Timer.autorange`` and is stored in the benchmark
+file, so that later runs are comparable. Every round starts from a fresh copy of the
+recorded arguments (unpickled in the timer setup); calls within a round share them.
+The JSON output uses the layout of pytest-benchmark (times per call in seconds).
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import pickle
+import runpy
+import statistics
+import sys
+import timeit
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REPEAT = 7
+
+
+class Benchmark:
+    """One function with its recorded input cases."""
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        qualname: str,
+        inputs: str,
+        import_path: str = ".",
+        numbers: Optional[List[int]] = None,
+        repeat: int = DEFAULT_REPEAT,
+    ):
+        """
+        Args:
+            name (str): Display name, e.g. ``work.dedupe``.
+            module (str): Importable module name of the function.
+            qualname (str): Qualified name within the module, e.g. ``Cache.lookup``.
+            inputs (str): Pickle file with a list of pickled ``(args, kwargs)`` tuples,
+                relative to the benchmark directory.
+            import_path (str): Directory added to ``sys.path``, relative to the
+                benchmark directory.
+            numbers (Optional[List[int]]): Calibrated calls per round for each case.
+            repeat (int): Number of timed rounds per case.
+        """
+        self.name = name
+        self.module = module
+        self.qualname = qualname
+        self.inputs = inputs
+        self.import_path = import_path
+        self.numbers = numbers or []
+        self.repeat = repeat
+
+    def load(self):
+        """Imports the function and reads the cases; returns ``(function, cases)``."""
+        path = os.path.normpath(os.path.join(BENCHMARK_DIR, self.import_path))
+        if path not in sys.path:
+            sys.path.insert(0, path)
+        target = importlib.import_module(self.module)
+        for part in self.qualname.split("."):
+            target = getattr(target, part)
+        with open(os.path.join(BENCHMARK_DIR, self.inputs), "rb") as f:
+            cases = pickle.load(f)
+        return target, cases
+
+    @staticmethod
+    def _timer(function, case: bytes) -> timeit.Timer:
+        return timeit.Timer(
+            "function(*args, **kwargs)",
+            setup="args, kwargs = loads(case)",
+            globals={"function": function, "loads": pickle.loads, "case": case},
+        )
+
+    def calibrate(self) -> List[Dict]:
+        """Finds ``number`` per case with ``Timer.autorange`` (rounds of at least 0.2 s).
+
+        Returns:
+            List[Dict]: ``number`` per case, or ``error`` if the call raised.
+        """
+        function, cases = self.load()
+        result = []
+        for case in cases:
+            try:
+                number, _ = self._timer(function, case).autorange()
+                result.append({"number": number})
+            except Exception as error:  # the case is dropped by the generator
+                result.append({"error": f"{type(error).__name__}: {error}"})
+        return result
+
+    def measure(self) -> List[Dict]:
+        """Times every case; returns entries in pytest-benchmark layout."""
+        function, cases = self.load()
+        entries = []
+        for index, case in enumerate(cases):
+            timer = self._timer(function, case)
+            number = (
+                self.numbers[index] if index < len(self.numbers) else None
+            ) or timer.autorange()[0]
+            per_call = [t / number for t in timer.repeat(self.repeat, number)]
+            entries.append(
+                {
+                    "name": f"{self.name}[{index}]",
+                    "stats": {
+                        "mean": statistics.fmean(per_call),
+                        "stddev": (
+                            statistics.stdev(per_call) if len(per_call) > 1 else 0.0
+                        ),
+                        "min": min(per_call),
+                        "max": max(per_call),
+                        "rounds": len(per_call),
+                        "iterations": number,
+                    },
+                }
+            )
+        return entries
+
+
+def discover(directory: str = BENCHMARK_DIR) -> List[Benchmark]:
+    """Collects ``BENCHMARK`` from every ``bench_*.py`` in directory."""
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(directory, "bench_*.py"))):
+        # Run as a script, this module is __main__ while the benchmark files import
+        # it as run_benchmarks, so their Benchmark class is a different object
+        benchmark = runpy.run_path(path).get("BENCHMARK")
+        if benchmark is not None:
+            benchmarks.append(benchmark)
+    return benchmarks
+
+
+def main(benchmarks: Optional[List[Benchmark]] = None, argv=None):
+    parser = argparse.ArgumentParser(description="Run generated micro-benchmarks")
+    parser.add_argument("--json", help="write results in pytest-benchmark layout")
+    parser.add_argument(
+        "--calibrate",
+        metavar="JSON",
+        help="write calls per round for each case to JSON instead of measuring",
+    )
+    options = parser.parse_args(argv)
+    if benchmarks is None:
+        benchmarks = discover()
+
+    if options.calibrate:
+        with open(options.calibrate, "w", encoding="utf-8") as f:
+            json.dump({b.name: b.calibrate() for b in benchmarks}, f)
+        return
+    entries = []
+    for benchmark in benchmarks:
+        entries.extend(benchmark.measure())
+    for entry in entries:
+        stats = entry["stats"]
+        print(
+            f"{entry['name']:<50} {stats['mean'] * 1e6:>12.3f} us "
+            f"± {stats['stddev'] * 1e6:.3f} us  ({stats['rounds']} x {stats['iterations']})"
+        )
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmarks": entries}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Rewrites independent blocking I/O to bounded concurrency ("Parallelize I/O").
+
+``concurrency_analysis`` finds loops, comprehensions and statement sequences whose
+blocking calls (HTTP, subprocesses, files) are independent of each other. For every
+function containing such a candidate, ``MultiChainComparison`` asks the LLM for a version
+that runs them with ``concurrent.futures.ThreadPoolExecutor`` (``asyncio.gather`` with a
+semaphore in ``async def``), limited to ``PHOENIXAI_CONCURRENCY_WORKERS`` workers.
+
+A candidate is accepted only if
+
+1. it is valid Python and the rewritten function actually bounds its concurrency
+   (``max_workers=`` on the executor or an ``asyncio.Semaphore``, each with a constant
+   of at most ``PHOENIXAI_CONCURRENCY_WORKERS``), and
+2. the project's tests pass with it (``PHOENIXAI_OPTIMIZE_TESTS``, default
+   ``pytest:tests`` when a ``tests`` folder exists).
+
+Output comparisons are not used, since network-bound targets are rarely deterministic;
+without passing tests on the original code nothing is rewritten. Candidates are written to
+disk only while the tests run, accepted functions are saved once at the end.
+"""
+
+import ast
+import functools
+from typing import Dict, List, Optional, Tuple
+
+from phoenixai.pipeline_analysis.concurrency_analysis import (
+    CONCURRENCY_MAX_WORKERS,
+    find_opportunities,
+    opportunities_for_prompt,
+)
+from phoenixai.pipeline_transformation.multi_chain_comparison import (
+    MultiChainComparison,
+)
+from phoenixai.pipeline_transformation.optimize_hotspots import (
+    resolve_entries,
+    tests_pass,
+)
+from phoenixai.utils.base_prompt_handling import call_llm, save_code_to_file, trim_code
+from phoenixai.utils.code_index import CodeIndex
+
+CONCURRENCY_TEMPERATURES = [0.2, 0.5]
+EXECUTOR_NAMES = {"ThreadPoolExecutor", "ProcessPoolExecutor"}
+SEMAPHORE_NAMES = {"Semaphore", "BoundedSemaphore"}
+
+
+def create_concurrency_prompt(
+    function_code: str, opportunities: List[Dict], imports: str, workers: int
+) -> str:
+    """Creates the prompt asking for a concurrent version of a function.
+
+    Args:
+        function_code (str): The source of the function.
+        opportunities (List[Dict]): Its independent candidates (see ``find_opportunities``).
+        imports (str): The import statements of the module.
+        workers (int): Maximum number of concurrent calls.
+
+    Returns:
+        str: The prompt.
+    """
+    if any(o["async"] for o in opportunities):
+        technique = (
+            f"asyncio.gather mit einem asyncio.Semaphore({workers}); blockierende Aufrufe "
+            f"über asyncio.to_thread"
+        )
+    else:
+        technique = f"concurrent.futures.ThreadPoolExecutor(max_workers={workers})"
+    return f"""
+Die folgende Funktion führt unabhängige blockierende Aufrufe (Netzwerk, Subprozesse, Dateien)
+nacheinander aus. Laut statischer Analyse sind diese Stellen voneinander unabhängig
+(Zeilen im Modul):
+{opportunities_for_prompt(opportunities)}
+
+Imports des Moduls (nur als Kontext):
+```python
+{imports}
+```
+
+Funktion:
+```python
+{function_code}
+```
+
+### Aufgabe:
+Schreibe die Funktion so um, dass diese Aufrufe nebenläufig laufen, mit {technique}.
+1. Die Nebenläufigkeit ist begrenzt (höchstens {workers} gleichzeitig); keine unbegrenzten Threads.
+2. Signatur, Rückgabewerte und deren Reihenfolge, Exceptions, Seiteneffekte und Ausgaben bleiben
+   identisch: Ergebnisse in der ursprünglichen Reihenfolge zusammensetzen (z. B. executor.map),
+   Ausgaben und Änderungen an gemeinsamen Objekten erst danach im aufrufenden Thread.
+3. Nur die Aufrufe selbst laufen in den Threads; Reduktionen (Summen, append, dict-Einträge) nicht.
+4. Keine neuen Abhängigkeiten; benötigte Imports der Standardbibliothek dürfen innerhalb der Funktion stehen.
+5. Gib **nur** den Code der Funktion zurück (samt Dekoratoren, ohne Einrückung), ohne Erklärungen.
+"""
+
+
+def _called_name(node: ast.Call) -> str:
+    func = node.func
+    return func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+
+
+def _bounded(node: ast.Call, keyword: str, workers: int) -> bool:
+    """Whether the first argument (or ``keyword``) is a constant int between 1 and ``workers``."""
+    values = node.args[:1] + [k.value for k in node.keywords if k.arg == keyword]
+    return (
+        len(values) == 1
+        and isinstance(values[0], ast.Constant)
+        and type(values[0].value) is int
+        and 1 <= values[0].value <= workers
+    )
+
+
+def concurrency_problem(function_code: str, workers: int) -> Optional[str]:
+    """Checks that a rewritten function bounds its concurrency.
+
+    Expressions like ``max_workers=None`` or ``len(items)`` are rejected: only a constant
+    limit can be checked against ``workers``.
+
+    Args:
+        function_code (str): The source of the rewritten function.
+        workers (int): Maximum number of concurrent calls.
+
+    Returns:
+        Optional[str]: Why the function is rejected, or None if it is bounded.
+    """
+    calls = [
+        node
+        for node in ast.walk(ast.parse(function_code))
+        if isinstance(node, ast.Call)
+    ]
+    executors = [node for node in calls if _called_name(node) in EXECUTOR_NAMES]
+    semaphores = [node for node in calls if _called_name(node) in SEMAPHORE_NAMES]
+    if not all(_bounded(node, "max_workers", workers) for node in executors):
+        return f"executor without constant max_workers <= {workers}"
+    if not all(_bounded(node, "value", workers) for node in semaphores):
+        return f"semaphore without constant limit <= {workers}"
+    if executors or semaphores:
+        return None
+    return "no ThreadPoolExecutor or asyncio.Semaphore"
+
+
+def _candidate_code(code: str, name: str, response: str, workers: int) -> Optional[str]:
+    """Splices the LLM response into the module; None if it is unusable."""
+    function_code = trim_code(response or "")
+    if not function_code.strip():
+        return None
+    try:
+        problem = concurrency_problem(function_code, workers)
+        new_code = CodeIndex(code).splice({name: function_code})
+        ast.parse(new_code)
+    except (SyntaxError, ValueError) as error:
+        problem = str(error)
+    if problem:
+        print(f"[Concurrency] Discarded candidate for {name}: {problem}")
+        return None
+    return new_code
+
+
+def _write(file_path: str, code: str):
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(code)
+
+
+def compare_test_results(
+    context: Dict, results: List[Optional[str]], temperatures: List[float]
+) -> Tuple[int, Optional[str]]:
+    """Comparison function for ``MultiChainComparison``: the first candidate whose tests pass.
+
+    Candidates are tried from the lowest temperature up; the file is restored afterwards.
+
+    Args:
+        context (Dict): ``file_path``, ``code`` (current code) and ``test_entry``.
+        results (List[Optional[str]]): Complete module code per chain (None if unusable).
+        temperatures (List[float]): The temperatures of the chains.
+
+    Returns:
+        Tuple[int, Optional[str]]: Index and code of the accepted candidate; the code is
+        None if no candidate passed.
+    """
+    order = sorted(range(len(results)), key=lambda i: temperatures[i])
+    for index in order:
+        if results[index] is None:
+            continue
+        try:
+            _write(context["file_path"], results[index])
+            passed = tests_pass(context["test_entry"])
+        finally:
+            _write(context["file_path"], context["code"])
+        print(
+            f"[Concurrency] T={temperatures[index]}: "
+            f"{'tests pass' if passed else 'tests fail'}"
+        )
+        if passed:
+            return index, results[index]
+    return 0, None
+
+
+def parallelize_function(
+    context: Dict, name: str, opportunities: List[Dict]
+) -> Optional[str]:
+    """Asks the LLM for a concurrent version of one function and returns the accepted module code.
+
+    Args:
+        context (Dict): See ``compare_test_results``.
+        name (str): Qualified name of the function.
+        opportunities (List[Dict]): Its independent candidates.
+
+    Returns:
+        Optional[str]: The new module code, or None if no candidate was accepted.
+    """
+    code = context["code"]
+    imports = "\n".join(
+        ast.get_source_segment(code, node)
+        for node in ast.parse(code).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+    prompt = create_concurrency_prompt(
+        CodeIndex(code).source(name).strip(),
+        opportunities,
+        imports,
+        context["workers"],
+    )
+    multi_chain = MultiChainComparison(prompt, CONCURRENCY_TEMPERATURES, "tests")
+    multi_chain.register_comparison_function(
+        "tests", functools.partial(compare_test_results, context)
+    )
+    return multi_chain.run(
+        lambda chain_prompt, temperature: _candidate_code(
+            code, name, call_llm(chain_prompt, temperature), context["workers"]
+        )
+    )
+
+
+def parallelize_io(
+    file_path: str, workers: int = CONCURRENCY_MAX_WORKERS
+) -> List[Dict]:
+    """Rewrites the functions of a file whose blocking calls can run concurrently.
+
+    Args:
+        file_path (str): The Python file to rewrite.
+        workers (int): Maximum number of concurrent calls in the rewritten code.
+
+    Returns:
+        List[Dict]: Per function ``name``, ``opportunities`` (count) and ``accepted``.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        original = f.read()
+    found = find_opportunities(original)["opportunities"]
+    by_function: Dict[str, List[Dict]] = {}
+    for opportunity in found:
+        if opportunity["independent"]:
+            by_function.setdefault(opportunity["function"], []).append(opportunity)
+    if "<module>" in by_function:
+        print(
+            "[Concurrency] Skipping module-level code – move it into a function to rewrite it."
+        )
+        del by_function["<module>"]
+    if not by_function:
+        print("[Concurrency] No independent blocking calls found.")
+        return []
+
+    _, test_entry = resolve_entries(file_path)
+    if not tests_pass(test_entry):
+        print(
+            "[Concurrency] No passing tests on the original – the rewrite cannot be verified."
+        )
+        return []
+    context = {
+        "file_path": file_path,
+        "code": original,
+        "test_entry": test_entry,
+        "workers": workers,
+    }
+    summary = []
+    for name, opportunities in by_function.items():
+        print(f"[Concurrency] {name}: {len(opportunities)} candidate(s)")
+        new_code = parallelize_function(context, name, opportunities)
+        if new_code is not None:
+            context["code"] = new_code
+        summary.append(
+            {
+                "name": name,
+                "opportunities": len(opportunities),
+                "accepted": new_code is not None,
+            }
+        )
+
+    if context["code"] != original:
+        save_code_to_file(file_path, context["code"])
+    print("[Concurrency] Summary:")
+    for item in summary:
+        result = "rewritten" if item["accepted"] else "unchanged"
+        print(f"  {item['name']:<40} {item['opportunities']:>3} candidate(s)  {result}")
+    return summary
@@ -0,0 +1,201 @@
+"""This module checks module, class and function docstrings against the Google style.
+
+A docstring is compliant if it exists and its sections match the signature:
+every parameter is listed under ``Args:`` (and nothing else), functions returning a
+value have a ``Returns:`` section, generators a ``Yields:`` section and functions
+raising exceptions themselves a ``Raises:`` section. Only non-compliant nodes need to
+be sent to the LLM.
+"""
+
+import ast
+import re
+
+from phoenixai.utils.code_index import FUNCTION_NODES, CodeIndex
+
+MODULE_KEY = "<module>"
+
+SECTION_PATTERN = re.compile(
+    r"^\s*(Args|Arguments|Parameters|Returns|Return|Yields|Yield|Raises|Attributes|"
+    r"Examples?|Notes?|Todo|See Also|Warnings?|References)\s*:\s*$"
+)
+ARG_ENTRY_PATTERN = re.compile(r"^\s*\*{0,2}(\w+)\s*(\([^)]*\))?\s*:")
+SECTION_ALIASES = {
+    "Arguments": "Args",
+    "Parameters": "Args",
+    "Return": "Returns",
+    "Yield": "Yields",
+}
+
+
+def parse_sections(docstring):
+    """Splits a Google-style docstring into its sections.
+
+    Args:
+        docstring (str): The cleaned docstring (as returned by ``ast.get_docstring``).
+
+    Returns:
+        dict: Section name (e.g. ``Args``) -> list of the section's lines."""
+    sections = {}
+    current = None
+    for line in docstring.splitlines():
+        match = SECTION_PATTERN.match(line)
+        if match:
+            name = match.group(1)
+            current = sections.setdefault(SECTION_ALIASES.get(name, name), [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def documented_args(section_lines):
+    """Returns the parameter names listed in an ``Args:`` section.
+
+    Only lines at the indentation of the first entry count; deeper lines continue a description.
+
+    Args:
+        section_lines (list): The lines of the section.
+
+    Returns:
+        list: The documented parameter names."""
+    lines = [line for line in section_lines if line.strip()]
+    if not lines:
+        return []
+    entry_indent = len(lines[0]) - len(lines[0].lstrip())
+    names = []
+    for line in lines:
+        if len(line) - len(line.lstrip()) != entry_indent:
+            continue
+        match = ARG_ENTRY_PATTERN.match(line)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def _own_nodes(function):
+    """Yields the nodes of a function body, without descending into nested functions, classes or lambdas."""
+    stack = list(function.body)
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (*FUNCTION_NODES, ast.ClassDef, ast.Lambda)):
+                stack.append(child)
+
+
+def _raises_outside_handlers(function):
+    """Checks whether the function raises an exception itself (not only re-raising inside an except block)."""
+    handler_nodes = set()
+    for node in _own_nodes(function):
+        if isinstance(node, ast.ExceptHandler):
+            handler_nodes.update(id(child) for child in ast.walk(node))
+    return any(
+        isinstance(node, ast.Raise) and node.exc is not None and id(node) not in handler_nodes
+        for node in _own_nodes(function)
+    )
+
+
+def expected_parameters(function, is_method):
+    """Returns the parameter names a function docstring must document.
+
+    Args:
+        function (ast.FunctionDef): The function node.
+        is_method (bool): Whether the function is defined in a class (``self``/``cls`` are skipped).
+
+    Returns:
+        list: The parameter names."""
+    arguments = function.args
+    names = [arg.arg for arg in [*arguments.posonlyargs, *arguments.args]]
+    is_static = any(
+        isinstance(decorator, ast.Name) and decorator.id == "staticmethod"
+        for decorator in function.decorator_list
+    )
+    if is_method and not is_static and names:
+        names = names[1:]
+    if arguments.vararg:
+        names.append(arguments.vararg.arg)
+    names.extend(arg.arg for arg in arguments.kwonlyargs)
+    if arguments.kwarg:
+        names.append(arguments.kwarg.arg)
+    return names
+
+
+def check_function_docstring(function, is_method=False):
+    """Checks a function or method docstring against its signature.
+
+    Args:
+        function (ast.FunctionDef): The function node.
+        is_method (bool): Whether the function is defined in a class.
+
+    Returns:
+        list: Descriptions of the problems found; empty if the docstring is compliant."""
+    docstring = ast.get_docstring(function)
+    if not docstring:
+        return ["missing docstring"]
+    issues = []
+    sections = parse_sections(docstring)
+    parameters = expected_parameters(function, is_method)
+    documented = documented_args(sections.get("Args", []))
+    if parameters and "Args" not in sections:
+        issues.append("missing Args section")
+    else:
+        missing = [name for name in parameters if name not in documented]
+        unknown = [name for name in documented if name not in parameters]
+        if missing:
+            issues.append(f"Args missing: {', '.join(missing)}")
+        if unknown:
+            issues.append(f"Args not in signature: {', '.join(unknown)}")
+
+    is_property = any(
+        isinstance(decorator, ast.Name) and decorator.id in ("property", "cached_property")
+        for decorator in function.decorator_list
+    )
+    own_nodes = list(_own_nodes(function))
+    is_generator = any(isinstance(node, (ast.Yield, ast.YieldFrom)) for node in own_nodes)
+    returns_value = any(
+        isinstance(node, ast.Return)
+        and node.value is not None
+        and not (isinstance(node.value, ast.Constant) and node.value.value is None)
+        for node in own_nodes
+    )
+    if is_generator and "Yields" not in sections and "Returns" not in sections:
+        issues.append("missing Yields section")
+    elif (
+        returns_value
+        and not is_property
+        and function.name != "__init__"
+        and "Returns" not in sections
+    ):
+        issues.append("missing Returns section")
+    if _raises_outside_handlers(function) and "Raises" not in sections:
+        issues.append("missing Raises section")
+    return issues
+
+
+def find_noncompliant_docstrings(code):
+    """Runs the compliance pre-pass over a whole module.
+
+    Args:
+        code (str): The Python code.
+
+    Returns:
+        dict: Qualified name (``MODULE_KEY`` for the module) -> list of problems, only for non-compliant nodes.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed."""
+    index = CodeIndex(code)
+    problems = {}
+    if index.tree.body and not ast.get_docstring(index.tree):
+        problems[MODULE_KEY] = ["missing docstring"]
+    for qualified_name, entry in index.entries.items():
+        parts = qualified_name.split(".")
+        ancestors = [".".join(parts[:i]) for i in range(1, len(parts))]
+        if any(index.get(ancestor)["kind"] != "class" for ancestor in ancestors):
+            # Hilfsfunktionen und -klassen innerhalb von Funktionen brauchen keinen eigenen Docstring
+            continue
+        if entry["kind"] == "class":
+            issues = [] if ast.get_docstring(entry["node"]) else ["missing docstring"]
+        else:
+            issues = check_function_docstring(entry["node"], entry["kind"] == "method")
+        if issues:
+            problems[qualified_name] = issues
+    return problems
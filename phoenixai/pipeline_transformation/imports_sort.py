@@ -1,16 +1,139 @@
 """This module provides functions to collect and sort import statements in a Python file."""
 
 import ast
-import astor
+import os
+from pathlib import Path
+
+import isort
+
 from phoenixai.utils.base_prompt_handling import (
     read_file,
-    run_black_and_isort,
+    remove_unused_imports,
     save_code_to_file,
 )
+from phoenixai.utils.document import parse_shared
+from phoenixai.utils.span_patch import SourcePatch, get_docstring_node
+
+DEFINITION_PREFIXES = ("def ", "async def ", "class ", "@")
+
+
+def _statement_lines(node):
+    """Returns the line numbers of a top-level statement, including decorators."""
+    start = min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+    return range(start, node.end_lineno + 1)
+
+
+def _movable_imports(tree):
+    """Returns the top-level imports that occupy their lines alone (no `;` with other statements)."""
+    line_owners = {}
+    for node in tree.body:
+        for line in _statement_lines(node):
+            line_owners[line] = line_owners.get(line, 0) + 1
+    return [
+        node
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        and all(line_owners[line] == 1 for line in _statement_lines(node))
+    ]
+
+
+def _sort_import_block(import_texts, file_path=None):
+    """Removes duplicates and sorts the import block with isort (only the block, not the whole file)."""
+    unique_imports = list(dict.fromkeys(text.strip() for text in import_texts))
+    block = "\n".join(unique_imports) + "\n"
+    settings_path = os.path.dirname(os.path.abspath(file_path)) if file_path else None
+    config = isort.Config(settings_path=settings_path) if settings_path else isort.Config()
+    try:
+        return isort.code(block, config=config, file_path=Path(file_path) if file_path else None)
+    except isort.exceptions.FileSkipped:
+        return "\n".join(sorted(unique_imports)) + "\n"
+
+
+def move_imports_to_top(code, file_path=None):
+    """Moves all top-level imports into one sorted block after the module docstring.
+
+    Only the import lines and the blank lines around them are touched; comments and formatting of the
+    remaining code stay as they are.
+
+    Args:
+        code (str): The Python code.
+        file_path (str, optional): Path of the file, used to find the isort configuration.
+
+    Returns:
+        str: The updated code."""
+    tree = parse_shared(code)
+    imports = _movable_imports(tree)
+    if not imports:
+        return code
+    lines = code.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    removed = {line for node in imports for line in _statement_lines(node)}
+    block = _sort_import_block(
+        ["".join(lines[node.lineno - 1 : node.end_lineno]) for node in imports], file_path
+    )
+
+    docstring = get_docstring_node(tree)
+    statements = [node for node in tree.body if node is not docstring]
+    if statements[0] is imports[0]:
+        anchor = imports[0].lineno
+    else:
+        anchor = SourcePatch(code).module_insert_line(tree)
+        while anchor <= len(lines) and not lines[anchor - 1].strip():
+            anchor += 1
+        if anchor > 1 and lines[anchor - 2].strip():
+            block = "\n" + block
+
+    # Zeilen ausgeben; Leerzeilen um entfernte Imports werden auf max(davor, danach) zusammengefasst
+    next_is_removed = [False] * (len(lines) + 2)
+    upcoming = False
+    for lineno in range(len(lines), 0, -1):
+        next_is_removed[lineno] = upcoming
+        if lines[lineno - 1].strip():
+            upcoming = lineno in removed
+    output = []
+    block_index = None
+    blanks_before = 0
+    inside_run = False
+    for lineno, line in enumerate(lines, start=1):
+        if lineno == anchor:
+            block_index = len(output)
+            output.append(block)
+        if lineno in removed:
+            inside_run = True
+            continue
+        if not line.strip():
+            if inside_run:
+                if next_is_removed[lineno]:
+                    continue
+                blanks_before -= 1
+                if blanks_before >= 0:
+                    continue
+            else:
+                blanks_before += 1
+            output.append(line)
+            continue
+        inside_run = False
+        blanks_before = 0
+        output.append(line)
+    if block_index is None:
+        block_index = len(output)
+        output.append(block)
+
+    # Nach dem Block so viele Leerzeilen wie black verlangt
+    following = output[block_index + 1 :]
+    blank_count = next((i for i, line in enumerate(following) if line.strip()), len(following))
+    code_line = next((line for line in following if line.strip() and not line.startswith("#")), "")
+    if blank_count < len(following):
+        needed = 2 if code_line.startswith(DEFINITION_PREFIXES) else 1
+        output[block_index + 1 : block_index + 1] = ["\n"] * max(0, needed - blank_count)
+    return "".join(output)
 
 
 def collect_imports_and_format(file_path):
-    """Collects all import statements from a file, sorts them, and formats the code.
+    """Collects all import statements from a file, sorts them into one block at the top and removes unused imports.
+
+    The rest of the file is left untouched, so no formatter pass over the whole file is needed.
 
     Args:
         file_path (str): The path to the Python file.
@@ -18,21 +141,13 @@ def collect_imports_and_format(file_path):
     Returns:
         None."""
     original_code = read_file(file_path)
-    tree = ast.parse(original_code)
-    imports = []
-    other_code_lines = []
-    for node in tree.body:
-        if isinstance(node, (ast.Import, ast.ImportFrom)):
-            imports.append(astor.to_source(node).strip())
-        else:
-            other_code_lines.append(astor.to_source(node).strip())
-    unique_imports = sorted(set(imports))
-    updated_code = "\n".join(unique_imports) + "\n\n" + "\n".join(other_code_lines)
-    save_code_to_file(file_path, updated_code)
+    updated_code = move_imports_to_top(original_code, file_path)
+    if updated_code != original_code:
+        save_code_to_file(file_path, updated_code)
+    remove_unused_imports(file_path)
     print(
         f"[Sort-Imports] Import-Anweisungen wurden nach oben verschoben und die Datei wurde gespeichert: {file_path}"
     )
-    run_black_and_isort(file_path)
 
 
 if __name__ == "__main__":
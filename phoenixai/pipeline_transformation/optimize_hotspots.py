@@ -0,0 +1,434 @@
+"""Profile-guided runtime optimization of the hottest functions of a file ("Optimize Hotspots").
+
+The pylint workflow iterates on error counts; this transform iterates on measured runtime:
+
+1. The target (``PHOENIXAI_OPTIMIZE_ENTRY``, else ``PHOENIXAI_PROFILE_ENTRY``, else the
+   file itself) is profiled with cProfile and the top-N functions *defined in the file*
+   are selected by their own time.
+2. For each hotspot, ``MultiChainComparison`` asks the LLM for a faster equivalent at
+   several temperatures. Its comparison function benchmarks every candidate against the
+   current code: both versions run the target ``PHOENIXAI_OPTIMIZE_REPEAT`` times,
+   interleaved, and the best (minimum) wall-clock times are compared.
+3. A candidate is accepted only if the target produces the same exit code and stdout,
+   the project's tests pass (``PHOENIXAI_OPTIMIZE_TESTS``, default ``pytest:tests`` when
+   a ``tests`` folder exists) and it is at least ``PHOENIXAI_OPTIMIZE_MARGIN`` faster.
+
+Candidates are written to disk only for the duration of a measurement; the original code
+is restored afterwards, and accepted functions are saved once at the end.
+"""
+
+import ast
+import functools
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from phoenixai.pipeline_analysis.performance_analysis import (
+    analyze_cpu,
+    entry_point_command,
+    parse_entry_point,
+)
+from phoenixai.pipeline_analysis.static_performance import (
+    analyze_source,
+    findings_for_prompt,
+)
+from phoenixai.pipeline_transformation.multi_chain_comparison import (
+    MultiChainComparison,
+)
+from phoenixai.utils.base_prompt_handling import call_llm, save_code_to_file, trim_code
+from phoenixai.utils.cancellation import (
+    DeadlineExceeded,
+    raise_if_cancelled,
+    run_subprocess,
+)
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.overlay import find_project_root
+from phoenixai.utils.tracing import span
+
+OPTIMIZE_TOP_N = int(os.getenv("PHOENIXAI_OPTIMIZE_TOP_N", "3"))
+# Minimum relative speedup of a candidate, e.g. 0.05 = at least 5 % faster
+OPTIMIZE_MARGIN = float(os.getenv("PHOENIXAI_OPTIMIZE_MARGIN", "0.05"))
+OPTIMIZE_REPEAT = int(os.getenv("PHOENIXAI_OPTIMIZE_REPEAT", "5"))
+# Time limit for one benchmark or test run in seconds
+OPTIMIZE_RUN_TIMEOUT = float(os.getenv("PHOENIXAI_OPTIMIZE_RUN_TIMEOUT", "120"))
+OPTIMIZE_TEMPERATURES = [0.2, 0.5, 0.8]
+# Functions with less than this share of the profiled own time are not worth an LLM call
+OPTIMIZE_MIN_SHARE = 0.02
+# pytest: "no tests collected"
+PYTEST_NO_TESTS = 5
+
+
+def resolve_entries(file_path: str) -> Tuple[Dict, Optional[Dict]]:
+    """Builds the benchmark entry point and the test entry point (None without tests).
+
+    Args:
+        file_path (str): The file to optimize.
+
+    Returns:
+        Tuple[Dict, Optional[Dict]]: Entry dictionaries as returned by ``parse_entry_point``.
+    """
+    root = find_project_root(file_path)
+    spec = os.getenv("PHOENIXAI_OPTIMIZE_ENTRY") or os.getenv("PHOENIXAI_PROFILE_ENTRY")
+    entry = parse_entry_point(spec or os.path.abspath(file_path), cwd=root)
+    tests = os.getenv("PHOENIXAI_OPTIMIZE_TESTS")
+    if tests is None and os.path.isdir(os.path.join(root, "tests")):
+        tests = "pytest:tests"
+    return entry, parse_entry_point(tests, cwd=root) if tests else None
+
+
+def find_hotspots(
+    file_path: str, entry: Dict, top_n: int = OPTIMIZE_TOP_N
+) -> List[Dict]:
+    """Profiles the entry point and returns the functions of file_path with the most own time.
+
+    Args:
+        file_path (str): The file whose functions are considered.
+        entry (Dict): The entry point to profile.
+        top_n (int): Maximum number of hotspots.
+
+    Returns:
+        List[Dict]: ``name`` (qualified), ``tottime``, ``cumtime`` and ``calls`` per function,
+        sorted by ``tottime``; functions below ``OPTIMIZE_MIN_SHARE`` of the total are skipped.
+    """
+    with tempfile.TemporaryDirectory(prefix="phoenixai_optimize_") as directory:
+        pstats_path = os.path.join(directory, "profile.pstats")
+        with span("cProfile", "profiling", path=entry["label"]):
+            summary = analyze_cpu(entry, pstats_path, timeout=OPTIMIZE_RUN_TIMEOUT)
+        if not os.path.isfile(pstats_path):
+            print(f"[Optimize] Profiling failed:\n{summary}")
+            return []
+        stats = pstats.Stats(pstats_path).stats
+
+    index = CodeIndex.from_file(file_path)
+    target = os.path.normcase(os.path.abspath(file_path))
+    hotspots: Dict[str, Dict] = {}
+    for (filename, line, function_name), stat in stats.items():
+        _, calls, tottime, cumtime, _ = stat
+        if (
+            os.path.normcase(os.path.abspath(os.path.join(entry["cwd"], filename)))
+            != target
+        ):
+            continue
+        enclosing = index.enclosing(line)
+        if (
+            enclosing is None
+            or enclosing["qualified_name"].rsplit(".", 1)[-1] != function_name
+        ):
+            continue
+        hotspot = hotspots.setdefault(
+            enclosing["qualified_name"],
+            {
+                "name": enclosing["qualified_name"],
+                "tottime": 0.0,
+                "cumtime": 0.0,
+                "calls": 0,
+            },
+        )
+        hotspot["tottime"] += tottime
+        hotspot["cumtime"] += cumtime
+        hotspot["calls"] += calls
+    total = sum(stat[2] for stat in stats.values()) or 1.0
+    relevant = [
+        h for h in hotspots.values() if h["tottime"] / total >= OPTIMIZE_MIN_SHARE
+    ]
+    return sorted(relevant, key=lambda h: -h["tottime"])[:top_n]
+
+
+def _module_context(code: str) -> str:
+    """Import statements of the module, so that the LLM knows the available names."""
+    tree = ast.parse(code)
+    lines = code.splitlines()
+    imports = [
+        "\n".join(lines[node.lineno - 1 : node.end_lineno])
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    return "\n".join(imports)
+
+
+def create_optimization_prompt(
+    function_code: str, hotspot: Dict, imports: str, findings: str = ""
+) -> str:
+    """Creates the prompt asking for a faster, behavior-preserving version of a function.
+
+    Args:
+        function_code (str): The source of the function.
+        hotspot (Dict): Profile data of the function (see ``find_hotspots``).
+        imports (str): The import statements of the module.
+        findings (str): Static performance findings within the function
+            (see ``static_performance.findings_for_prompt``), if any.
+
+    Returns:
+        str: The prompt.
+    """
+    if findings:
+        findings = f"""
+Statische Analyse – auffällige Muster in dieser Funktion (Zeilen im Modul):
+{findings}
+"""
+    return f"""
+Die folgende Funktion `{hotspot['name']}` ist laut Profiler ein Hotspot:
+{hotspot['calls']} Aufrufe, {hotspot['tottime']:.3f} s Eigenzeit, {hotspot['cumtime']:.3f} s inklusive Aufrufe.
+
+Imports des Moduls (nur als Kontext):
+```python
+{imports}
+```
+
+Funktion:
+```python
+{function_code}
+```
+{findings}
+### Aufgabe:
+Schreibe eine schnellere Version dieser Funktion mit exakt demselben Verhalten.
+1. Signatur, Rückgabewerte, Exceptions, Seiteneffekte und Ausgaben bleiben identisch.
+2. Nutze z. B. bessere Datenstrukturen (set/dict statt Listen-Suche), vermeide wiederholte Arbeit in Schleifen,
+   ziehe Konstanten aus Schleifen heraus, nutze eingebaute Funktionen und Comprehensions.
+3. Keine neuen Abhängigkeiten; benötigte Imports der Standardbibliothek dürfen innerhalb der Funktion stehen.
+4. Gib **nur** den Code der Funktion zurück (samt Dekoratoren, ohne Einrückung), ohne Erklärungen.
+"""
+
+
+def _candidate_code(code: str, name: str, response: str) -> Optional[str]:
+    """Splices the LLM response into the module; None if it is empty or not valid Python."""
+    function_code = trim_code(response or "")
+    if not function_code.strip():
+        return None
+    try:
+        ast.parse(function_code)
+        new_code = CodeIndex(code).splice({name: function_code})
+        ast.parse(new_code)
+    except (SyntaxError, ValueError) as error:
+        print(f"[Optimize] Discarded candidate for {name}: {error}")
+        return None
+    return new_code
+
+
+def _run(entry: Dict) -> Dict:
+    """Runs an entry point once; returns wall-clock seconds, exit code and stdout."""
+    start = time.perf_counter()
+    try:
+        result = run_subprocess(
+            [sys.executable, *entry_point_command(entry)],
+            timeout=OPTIMIZE_RUN_TIMEOUT,
+            capture_output=True,
+            text=True,
+            stdin=subprocess.DEVNULL,
+            cwd=entry["cwd"],
+        )
+    except DeadlineExceeded:
+        raise_if_cancelled()
+        return {"seconds": float("inf"), "returncode": None, "stdout": ""}
+    return {
+        "seconds": time.perf_counter() - start,
+        "returncode": result.returncode,
+        "stdout": result.stdout,
+    }
+
+
+def _write(file_path: str, code: str):
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(code)
+
+
+def tests_pass(test_entry: Optional[Dict]) -> Optional[bool]:
+    """Runs the project's tests; None if there are none (or none were collected)."""
+    if test_entry is None:
+        return None
+    with span("tests", "subprocess", path=test_entry["label"]):
+        result = _run(test_entry)
+    if result["returncode"] == PYTEST_NO_TESTS and test_entry["kind"] == "pytest":
+        return None
+    return result["returncode"] == 0
+
+
+def benchmark_candidate(context: Dict, candidate: str) -> Dict:
+    """Times the target with the current code and with candidate, interleaved.
+
+    Both versions run ``context["repeat"]`` times; the order alternates per round so that
+    drift (caches, CPU frequency) affects both equally. The file is restored afterwards.
+
+    Args:
+        context (Dict): ``file_path``, ``code`` (current code), ``entry``, ``test_entry``,
+            ``tests_usable`` and ``repeat``.
+        candidate (str): The complete new module code.
+
+    Returns:
+        Dict: ``baseline`` and ``candidate`` (minimum seconds), ``speedup`` (relative),
+        ``same_output``, ``tests`` (True/False/None) and ``reason`` if rejected.
+    """
+    timings = {"baseline": [], "candidate": []}
+    outputs = {"baseline": set(), "candidate": set()}
+    versions = [("baseline", context["code"]), ("candidate", candidate)]
+    try:
+        for round_number in range(context["repeat"]):
+            for label, code in versions if round_number % 2 == 0 else versions[::-1]:
+                _write(context["file_path"], code)
+                result = _run(context["entry"])
+                timings[label].append(result["seconds"])
+                outputs[label].add((result["returncode"], result["stdout"]))
+        same_output = (
+            outputs["baseline"] == outputs["candidate"]
+            and len(outputs["baseline"]) == 1
+        )
+        tests = None
+        if same_output and context["tests_usable"]:
+            _write(context["file_path"], candidate)
+            tests = tests_pass(context["test_entry"])
+    finally:
+        _write(context["file_path"], context["code"])
+
+    baseline, best = min(timings["baseline"]), min(timings["candidate"])
+    report = {
+        "baseline": baseline,
+        "candidate": best,
+        "speedup": baseline / best - 1 if best else 0.0,
+        "same_output": same_output,
+        "tests": tests,
+        "reason": None,
+    }
+    if not same_output:
+        report["reason"] = "different exit code or output"
+    elif tests is False:
+        report["reason"] = "tests fail"
+    elif report["speedup"] < context["margin"]:
+        report["reason"] = (
+            f"speedup {report['speedup']:+.1%} below margin {context['margin']:.0%}"
+        )
+    return report
+
+
+def compare_benchmark_results(
+    context: Dict, results: List[Optional[str]], temperatures: List[float]
+) -> Tuple[int, Optional[str]]:
+    """Comparison function for ``MultiChainComparison``: the fastest accepted candidate wins.
+
+    Args:
+        context (Dict): See ``benchmark_candidate``; ``reports`` collects one entry per candidate.
+        results (List[Optional[str]]): Complete module code per chain (None if unusable).
+        temperatures (List[float]): The temperatures of the chains.
+
+    Returns:
+        Tuple[int, Optional[str]]: Index and code of the best candidate; the code is None
+        if no candidate was accepted.
+    """
+    best_index, best_code, best_speedup = 0, None, None
+    for index, (candidate, temperature) in enumerate(zip(results, temperatures)):
+        if candidate is None:
+            continue
+        with span("benchmark candidate", "profiling", temperature=temperature):
+            report = benchmark_candidate(context, candidate)
+        report["temperature"] = temperature
+        context["reports"].append(report)
+        verdict = report["reason"] or "accepted"
+        print(
+            f"[Optimize] T={temperature}: {report['baseline']:.3f} s -> {report['candidate']:.3f} s "
+            f"({report['speedup']:+.1%}) – {verdict}"
+        )
+        if report["reason"] is None and (
+            best_speedup is None or report["speedup"] > best_speedup
+        ):
+            best_index, best_code, best_speedup = index, candidate, report["speedup"]
+    return best_index, best_code
+
+
+def optimize_function(context: Dict, hotspot: Dict) -> Optional[str]:
+    """Asks the LLM for faster versions of one hotspot and returns the accepted module code.
+
+    Args:
+        context (Dict): See ``benchmark_candidate``.
+        hotspot (Dict): The hotspot (see ``find_hotspots``).
+
+    Returns:
+        Optional[str]: The new module code, or None if no candidate was accepted.
+    """
+    code = context["code"]
+    name = hotspot["name"]
+    index = CodeIndex(code)
+    entry = index.get(name)
+    findings = findings_for_prompt(
+        analyze_source(code), entry["start_line"], entry["end_line"]
+    )
+    prompt = create_optimization_prompt(
+        index.source(name).strip(), hotspot, _module_context(code), findings
+    )
+    multi_chain = MultiChainComparison(prompt, OPTIMIZE_TEMPERATURES, "benchmark")
+    multi_chain.register_comparison_function(
+        "benchmark", functools.partial(compare_benchmark_results, context)
+    )
+    return multi_chain.run(
+        lambda chain_prompt, temperature: _candidate_code(
+            code, name, call_llm(chain_prompt, temperature)
+        )
+    )
+
+
+def optimize_hotspots(file_path: str, top_n: int = OPTIMIZE_TOP_N) -> List[Dict]:
+    """Optimizes the top-N hotspot functions of a file, keeping only measured speedups.
+
+    Args:
+        file_path (str): The Python file to optimize.
+        top_n (int): Number of hotspot functions to try.
+
+    Returns:
+        List[Dict]: Per hotspot its profile data plus ``accepted`` and ``speedup``.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        original = f.read()
+    entry, test_entry = resolve_entries(file_path)
+    print(f"[Optimize] Profiling {entry['label']} (cwd {entry['cwd']})")
+    hotspots = find_hotspots(file_path, entry, top_n)
+    if not hotspots:
+        print("[Optimize] No functions of this file show up in the profile.")
+        return []
+
+    tests_usable = tests_pass(test_entry)
+    if tests_usable is None:
+        print(
+            "[Optimize] No tests found – behavior is only checked via the target's output."
+        )
+    elif not tests_usable:
+        print(
+            "[Optimize] Tests already fail on the original – only the target's output is checked."
+        )
+    context = {
+        "file_path": file_path,
+        "code": original,
+        "entry": entry,
+        "test_entry": test_entry,
+        "tests_usable": bool(tests_usable),
+        "repeat": OPTIMIZE_REPEAT,
+        "margin": OPTIMIZE_MARGIN,
+        "reports": [],
+    }
+    summary = []
+    for hotspot in hotspots:
+        print(
+            f"[Optimize] Hotspot {hotspot['name']}: {hotspot['tottime']:.3f} s own time, "
+            f"{hotspot['calls']} calls"
+        )
+        context["reports"] = []
+        new_code = optimize_function(context, hotspot)
+        accepted = [r for r in context["reports"] if r["reason"] is None]
+        speedup = max((r["speedup"] for r in accepted), default=0.0)
+        if new_code is not None:
+            # Later hotspots are measured against the already optimized code
+            context["code"] = new_code
+        summary.append(
+            {**hotspot, "accepted": new_code is not None, "speedup": speedup}
+        )
+
+    if context["code"] != original:
+        save_code_to_file(file_path, context["code"])
+    print("[Optimize] Summary:")
+    for item in summary:
+        result = (
+            f"accepted ({item['speedup']:+.1%})" if item["accepted"] else "unchanged"
+        )
+        print(f"  {item['name']:<40} {item['tottime']:>8.3f} s  {result}")
+    return summary
@@ -1,18 +1,19 @@
 # pipeline_transform_impl.py
-import os
 
 from phoenixai.pipeline_transformation.port_code import run_porting
 from phoenixai.pipeline_transformation.refactor import (
-    save_selected_functions,
-    process_single_function, select_functions_to_refactor,
+    refactor_functions, select_functions_to_refactor,
 )
 from phoenixai.pipeline_transformation.add_docstrings import process_file_for_docstrings
+from phoenixai.pipeline_transformation.benchmark_generator import generate_benchmarks
+from phoenixai.pipeline_transformation.concurrency_rewrite import parallelize_io
 from phoenixai.pipeline_transformation.sonarqube_lite import process_issues_from_sonarqube
 from phoenixai.utils.base_prompt_handling import (
     apply_isort_to_file,
     format_file_with_black,
 )
 from phoenixai.pipeline_transformation.imports_sort import collect_imports_and_format
+from phoenixai.pipeline_transformation.optimize_hotspots import optimize_hotspots
 from phoenixai.pipeline_transformation.pylint_workflow import (
     iterative_process_with_pylint,
 )
@@ -20,9 +21,10 @@ from phoenixai.pipeline_transformation.sourcery_quick_fix import run_sourcery_fi
 from phoenixai.pipeline_transformation.typ_annotation_updater import (
     annotation_process_file,
 )
+from phoenixai.utils.document import uses_document
 
 
-
+@uses_document
 def run_refactor(file_path):
     print("[DEBUG] run_refactor gestartet", flush=True)
     print(f"[Transform] Refactor für {file_path}", flush=True)
@@ -32,34 +34,33 @@ def run_refactor(file_path):
         print("[DEBUG] Keine Funktionen ausgewählt.", flush=True)
         return
     print("[DEBUG] Refactor beginnt", flush=True)
-    temp_file_path = save_selected_functions(selected_functions)
-    print(f"[DEBUG] Temp-Datei erstellt: {temp_file_path}", flush=True)
-    for func_name in selected_functions:
-        print(f"[DEBUG] Bearbeite Funktion: {func_name}", flush=True)
-        process_single_function(file_path, func_name)
-        print(f"[DEBUG] Prozess für Funktion {func_name} beendet", flush=True)
-    os.remove(temp_file_path)
-    print(f"[DEBUG] Temporäre Datei {temp_file_path} gelöscht.", flush=True)
+    # Alle Funktionen gleichzeitig an das LLM, danach ein einziger Schreibvorgang
+    refactor_functions(file_path, selected_functions)
 
+@uses_document
 def run_add_docstrings(file_path):
     print(f"[Transform] Docstrings für {file_path}")
     process_file_for_docstrings(file_path)
 
 
+@uses_document
 def run_type_annotation_updater(file_path):
     print(f"[Transform] Type Annotation für {file_path}")
     annotation_process_file(file_path)
 
 
+@uses_document
 def run_move_imports(file_path):
     print(f"[Transform] Imports sortieren für {file_path}")
     collect_imports_and_format(file_path)
 
 
+@uses_document
 def run_isort(file_path):
     apply_isort_to_file(file_path)
 
 
+@uses_document
 def run_black(file_path):
     format_file_with_black(file_path)
 
@@ -70,6 +71,24 @@ def run_pylint(file_path):
     iterative_process_with_pylint(file_path, code_content, 1)
 
 
+def run_optimize_hotspots(file_path):
+    # Misst Kandidaten mit echten Läufen und braucht daher die Datei auf der Festplatte
+    print(f"[Transform] Optimize Hotspots für {file_path}")
+    optimize_hotspots(file_path)
+
+
+def run_generate_benchmarks(file_path):
+    # Zeichnet Argumente in echten Testläufen auf und schreibt Dateien neben das Projekt
+    print(f"[Transform] Micro-Benchmarks für {file_path}")
+    generate_benchmarks(file_path)
+
+
+def run_parallelize_io(file_path):
+    # Prüft Kandidaten mit den Tests des Projekts und braucht daher die Datei auf der Festplatte
+    print(f"[Transform] Parallelize I/O für {file_path}")
+    parallelize_io(file_path)
+
+
 def run_sourcery(file_path):
     if not run_sourcery_fix(file_path):
         print("[Transform] Keine Verbesserungen mit Sourcery.")
@@ -83,6 +102,7 @@ def run_custom_prompt(file_path):
 def run_sonar_qube_analysis(file_path):
     process_issues_from_sonarqube(file_path)
     
+@uses_document
 def run_port(file_path):
     print(f"[Transform] Portierung für {file_path}")
     run_porting(file_path)
@@ -96,6 +116,9 @@ transform_actions = {
     "Isort": run_isort,
     "Black": run_black,
     "Pylint": run_pylint,
+    "Optimize Hotspots": run_optimize_hotspots,
+    "Generate Benchmarks": run_generate_benchmarks,
+    "Parallelize I/O": run_parallelize_io,
     "Sourcery": run_sourcery,
     "Custom Prompt": run_custom_prompt,
     "SonarQube": run_sonar_qube_analysis,
@@ -3,10 +3,9 @@
 import os
 from phoenixai.utils.base_prompt_handling import (
     read_file,
-    trim_code,
-    call_llm,
     save_code_to_file,
 )
+from phoenixai.utils.llm_diff import request_code_change
 
 
 def generate_porting_prompt(code):
@@ -40,7 +39,7 @@ def run_porting(file_path):
     Führt den Portierungsvorgang für die angegebene Datei durch:
       - Liest den Originalcode,
       - generiert einen Portierungsprompt,
-      - ruft das LLM zur Portierung auf,
+      - ruft das LLM zur Portierung auf (im Diff-Modus nur die Änderungen),
       - trimmt und speichert den neuen Code zurück in die Datei.
 
     Args:
@@ -55,10 +54,9 @@ def run_porting(file_path):
 
     prompt = generate_porting_prompt(original_code)
     print("[Porting] Sende Prompt an das LLM ...")
-    improved_code = call_llm(prompt)
-    if not improved_code:
+    trimmed_code = request_code_change(prompt, original_code)
+    if not trimmed_code:
         print("[Porting] LLM hat keine Antwort geliefert.")
         return
 
-    trimmed_code = trim_code(improved_code)
     save_code_to_file(file_path, trimmed_code)
@@ -0,0 +1,573 @@
+"""Deterministic fixes for mechanical pylint messages.
+
+Many messages of the pylint loop do not need an LLM: trailing whitespace, missing
+final newline, unused imports, wrong import order, ``len(seq)`` used as a condition,
+``== None`` comparisons, ``%``/``str.format`` formatting that could be an f-string,
+f-strings without placeholders and unnecessary ``pass`` statements. The fixers in
+``FIXERS`` are keyed by pylint message code and resolve what they can locally;
+only the residual messages are sent to the LLM.
+
+Line-based fixers add their edits to one ``SourcePatch`` of the original code, so the
+line numbers of all messages stay valid; fixers that work on the whole module
+(import order, final newlines) run afterwards on the patched code. Cases a fixer
+cannot convert safely are left for the LLM.
+"""
+
+import ast
+import os
+import re
+import string
+import tokenize
+from typing import Callable, Dict, List, Optional, Tuple
+
+from phoenixai.pipeline_transformation.imports_sort import move_imports_to_top
+from phoenixai.utils.span_patch import SourcePatch
+
+PYLINT_AUTOFIX = os.getenv("PHOENIXAI_PYLINT_AUTOFIX", "1") != "0"
+
+# Code -> (Fixer, zeilenbasiert); zeilenbasierte Fixer laufen zuerst, in Registrierungsreihenfolge
+FIXERS: Dict[str, Tuple[Callable, bool]] = {}
+
+STRING_LITERAL_PATTERN = re.compile(r"^([rRuU]?)(['\"])(.*)\2$", re.DOTALL)
+PERCENT_PATTERN = re.compile(r"%(?:\.(\d+))?([sdirf%])")
+# Die Meldungen enden mit dem symbolischen Namen, z. B. "(unused-import)"
+UNUSED_IMPORT_PATTERNS = (
+    re.compile(r"^Unused import (?P<name>\S+)(?: \([\w-]+\))?$"),
+    re.compile(
+        r"^Unused (?P<name>\S+) imported from \S+(?: as (?P<asname>\S+))?(?: \([\w-]+\))?$"
+    ),
+    re.compile(r"^Unused (?P<name>\S+) imported as (?P<asname>\S+)(?: \([\w-]+\))?$"),
+)
+SUGGESTION_PATTERN = re.compile(r"^Comparison '(.+)' should be '(.+?)'")
+SIMPLE_EXPRESSIONS = (ast.Name, ast.Attribute, ast.Constant)
+
+
+def register_fixer(*codes: str, line_based: bool = True) -> Callable:
+    """Registers a fixer for one or more pylint message codes.
+
+    Line-based fixers are called as ``fixer(patch, tree, messages, file_path)`` and add
+    edits to the shared patch; the others are called as ``fixer(code, messages, file_path)``
+    and return the new code. Both return the number of messages they addressed (the
+    module fixers as the first element of a ``(count, code)`` tuple).
+
+    Args:
+        *codes (str): The pylint message codes, e.g. ``"C0303"``.
+        line_based (bool): Whether the fixer relies on the line numbers of the messages.
+
+    Returns:
+        Callable: The decorator."""
+
+    def decorator(fixer):
+        for code in codes:
+            FIXERS[code] = (fixer, line_based)
+        return fixer
+
+    return decorator
+
+
+def _nodes_on_line(tree: ast.AST, node_type, line: int) -> List[ast.AST]:
+    """Returns the nodes of a type starting on a line, in source order."""
+    nodes = [
+        node
+        for node in ast.walk(tree)
+        if isinstance(node, node_type) and getattr(node, "lineno", None) == line
+    ]
+    return sorted(nodes, key=lambda node: node.col_offset)
+
+
+def _embeddable(code: str, node: ast.AST, quote: str) -> Optional[str]:
+    """Returns the source of an expression if it can be placed into an f-string.
+
+    Args:
+        code (str): The module source.
+        node (ast.AST): The expression.
+        quote (str): The quote character of the f-string.
+
+    Returns:
+        Optional[str]: The source, or None for expressions Python 3.11 does not allow
+            there (quotes, backslashes, comments, line breaks, lambdas)."""
+    source = ast.get_source_segment(code, node)
+    if source is None or isinstance(node, (ast.Lambda, ast.NamedExpr, ast.Starred)):
+        return None
+    if any(char in source for char in (quote, "\\", "\n", "#")) or source.startswith(
+        "{"
+    ):
+        return None
+    return source
+
+
+def _string_literal(code: str, node: ast.AST) -> Optional[Tuple[str, str, str]]:
+    """Splits a single-line, non-concatenated string literal into prefix, quote and body."""
+    if not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+        return None
+    source = ast.get_source_segment(code, node)
+    match = STRING_LITERAL_PATTERN.match(source or "")
+    if (
+        match is None
+        or "\n" in source
+        or match.group(2) in match.group(3).replace("\\" + match.group(2), "")
+    ):
+        return None
+    return match.group(1), match.group(2), match.group(3)
+
+
+def _fstring_prefix(prefix: str) -> str:
+    return "rf" if prefix in ("r", "R") else "f"
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _percent_to_fstring(code: str, node: ast.BinOp) -> Optional[str]:
+    """Converts ``"..." % (a, b)`` with %s, %r, %f and %.Nf to an f-string.
+
+    %d and %i are left alone: they truncate floats, while ``{x:d}`` raises ValueError.
+    """
+    literal = _string_literal(code, node.left)
+    if literal is None:
+        return None
+    prefix, quote, body = literal
+    if isinstance(node.right, ast.Tuple):
+        values = node.right.elts
+    elif isinstance(node.right, ast.Constant) and not isinstance(
+        node.right.value, tuple
+    ):
+        values = [node.right]
+    else:
+        # Ein Name kann zur Laufzeit ein Tupel sein
+        return None
+    if "%" in PERCENT_PATTERN.sub("", body):
+        return None
+    parts = []
+    position = 0
+    value_index = 0
+    for match in PERCENT_PATTERN.finditer(body):
+        parts.append(_escape_braces(body[position : match.start()]))
+        position = match.end()
+        precision, conversion = match.groups()
+        if conversion == "%":
+            parts.append("%")
+            continue
+        if (
+            value_index >= len(values)
+            or conversion in "di"
+            or (precision and conversion != "f")
+        ):
+            return None
+        source = _embeddable(code, values[value_index], quote)
+        if source is None:
+            return None
+        value_index += 1
+        if conversion == "r":
+            parts.append(f"{{{source}!r}}")
+        elif conversion == "f":
+            parts.append(f"{{{source}:.{precision or 6}f}}")
+        else:
+            parts.append(f"{{{source}}}")
+    if value_index != len(values):
+        return None
+    parts.append(_escape_braces(body[position:]))
+    return f"{_fstring_prefix(prefix)}{quote}{''.join(parts)}{quote}"
+
+
+def _format_to_fstring(code: str, node: ast.Call) -> Optional[str]:
+    """Converts ``"...".format(...)`` with positional or keyword fields to an f-string."""
+    literal = _string_literal(code, node.func.value)
+    if (
+        literal is None
+        or any(isinstance(arg, ast.Starred) for arg in node.args)
+        or any(keyword.arg is None for keyword in node.keywords)
+    ):
+        return None
+    prefix, quote, body = literal
+    arguments = {str(i): arg for i, arg in enumerate(node.args)}
+    arguments.update({keyword.arg: keyword.value for keyword in node.keywords})
+    used = {}
+    parts = []
+    auto_index = 0
+    try:
+        fields = list(string.Formatter().parse(body))
+    except ValueError:
+        return None
+    for literal_text, field_name, format_spec, conversion in fields:
+        parts.append(_escape_braces(literal_text))
+        if field_name is None:
+            continue
+        match = re.match(r"^(\w*)(.*)$", field_name)
+        key, rest = match.group(1), match.group(2)
+        if not key:
+            key = str(auto_index)
+            auto_index += 1
+        if key not in arguments or "{" in (format_spec or ""):
+            return None
+        value = arguments[key]
+        source = _embeddable(code, value, quote)
+        if source is None:
+            return None
+        if rest and not isinstance(
+            value, SIMPLE_EXPRESSIONS + (ast.Call, ast.Subscript)
+        ):
+            source = f"({source})"
+        used[key] = used.get(key, 0) + 1
+        field = source + rest
+        if conversion:
+            field += f"!{conversion}"
+        if format_spec:
+            field += f":{format_spec}"
+        parts.append(f"{{{field}}}")
+    for key, value in arguments.items():
+        # Nicht verwendete oder mehrfach verwendete Argumente mit Seiteneffekten nicht anfassen
+        if used.get(key, 0) != 1 and not isinstance(value, SIMPLE_EXPRESSIONS):
+            return None
+    return f"{_fstring_prefix(prefix)}{quote}{''.join(parts)}{quote}"
+
+
+@register_fixer("C0303")
+def fix_trailing_whitespace(patch, tree, messages, file_path):
+    """Strips trailing whitespace, except inside multi-line strings.
+
+    Returns:
+        int: The number of fixed lines."""
+    string_lines = set()
+    for token in patch.tokens():
+        if token.type == tokenize.STRING and token.end[0] > token.start[0]:
+            string_lines.update(range(token.start[0], token.end[0]))
+    fixed = 0
+    for message in messages:
+        line = message["line"]
+        if line in string_lines or line > len(patch.lines):
+            continue
+        text = patch.lines[line - 1]
+        content = text.rstrip("\r\n")
+        stripped = content.rstrip()
+        if stripped != content:
+            start = patch.line_start(line)
+            patch.replace(start + len(stripped), start + len(content), "")
+            fixed += 1
+    return fixed
+
+
+@register_fixer("W0107")
+def fix_unnecessary_pass(patch, tree, messages, file_path):
+    """Removes ``pass`` statements that are alone on their line.
+
+    Returns:
+        int: The number of removed statements."""
+    fixed = 0
+    for message in messages:
+        line = message["line"]
+        if line > len(patch.lines) or patch.lines[line - 1].strip() != "pass":
+            continue
+        if _nodes_on_line(tree, ast.Pass, line):
+            patch.replace(patch.line_start(line), patch.line_start(line + 1), "")
+            fixed += 1
+    return fixed
+
+
+@register_fixer("W1309")
+def fix_fstring_without_interpolation(patch, tree, messages, file_path):
+    """Turns f-strings without placeholders into plain strings.
+
+    Returns:
+        int: The number of converted strings."""
+    fixed = 0
+    for message in messages:
+        for node in _nodes_on_line(tree, ast.JoinedStr, message["line"]):
+            if node.col_offset != message["column"] or any(
+                isinstance(value, ast.FormattedValue) for value in node.values
+            ):
+                continue
+            source = ast.get_source_segment(patch.code, node)
+            match = re.match(r"^([rRfF]{1,2})(['\"])(.*)\2$", source or "")
+            if match is None or "\n" in source:
+                continue
+            prefix = match.group(1).replace("f", "").replace("F", "")
+            body = match.group(3).replace("{{", "{").replace("}}", "}")
+            patch.replace_node(node, f"{prefix}{match.group(2)}{body}{match.group(2)}")
+            fixed += 1
+    return fixed
+
+
+@register_fixer("C0209")
+def fix_consider_using_fstring(patch, tree, messages, file_path):
+    """Converts ``%`` and ``str.format`` formatting to f-strings where this is safe.
+
+    Returns:
+        int: The number of converted expressions."""
+    fixed = 0
+    for message in messages:
+        line, column = message["line"], message["column"]
+        for node in _nodes_on_line(tree, (ast.BinOp, ast.Call), line):
+            replacement = None
+            if (
+                isinstance(node, ast.BinOp)
+                and isinstance(node.op, ast.Mod)
+                and node.left.col_offset == column
+            ):
+                replacement = _percent_to_fstring(patch.code, node)
+            elif (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "format"
+                and node.func.value.col_offset == column
+            ):
+                replacement = _format_to_fstring(patch.code, node)
+            else:
+                continue
+            if replacement is not None:
+                patch.replace_node(node, replacement)
+                fixed += 1
+            break
+    return fixed
+
+
+def _is_len_call(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == "len"
+        and len(node.args) == 1
+        and not node.keywords
+    )
+
+
+@register_fixer("C1802")
+def fix_len_as_condition(patch, tree, messages, file_path):
+    """Replaces ``len(seq)`` used as a condition by ``seq`` (``not len(seq)`` by ``not seq``).
+
+    Pylint reports ``not len(seq)`` at the column of the ``not``, otherwise at the call.
+
+    Returns:
+        int: The number of replaced calls."""
+    fixed = 0
+    for message in messages:
+        line, column = message["line"], message["column"]
+        candidates = [
+            node
+            for node in _nodes_on_line(tree, ast.Call, line)
+            if node.col_offset == column
+        ] + [
+            node.operand
+            for node in _nodes_on_line(tree, ast.UnaryOp, line)
+            if isinstance(node.op, ast.Not) and node.col_offset == column
+        ]
+        for node in candidates:
+            if _is_len_call(node):
+                argument = node.args[0]
+                source = ast.get_source_segment(patch.code, argument)
+                if not isinstance(
+                    argument, SIMPLE_EXPRESSIONS + (ast.Call, ast.Subscript)
+                ):
+                    source = f"({source})"
+                patch.replace_node(node, source)
+                fixed += 1
+                break
+    return fixed
+
+
+def _compares_with_none(node: ast.Compare) -> bool:
+    return len(node.ops) == 1 and any(
+        isinstance(side, ast.Constant) and side.value is None
+        for side in (node.left, node.comparators[0])
+    )
+
+
+@register_fixer("C0121")
+def fix_singleton_comparison(patch, tree, messages, file_path):
+    """Applies pylint's suggestion for comparisons with None (``is None``/``is not None``).
+
+    Comparisons with True or False are left for the LLM: ``x == True`` is not the same as
+    ``x is True`` for values like ``1``.
+
+    Returns:
+        int: The number of rewritten comparisons."""
+    fixed = 0
+    for message in messages:
+        match = SUGGESTION_PATTERN.match(message["message_emitted"])
+        if match is None:
+            continue
+        current, suggestion = match.groups()
+        for node in _nodes_on_line(tree, ast.Compare, message["line"]):
+            if ast.get_source_segment(
+                patch.code, node
+            ) == current and _compares_with_none(node):
+                patch.replace_node(node, suggestion)
+                fixed += 1
+                break
+    return fixed
+
+
+@register_fixer("W0611")
+def fix_unused_import(patch, tree, messages, file_path):
+    """Removes unused module-level imports (not in ``__init__.py``, where they are re-exports).
+
+    Returns:
+        int: The number of removed names."""
+    if file_path and os.path.basename(file_path) == "__init__.py":
+        return 0
+    unused = {}
+    for message in messages:
+        for pattern in UNUSED_IMPORT_PATTERNS:
+            match = pattern.match(message["message_emitted"])
+            if match:
+                unused.setdefault(message["line"], []).append(
+                    (match.group("name"), match.groupdict().get("asname"))
+                )
+                break
+    fixed = 0
+    for node in tree.body:
+        if (
+            not isinstance(node, (ast.Import, ast.ImportFrom))
+            or node.lineno not in unused
+        ):
+            continue
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            continue
+        names = unused[node.lineno]
+        keep = [
+            alias for alias in node.names if (alias.name, alias.asname) not in names
+        ]
+        removed = len(node.names) - len(keep)
+        if not removed:
+            continue
+        line_text = "".join(patch.lines[node.lineno - 1 : node.end_lineno])
+        if not keep and line_text.strip() == ast.get_source_segment(patch.code, node):
+            patch.replace(
+                patch.line_start(node.lineno), patch.line_start(node.end_lineno + 1), ""
+            )
+        elif keep:
+            rendered = ", ".join(
+                f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+                for alias in keep
+            )
+            if isinstance(node, ast.ImportFrom):
+                module = "." * node.level + (node.module or "")
+                patch.replace_node(node, f"from {module} import {rendered}")
+            else:
+                patch.replace_node(node, f"import {rendered}")
+        else:
+            continue
+        fixed += removed
+    return fixed
+
+
+@register_fixer("C0411", line_based=False)
+def fix_import_order(code, messages, file_path):
+    """Sorts the module-level imports into one block (standard library, third party, local).
+
+    Returns:
+        Tuple[int, str]: The number of addressed messages and the new code."""
+    new_code = move_imports_to_top(code, file_path)
+    return (len(messages) if new_code != code else 0), new_code
+
+
+@register_fixer("C0305", line_based=False)
+def fix_trailing_newlines(code, messages, file_path):
+    """Removes empty lines at the end of the file.
+
+    Returns:
+        Tuple[int, str]: The number of addressed messages and the new code."""
+    new_code = re.sub(r"\n\s*\Z", "\n", code)
+    return (len(messages) if new_code != code else 0), new_code
+
+
+@register_fixer("C0304", line_based=False)
+def fix_missing_final_newline(code, messages, file_path):
+    """Adds the missing line break at the end of the file.
+
+    Returns:
+        Tuple[int, str]: The number of addressed messages and the new code."""
+    if code and not code.endswith("\n"):
+        return len(messages), code + "\n"
+    return 0, code
+
+
+def apply_deterministic_fixes(
+    code: str, errors: List[Dict], file_path: Optional[str] = None
+) -> Tuple[str, Dict[str, int]]:
+    """Applies all registered fixers to the pylint messages they cover.
+
+    Args:
+        code (str): The code the messages refer to.
+        errors (List[Dict]): The messages as returned by
+            ``pylint_workflow.extract_error_codes_and_messages`` (with line and column).
+        file_path (str, optional): Path of the file (isort configuration, ``__init__.py`` check).
+
+    Returns:
+        Tuple[str, Dict[str, int]]: The new code and the number of addressed messages per code.
+            If the combined result does not parse, the original code is returned unchanged.
+    """
+    by_code = {}
+    for error in errors:
+        if error["error_code"] in FIXERS:
+            by_code.setdefault(error["error_code"], []).append(error)
+    if not by_code:
+        return code, {}
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code, {}
+
+    attempted = {}
+    patch = SourcePatch(code)
+    for error_code, (fixer, line_based) in FIXERS.items():
+        if line_based and error_code in by_code:
+            attempted[error_code] = fixer(patch, tree, by_code[error_code], file_path)
+    # Eine ganze entfernte Zeile schließt z. B. das Entfernen ihrer Leerzeichen am Ende ein
+    kept = []
+    for edit in sorted(patch.edits, key=lambda edit: (edit[0], -edit[1])):
+        if not kept or edit[0] >= kept[-1][1]:
+            kept.append(edit)
+    patch.edits = kept
+    try:
+        new_code = patch.apply()
+        for error_code, (fixer, line_based) in FIXERS.items():
+            if not line_based and error_code in by_code:
+                attempted[error_code], new_code = fixer(
+                    new_code, by_code[error_code], file_path
+                )
+        ast.parse(new_code)
+    except (ValueError, SyntaxError, tokenize.TokenError) as e:
+        print(f"[Pylint-Autofix] Automatische Korrekturen verworfen: {e}")
+        return code, {}
+    return new_code, {key: value for key, value in attempted.items() if value}
+
+
+def fix_rates(before: List[Dict], after: List[Dict]) -> Dict[str, Tuple[int, int]]:
+    """Counts per fixable code how many messages disappeared after the fixes.
+
+    Args:
+        before (List[Dict]): The messages before the fixes.
+        after (List[Dict]): The messages of a new pylint run on the fixed code.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Code -> (resolved, total)."""
+    counts_before = {}
+    for error in before:
+        if error["error_code"] in FIXERS:
+            counts_before[error["error_code"]] = (
+                counts_before.get(error["error_code"], 0) + 1
+            )
+    counts_after = {}
+    for error in after:
+        counts_after[error["error_code"]] = counts_after.get(error["error_code"], 0) + 1
+    return {
+        code: (max(0, total - counts_after.get(code, 0)), total)
+        for code, total in sorted(counts_before.items())
+    }
+
+
+def format_fix_rates(rates: Dict[str, Tuple[int, int]]) -> str:
+    """Formats the per-code auto-fix rates for the console.
+
+    Args:
+        rates (Dict[str, Tuple[int, int]]): Code -> (resolved, total).
+
+    Returns:
+        str: One line per code, e.g. ``C0303: 4/4 (100%)``."""
+    return "\n".join(
+        f"  {code}: {resolved}/{total} ({100 * resolved // total}%)"
+        for code, (resolved, total) in rates.items()
+        if total
+    )
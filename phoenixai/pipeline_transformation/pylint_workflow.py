@@ -1,12 +1,23 @@
-"""Module for iterative code improvement using LLM and Pylint."""
+"""Module for iterative code improvement using LLM and Pylint.
+
+By default the loop works on localized regions: pylint messages are grouped by the
+enclosing function, method, class header or run of module-level statements, and only
+those regions (plus the file's imports as context) are sent to the LLM, concurrently
+per region. The results are spliced back into the file, so iteration time and token
+usage scale with the number of problems instead of the file size. Setting
+``PHOENIXAI_PYLINT_LOCALIZED=0`` restores the whole-file multi-chain comparison.
+"""
 
 import ast
-import subprocess
+import contextvars
+import functools
 import logging
 import sqlite3
 import re
 import os
-from typing import List, Tuple, Dict
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Dict
 from phoenixai.utils.base_prompt_handling import (
     generate_initial_prompt,
     call_llm,
@@ -16,6 +27,25 @@ from phoenixai.utils.base_prompt_handling import (
 from phoenixai.pipeline_transformation.multi_chain_comparison import (
     MultiChainComparison,
 )
+from phoenixai.pipeline_transformation.pylint_autofix import (
+    PYLINT_AUTOFIX,
+    apply_deterministic_fixes,
+    fix_rates,
+    format_fix_rates,
+)
+from phoenixai.utils.cancellation import run_subprocess
+from phoenixai.utils.code_index import FUNCTION_NODES, CodeIndex, splice_lines
+from phoenixai.utils.llm_diff import request_code_change
+from phoenixai.utils.tracing import span
+
+PYLINT_LOCALIZED = os.getenv("PHOENIXAI_PYLINT_LOCALIZED", "1") != "0"
+PYLINT_MAX_PARALLEL = int(os.getenv("PHOENIXAI_PYLINT_MAX_PARALLEL", "8"))
+PYLINT_REGION_TEMPERATURE = 0.2
+MODULE_REGION = "<module>"
+
+PYLINT_MESSAGE_PATTERN = re.compile(
+    r"^.*?:(\d+):(\d+): ([A-Z]\d{4}): (.+?)$", re.MULTILINE
+)
 
 
 def setup_multichain_comparison(temperatures: List[float]) -> MultiChainComparison:
@@ -69,6 +99,8 @@ def run_multichain_for_code_improvement(
 ) -> str:
     """Runs MultiChainComparison to find the best result based on LLM responses.
 
+    In diff output mode each chain receives only a diff, which is applied to code_content before comparing.
+
     Args:
         multi_chain (MultiChainComparison): The MultiChainComparison instance.
         code_content (str): The code content.
@@ -78,7 +110,11 @@ def run_multichain_for_code_improvement(
         str: The improved code."""
     prompt = create_full_prompt(code_content, formatted_errors)
     multi_chain.prompt = prompt
-    return multi_chain.run(call_llm)
+    return multi_chain.run(
+        lambda chain_prompt, temperature: request_code_change(
+            chain_prompt, code_content, temperature, llm=call_llm
+        )
+    )
 
 
 def process_and_validate_code(
@@ -216,7 +252,8 @@ def format_code_with_black(code):
     temp_file = "temp_code.py"
     with open(temp_file, "w", encoding="utf-8") as f:
         f.write(code)
-    subprocess.run(["black", temp_file], check=True)
+    with span("subprocess: black", "subprocess", path=temp_file):
+        run_subprocess(["black", temp_file], check=True)
     with open(temp_file, "r", encoding="utf-8") as f:
         formatted_code = f.read()
     os.remove(temp_file)
@@ -247,36 +284,47 @@ def run_pylint(file_path):
 
     Returns:
         str: The raw output from Pylint."""
-    result = subprocess.run(["pylint", file_path], capture_output=True, text=True)
+    with span("subprocess: pylint", "subprocess", path=str(file_path)):
+        result = run_subprocess(["pylint", file_path], capture_output=True, text=True)
     return result.stdout
 
 
 def extract_error_codes_and_messages(pylint_output):
-    """Extracts error codes and messages from Pylint output.
+    """Extracts error codes, messages and positions from Pylint output.
 
     Args:
-        pylint_output (str): The raw output from Pylint.
+        pylint_output (str): The raw output from Pylint (``path:line:column: CODE: message``).
 
     Returns:
-        List[Dict[str, str]]: A list of dictionaries, each containing an error code and its message.
+        List[Dict]: A list of dictionaries, each containing an error code, its message,
+            the line and the column.
     """
-    matches = re.findall(": ([A-Z]\\d{4}): (.+?)(?:\\n|$)", pylint_output)
-    return [{"error_code": match[0], "message_emitted": match[1]} for match in matches]
-
-
+    return [
+        {
+            "error_code": match[2],
+            "message_emitted": match[3],
+            "line": int(match[0]),
+            "column": int(match[1]),
+        }
+        for match in PYLINT_MESSAGE_PATTERN.findall(pylint_output)
+    ]
+
+
+@functools.lru_cache(maxsize=None)
 def fetch_error_description_from_db(error_code):
-    """Fetches error description from the database."""
+    """Fetches error description from the database (cached per error code)."""
     dirname = os.path.dirname(__file__)
-    filename = os.path.join(dirname, "..\\database\\code_quality_tests.db")
+    filename = os.path.join(dirname, "..", "database", "code_quality_tests.db")
     # db_path = "C:\\Users\\Anwender\\PycharmProjects\\PhoenixAI\\phoenixai\\database\\code_quality_tests.db"
     db_path = filename
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT description FROM pylint_test WHERE error_code = ?", (error_code,)
-    )
-    result = cursor.fetchone()
-    conn.close()
+    with span("sqlite: pylint_test", "sqlite", error_code=error_code):
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT description FROM pylint_test WHERE error_code = ?", (error_code,)
+        )
+        result = cursor.fetchone()
+        conn.close()
     return result[0] if result else None
 
 
@@ -321,9 +369,287 @@ def create_full_prompt(code_content, formatted_errors):
     return generate_initial_prompt(code_content) + formatted_errors
 
 
+def _statement_range(body: List[ast.stmt], line: int) -> Optional[Tuple[int, int]]:
+    """Finds the run of consecutive non-definition statements in body that contains line.
+
+    Args:
+        body (List[ast.stmt]): The statements of a module or class body.
+        line (int): The line number.
+
+    Returns:
+        Optional[Tuple[int, int]]: The first and last line of the run, or None."""
+    runs = []
+    previous_plain = False
+    for node in body:
+        is_definition = isinstance(node, (*FUNCTION_NODES, ast.ClassDef))
+        if not is_definition and previous_plain:
+            runs[-1] = (runs[-1][0], node.end_lineno, False)
+        else:
+            runs.append((node.lineno, node.end_lineno, is_definition))
+        previous_plain = not is_definition
+    for start, end, is_definition in runs:
+        if start <= line <= end and not is_definition:
+            return start, end
+    return None
+
+
+def _region_for_line(index: CodeIndex, line: int) -> Tuple[int, int, str]:
+    """Determines the smallest self-contained code region a pylint message refers to.
+
+    Functions and methods are sent as a whole; for a class the header (up to its
+    docstring) or the run of class-level statements is used, on module level the
+    run of consecutive module-level statements. Blank and comment lines between
+    statements form a region of their own.
+
+    Args:
+        index (CodeIndex): The index of the file.
+        line (int): The line number of the message.
+
+    Returns:
+        Tuple[int, int, str]: The first line, the last line and the name of the region.
+    """
+    entry = index.enclosing(line)
+    if entry is None:
+        run = _statement_range(index.tree.body, line)
+        start, end = run or (line, line)
+        return start, end, MODULE_REGION
+    if entry["kind"] != "class":
+        return entry["start_line"], entry["end_line"], entry["qualified_name"]
+    node = entry["node"]
+    first = node.body[0]
+    first_line = min(
+        [d.lineno for d in getattr(first, "decorator_list", [])] + [first.lineno]
+    )
+    if line < first_line:
+        header_end = first_line - 1
+        if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant):
+            header_end = first.end_lineno
+        return entry["start_line"], header_end, entry["qualified_name"]
+    run = _statement_range(node.body, line)
+    start, end = run or (line, line)
+    return start, end, entry["qualified_name"]
+
+
+def group_errors_by_region(code: str, errors: List[Dict]) -> List[Dict]:
+    """Groups pylint messages by the code region they belong to.
+
+    Overlapping regions (e.g. a function and a function nested in it) are merged.
+
+    Args:
+        code (str): The code the messages refer to.
+        errors (List[Dict]): The messages as returned by ``extract_error_codes_and_messages``.
+
+    Returns:
+        List[Dict]: Regions sorted by position, each with ``start``, ``end``, ``names``
+            and ``errors``.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed."""
+    index = CodeIndex(code)
+    last_line = max(len(index.lines), 1)
+    regions = []
+    for error in errors:
+        start, end, name = _region_for_line(
+            index, min(max(error["line"], 1), last_line)
+        )
+        regions.append({"start": start, "end": end, "names": [name], "errors": [error]})
+    regions.sort(key=lambda region: (region["start"], -region["end"]))
+    merged = []
+    for region in regions:
+        if merged and region["start"] <= merged[-1]["end"]:
+            current = merged[-1]
+            current["end"] = max(current["end"], region["end"])
+            current["errors"].extend(region["errors"])
+            current["names"].extend(
+                name for name in region["names"] if name not in current["names"]
+            )
+        else:
+            merged.append(region)
+    return merged
+
+
+def _module_imports(code: str) -> List[str]:
+    """Returns the source of the module-level import statements (context for region prompts)."""
+    tree = ast.parse(code)
+    return [
+        ast.get_source_segment(code, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def create_region_prompt(
+    region: Dict, excerpt: str, imports: List[str], total_lines: int
+) -> str:
+    """Creates the LLM prompt for a single code region.
+
+    Args:
+        region (Dict): The region as returned by ``group_errors_by_region``.
+        excerpt (str): The dedented source of the region.
+        imports (List[str]): The module-level imports of the file, shown as context.
+        total_lines (int): The number of lines of the whole file.
+
+    Returns:
+        str: The prompt for the LLM."""
+    errors = []
+    for error in region["errors"]:
+        description = fetch_error_description_from_db(error["error_code"])
+        relative_line = error["line"] - region["start"] + 1
+        errors.append(
+            f"- {error['error_code']} (Zeile {relative_line}: {error['message_emitted']}): "
+            f"{description or 'Description not found'}"
+        )
+    context = ""
+    if imports and region["names"] != [MODULE_REGION]:
+        context = (
+            "Vorhandene Imports der Datei (nur zur Information, nicht zurückgeben):\n"
+            + "\n".join(imports)
+            + "\n\n"
+        )
+    return f"""
+Die folgende Python-Datei hat {total_lines} Zeilen. Überarbeite **nur** den Ausschnitt
+`{", ".join(region["names"])}` (Zeilen {region["start"]}–{region["end"]}); der Rest der Datei bleibt unverändert.
+
+{context}Ausschnitt:
+
+{excerpt}
+
+Gib **nur** den verbesserten Ausschnitt als reinen Code zurück, ohne zusätzliche Erklärungen,
+Markdown-Codeblöcke oder andere Teile der Datei. Behalte Namen und Signaturen bei, die von
+außerhalb des Ausschnitts verwendet werden, und behebe die angegebenen Probleme:
+
+Zu behebende Probleme (Zeilenangaben relativ zum Ausschnitt):
+""" + "\n".join(errors)
+
+
+def _format_region(excerpt: str) -> str:
+    """Formats a region with Black in memory; fragments Black cannot parse are kept as they are."""
+    import black
+
+    try:
+        return black.format_str(excerpt, mode=black.Mode())
+    except Exception:  # pylint: disable=broad-except
+        return excerpt
+
+
+def _improve_region(
+    code: str, region: Dict, prompt: str, excerpt: str
+) -> Optional[str]:
+    """Asks the LLM for one region and checks the result in the context of the whole file.
+
+    Args:
+        code (str): The code of the whole file.
+        region (Dict): The region.
+        prompt (str): The prompt for the region.
+        excerpt (str): The dedented source of the region.
+
+    Returns:
+        Optional[str]: The new source of the region, or None if it is missing or invalid.
+    """
+    name = ", ".join(region["names"])
+    improved = request_code_change(
+        prompt, excerpt, PYLINT_REGION_TEMPERATURE, llm=call_llm
+    )
+    if not improved.strip() or improved.strip() == excerpt.strip():
+        print(f"[Pylint-Workflow] Keine Änderung für {name}.", flush=True)
+        return None
+    improved = _format_region(improved)
+    try:
+        ast.parse(splice_lines(code, {(region["start"], region["end"]): improved}))
+    except SyntaxError as e:
+        print(f"[Pylint-Workflow] Syntaxfehler im LLM-Code für {name}: {e}", flush=True)
+        return None
+    return improved
+
+
+def improve_regions(code: str, errors: List[Dict]) -> str:
+    """Fixes pylint messages region by region with concurrent LLM calls.
+
+    Args:
+        code (str): The code the messages refer to.
+        errors (List[Dict]): The pylint messages including their lines.
+
+    Returns:
+        str: The code with all valid region results spliced in (unchanged if there are none).
+    """
+    regions = group_errors_by_region(code, errors)
+    lines = code.splitlines(keepends=True)
+    imports = _module_imports(code)
+    excerpts = [
+        textwrap.dedent("".join(lines[region["start"] - 1 : region["end"]]))
+        for region in regions
+    ]
+    prompts = [
+        create_region_prompt(region, excerpt, imports, len(lines))
+        for region, excerpt in zip(regions, excerpts)
+    ]
+    print(
+        f"[Pylint-Workflow] {len(errors)} Meldung(en) in {len(regions)} Bereich(en), "
+        f"{sum(len(excerpt) for excerpt in excerpts)} von {len(code)} Zeichen werden gesendet."
+    )
+    with span("pylint regions", "llm", regions=len(regions)):
+        with ThreadPoolExecutor(
+            max_workers=min(PYLINT_MAX_PARALLEL, len(regions))
+        ) as executor:
+            # Jeder Aufruf läuft in einer Kopie des Kontexts (Deadline, Arbeitskopie der Pipeline)
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _improve_region,
+                    code,
+                    region,
+                    prompt,
+                    excerpt,
+                )
+                for region, prompt, excerpt in zip(regions, prompts, excerpts)
+            ]
+            results = [future.result() for future in futures]
+    replacements = {
+        (region["start"], region["end"]): result
+        for region, result in zip(regions, results)
+        if result is not None
+    }
+    if not replacements:
+        return code
+    return splice_lines(code, replacements)
+
+
+def run_deterministic_fixes(file_path, code_content, errors, totals):
+    """Resolves mechanical pylint messages without the LLM and lints the file again.
+
+    Args:
+        file_path (str): The path to the file.
+        code_content (str): The code the messages refer to (the content of the file).
+        errors (List[Dict]): The pylint messages.
+        totals (Dict[str, List[int]]): Accumulated ``[resolved, total]`` per code, updated in place.
+
+    Returns:
+        Tuple[str, List[Dict], Optional[str]]: The code, the residual messages and their
+            formatted description (None if nothing was changed)."""
+    fixed_code, _ = apply_deterministic_fixes(code_content, errors, file_path)
+    if fixed_code == code_content:
+        return code_content, errors, None
+    save_code_to_file(file_path, fixed_code)
+    residual, formatted_errors = analyze_with_pylint(file_path)
+    rates = fix_rates(errors, residual)
+    for code, (resolved, total) in rates.items():
+        counts = totals.setdefault(code, [0, 0])
+        counts[0] += resolved
+        counts[1] += total
+    print(
+        f"[Pylint-Autofix] {len(errors) - len(residual)} Meldung(en) ohne LLM behoben, "
+        f"{len(residual)} verbleiben:\n{format_fix_rates(rates)}"
+    )
+    return fixed_code, residual, formatted_errors
+
+
 def iterative_process_with_pylint(file_path, code_content, iterations):
     """Iteratively runs the workflow based on the given number of iterations.
 
+    Mechanical messages are fixed deterministically first (``PYLINT_AUTOFIX``); only the
+    residual messages go to the LLM. With ``PYLINT_LOCALIZED`` only the regions containing
+    them are sent; otherwise the whole file is improved by a multi-chain comparison.
+
     Args:
         file_path (str): The path to the file.
         code_content (str): The initial code content.
@@ -332,9 +658,15 @@ def iterative_process_with_pylint(file_path, code_content, iterations):
     temperatures = [0.2, 0.4, 0.6]
     multi_chain = setup_multichain_comparison(temperatures)
     previous_error_count = None
+    autofix_totals = {}
     for i in range(1, iterations + 1):
         logging.info("--- Iteration %d/%d started ---", i, iterations)
         errors, formatted_errors = analyze_with_pylint(file_path)
+        if errors and PYLINT_AUTOFIX:
+            code_content, errors, residual_errors = run_deterministic_fixes(
+                file_path, code_content, errors, autofix_totals
+            )
+            formatted_errors = residual_errors or formatted_errors
         if not errors:
             logging.info("No error codes found. Workflow finished.")
             break
@@ -342,6 +674,15 @@ def iterative_process_with_pylint(file_path, code_content, iterations):
         if should_stop_iteration(previous_error_count, current_error_count):
             break
         previous_error_count = current_error_count
+        if PYLINT_LOCALIZED:
+            improved_code = improve_regions(code_content, errors)
+            if improved_code == code_content:
+                logging.info("No region could be improved in iteration %d.", i)
+                break
+            save_code_to_file(file_path, improved_code, i)
+            logging.info("Improved regions saved in iteration %d.", i)
+            code_content = improved_code
+            continue
         improved_code = run_multichain_for_code_improvement(
             multi_chain, code_content, formatted_errors
         )
@@ -350,7 +691,9 @@ def iterative_process_with_pylint(file_path, code_content, iterations):
             break
         if formatted_code := process_and_validate_code(improved_code, file_path, i):
             code_content = formatted_code
-            file_path = update_file_path(file_path, i)
         else:
             break
+    if autofix_totals:
+        rates = {code: tuple(counts) for code, counts in sorted(autofix_totals.items())}
+        print(f"[Pylint-Autofix] Auto-Fix-Quote je Code:\n{format_fix_rates(rates)}")
     logging.info("Iterative workflow finished.")
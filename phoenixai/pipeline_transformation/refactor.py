@@ -2,73 +2,78 @@
 This module provides functionalities for refactoring Python functions using a large language model (LLM).
 
 It allows users to select functions from a file, send them to an LLM for refactoring,
-and then replace the original functions with the refactored code.  The process uses asynchronous calls to manage LLM interaction.
+and then replace the original functions with the refactored code.  All selected functions are sent to the LLM concurrently and spliced back in a single write.
 """
 import ast
-import astor
+import contextvars
 import tkinter as tk
 import tempfile
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import simpledialog
-from phoenixai.utils.base_prompt_handling import save_code_to_file, trim_code, call_llm, read_file
+from phoenixai.utils.base_prompt_handling import save_code_to_file, trim_code, call_llm
+from phoenixai.utils.cancellation import DeadlineExceeded, deadline, raise_if_cancelled
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.prompt_minify import MinifiedSource, minify_for_action
+
+# Frist pro LLM-Aufruf in Sekunden; die Frist des Pipeline-Schritts gilt zusätzlich
+REFACTOR_LLM_TIMEOUT = 60
+# Maximale Anzahl gleichzeitiger LLM-Aufrufe beim Refactoring mehrerer Funktionen
+REFACTOR_MAX_PARALLEL = 20
 
 
 def extract_functions(file_path):
-    """Extract function definitions from a Python file.
+    """Extract function and method definitions from a Python file.
 
 Args:
     file_path (str): Path to the Python file.
 
 Returns:
-    list: A list of dictionaries, where each dictionary contains the name, start line, and end line of a function.
+    list: A list of dictionaries, where each dictionary contains the qualified name
+          (e.g. "Player.update" for methods), start line, and end line of a function.
           Returns an empty list if no functions are found."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        code = f.read()
-    parsed_ast = ast.parse(code)
-    functions = []
-    for node in parsed_ast.body:
-        if isinstance(node, ast.FunctionDef):
-            start_line = node.lineno
-            end_line = node.body[-1].end_lineno if hasattr(node.body[-1],
-                'end_lineno') else node.lineno
-            functions.append({'name': node.name, 'start_line': start_line,
-                'end_line': end_line})
-    return functions
+    index = CodeIndex.from_file(file_path)
+    return [{'name': entry['qualified_name'], 'start_line': entry['start_line'],
+        'end_line': entry['end_line']} for entry in index.functions()]
 
 
 def extract_function_by_name(file_path, function_name):
-    """Extract a specific function from a Python file by its name.
+    """Extract a specific function from a Python file by its (qualified) name.
 
 Args:
     file_path (str): Path to the Python file.
-    function_name (str): Name of the function to extract.
+    function_name (str): Qualified name of the function to extract.
 
 Returns:
     tuple: A tuple containing the function code (str), start line (int), and end line (int).
 
 Raises:
     ValueError: If the function is not found in the file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        code = f.read()
-    parsed_ast = ast.parse(code)
-    for node in parsed_ast.body:
-        if isinstance(node, ast.FunctionDef) and node.name == function_name:
-            start_line = node.lineno
-            end_line = node.body[-1].end_lineno if hasattr(node.body[-1],
-                'end_lineno') else node.lineno
-            return astor.to_source(node).strip(), start_line, end_line
-    raise ValueError(f'Funktion {function_name} nicht gefunden.')
-
-
-def generate_refactoring_prompt(function_code, function_name):
+    index = CodeIndex.from_file(file_path)
+    entry = index.get(function_name)
+    return index.source(function_name).strip(), entry['start_line'], entry[
+        'end_line']
+
+
+def generate_refactoring_prompt(function_code, function_name, is_method=False,
+    has_markers=False):
     """Generate a prompt for the LLM to refactor a given function.
 
 Args:
     function_code (str): The code of the function to refactor.
     function_name (str): The name of the function.
+    is_method (bool): Whether the function is a method; helpers then have to be methods of the same class.
+    has_markers (bool): Whether the code contains shortened docstrings with <<doc:N>> markers.
 
 Returns:
     str: The prompt for the LLM."""
+    method_hint = ("""
+            5. Die Funktion ist eine Methode. Lege alle Hilfsfunktionen als Methoden derselben Klasse an
+               (mit self oder als @staticmethod) und gib nur diese Methoden zurück, ohne die Klassendefinition.
+    """ if is_method else "")
+    marker_hint = (f"""
+            {6 if is_method else 5}. Docstrings mit einem Marker wie <<doc:1>> sind gekürzt. Übernimm jeden dieser
+               Docstrings samt Marker wörtlich in die Funktion, zu der er gehört; entferne oder ändere keinen Marker.
+    """ if has_markers else "")
     return f"""
             Hier ist der Python-Code für die Funktion {function_name}, die refaktoriert werden soll:
 
@@ -85,7 +90,7 @@ Returns:
             2. Die neuen Funktionen sollten möglichst selbsterklärende Namen tragen und den Code in logische Einheiten aufteilen.
             3. Die Semantik der Funktion (das letztliche Ergebnis und Verhalten) muss erhalten bleiben.
             4. Gib **nur** den komplett refaktorierten Code zurück, ohne zusätzliche Erklärungen oder Kommentare.
-    """
+    {method_hint}{marker_hint}"""
 
 
 def replace_function_in_code(lines, start_line, end_line, refactored_function):
@@ -159,46 +164,107 @@ Returns:
     return selected
 
 
-def process_single_function(file_path, func_name):
-    """Refactors a single function using an LLM.
+def _refactor_with_llm(func_name, prompt):
+    """Calls the LLM for one function within its own deadline.
 
-Args:
-    file_path (str): Path to the Python file.
-    func_name (str): Name of the function to refactor."""
+Returns:
+    str | None: The trimmed, syntactically valid refactored code, or None."""
     try:
-        function_code, start_line, end_line = extract_function_by_name(
-            file_path, func_name)
-    except ValueError as e:
-        print(f'[Refactor] {e}', flush=True)
-        return
-    prompt = generate_refactoring_prompt(function_code, func_name)
-    result_container = {}
-
-    def llm_call():
-        result_container['result'] = call_llm(prompt)
-    thread = threading.Thread(target=llm_call)
-    thread.start()
-    thread.join(timeout=60)
-    if thread.is_alive():
-        return
-    refactored_code = result_container.get('result', '')
+        with deadline(REFACTOR_LLM_TIMEOUT):
+            refactored_code = call_llm(prompt)
+    except DeadlineExceeded:
+        # Ist die Frist des ganzen Schritts abgelaufen, wird der Abbruch weitergereicht
+        raise_if_cancelled()
+        print(f'[Refactor] Zeitlimit für {func_name} überschritten, Funktion bleibt unverändert.',
+            flush=True)
+        return None
     trimmed_refactored_code = trim_code(refactored_code)
+    if not trimmed_refactored_code:
+        print(f'[Refactor] Keine Antwort des LLM für {func_name}.', flush=True)
+        return None
     try:
         ast.parse(trimmed_refactored_code)
     except SyntaxError as e:
         print(f'[Refactor] Syntaxfehler im LLM-Code für {func_name}: {e}',
             flush=True)
-        return
-    original_code = read_file(file_path)
-    lines = original_code.splitlines()
-    try:
-        _, current_start, current_end = extract_function_by_name(file_path,
-            func_name)
-    except ValueError as e:
-        print(f'[Refactor] Funktion {func_name} nicht mehr gefunden: {e}',
-            flush=True)
-        return
-    updated_lines = replace_function_in_code(lines, current_start,
-        current_end, trimmed_refactored_code)
-    new_code = '\n'.join(updated_lines)
+        return None
+    return trimmed_refactored_code
+
+
+def _refactor_all(prompts):
+    """Sends the prompts (function name -> prompt) to the LLM in parallel.
+
+Returns:
+    dict: Function name -> refactored code or None."""
+    with ThreadPoolExecutor(max_workers=min(REFACTOR_MAX_PARALLEL, len(prompts))) as executor:
+        # Jeder Aufruf läuft in einer Kopie des Kontexts (Deadline, Arbeitskopie der Pipeline)
+        futures = {func_name: executor.submit(contextvars.copy_context().run,
+            _refactor_with_llm, func_name, prompt) for func_name, prompt in prompts.items()}
+        return {func_name: future.result() for func_name, future in futures.items()}
+
+
+def refactor_functions(file_path, func_names):
+    """Refactors several functions of a file with concurrent LLM calls and a single write.
+
+The file is indexed once; all prompts are sent to the LLM in parallel (at most
+REFACTOR_MAX_PARALLEL at a time), and the valid results are spliced into the
+code bottom-up before the file is saved once.
+
+Args:
+    file_path (str): Path to the Python file.
+    func_names (list): Qualified names of the functions to refactor.
+
+Returns:
+    list: The names of the functions that were replaced."""
+    index = CodeIndex.from_file(file_path)
+    prompts = {}
+    minified = {}
+    for func_name in func_names:
+        if func_name not in index:
+            print(f'[Refactor] Funktion {func_name} nicht gefunden.', flush=True)
+            continue
+        # Lange Docstrings gehen gekürzt an das LLM und werden danach wieder eingesetzt
+        minified[func_name] = minify_for_action(index.source(func_name), 'Refactor')
+        prompts[func_name] = generate_refactoring_prompt(minified[func_name].text.strip(),
+            func_name, index.get(func_name)['kind'] == 'method',
+            bool(minified[func_name].docstrings))
+    if not prompts:
+        return []
+
+    results = _refactor_all(prompts)
+    # Hat das LLM Marker entfernt, ließen sich die Docstrings nicht wiederherstellen:
+    # diese Funktionen werden noch einmal mit dem vollständigen Code angefragt
+    retry = {}
+    for name, code in results.items():
+        missing = minified[name].missing_markers(code) if code else []
+        if missing:
+            print(f'[Refactor] Docstring-Marker {", ".join(missing)} fehlen für {name}, '
+                'neuer Versuch ohne gekürzte Docstrings.', flush=True)
+            minified[name] = MinifiedSource(index.source(name), index.source(name), {}, 'Refactor')
+            retry[name] = generate_refactoring_prompt(index.source(name).strip(), name,
+                index.get(name)['kind'] == 'method')
+    if retry:
+        results.update(_refactor_all(retry))
+
+    replacements = {name: minified[name].restore(code) for name, code in results.items() if code}
+    # Bei verschachtelter Auswahl (z. B. Funktion und innere Funktion) gewinnt die äußere Definition,
+    # damit sich die Ersetzungen nicht überlappen
+    for name in list(replacements):
+        if any(name.startswith(f'{other}.') for other in replacements if other != name):
+            print(f'[Refactor] {name} übersprungen, da die umgebende Definition ersetzt wird.', flush=True)
+            del replacements[name]
+    if not replacements:
+        return []
+    new_code = index.splice(replacements)
     save_code_to_file(file_path, new_code)
+    print(f'[Refactor] {len(replacements)} Funktion(en) ersetzt: {", ".join(replacements)}', flush=True)
+    return list(replacements)
+
+
+def process_single_function(file_path, func_name):
+    """Refactors a single function using an LLM.
+
+Args:
+    file_path (str): Path to the Python file.
+    func_name (str): Name of the function to refactor."""
+    refactor_functions(file_path, [func_name])
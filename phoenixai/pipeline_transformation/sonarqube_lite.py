@@ -5,6 +5,7 @@ It analyzes SonarQube results, groups issues, generates prompts for an LLM, proc
 """
 
 import logging
+import os
 from os.path import split
 from pathlib import Path
 import sys
@@ -16,9 +17,11 @@ from phoenixai.analysis.analyze import sonarqube_analysis
 from phoenixai.utils.base_prompt_handling import (
     call_llm,
     generate_initial_prompt,
+    read_file,
     save_code_to_file,
     trim_code,
 )
+from phoenixai.utils.llm_diff import request_code_change
 
 
 def analyze_sonar_issues():
@@ -63,11 +66,12 @@ def group_issues(issues, file_path, group_size=10):
     ]
 
 
-def generate_group_prompt(issues_group):
+def generate_group_prompt(issues_group, code_content=""):
     """Creates a combined prompt for a group of issues.
 
     Args:
         issues_group (dict): A dictionary containing a group of issues.
+        code_content (str): The code of the affected file, if available.
 
     Returns:
         str: The generated prompt as a string."""
@@ -77,17 +81,23 @@ def generate_group_prompt(issues_group):
         prompt_parts.append(
             f"- {issue['message']} (SonarQube-Rule: {issue['rule']}) in Datei {issue['component']}."
         )
-    prompt = f"{generate_initial_prompt('')}\n" + "\n".join(prompt_parts)
+    prompt = f"{generate_initial_prompt(code_content)}\n" + "\n".join(prompt_parts)
     return prompt
 
 
-def process_group_with_llm(prompt, code_file_paths, iteration=1):
+def _local_path(code_file_path):
+    """Converts a SonarQube component key (``project:path``) into a file path."""
+    return code_file_path.replace(':', '/') if ':' in code_file_path else code_file_path
+
+
+def process_group_with_llm(prompt, code_file_paths, iteration=1, original_code=None):
     """Sends the combined prompt to the LLM and saves the improved codes.
 
     Args:
         prompt (str): The generated prompt.
         code_file_paths (list): A list of affected files.
         iteration (int): The iteration number, used to save different versions.
+        original_code (str, optional): The code contained in the prompt; enables the diff output mode.
 
     Returns:
         list: A list of paths to the improved files.
@@ -96,15 +106,16 @@ def process_group_with_llm(prompt, code_file_paths, iteration=1):
         ValueError: If no response is received from the LLM or an error occurs during the call.
     """
     logging.info(f"Verarbeite Prompt mit {len(code_file_paths)} Dateien.")
-    response = call_llm(prompt)
-    if not response:
+    if original_code is not None:
+        improved_code = request_code_change(prompt, original_code)
+    else:
+        response = call_llm(prompt)
+        improved_code = trim_code(response.strip()) if response else ""
+    if not improved_code:
         raise ValueError("Keine Antwort vom LLM erhalten oder Fehler beim Aufruf.")
-    improved_code = trim_code(response.strip())
     improved_files = []
     for idx, code_file_path in enumerate(code_file_paths, start=1):
-        if ':' in code_file_path:
-            code_file_path = code_file_path.replace(':', '/')
-            
+        code_file_path = _local_path(code_file_path)
         improved_file = save_code_to_file(
             code_file_path, improved_code, iteration=iteration + idx
         )
@@ -121,11 +132,14 @@ def process_issue_groups(issue_groups):
         logging.info(
             f"Verarbeite Gruppe {group_idx}/{len(issue_groups)} mit {len(issues_group)} Issues."
         )
-        prompt = generate_group_prompt(issues_group)
         code_file_paths = [issue["component"] for issue in issues_group["issues"]]
+        original_code = None
+        if code_file_paths and os.path.isfile(_local_path(code_file_paths[0])):
+            original_code = read_file(_local_path(code_file_paths[0]))
+        prompt = generate_group_prompt(issues_group, original_code or "")
         try:
             improved_files = process_group_with_llm(
-                prompt, code_file_paths, iteration=group_idx
+                prompt, code_file_paths, iteration=group_idx, original_code=original_code
             )
             logging.info(
                 f"Gruppe {group_idx} erfolgreich verarbeitet. Verbesserte Dateien: {improved_files}"
@@ -5,6 +5,9 @@ import logging
 import os
 from typing import Optional
 
+from phoenixai.utils.cancellation import run_subprocess
+from phoenixai.utils.tracing import span
+
 
 def run_sourcery_fix(file_path: str) -> bool:
     """Runs Sourcery to automatically fix the code in the specified file.
@@ -19,9 +22,10 @@ def run_sourcery_fix(file_path: str) -> bool:
         return False
     command = ["sourcery", "review", "--fix", file_path]
     try:
-        result = subprocess.run(
-            command, capture_output=True, text=True, check=True, encoding="utf-8"
-        )
+        with span("subprocess: sourcery", "subprocess", path=file_path):
+            result = run_subprocess(
+                command, capture_output=True, text=True, check=True, encoding="utf-8"
+            )
         logging.info(f"Sourcery hat '{file_path}' erfolgreich korrigiert.")
         return True
     except subprocess.CalledProcessError as e:
@@ -3,16 +3,44 @@ This module provides functions for automatically adding type annotations to Pyth
 """
 
 import ast
-import astor
+import json
 import subprocess
 import shutil
 from phoenixai.utils.base_prompt_handling import (
+    STRUCTURED_OUTPUT,
     trim_code,
     read_file,
     save_code_to_file,
     call_llm,
-    run_black_and_isort,
+    call_structured_llm,
 )
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.prompt_minify import minify_for_action
+from phoenixai.utils.span_patch import SourcePatch, annotation_source
+
+# Strukturierte Antwort: nur die Signaturen je qualifiziertem Namen statt des ganzen Codes
+ANNOTATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "qualified_name": {"type": "string"},
+            "params": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "type": {"type": "string"},
+                    },
+                    "required": ["name", "type"],
+                },
+            },
+            "return_type": {"type": "string"},
+        },
+        "required": ["qualified_name", "params", "return_type"],
+    },
+}
 
 
 def generate_type_annotation_prompt(code_snippet):
@@ -44,9 +72,65 @@ Your task is to generate and insert **type annotations** for all classes, method
 """
 
 
+def generate_structured_type_annotation_prompt(code_snippet):
+    """Generates a prompt for the LLM to return only the type annotations as JSON.
+
+    Args:
+        code_snippet (str): The Python code for which to generate type annotations.
+
+    Returns:
+        str: The formatted prompt for the LLM."""
+    return f"""
+Here is the Python code: {code_snippet}
+
+Your task is to determine **type annotations** for the functions and methods in the given Python code.
+
+### Guidelines for Type Annotations:
+1. Use standard Python typing conventions (e.g., `from typing import Any, List, Dict`).
+2. For arguments and return values without clear types, use `Any`.
+3. Use `Self` for methods that return the instance of the same class.
+4. Ensure all annotations are consistent with the function/method usage.
+5. Keep existing type annotations unless they are incorrect.
+
+### Output Requirements:
+1. Respond with a JSON list containing one object per function or method whose annotations are missing or incorrect.
+   Functions that are already fully and correctly annotated must be left out.
+2. `qualified_name` is the name including enclosing classes and functions, e.g. `Player.update`.
+3. `params` lists every parameter except `self` and `cls` with its `name` and its `type` as a Python expression.
+4. `return_type` is the return annotation as a Python expression (`None` if nothing is returned).
+5. Do not return any code.
+"""
+
+
+def _valid_annotation(text):
+    """Returns the annotation if it is a valid Python expression, otherwise None."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        ast.parse(text, mode="eval")
+    except SyntaxError:
+        return None
+    return text
+
+
+def _all_arguments(arguments):
+    """Returns all parameters of a function (positional-only, regular, *args, keyword-only, **kwargs)."""
+    return [
+        *arguments.posonlyargs,
+        *arguments.args,
+        *([arguments.vararg] if arguments.vararg else []),
+        *arguments.kwonlyargs,
+        *([arguments.kwarg] if arguments.kwarg else []),
+    ]
+
+
 def insert_type_annotations(original_code, llm_response):
     """Inserts the generated type annotations into the original code or replaces existing annotations.
 
+    Functions and methods are matched by their qualified names, parameters by name. Only the
+    annotation spans are changed; existing annotations the LLM dropped are kept.
+
     Args:
         original_code (str): The original Python code.
         llm_response (str): The LLM-generated code with type annotations.
@@ -57,25 +141,69 @@ def insert_type_annotations(original_code, llm_response):
     Raises:
         RuntimeError: If an error occurs during the insertion process."""
     try:
-        original_ast = ast.parse(original_code)
-        llm_ast = ast.parse(llm_response)
-        for node in original_ast.body:
-            if isinstance(node, ast.FunctionDef):
-                for llm_node in llm_ast.body:
-                    if (
-                        isinstance(llm_node, ast.FunctionDef)
-                        and node.name == llm_node.name
-                    ):
-                        for orig_arg, llm_arg in zip(
-                            node.args.args, llm_node.args.args
-                        ):
-                            orig_arg.annotation = llm_arg.annotation
-                        node.returns = llm_node.returns
-        return astor.to_source(original_ast)
+        original_index = CodeIndex(original_code)
+        llm_index = CodeIndex(llm_response)
+        patch = SourcePatch(original_code)
+        for entry in original_index.functions():
+            if entry["qualified_name"] not in llm_index:
+                continue
+            node = entry["node"]
+            llm_node = llm_index.get(entry["qualified_name"])["node"]
+            if not isinstance(llm_node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            llm_arguments = {arg.arg: arg for arg in _all_arguments(llm_node.args)}
+            for orig_arg in _all_arguments(node.args):
+                llm_arg = llm_arguments.get(orig_arg.arg)
+                if llm_arg is not None and llm_arg.annotation is not None:
+                    patch.set_annotation(
+                        orig_arg, annotation_source(llm_response, llm_arg.annotation)
+                    )
+            if llm_node.returns is not None:
+                patch.set_return_annotation(
+                    node, annotation_source(llm_response, llm_node.returns)
+                )
+        return patch.apply()
     except Exception as e:
         raise RuntimeError(f"Fehler beim Einfügen der Typannotationen: {e}") from e
 
 
+def apply_annotation_updates(original_code, updates):
+    """Inserts type annotations from a structured LLM response into the original code.
+
+    Args:
+        original_code (str): The original Python code.
+        updates (list): The parsed JSON response (``{qualified_name, params, return_type}`` objects).
+
+    Returns:
+        str: The updated Python code with type annotations.
+
+    Raises:
+        RuntimeError: If the response is not a list."""
+    if not isinstance(updates, list):
+        raise RuntimeError("Fehler beim Einfügen der Typannotationen: Antwort ist keine Liste.")
+    index = CodeIndex(original_code)
+    patch = SourcePatch(original_code)
+    for update in updates:
+        if not isinstance(update, dict):
+            continue
+        entry = index.entries.get(update.get("qualified_name"))
+        if entry is None or entry["kind"] == "class":
+            continue
+        node = entry["node"]
+        arguments = {arg.arg: arg for arg in _all_arguments(node.args)}
+        for param in update.get("params") or []:
+            if not isinstance(param, dict) or param.get("name") in ("self", "cls"):
+                continue
+            arg = arguments.get(param.get("name"))
+            annotation = _valid_annotation(param.get("type"))
+            if arg is not None and annotation:
+                patch.set_annotation(arg, annotation)
+        returns = _valid_annotation(update.get("return_type"))
+        if returns:
+            patch.set_return_annotation(node, returns)
+    return patch.apply()
+
+
 def add_missing_typing_imports(code: str) -> str:
     """Scans the code for type annotations and automatically inserts missing imports from the typing module.
 
@@ -102,13 +230,15 @@ def add_missing_typing_imports(code: str) -> str:
     class TypeAnnotationVisitor(ast.NodeVisitor):
 
         def visit_FunctionDef(self, node):
-            for arg in node.args.args:
+            for arg in _all_arguments(node.args):
                 if arg.annotation:
                     self.process_annotation(arg.annotation)
             if node.returns:
                 self.process_annotation(node.returns)
             self.generic_visit(node)
 
+        visit_AsyncFunctionDef = visit_FunctionDef
+
         def visit_AnnAssign(self, node):
             if node.annotation:
                 self.process_annotation(node.annotation)
@@ -144,29 +274,40 @@ def add_missing_typing_imports(code: str) -> str:
     missing_imports = found_types - existing_imports
     if missing_imports:
         import_line = f"from typing import {', '.join(sorted(missing_imports))}\n"
-        lines = code.splitlines()
-        insert_pos = 0
-        if lines and lines[0].startswith('"""'):
-            for i in range(1, len(lines)):
-                if lines[i].strip().endswith('"""'):
-                    insert_pos = i + 1
-                    break
-        lines.insert(insert_pos, import_line)
-        code = "\n".join(lines)
+        patch = SourcePatch(code)
+        patch.insert_lines(patch.module_insert_line(tree), import_line)
+        code = patch.apply()
     return code
 
 
-def annotation_process_file(file_path):
-    """Complete process for generating and inserting type annotations, auto-adding necessary typing imports,
-    and then applying isort.
+def annotation_process_file(file_path, structured=STRUCTURED_OUTPUT):
+    """Complete process for generating and inserting type annotations and auto-adding necessary typing imports.
+
+    Only the changed annotation spans are written; no formatter pass over the whole file is needed afterwards.
 
     Args:
-        file_path (str): The path to the file to be processed."""
+        file_path (str): The path to the file to be processed.
+        structured (bool): Request only the signatures as JSON instead of the annotated code.
+
+    Raises:
+        RuntimeError: If the LLM response cannot be applied."""
     original_code = read_file(file_path)
-    prompt = generate_type_annotation_prompt(original_code)
-    llm_response = call_llm(prompt)
-    trimmed_llm_code = trim_code(llm_response)
-    updated_code = insert_type_annotations(original_code, trimmed_llm_code)
+    # Kommentare und Docstring-Rümpfe braucht das LLM für die Signaturen nicht
+    prompt_code = minify_for_action(original_code, "Type Annotation Updater").text
+    if structured:
+        llm_response = call_structured_llm(
+            generate_structured_type_annotation_prompt(prompt_code), ANNOTATION_SCHEMA
+        )
+        if llm_response is None:
+            raise RuntimeError("Fehler beim Einfügen der Typannotationen: keine Antwort vom LLM")
+        try:
+            updates = json.loads(llm_response)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Fehler beim Einfügen der Typannotationen: ungültiges JSON ({e})") from e
+        updated_code = apply_annotation_updates(original_code, updates)
+    else:
+        llm_response = call_llm(generate_type_annotation_prompt(prompt_code))
+        trimmed_llm_code = trim_code(llm_response)
+        updated_code = insert_type_annotations(original_code, trimmed_llm_code)
     updated_code = add_missing_typing_imports(updated_code)
     save_code_to_file(file_path, updated_code)
-    run_black_and_isort(file_path)
@@ -34,6 +34,12 @@ class ActionManager:
             cb = tb.Checkbutton(transformation_frame, text=t_name, variable=var, bootstyle="secondary")
             cb.pack(side="left", padx=5, pady=2)
 
+    def chosen_actions(self):
+        """Liefert die ausgewählten Aktionen als Liste aus (Art, Name) in Pipeline-Reihenfolge."""
+        chosen = [("analysis", name) for name, info in self.analysis_vars.items() if info["var"].get()]
+        chosen += [("transform", name) for name, info in self.transform_vars.items() if info["var"].get()]
+        return chosen
+
     def confirm_actions(self, selected_file):
         """Bestätigt die ausgewählten Aktionen und fügt sie der Pipeline hinzu."""
         chosen_analysis = [name for name, info in self.analysis_vars.items() if info["var"].get()]
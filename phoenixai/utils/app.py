@@ -9,10 +9,15 @@ aus der GUI heraus gestartet.
 """
 
 import os
+import io
+import html
 import json
+import pstats
 import urllib.parse
 import markdown
-from flask import Flask, request, abort, render_template_string
+from flask import Flask, request, abort, render_template_string, jsonify, send_file
+
+from phoenixai.utils.tracing import chrome_to_speedscope, is_top_level_work
 
 app = Flask(__name__)
 
@@ -155,6 +160,181 @@ INDEX_TEMPLATE = """
 </html>
 """
 
+# HTML-Vorlage für die Flame-Chart-Ansicht eines Pipeline-Traces
+TRACE_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="UTF-8">
+    <title>Trace: {{ report_name }}</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 2em; }
+        a { text-decoration: none; color: blue; }
+        .lane { position: relative; margin-bottom: 1.5em; border-top: 1px solid #ccc; }
+        .span {
+            position: absolute; height: 20px; overflow: hidden; white-space: nowrap;
+            font-size: 11px; line-height: 20px; padding-left: 2px; box-sizing: border-box;
+            border: 1px solid #fff; color: #222;
+        }
+        .cat-pipeline { background: #9ecae1; }
+        .cat-llm { background: #fdae6b; }
+        .cat-subprocess { background: #a1d99b; }
+        .cat-io { background: #bcbddc; }
+        .cat-sqlite { background: #fdd0a2; }
+        .cat-profiling { background: #c7e9c0; }
+        .cat-other { background: #d9d9d9; }
+        table { border-collapse: collapse; margin-bottom: 1.5em; }
+        td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+    </style>
+</head>
+<body>
+    <h1>Trace: {{ run_name }}</h1>
+    <p>
+        <a href="/">Zurück zur Übersicht</a> |
+        <a href="/raw_report?report={{ report_name | url_encode }}">Chrome-Trace-JSON (chrome://tracing, Perfetto)</a> |
+        <a href="/raw_report?report={{ report_name | url_encode }}&format=speedscope">speedscope-JSON</a>
+    </p>
+    <p>Gesamtdauer: {{ "%.3f"|format(total_ms / 1000) }} s</p>
+    <table>
+        <tr><th>Kategorie</th><th>Zeit (s)</th><th>Anteil</th></tr>
+        {% for category, seconds in categories %}
+            <tr><td>{{ category }}</td><td>{{ "%.3f"|format(seconds) }}</td>
+                <td>{{ "%.1f"|format(100 * seconds * 1000 / total_ms if total_ms else 0) }} %</td></tr>
+        {% endfor %}
+    </table>
+    {% for lane in lanes %}
+        <h3>Thread {{ lane.name }}</h3>
+        <div class="lane" style="height: {{ (lane.depth + 1) * 22 }}px;">
+            {% for s in lane.spans %}
+                <div class="span cat-{{ s.css }}"
+                     style="left: {{ s.left }}%; width: {{ s.width }}%; top: {{ s.depth * 22 }}px;"
+                     title="{{ s.name }} – {{ '%.3f'|format(s.dur_ms) }} ms {{ s.args }}">{{ s.name }}</div>
+            {% endfor %}
+        </div>
+    {% endfor %}
+</body>
+</html>
+"""
+
+# HTML-Vorlage für den annotierten Quelltext eines Zeilen-Profils (line_runner)
+LINE_PROFILE_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="UTF-8">
+    <title>Zeilen-Profil: {{ report_name }}</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 2em; }
+        a { text-decoration: none; color: blue; }
+        table.source { border-collapse: collapse; font-family: Consolas, Monaco, monospace; font-size: 12px; }
+        table.source td { padding: 0 8px; white-space: pre; }
+        table.source td.num { text-align: right; color: #666; }
+        table.source tr.hot td { border-top: 1px solid #fff; }
+    </style>
+</head>
+<body>
+    <h1>Zeilen-Profil: {{ data.target }}</h1>
+    <p>
+        <a href="/">Zurück zur Übersicht</a> |
+        <a href="/raw_report?report={{ report_name | url_encode }}">JSON herunterladen</a>
+    </p>
+    <p>Status: {{ data.status }} · {{ data.engine }} · {{ "%.2f"|format(data.elapsed_ns / 1e9) }} s.
+       Zeit je Zeile inklusive der Aufrufe aus ihr heraus; Farbe nach Anteil an der Gesamtzeit.</p>
+    {% for file in files %}
+        <h3>{{ file.name }} ({{ "%.1f"|format(file.max_percent) }} % in der heißesten Zeile)</h3>
+        <table class="source">
+            <tr><th>Zeile</th><th>Aufrufe</th><th>Zeit (ms)</th><th>Anteil</th><th></th></tr>
+            {% for row in file.rows %}
+                <tr class="{{ 'hot' if row.hits else '' }}" style="background: rgba(230, 60, 30, {{ row.heat }});">
+                    <td class="num">{{ row.line }}</td>
+                    <td class="num">{{ row.hits or "" }}</td>
+                    <td class="num">{{ "%.2f"|format(row.ms) if row.hits else "" }}</td>
+                    <td class="num">{{ "%.1f %%"|format(row.percent) if row.hits else "" }}</td>
+                    <td>{{ row.text }}</td>
+                </tr>
+            {% endfor %}
+        </table>
+    {% endfor %}
+</body>
+</html>
+"""
+
+KNOWN_TRACE_CATEGORIES = {"pipeline", "llm", "subprocess", "io", "sqlite", "profiling"}
+
+
+def build_flame_chart(trace):
+    """Berechnet aus einem Chrome-Trace die Positionen der Spans für die Flame-Chart-Ansicht."""
+    events = [e for e in trace.get("traceEvents", []) if e.get("ph") == "X"]
+    thread_names = {e["tid"]: e["args"]["name"] for e in trace.get("traceEvents", [])
+                    if e.get("ph") == "M" and e.get("name") == "thread_name"}
+    if not events:
+        return [], 0.0, []
+    t0 = min(e["ts"] for e in events)
+    total = max(e["ts"] + e["dur"] for e in events) - t0 or 1.0
+
+    lanes = {}
+    categories = {}
+    for e in events:
+        depth = e.get("args", {}).get("depth", 0)
+        lane = lanes.setdefault(e["tid"], {"name": thread_names.get(e["tid"], e["tid"]), "depth": 0, "spans": []})
+        lane["depth"] = max(lane["depth"], depth)
+        args = {k: v for k, v in e.get("args", {}).items() if k != "depth"}
+        lane["spans"].append({
+            "name": e["name"],
+            "css": e["cat"] if e["cat"] in KNOWN_TRACE_CATEGORIES else "other",
+            "left": round(100 * (e["ts"] - t0) / total, 4),
+            "width": max(round(100 * e["dur"] / total, 4), 0.05),
+            "depth": depth,
+            "dur_ms": e["dur"] / 1000,
+            "args": args or "",
+        })
+        if is_top_level_work(e):
+            categories[e["cat"]] = categories.get(e["cat"], 0.0) + e["dur"] / 1e6
+    return list(lanes.values()), total / 1000, sorted(categories.items(), key=lambda c: -c[1])
+
+
+def build_line_heatmap(data):
+    """Bereitet ein Zeilen-Profil für LINE_PROFILE_TEMPLATE auf; heißeste Dateien zuerst."""
+    elapsed = data.get("elapsed_ns") or 1
+    files = []
+    for filename, entry in data.get("files", {}).items():
+        rows = []
+        for line, text in enumerate(entry.get("source", []), start=1):
+            stat = entry["lines"].get(str(line), {"hits": 0, "time_ns": 0})
+            share = stat["time_ns"] / elapsed
+            # Wurzel, damit auch Zeilen mit wenigen Prozent sichtbar eingefärbt werden
+            rows.append({"line": line, "hits": stat["hits"], "ms": stat["time_ns"] / 1e6,
+                         "percent": 100 * share, "heat": round(min(share, 1.0) ** 0.5 * 0.8, 3),
+                         "text": text.rstrip("\n")})
+        max_percent = max((row["percent"] for row in rows), default=0.0)
+        files.append({"name": filename, "rows": rows, "max_percent": max_percent})
+    files.sort(key=lambda f: -f["max_percent"])
+    return files
+
+
+def resolve_report_path(report_param):
+    report_rel_path = urllib.parse.unquote(report_param)
+    report_path = os.path.join(REPORTS_DIR, report_rel_path)
+    if not os.path.abspath(report_path).startswith(os.path.abspath(REPORTS_DIR)):
+        abort(403, "Zugriff verweigert.")
+    if not os.path.isfile(report_path):
+        abort(404, "Report nicht gefunden.")
+    return report_rel_path, report_path
+
+
+@app.route("/raw_report")
+def raw_report():
+    """Liefert eine Report-Datei unverändert aus (z. B. Trace-JSON zum Laden in externe Viewer)."""
+    report_param = request.args.get("report")
+    if not report_param:
+        abort(400, "Kein Report angegeben.")
+    _, report_path = resolve_report_path(report_param)
+    if request.args.get("format") == "speedscope":
+        with open(report_path, "r", encoding="utf-8") as f:
+            return jsonify(chrome_to_speedscope(json.load(f)))
+    return send_file(os.path.abspath(report_path), as_attachment=True)
+
+
 @app.route("/")
 def index():
     if not os.path.isdir(REPORTS_DIR):
@@ -168,12 +348,20 @@ def view_report():
     if not report_param:
         abort(400, "Kein Report angegeben.")
 
-    report_rel_path = urllib.parse.unquote(report_param)
-    report_path = os.path.join(REPORTS_DIR, report_rel_path)
-    if not os.path.abspath(report_path).startswith(os.path.abspath(REPORTS_DIR)):
-        abort(403, "Zugriff verweigert.")
-    if not os.path.isfile(report_path):
-        abort(404, "Report nicht gefunden.")
+    report_rel_path, report_path = resolve_report_path(report_param)
+
+    if report_path.endswith(".pstats"):
+        # Binäre cProfile-Daten: als Tabelle anzeigen, Download über /raw_report
+        stream = io.StringIO()
+        try:
+            pstats.Stats(report_path, stream=stream).sort_stats("cumulative").print_stats(40)
+        except Exception as e:
+            abort(500, f"Fehler beim Lesen der Profildaten: {e}")
+        download = f"/raw_report?report={urllib.parse.quote(report_rel_path)}"
+        html_content = (f'<p><a href="{download}">{os.path.basename(report_path)} herunterladen</a> '
+                        f'(z. B. für snakeviz oder <code>python -m pstats</code>)</p>'
+                        f'<pre><code>{html.escape(stream.getvalue())}</code></pre>')
+        return render_template_string(REPORT_TEMPLATE, report_name=report_rel_path, report_content=html_content)
 
     try:
         with open(report_path, "r", encoding="utf-8") as f:
@@ -181,6 +369,34 @@ def view_report():
     except Exception as e:
         abort(500, f"Fehler beim Lesen des Reports: {e}")
 
+    if report_path.endswith(".svg"):
+        # Flame Graph des Sampling-Profilers; Tooltips (<title>) funktionieren nur inline
+        speedscope = report_path[:-len(".svg")] + ".speedscope.json"
+        links = ""
+        if os.path.isfile(speedscope):
+            rel = os.path.relpath(speedscope, REPORTS_DIR).replace(os.sep, "/")
+            links = (f'<p><a href="/raw_report?report={urllib.parse.quote(rel)}">{os.path.basename(speedscope)} '
+                     f'herunterladen</a> (interaktiv in https://www.speedscope.app öffnen)</p>')
+        html_content = f'{links}<div style="overflow-x: auto">{content}</div>'
+        return render_template_string(REPORT_TEMPLATE, report_name=report_rel_path, report_content=html_content)
+
+    if report_path.endswith(".lines.json"):
+        data = json.loads(content)
+        return render_template_string(LINE_PROFILE_TEMPLATE, report_name=report_rel_path, data=data,
+                                      files=build_line_heatmap(data))
+
+    if report_path.endswith(".json") and "traceEvents" in content:
+        trace = json.loads(content)
+        lanes, total_ms, categories = build_flame_chart(trace)
+        return render_template_string(
+            TRACE_TEMPLATE,
+            report_name=report_rel_path,
+            run_name=trace.get("otherData", {}).get("run", report_rel_path),
+            lanes=lanes,
+            total_ms=total_ms,
+            categories=categories,
+        )
+
     # Nutze Markdown-Extensions für Code-Blocks
     html_content = markdown.markdown(content, extensions=["fenced_code", "codehilite"])
     return render_template_string(REPORT_TEMPLATE, report_name=report_rel_path, report_content=html_content)
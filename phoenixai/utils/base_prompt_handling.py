@@ -3,10 +3,17 @@ import logging
 import os
 import subprocess
 from pathlib import Path
+from typing import Optional
 
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from phoenixai.utils.cancellation import (DEFAULT_LLM_TIMEOUT, OperationCancelled, raise_if_cancelled,
+                                          remaining_time, run_subprocess)
+from phoenixai.utils.document import (current_session, format_with_black, format_with_isort,
+                                      remove_unused_imports_in_memory)
+from phoenixai.utils.tracing import span
+
 """This module provides functions to improve Python code using a large language model (LLM).
 
 It reads Python code from a file, sends it to the LLM for improvement,
@@ -42,9 +49,14 @@ def read_file(file_path):
 
     Raises:
         FileNotFoundError: If the file does not exist."""
+    session = current_session()
+    if session is not None and file_path in session:
+        return session.open(file_path).text
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"Die Datei {file_path} existiert nicht.")
-    with open(file_path, "r", encoding="utf-8") as f:
+    if session is not None:
+        return session.open(file_path).text
+    with span("read_file", "io", path=str(file_path)), open(file_path, "r", encoding="utf-8") as f:
         return f.read()
 
 
@@ -91,30 +103,98 @@ Zu behebende Probleme:
 """
 
 
-def call_llm(prompt: str, temperature: float = 0.7) -> str:
+def call_llm(prompt: str, temperature: float = 0.7, timeout: float = DEFAULT_LLM_TIMEOUT) -> str:
     """Calls the LLM (Gemini) with a given prompt and temperature.
 
     Args:
         prompt (str): The input prompt for the LLM.
         temperature (float, optional): The creativity of the LLM. Defaults to 0.7.
+        timeout (float, optional): Maximum seconds for the request; the active
+            cancellation deadline (e.g. of the pipeline step) may shorten it.
 
     Returns:
-        str: The generated output of the LLM."""
+        str: The generated output of the LLM.
+
+    Raises:
+        OperationCancelled: If the active cancellation token was cancelled or its deadline expired."""
     try:
+        raise_if_cancelled()
         model = load_llm_model()
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(temperature=temperature),
-        )
-        if response and response.candidates:
-            return response.candidates[0].content.parts[0].text
+        request_timeout = remaining_time(timeout)
+        with span("LLM: gemini", "llm", prompt_chars=len(prompt), temperature=temperature) as info:
+            response = model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(temperature=temperature),
+                request_options={"timeout": max(1.0, request_timeout)},
+            )
+            # Eine verspätete Antwort darf nach Ablauf der Frist nicht mehr weiterverarbeitet werden
+            raise_if_cancelled()
+            if response and response.candidates:
+                text = response.candidates[0].content.parts[0].text
+                info["response_chars"] = len(text)
+                return text
         logging.error("Keine validen Ergebnisse vom LLM erhalten.")
         return ""
+    except OperationCancelled:
+        raise
     except Exception as e:
+        raise_if_cancelled()
         logging.error(f"Fehler beim Aufrufen des LLM: {e}")
         return ""
 
 
+# Docstring- und Typannotations-Schritte fragen JSON statt des ganzen Codes an (0 = Code-Echo wie bisher)
+STRUCTURED_OUTPUT = os.getenv("PHOENIXAI_STRUCTURED_OUTPUT", "1") != "0"
+
+
+def call_structured_llm(prompt: str, response_schema, temperature: float = 0.3,
+                        timeout: float = DEFAULT_LLM_TIMEOUT) -> Optional[str]:
+    """Calls the LLM (Gemini) with a JSON response schema instead of free text.
+
+    The model only returns the requested fields (e.g. docstrings or signatures per
+    qualified name) instead of echoing whole files, which keeps output tokens small.
+
+    Args:
+        prompt (str): The input prompt for the LLM.
+        response_schema (dict): OpenAPI-style schema of the expected JSON response.
+        temperature (float, optional): The creativity of the LLM. Defaults to 0.3.
+        timeout (float, optional): Maximum seconds for the request; the active
+            cancellation deadline may shorten it.
+
+    Returns:
+        Optional[str]: The JSON text of the response, or None if the call failed or the LLM
+        gave no valid result (unlike an empty JSON list, which is a valid answer).
+
+    Raises:
+        OperationCancelled: If the active cancellation token was cancelled or its deadline expired."""
+    try:
+        raise_if_cancelled()
+        model = load_llm_model("gemini-1.5-flash")
+        with span("LLM: gemini (structured)", "llm", prompt_chars=len(prompt), temperature=temperature) as info:
+            response = model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=temperature,
+                    response_mime_type="application/json",
+                    response_schema=response_schema,
+                ),
+                request_options={"timeout": max(1.0, remaining_time(timeout))},
+            )
+            raise_if_cancelled()
+            if response and response.candidates:
+                raw_text = response.candidates[0].content.parts[0].text
+                info["response_chars"] = len(raw_text)
+                return raw_text
+        logging.error("Keine validen Ergebnisse vom LLM erhalten.")
+        return None
+    except OperationCancelled:
+        raise
+    except Exception as e:
+        raise_if_cancelled()
+        logging.error(f"Fehler beim Aufrufen des LLM für strukturierte Ausgabe: {e}")
+        return None
+
+
 def _strip_code_start(improved_code):
     """Removes Markdown markers from the beginning of the code."""
     lines = improved_code.splitlines()
@@ -156,9 +236,19 @@ def save_code_to_file(file_path, improved_code, iteration=None):
 
     Returns:
         str: The path to the saved file.
+
+    Raises:
+        OperationCancelled: If the active step was cancelled or timed out; nothing is written then.
     """
+    raise_if_cancelled()
+    session = current_session()
+    if session is not None:
+        # Innerhalb einer Kette nur die Arbeitskopie ändern; geschrieben wird am Ende der Kette
+        session.open(file_path, create=True).text = improved_code
+        print(f"[Save] Code in Arbeitskopie übernommen: {file_path}")
+        return file_path
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
+        with span("save_code_to_file", "io", path=str(file_path)), open(file_path, "w", encoding="utf-8") as f:
             f.write(improved_code)
         print(f"[Save] Code gespeichert unter: {file_path}")
     except Exception as error:
@@ -183,14 +273,23 @@ def format_file_with_black(file_path):
         raise FileNotFoundError(
             f"Die angegebene Datei existiert nicht: {file.resolve()}"
         )
+    session = current_session()
+    if session is not None:
+        try:
+            format_with_black(session.open(file))
+        except Exception as e:
+            raise RuntimeError(f"Fehler beim Formatieren der Datei mit Black: {file.resolve()}.\n{e}") from e
+        print(f"[Black] Die Datei {file.resolve()} wurde in der Arbeitskopie formatiert.")
+        return
     try:
-        subprocess.run(
-            ["black", str(file)],
-            check=True,
-            text=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        with span("subprocess: black", "subprocess", path=str(file)):
+            run_subprocess(
+                ["black", str(file)],
+                check=True,
+                text=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
         print(f"[Black] Die Datei {file.resolve()} wurde erfolgreich formatiert.")
     except subprocess.CalledProcessError as e:
         raise RuntimeError(
@@ -200,7 +299,12 @@ Black-Ausgabe:
         ) from e
 
 def remove_unused_imports(file_path):
-    subprocess.run(["autoflake", "--remove-all-unused-imports", "--in-place", file_path])
+    session = current_session()
+    if session is not None:
+        remove_unused_imports_in_memory(session.open(file_path))
+        return
+    with span("subprocess: autoflake", "subprocess", path=str(file_path)):
+        run_subprocess(["autoflake", "--remove-all-unused-imports", "--in-place", file_path])
 
 
 def apply_isort_to_file(file_path):
@@ -218,14 +322,24 @@ def apply_isort_to_file(file_path):
         raise FileNotFoundError(
             f"Die angegebene Datei existiert nicht: {file.resolve()}"
         )
+    session = current_session()
+    if session is not None:
+        try:
+            format_with_isort(session.open(file))
+        except Exception as e:
+            raise RuntimeError(f"Fehler beim Anwenden von isort auf die Datei: {file.resolve()}.\n{e}") from e
+        remove_unused_imports(file_path)
+        print(f"[Isort] Die Datei {file.resolve()} wurde in der Arbeitskopie bearbeitet.")
+        return
     try:
-        subprocess.run(
-            ["isort", str(file)],
-            check=True,
-            text=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        with span("subprocess: isort", "subprocess", path=str(file)):
+            run_subprocess(
+                ["isort", str(file)],
+                check=True,
+                text=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
         remove_unused_imports(file_path)
         print(f"[Isort] Die Datei {file.resolve()} wurde erfolgreich bearbeitet.")
     except subprocess.CalledProcessError as e:
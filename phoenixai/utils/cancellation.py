@@ -0,0 +1,207 @@
+# cancellation.py
+"""
+Deadlines und kooperativer Abbruch für Pipeline-Schritte, LLM-Aufrufe und Subprozesse.
+
+Ein CancellationToken trägt eine optionale Deadline (monotone Uhr) und kann
+explizit abgebrochen werden. Das aktive Token wird über eine ContextVar
+weitergereicht, sodass tief verschachtelte Funktionen (``call_llm``,
+``run_subprocess``, ``save_code_to_file``) es ohne zusätzliche Parameter finden.
+
+- ``run_subprocess`` beendet den Prozess (samt Prozessgruppe) hart, sobald die
+  Deadline abläuft oder das Token abgebrochen wird.
+- ``deadline(seconds)`` setzt für einen Block eine engere Frist, z. B. pro LLM-Aufruf.
+- ``raise_if_cancelled()`` ist der Prüfpunkt vor Seiteneffekten wie Dateischreibzugriffen.
+
+Beispiel:
+
+    with cancellation_scope(CancellationToken(timeout=300)):
+        with deadline(60):
+            text = call_llm(prompt)
+        run_subprocess(["pylint", file_path], capture_output=True, text=True)
+"""
+
+import contextvars
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Sequence
+
+
+def _optional_seconds(value: str) -> Optional[float]:
+    """Sekunden aus einer Umgebungsvariable; 0, "none" oder leer bedeuten keine Frist."""
+    value = value.strip().lower()
+    if value in ("", "none"):
+        return None
+    seconds = float(value)
+    return seconds if seconds > 0 else None
+
+
+# Standard-Frist für einen Pipeline-Schritt in Sekunden (PHOENIXAI_STEP_TIMEOUT=0 oder none: unbegrenzt)
+DEFAULT_STEP_TIMEOUT = _optional_seconds(os.getenv("PHOENIXAI_STEP_TIMEOUT", "900"))
+# Standard-Frist für einen einzelnen LLM-Aufruf in Sekunden
+DEFAULT_LLM_TIMEOUT = float(os.getenv("PHOENIXAI_LLM_TIMEOUT", "120"))
+
+_POLL_INTERVAL = 0.2
+
+
+class OperationCancelled(Exception):
+    """Die Arbeit wurde über das CancellationToken abgebrochen."""
+
+
+class DeadlineExceeded(OperationCancelled, TimeoutError):
+    """Die Deadline des aktiven CancellationTokens ist abgelaufen."""
+
+
+class CancellationToken:
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        """
+        :param timeout: Frist in Sekunden ab jetzt (None = keine eigene Deadline).
+        :param parent: Übergeordnetes Token; dessen Abbruch und Deadline gelten mit.
+        """
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason: str = "abgebrochen"):
+        self.reason = reason
+        self._cancelled.set()
+
+    @property
+    def expired(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self.parent.expired if self.parent else False
+
+    @property
+    def cancelled(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+        return self.expired or (self.parent.cancelled if self.parent else False)
+
+    def remaining(self) -> Optional[float]:
+        """Verbleibende Zeit in Sekunden bis zur engsten Deadline (None = unbegrenzt)."""
+        candidates = []
+        if self.deadline is not None:
+            candidates.append(self.deadline - time.monotonic())
+        parent_remaining = self.parent.remaining() if self.parent else None
+        if parent_remaining is not None:
+            candidates.append(parent_remaining)
+        return max(0.0, min(candidates)) if candidates else None
+
+    def raise_if_cancelled(self):
+        if self.expired:
+            raise DeadlineExceeded("Zeitlimit überschritten")
+        if self.cancelled:
+            raise OperationCancelled(self.reason or (self.parent.reason if self.parent else None) or "abgebrochen")
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "phoenixai_cancellation_token", default=None
+)
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: Optional[CancellationToken]):
+    """Macht das Token für den Block (und mit copy_context gestartete Threads) aktiv."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Engere Frist für einen Block; erbt Abbruch und Deadline des aktiven Tokens."""
+    with cancellation_scope(CancellationToken(timeout=seconds, parent=current_token())) as token:
+        yield token
+
+
+def raise_if_cancelled():
+    token = current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Verbleibende Zeit des aktiven Tokens, begrenzt durch default."""
+    token = current_token()
+    remaining = token.remaining() if token is not None else None
+    if remaining is None:
+        return default
+    return remaining if default is None else min(remaining, default)
+
+
+def _kill(process: subprocess.Popen):
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def _interrupt(process: subprocess.Popen, grace: float):
+    """Sendet SIGINT (der Prozess kann noch aufräumen, z. B. Profile schreiben) und beendet ihn nach grace Sekunden hart."""
+    if os.name == "posix":
+        try:
+            os.killpg(process.pid, signal.SIGINT)
+            process.wait(timeout=grace)
+            return
+        except (ProcessLookupError, PermissionError, OSError, subprocess.TimeoutExpired):
+            pass
+    _kill(process)
+
+
+def run_subprocess(cmd: Sequence[str], timeout: Optional[float] = None, check: bool = False,
+                   input=None, capture_output: bool = False, interrupt_grace: Optional[float] = None,
+                   **popen_kwargs) -> subprocess.CompletedProcess:
+    """
+    Wie ``subprocess.run``, beachtet aber das aktive CancellationToken.
+
+    Läuft die engste Frist (timeout oder Token) ab oder wird das Token abgebrochen,
+    wird der Prozess samt Kindprozessen beendet und DeadlineExceeded bzw.
+    OperationCancelled ausgelöst.
+
+    :param interrupt_grace: Wenn gesetzt, bekommt der Prozess vor dem harten Beenden erst
+        SIGINT und so viele Sekunden Zeit, sich selbst zu beenden (nur POSIX).
+    """
+    token = CancellationToken(timeout=timeout, parent=current_token())
+    token.raise_if_cancelled()
+    if capture_output:
+        popen_kwargs.setdefault("stdout", subprocess.PIPE)
+        popen_kwargs.setdefault("stderr", subprocess.PIPE)
+    if input is not None:
+        popen_kwargs.setdefault("stdin", subprocess.PIPE)
+    if os.name == "posix":
+        # Eigene Prozessgruppe, damit beim Abbruch auch Enkelprozesse (docker, pydeps -> dot) enden
+        popen_kwargs.setdefault("start_new_session", True)
+
+    with subprocess.Popen(cmd, **popen_kwargs) as process:
+        while True:
+            try:
+                stdout, stderr = process.communicate(input=input, timeout=_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if token.cancelled:
+                    if interrupt_grace is not None:
+                        _interrupt(process, interrupt_grace)
+                    else:
+                        _kill(process)
+                    process.communicate()
+                    print(f"[Cancel] Prozess beendet: {' '.join(map(str, cmd))}", flush=True)
+                    token.raise_if_cancelled()
+
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
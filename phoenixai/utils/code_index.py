@@ -0,0 +1,138 @@
+# code_index.py
+"""
+Index der Funktionen, Methoden und Klassen einer Python-Datei.
+
+Der Index wird einmal aus dem AST aufgebaut und enthält für jede Definition den
+qualifizierten Namen (z. B. ``Player.update``), die Zeilen inklusive Dekoratoren,
+die Einrückung und den Quelltext-Ausschnitt. Über ``splice`` lassen sich mehrere
+Definitionen in einem Durchgang ersetzen (von unten nach oben, damit die
+Zeilennummern der übrigen Einträge gültig bleiben); danach wird der Index neu
+aufgebaut.
+"""
+
+import ast
+import textwrap
+from typing import Dict, List, Optional, Tuple
+
+from phoenixai.utils.document import parse_shared
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class CodeIndex:
+    def __init__(self, code: str):
+        """
+        :param code: Quelltext der Datei.
+        :raises SyntaxError: Wenn der Code nicht geparst werden kann.
+        """
+        self.entries: Dict[str, Dict] = {}
+        self._load(code)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "CodeIndex":
+        from phoenixai.utils.base_prompt_handling import read_file
+        return cls(read_file(file_path))
+
+    def _load(self, code: str):
+        self.code = code
+        self.lines = code.splitlines(keepends=True)
+        self.entries = {}
+        self.tree = parse_shared(code)
+        self._build(self.tree)
+
+    def _build(self, tree: ast.AST):
+        def visit(body, prefix: str, parent_kind: Optional[str]):
+            for node in body:
+                if isinstance(node, FUNCTION_NODES):
+                    kind = "method" if parent_kind == "class" else "function"
+                elif isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    continue
+                qualified_name = f"{prefix}{node.name}"
+                start_line = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                self.entries[qualified_name] = {
+                    "name": node.name,
+                    "qualified_name": qualified_name,
+                    "kind": kind,
+                    "start_line": start_line,
+                    "end_line": node.end_lineno,
+                    "col_offset": node.col_offset,
+                    "node": node,
+                }
+                visit(node.body, f"{qualified_name}.", kind)
+
+        visit(tree.body, "", None)
+
+    # ===================== Abfragen =====================
+    def __contains__(self, qualified_name: str) -> bool:
+        return qualified_name in self.entries
+
+    def get(self, qualified_name: str) -> Dict:
+        try:
+            return self.entries[qualified_name]
+        except KeyError:
+            raise ValueError(f"Funktion {qualified_name} nicht gefunden.") from None
+
+    def functions(self) -> List[Dict]:
+        """Alle Funktionen und Methoden in Reihenfolge ihres Auftretens."""
+        return [e for e in self.entries.values() if e["kind"] != "class"]
+
+    def classes(self) -> List[Dict]:
+        return [e for e in self.entries.values() if e["kind"] == "class"]
+
+    def source(self, qualified_name: str, dedent: bool = True) -> str:
+        """Quelltext der Definition (inklusive Dekoratoren und Kommentare im Rumpf)."""
+        entry = self.get(qualified_name)
+        segment = "".join(self.lines[entry["start_line"] - 1:entry["end_line"]])
+        return textwrap.dedent(segment) if dedent else segment
+
+    def enclosing(self, line: int) -> Optional[Dict]:
+        """Die innerste Definition, die die Zeile enthält (oder None auf Modulebene)."""
+        best = None
+        for entry in self.entries.values():
+            if entry["start_line"] <= line <= entry["end_line"]:
+                if best is None or entry["start_line"] >= best["start_line"]:
+                    best = entry
+        return best
+
+    # ===================== Ersetzen =====================
+    def splice(self, replacements: Dict[str, str]) -> str:
+        """
+        Ersetzt mehrere Definitionen gleichzeitig und baut den Index für den neuen Code neu auf.
+
+        :param replacements: qualifizierter Name -> neuer (nicht eingerückter) Quelltext.
+        :return: Der neue Quelltext der Datei.
+        :raises ValueError: Bei unbekannten Namen oder verschachtelten, sich überlappenden Ersetzungen.
+        """
+        ranges = {}
+        for name, source in replacements.items():
+            entry = self.get(name)
+            ranges[(entry["start_line"], entry["end_line"])] = source
+        new_code = splice_lines(self.code, ranges)
+        self._load(new_code)
+        return new_code
+
+
+def splice_lines(code: str, replacements: Dict[Tuple[int, int], str]) -> str:
+    """
+    Ersetzt Zeilenbereiche (1-basiert, inklusive) durch neuen Quelltext, von unten nach oben.
+
+    Der neue Text wird auf die Einrückung der ersten Zeile des Bereichs gebracht; der
+    Zeilenumbruch hinter dem Bereich bleibt erhalten.
+
+    :raises ValueError: Wenn sich Bereiche überlappen.
+    """
+    lines = code.splitlines(keepends=True)
+    targets = sorted(replacements, reverse=True)
+    for (outer_start, outer_end), (inner_start, _) in zip(targets[1:], targets):
+        if inner_start <= outer_end:
+            raise ValueError(f"Überlappende Ersetzungen: Zeilen {outer_start}-{outer_end} und ab {inner_start}")
+    for start, end in targets:
+        first = lines[start - 1]
+        indent = first[:len(first) - len(first.lstrip())]
+        new_source = textwrap.indent(textwrap.dedent(replacements[(start, end)]).strip("\n"), indent,
+                                     lambda line: line.strip() != "")
+        trailing = "\n" if lines[end - 1].endswith("\n") else ""
+        lines[start - 1:end] = [new_source + trailing]
+    return "".join(lines)
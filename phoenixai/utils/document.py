@@ -0,0 +1,296 @@
+# document.py
+"""
+Gemeinsame Arbeitskopie einer Datei für aufeinanderfolgende Transform-Schritte.
+
+Ohne Session liest, parst, rendert und schreibt jede Transformation die Datei
+selbst – eine Kette wie "Move Imports → Type Annotation → Docstrings → Black"
+berührt dieselbe Datei also mehrfach und startet black/isort/autoflake jedes
+Mal als Subprozess.
+
+Ist eine DocumentSession aktiv, arbeiten ``read_file`` und ``save_code_to_file``
+auf einem Document im Speicher (Quelltext, bei Bedarf neu aufgebauter AST,
+Dirty-Flag). black, isort und autoflake laufen dann über ihre Python-APIs auf
+dem Text. Die Pipeline schreibt die Datei erst am Ende der Kette einmal auf die
+Festplatte (``DocumentSession.flush``).
+
+Beispiel:
+
+    session = DocumentSession()
+    with document_scope(session):
+        run_move_imports(path)
+        run_black(path)
+    session.flush()
+"""
+
+import ast
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from phoenixai.utils.tracing import span
+
+
+class Document:
+    def __init__(self, path: str, text: str, stats: Optional[Dict[str, Dict[str, float]]] = None,
+                 disk_text: Optional[str] = ""):
+        """
+        :param path: Pfad der Datei auf der Festplatte.
+        :param text: Aktueller Inhalt der Datei.
+        :param stats: Gemeinsame Zählerstruktur der Session (optional).
+        :param disk_text: Inhalt auf der Festplatte; None für eine neue, noch nicht existierende Datei.
+                          Standard: identisch mit text.
+        """
+        self.path = path
+        self._text = text
+        self._disk_text = text if disk_text == "" else disk_text
+        self._tree: Optional[ast.AST] = None
+        self._stats = stats
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value: str):
+        if value == self._text:
+            return
+        self._text = value
+        self._tree = None
+
+    @property
+    def dirty(self) -> bool:
+        return self._text != self._disk_text
+
+    @property
+    def disk_text(self) -> Optional[str]:
+        """Stand der Datei auf der Festplatte beim Öffnen bzw. letzten Schreiben (None = neue Datei)."""
+        return self._disk_text
+
+    def mark_written(self):
+        self._disk_text = self._text
+
+    @property
+    def tree(self) -> ast.AST:
+        """Der AST zum aktuellen Text; wird erst beim Zugriff nach einer Änderung neu geparst.
+
+        Der Baum wird gemeinsam genutzt und darf nicht verändert werden – wer ihn
+        umbauen will, parst den Text selbst.
+        """
+        if self._tree is None:
+            with self._measure("parse"):
+                self._tree = ast.parse(self._text)
+        return self._tree
+
+    def flush(self) -> bool:
+        """Schreibt den Text auf die Festplatte, falls er sich geändert hat."""
+        if not self.dirty:
+            return False
+        with self._measure("write"), span("save_code_to_file", "io", path=self.path), \
+                open(self.path, "w", encoding="utf-8") as f:
+            f.write(self._text)
+        self.mark_written()
+        return True
+
+    def revert(self, text: str):
+        """Setzt den Text zurück (z. B. nach einem fehlgeschlagenen Schritt)."""
+        self.text = text
+
+    @contextmanager
+    def _measure(self, operation: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._stats is not None:
+                entry = self._stats.setdefault(operation, {"count": 0, "seconds": 0.0})
+                entry["count"] += 1
+                entry["seconds"] += time.perf_counter() - start
+
+
+class DocumentSession:
+    def __init__(self):
+        self.documents: Dict[str, Document] = {}
+        # operation -> {"count": ..., "seconds": ...}; read, parse, format, write
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.abspath(str(path))
+
+    def open(self, path, create: bool = False) -> Document:
+        """
+        Liefert das Document zur Datei; beim ersten Zugriff wird sie einmal gelesen.
+
+        :param create: Wenn True und die Datei nicht existiert, wird ein leeres, neues Document angelegt.
+        """
+        key = self._key(path)
+        document = self.documents.get(key)
+        if document is None and create and not os.path.exists(key):
+            document = self.documents[key] = Document(key, "", self.stats, disk_text=None)
+        elif document is None:
+            start = time.perf_counter()
+            with span("read_file", "io", path=str(path)), open(key, "r", encoding="utf-8") as f:
+                text = f.read()
+            document = self.documents[key] = Document(key, text, self.stats)
+            self.record("read", time.perf_counter() - start)
+        return document
+
+    def __contains__(self, path) -> bool:
+        return self._key(path) in self.documents
+
+    def record(self, operation: str, seconds: float):
+        entry = self.stats.setdefault(operation, {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, str]:
+        return {key: document.text for key, document in self.documents.items()}
+
+    def restore(self, snapshot: Dict[str, str]):
+        """Verwirft Änderungen seit dem Snapshot; danach geöffnete Dateien werden vergessen."""
+        for key in list(self.documents):
+            if key in snapshot:
+                self.documents[key].revert(snapshot[key])
+            else:
+                del self.documents[key]
+
+    @property
+    def dirty(self) -> bool:
+        return any(document.dirty for document in self.documents.values())
+
+    def flush(self) -> int:
+        """Schreibt alle geänderten Dokumente und leert die Session. Gibt die Anzahl geschriebener Dateien zurück."""
+        written = sum(1 for document in self.documents.values() if document.flush())
+        if written:
+            print(f"[Document] {written} Datei(en) auf die Festplatte geschrieben.")
+        self.documents.clear()
+        return written
+
+    @contextmanager
+    def external_view(self, path: Optional[str]):
+        """
+        Für Aktionen, die selbst auf Dateien zugreifen (Subprozesse, Analysen):
+        liefert den Pfad, unter dem sie arbeiten sollen. Hier wird vorher alles geschrieben.
+        """
+        self.flush()
+        yield path
+
+    def close(self):
+        """Beendet die Session (z. B. beim Schließen der GUI); offene Änderungen werden geschrieben."""
+        self.flush()
+
+
+_current_session: contextvars.ContextVar[Optional[DocumentSession]] = contextvars.ContextVar(
+    "phoenixai_document_session", default=None
+)
+
+
+def current_session() -> Optional[DocumentSession]:
+    return _current_session.get()
+
+
+@contextmanager
+def document_scope(session: Optional[DocumentSession]):
+    """Lässt read_file/save_code_to_file im Block auf den Dokumenten der Session arbeiten."""
+    reset = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(reset)
+
+
+def uses_document(function):
+    """Markiert eine Aktion, die ausschließlich über read_file/save_code_to_file und die Formatter arbeitet.
+
+    Nur solche Aktionen dürfen auf der ungespeicherten Arbeitskopie laufen; vor allen
+    anderen (Subprozesse auf der Datei, Analysen) schreibt die Pipeline die Datei zurück.
+    """
+    function.uses_document = True
+    return function
+
+
+def is_document_aware(function) -> bool:
+    return bool(getattr(function, "uses_document", False))
+
+
+def parse_shared(code: str) -> ast.AST:
+    """Parst code – oder liefert den zwischengespeicherten AST, wenn code der Text eines offenen Dokuments ist.
+
+    Nur für lesende Zugriffe; Transformationen, die den Baum verändern, parsen selbst.
+    """
+    session = current_session()
+    if session is not None:
+        for document in session.documents.values():
+            if document.text is code or document.text == code:
+                return document.tree
+    return ast.parse(code)
+
+
+# ===================== Formatter im Speicher =====================
+def _record_format(start: float):
+    session = current_session()
+    if session is not None:
+        session.record("format", time.perf_counter() - start)
+
+
+_black_modes: Dict[str, object] = {}
+
+
+def _black_mode_for(path: str):
+    """Baut den black-Mode aus der pyproject.toml des Projekts (wie beim Aufruf von ``black <datei>``)."""
+    import black
+
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory in _black_modes:
+        return _black_modes[directory]
+    config = {}
+    pyproject = black.find_pyproject_toml((directory,))
+    if pyproject:
+        try:
+            config = black.parse_pyproject_toml(pyproject)
+        except (OSError, ValueError) as e:
+            print(f"[Black] pyproject.toml konnte nicht gelesen werden: {e}")
+    target_versions = {black.TargetVersion[v.upper()] for v in config.get("target_version", [])}
+    mode = black.Mode(
+        target_versions=target_versions,
+        line_length=int(config.get("line_length", black.DEFAULT_LINE_LENGTH)),
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+        preview=bool(config.get("preview", False)),
+    )
+    _black_modes[directory] = mode
+    return mode
+
+
+def format_with_black(document: Document):
+    import black
+
+    start = time.perf_counter()
+    with span("black (in-memory)", "format", path=document.path):
+        try:
+            document.text = black.format_str(document.text, mode=_black_mode_for(document.path))
+        except black.NothingChanged:
+            pass
+    _record_format(start)
+
+
+def format_with_isort(document: Document):
+    import isort
+
+    start = time.perf_counter()
+    with span("isort (in-memory)", "format", path=document.path):
+        config = isort.Config(settings_path=os.path.dirname(document.path))
+        document.text = isort.code(document.text, config=config, file_path=Path(document.path))
+    _record_format(start)
+
+
+def remove_unused_imports_in_memory(document: Document):
+    import autoflake
+
+    start = time.perf_counter()
+    with span("autoflake (in-memory)", "format", path=document.path):
+        document.text = autoflake.fix_code(document.text, remove_all_unused_imports=True)
+    _record_format(start)
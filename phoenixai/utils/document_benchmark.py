@@ -0,0 +1,173 @@
+# document_benchmark.py
+"""
+Misst, wie viel Parse-, Render-, I/O- und Formatierungszeit die gemeinsame
+Arbeitskopie (DocumentSession) bei einer Transform-Kette spart.
+
+Die Kette "Move Imports → Type Annotation Updater → Add/Improve Docstrings → Black"
+wird für jede Datei eines Projekts zweimal auf einer Kopie ausgeführt: einmal wie
+bisher Datei für Datei, einmal mit einer DocumentSession und einem Flush am Ende.
+Damit nur die lokalen Kosten verglichen werden, antwortet das "LLM" hier mit dem
+unveränderten aktuellen Code der Datei bzw. – bei strukturierter Ausgabe – mit den
+vorhandenen Docstrings und ohne neue Typannotationen.
+
+    python -m phoenixai.utils.document_benchmark phoenixai/Projects/fuego-fighters
+"""
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import astor
+
+from phoenixai.pipeline_transformation import add_docstrings, typ_annotation_updater
+from phoenixai.pipeline_transformation.pipeline_transform_impl import transform_actions
+from phoenixai.utils.code_index import CodeIndex
+from phoenixai.utils.document import current_session
+from phoenixai.utils.pipeline_common import Pipeline, PipelineStep
+from phoenixai.utils.repo_runner import list_repository_files
+
+CHAIN = ["Move Imports", "Type Annotation Updater", "Add/Improve Docstrings", "Black"]
+
+_OPERATION_BY_SPAN = {
+    "read_file": "read",
+    "save_code_to_file": "write",
+    "subprocess": "subprocess",
+    "black (in-memory)": "format",
+    "isort (in-memory)": "format",
+    "autoflake (in-memory)": "format",
+}
+
+
+def _add(counters: Dict[str, Dict[str, float]], operation: str, seconds: float, count: int = 1):
+    entry = counters.setdefault(operation, {"count": 0, "seconds": 0.0})
+    entry["count"] += count
+    entry["seconds"] += seconds
+
+
+@contextmanager
+def _counted(module, attribute: str, counters: Dict[str, Dict[str, float]], operation: str):
+    original = getattr(module, attribute)
+
+    def wrapper(*args, **kwargs):
+        # Aufrufe aus black/isort/pyflakes laufen ohne Session im Subprozess und werden dort nicht gezählt
+        if not sys._getframe(1).f_globals.get("__name__", "").startswith("phoenixai"):
+            return original(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            _add(counters, operation, time.perf_counter() - start)
+
+    setattr(module, attribute, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, attribute, original)
+
+
+@contextmanager
+def _echo_llm(file_path_holder: Dict[str, str]):
+    """Ersetzt den LLM-Aufruf der Transformationen durch den aktuellen Code der Datei."""
+    def current_code():
+        session = current_session()
+        if session is not None:
+            return session.open(file_path_holder["path"]).text
+        with open(file_path_holder["path"], "r", encoding="utf-8") as f:
+            return f.read()
+
+    def echo(prompt, temperature=0.7, timeout=None):
+        return current_code()
+
+    def echo_structured(prompt, response_schema, temperature=0.3, timeout=None):
+        if response_schema is not add_docstrings.DOCSTRING_SCHEMA:
+            return "[]"
+        index = CodeIndex(current_code())
+        nodes = {add_docstrings.MODULE_KEY: index.tree}
+        nodes.update((name, entry["node"]) for name, entry in index.entries.items())
+        return json.dumps([{"qualified_name": name, "docstring": ast.get_docstring(node) or "Dokumentation."}
+                           for name, node in nodes.items()])
+
+    modules = (typ_annotation_updater, add_docstrings)
+    originals = [(module.call_llm, module.call_structured_llm) for module in modules]
+    for module in modules:
+        module.call_llm, module.call_structured_llm = echo, echo_structured
+    try:
+        yield
+    finally:
+        for module, (call_llm, call_structured_llm) in zip(modules, originals):
+            module.call_llm, module.call_structured_llm = call_llm, call_structured_llm
+
+
+def _run_chain(project_dir: str, files: List[str], with_session: bool) -> Dict:
+    counters: Dict[str, Dict[str, float]] = {}
+    holder: Dict[str, str] = {}
+    failures = 0
+    started = time.perf_counter()
+    with _echo_llm(holder), _counted(ast, "parse", counters, "parse"), \
+            _counted(astor, "to_source", counters, "render"):
+        for rel_path in files:
+            holder["path"] = os.path.join(project_dir, rel_path)
+            pipeline = Pipeline(None, transactional=False)
+            for name in CHAIN:
+                step = PipelineStep(name, transform_actions[name], holder["path"])
+                step.export_trace = False
+                if with_session:
+                    pipeline.run_step_on_documents(step, pipeline.documents)
+                else:
+                    step.run()
+                failures += not step.status.startswith("🟢")
+                for event in step.trace.events:
+                    operation = _OPERATION_BY_SPAN.get(event["name"].split(":")[0])
+                    if operation:
+                        _add(counters, operation, event["dur"] / 1e6)
+            if with_session:
+                # Der Flush am Ende der Kette läuft außerhalb der Schritte und wird hier gemessen
+                flush_start = time.perf_counter()
+                written = pipeline.documents.flush()
+                if written:
+                    _add(counters, "write", time.perf_counter() - flush_start, written)
+    return {"wall": time.perf_counter() - started, "counters": counters, "failures": failures}
+
+
+def run_benchmark(project_dir: str) -> List[str]:
+    files = list_repository_files(project_dir, ["**/*.py"], [])
+    results = {}
+    for label, with_session in (("ohne Session", False), ("mit Session", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            copy = os.path.join(tmp, "project")
+            shutil.copytree(project_dir, copy, ignore=shutil.ignore_patterns(".git", "__pycache__", ".venv"))
+            results[label] = _run_chain(copy, files, with_session)
+
+    before, after = results["ohne Session"], results["mit Session"]
+    lines = [
+        f"# Document-Benchmark: {os.path.basename(os.path.abspath(project_dir))}\n",
+        f"Kette: {' → '.join(CHAIN)}, {len(files)} Dateien\n",
+        "| Operation | ohne Session | mit Session |",
+        "|---|---|---|",
+    ]
+    empty = {"count": 0, "seconds": 0.0}
+    for operation in ("read", "parse", "render", "subprocess", "format", "write"):
+        b = before["counters"].get(operation, empty)
+        a = after["counters"].get(operation, empty)
+        lines.append(f"| {operation} | {b['count']}× / {b['seconds']:.2f}s | {a['count']}× / {a['seconds']:.2f}s |")
+    lines.append(f"| Gesamtzeit | {before['wall']:.2f}s | {after['wall']:.2f}s |")
+    lines.append(f"| Fehlgeschlagene Schritte | {before['failures']} | {after['failures']} |")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht Transform-Ketten mit und ohne DocumentSession.")
+    parser.add_argument("project", help="Projektverzeichnis (wird nicht verändert, es wird eine Kopie benutzt).")
+    args = parser.parse_args()
+    print("\n".join(run_benchmark(args.project)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# flamegraph.py
+"""
+Auswertung von Stapel-Samples im "collapsed stack"-Format (``a;b;c 42`` je Zeile).
+
+- ``read_collapsed`` liest die Datei des Sampling-Runners,
+- ``to_speedscope`` erzeugt ein "sampled"-Profil für https://www.speedscope.app,
+- ``render_svg`` zeichnet einen statischen Flame Graph (Wurzel unten, Breite = Anteil
+  der Samples; Tooltip mit Anzahl und Prozent),
+- ``top_functions`` fasst Eigen- und Gesamtanteil je Funktion für den Text-Report zusammen.
+"""
+
+import html
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+Stack = Tuple[str, ...]
+
+SVG_WIDTH = 1200
+FRAME_HEIGHT = 16
+# Rahmen schmaler als das werden nicht gezeichnet (der Anteil steckt im Elternrahmen)
+MIN_FRAME_WIDTH = 0.3
+
+
+def read_collapsed(path: str) -> Counter:
+    samples: Counter = Counter()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                samples[tuple(stack.split(";"))] += int(count)
+    return samples
+
+
+def to_speedscope(samples: Counter, name: str, interval_ms: float) -> Dict:
+    """Ein "sampled"-Profil; jedes Sample wiegt interval_ms Millisekunden."""
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    stacks, weights = [], []
+    for stack, count in samples.items():
+        indices = []
+        for label in stack:
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indices.append(frame_index[label])
+        stacks.append(indices)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": stacks,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "phoenixai",
+    }
+
+
+def top_functions(samples: Counter, limit: int = 15) -> List[Tuple[str, int, int]]:
+    """(Funktion, eigene Samples, Samples inklusive Aufgerufener), sortiert nach eigenen Samples."""
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in samples.items():
+        own[stack[-1]] += count
+        for label in set(stack):
+            total[label] += count
+    return [(label, own[label], total[label]) for label, _ in own.most_common(limit)]
+
+
+def _build_tree(samples: Counter) -> Dict:
+    root = {"name": "alle", "value": 0, "children": {}}
+    for stack, count in samples.items():
+        root["value"] += count
+        node = root
+        for label in stack:
+            node = node["children"].setdefault(label, {"name": label, "value": 0, "children": {}})
+            node["value"] += count
+    return root
+
+
+def _color(label: str) -> str:
+    # Stabile Farbe je Funktion im klassischen Rot-Gelb-Bereich
+    seed = zlib.crc32(label.encode("utf-8"))
+    return f"rgb({205 + seed % 50},{80 + (seed >> 8) % 130},{(seed >> 16) % 55})"
+
+
+def render_svg(samples: Counter, title: str = "Flame Graph") -> str:
+    root = _build_tree(samples)
+    total = root["value"] or 1
+    scale = (SVG_WIDTH - 20) / total
+    rects: List[Tuple[int, float, float, Dict]] = []
+
+    def walk(node, depth, x):
+        rects.append((depth, x, node["value"] * scale, node))
+        offset = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            if child["value"] * scale >= MIN_FRAME_WIDTH:
+                walk(child, depth + 1, offset)
+            offset += child["value"] * scale
+
+    walk(root, 0, 10.0)
+    max_depth = max(depth for depth, _, _, _ in rects)
+    height = (max_depth + 1) * FRAME_HEIGHT + 50
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="Verdana, sans-serif" font-size="11">',
+        f'<rect width="100%" height="100%" fill="#fdfdf3"/>',
+        f'<text x="{SVG_WIDTH / 2}" y="20" text-anchor="middle" font-size="15">{html.escape(title)}</text>',
+    ]
+    for depth, x, width, node in rects:
+        y = height - 10 - (depth + 1) * FRAME_HEIGHT
+        label = node["name"]
+        tooltip = f"{label} – {node['value']} Samples ({100 * node['value'] / total:.1f} %)"
+        # Etwa 7 px pro Zeichen; zu lange Namen werden gekürzt
+        chars = int((width - 6) / 7)
+        text = label if len(label) <= chars else label[:max(chars - 2, 0)] + ".."
+        parts.append(
+            f'<g><title>{html.escape(tooltip)}</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{max(width - 0.5, 0.1):.1f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{"#c8c8c8" if depth == 0 else _color(label)}" rx="2"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">{html.escape(text)}</text>' if chars > 2 else "")
+            + "</g>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
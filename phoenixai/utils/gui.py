@@ -1,10 +1,12 @@
 # gui.py
 
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 import ttkbootstrap as tb
-from tkinter import ttk
+from tkinter import messagebox, ttk
 
 from pipeline_common import Pipeline, PipelineStep
 
@@ -15,6 +17,7 @@ from repository_manager import RepositoryManager
 from navigation_manager import NavigationManager
 from action_manager import ActionManager
 from result_manager import ResultManager
+from phoenixai.utils.repo_runner import RepoRunner, DEFAULT_INCLUDE
 
 class AnalyseGUI(tb.Window):
     def __init__(self):
@@ -184,6 +187,10 @@ class AnalyseGUI(tb.Window):
         )
         self.pipeline_tree.bind("<Button-3>", self.show_pipeline_menu_handler)  # Für Windows und Linux
 
+        # Blättern im Zeilenfenster bei sehr langen Pipelines
+        self.pipeline_tree.bind("<Control-Prior>", lambda event: self.pipeline.view.page(-1))
+        self.pipeline_tree.bind("<Control-Next>", lambda event: self.pipeline.view.page(1))
+
     # ===================== Aufbau rechter Bereich =====================
     def build_right_side(self):
         """
@@ -195,7 +202,8 @@ class AnalyseGUI(tb.Window):
         self.repo_manager = RepositoryManager(
             parent_frame=self.right_frame,
             set_status_callback=self.set_status,
-            populate_repos_callback=self.on_repository_change
+            populate_repos_callback=self.on_repository_change,
+            run_repository_callback=self.run_repository_actions
         )
 
         # Ergebnisse darunter
@@ -226,6 +234,52 @@ class AnalyseGUI(tb.Window):
         """Callback wenn ein Repository ausgewählt wird."""
         self.navigation_manager.update_directory_list(new_directory)
 
+    # ===================== Repository-weite Ausführung =====================
+    def run_repository_actions(self, repo, include, exclude):
+        """Führt die ausgewählten Aktionen im Hintergrund für alle Dateien des Repositories aus."""
+        actions = self.action_manager.chosen_actions()
+        if not actions:
+            messagebox.showwarning("Warnung", "Bitte wähle mindestens eine Aktion (Analyse oder Transform).")
+            return
+        progress_queue = queue.Queue()
+
+        def on_progress(result, done, total):
+            progress_queue.put(("progress", result, done, total))
+
+        def worker():
+            try:
+                runner = RepoRunner(repo["path"], actions, include=include or DEFAULT_INCLUDE,
+                                    exclude=exclude, progress_callback=on_progress)
+                progress_queue.put(("done", runner.run()))
+            except Exception as e:
+                progress_queue.put(("error", e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.set_status(f"Repository-Lauf für '{repo['name']}' gestartet...")
+        self.after(200, self._poll_repository_run, progress_queue, repo["name"])
+
+    def _poll_repository_run(self, progress_queue, repo_name):
+        # Tk-Widgets dürfen nur aus dem GUI-Thread verändert werden
+        while True:
+            try:
+                message = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                _, result, done, total = message
+                steps = ", ".join(f"{s['action']}: {s['status']}" for s in result["steps"])
+                self.results_manager.update_results_tree(result["rel_path"], steps, result["status"])
+                self.set_status(f"Repository-Lauf '{repo_name}': {done}/{total} Dateien")
+            elif message[0] == "done":
+                report = message[1]
+                self.set_status(f"Repository-Lauf '{repo_name}' abgeschlossen: {report['files']} Dateien, "
+                                f"{len(report['failed_files'])} fehlgeschlagen, {report['wall_time']:.1f}s")
+                return
+            else:
+                self.set_status(f"Repository-Lauf '{repo_name}' fehlgeschlagen: {message[1]}")
+                return
+        self.after(200, self._poll_repository_run, progress_queue, repo_name)
+
     # ===================== Navigation =====================
     def update_directory_list(self, directory, add_to_history=True):
         self.navigation_manager.update_directory_list(directory, add_to_history)
@@ -265,13 +319,12 @@ class AnalyseGUI(tb.Window):
         if not selected_item:
             return
         try:
-            step_index = self.pipeline_tree.index(selected_item)  # Besser als int(selected_item[0]) - 1
-            if 0 <= step_index < len(self.pipeline.steps):
-                del self.pipeline.steps[step_index]
-                self.pipeline.display_status()
+            # Die iid identifiziert den Step unabhängig vom aktuell angezeigten Fenster
+            step_index = self.pipeline.remove_step(selected_item[0])
+            if step_index is not None:
                 self.set_status(f"Schritt {step_index + 1} entfernt.")
         except Exception as e:
-            tb.messagebox.show_error("Fehler", f"Ungültige Schritt-ID oder anderer Fehler: {e}")
+            messagebox.showerror("Fehler", f"Ungültige Schritt-ID oder anderer Fehler: {e}")
 
     def show_pipeline_menu_handler(self, event):
         selected_item = self.pipeline_tree.identify_row(event.y)
@@ -322,6 +375,8 @@ class AnalyseGUI(tb.Window):
     def on_close(self):
         """Handler für das Schließen des Fensters."""
         self.repo_manager.save_repositories()
+        # Arbeitskopien einer abgebrochenen Kette schreiben bzw. offene Transaktion verwerfen
+        self.pipeline.close_documents()
         self.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+# llm_diff.py
+"""
+Diff-Ausgabemodus für Transformationen, die vom LLM eine komplette Datei zurückbekommen.
+
+Portierung, Pylint-Workflow und SonarQube-Schritt lassen sich bisher immer die ganze
+Datei neu ausgeben – auch wenn sich nur fünf Zeilen ändern. Im Diff-Modus
+(``PHOENIXAI_LLM_OUTPUT_MODE=diff``) wird das LLM stattdessen um einen Unified Diff
+gebeten. Der Diff wird lokal geprüft und mit Toleranz angewendet:
+
+- Zeilenangaben in den Hunk-Köpfen dürfen falsch sein; jeder Hunk wird über seine
+  Kontext- und Entfernt-Zeilen gesucht, zuerst an der erwarteten Stelle, dann im
+  Umkreis von ``DIFF_FUZZ_LINES`` Zeilen, zuletzt eindeutig in der ganzen Datei,
+- Unterschiede bei Leerzeichen am Zeilenende werden ignoriert.
+
+Lässt sich der Diff nicht anwenden oder ist das Ergebnis kein gültiges Python, wird
+automatisch noch einmal im Vollmodus (ganze Datei) angefragt. Die Ausgabetokens – und
+damit die Latenz – skalieren so mit der Größe der Änderung statt mit der Dateigröße.
+"""
+
+import ast
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+from phoenixai.utils.base_prompt_handling import call_llm, trim_code
+from phoenixai.utils.tracing import span
+
+# "full": ganze Datei (bisheriges Verhalten), "diff": Unified Diff mit Fallback auf "full"
+LLM_OUTPUT_MODE = os.getenv("PHOENIXAI_LLM_OUTPUT_MODE", "full").strip().lower()
+# Wie weit ein Hunk von seiner angegebenen Position entfernt gesucht wird
+DIFF_FUZZ_LINES = int(os.getenv("PHOENIXAI_DIFF_FUZZ_LINES", "40"))
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+DIFF_INSTRUCTIONS = """
+
+### WICHTIG – Ausgabeformat (ersetzt alle Anweisungen oben zum Rückgabeformat):
+Gib **nicht** den vollständigen Code zurück, sondern **ausschließlich** die Änderungen als Unified Diff
+gegenüber dem oben gezeigten Code, ohne Erklärungen:
+
+```diff
+--- a/file.py
++++ b/file.py
+@@ -12,4 +12,5 @@
+ unveränderte Kontextzeile
+-entfernte Zeile
++neue Zeile
++neue Zeile
+ unveränderte Kontextzeile
+```
+
+- Jede Zeile eines Hunks beginnt mit genau einem Zeichen: Leerzeichen (Kontext), `-` (entfernt) oder `+` (neu).
+- Gib zu jedem Hunk 2–3 unveränderte Kontextzeilen davor und danach an, exakt wie im Original (inklusive Einrückung).
+- Die Hunks müssen in der Reihenfolge ihrer Position in der Datei stehen.
+- Ist keine Änderung nötig, gib einen leeren Diff zurück.
+"""
+
+
+class DiffApplyError(ValueError):
+    """Der Diff des LLM passt nicht zum Originalcode."""
+
+
+def extract_diff(response: str) -> str:
+    """Entfernt Markdown-Zäune und Text vor dem ersten Diff-Kopf."""
+    lines = response.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith(("--- ", "@@"))), None)
+    if start is None:
+        return ""
+    body = []
+    for line in lines[start:]:
+        if line.strip() == "```":
+            break
+        body.append(line)
+    return "\n".join(body)
+
+
+def parse_unified_diff(diff_text: str) -> List[Dict]:
+    """
+    Zerlegt einen Unified Diff in Hunks.
+
+    Die Zeilenzahlen im Hunk-Kopf werden nicht geprüft (LLMs verzählen sich häufig);
+    ein Hunk endet beim nächsten Kopf oder am Ende des Diffs.
+
+    :return: Liste von Hunks mit ``old_start``, ``old_count``, ``old`` (Kontext + entfernte Zeilen) und ``new``.
+    :raises DiffApplyError: Bei Zeilen, die keinem Hunk angehören oder kein gültiges Präfix haben.
+    """
+    hunks: List[Dict] = []
+    current: Optional[Dict] = None
+    for line in diff_text.rstrip("\n").splitlines():
+        if line.startswith(("--- ", "+++ ")) and (current is None or not current["old"] and not current["new"]):
+            continue
+        match = HUNK_HEADER.match(line)
+        if match:
+            old_count = int(match.group(2)) if match.group(2) is not None else None
+            current = {"old_start": int(match.group(1)), "old_count": old_count, "old": [], "new": []}
+            hunks.append(current)
+            continue
+        if line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        if current is None:
+            if line.strip():
+                raise DiffApplyError(f"Zeile außerhalb eines Hunks: {line!r}")
+            continue
+        prefix, content = (line[:1], line[1:]) if line else (" ", "")
+        if prefix == " ":
+            current["old"].append(content)
+            current["new"].append(content)
+        elif prefix == "-":
+            current["old"].append(content)
+        elif prefix == "+":
+            current["new"].append(content)
+        else:
+            raise DiffApplyError(f"Ungültige Diff-Zeile: {line!r}")
+    return hunks
+
+
+def _matches(lines: List[str], position: int, block: List[str], loose: bool) -> bool:
+    if position < 0 or position + len(block) > len(lines):
+        return False
+    if loose:
+        return all(a.rstrip() == b.rstrip() for a, b in zip(lines[position:position + len(block)], block))
+    return lines[position:position + len(block)] == block
+
+
+def _locate(lines: List[str], block: List[str], expected: int, lower_bound: int, fuzz: int) -> int:
+    """Sucht den Block an der erwarteten Stelle, dann im Umkreis, dann eindeutig in der ganzen Datei."""
+    for loose in (False, True):
+        for distance in range(fuzz + 1):
+            for position in {expected - distance, expected + distance}:
+                if position >= lower_bound and _matches(lines, position, block, loose):
+                    return position
+    for loose in (False, True):
+        found = [p for p in range(lower_bound, len(lines) - len(block) + 1) if _matches(lines, p, block, loose)]
+        if len(found) == 1:
+            return found[0]
+        if len(found) > 1:
+            raise DiffApplyError(f"Hunk passt an mehreren Stellen ({len(found)}×), Position unklar.")
+    raise DiffApplyError("Hunk-Kontext nicht im Originalcode gefunden: " + " / ".join(block[:3]))
+
+
+def apply_unified_diff(original: str, diff_text: str, fuzz: int = DIFF_FUZZ_LINES) -> str:
+    """
+    Wendet einen (vom LLM erzeugten) Unified Diff mit Positions-Toleranz an.
+
+    :raises DiffApplyError: Wenn der Diff leer ist oder ein Hunk nicht eindeutig gefunden wird.
+    """
+    hunks = parse_unified_diff(diff_text)
+    if not hunks:
+        raise DiffApplyError("Der Diff enthält keine Hunks.")
+    lines = original.splitlines()
+    result: List[str] = []
+    cursor = 0
+    for hunk in hunks:
+        # Bei "@@ -5,0 ..." wird hinter Zeile 5 eingefügt, sonst ab Zeile old_start ersetzt
+        expected = max(0, hunk["old_start"] if hunk["old_count"] == 0 else hunk["old_start"] - 1)
+        if hunk["old"]:
+            position = _locate(lines, hunk["old"], expected, cursor, fuzz)
+        else:
+            # Reine Einfügung ohne Kontext: nur die Zeilenangabe ist verfügbar
+            position = min(max(expected, cursor), len(lines))
+        result.extend(lines[cursor:position])
+        result.extend(hunk["new"])
+        cursor = position + len(hunk["old"])
+    result.extend(lines[cursor:])
+    return "\n".join(result) + ("\n" if original.endswith("\n") or not original else "")
+
+
+def request_code_change(prompt: str, original_code: str, temperature: float = 0.7,
+                        mode: Optional[str] = None, llm: Callable[..., str] = None) -> str:
+    """
+    Fragt das LLM nach einer geänderten Fassung von original_code und liefert den vollständigen neuen Code.
+
+    Im Diff-Modus wird nur ein Diff angefordert und lokal angewendet; schlägt das fehl,
+    folgt ein zweiter Aufruf im Vollmodus.
+
+    :param prompt: Der bisherige Prompt (enthält den Code und verlangt den vollständigen Code).
+    :param original_code: Der Code, auf den sich der Diff bezieht.
+    :param mode: "full" oder "diff"; Standard: ``LLM_OUTPUT_MODE``.
+    :param llm: Aufrufbare LLM-Funktion (prompt, temperature); Standard: ``call_llm``.
+    :return: Der neue Code (leer, wenn das LLM nicht geantwortet hat).
+    """
+    llm = llm or call_llm
+    mode = mode or LLM_OUTPUT_MODE
+    if mode == "diff":
+        response = llm(prompt + DIFF_INSTRUCTIONS, temperature)
+        if response:
+            try:
+                with span("apply diff", "llm", response_chars=len(response)):
+                    diff_text = extract_diff(response)
+                    if not diff_text.strip():
+                        print("[Diff] Das LLM meldet keine Änderungen.")
+                        return original_code
+                    new_code = apply_unified_diff(original_code, diff_text)
+                    ast.parse(new_code)
+                print(f"[Diff] Diff angewendet ({len(response)} statt ca. {len(original_code)} Zeichen Ausgabe).")
+                return new_code
+            except (DiffApplyError, SyntaxError) as e:
+                print(f"[Diff] Diff nicht anwendbar ({e}) – Fallback auf vollständige Ausgabe.")
+        else:
+            print("[Diff] Keine Antwort im Diff-Modus – Fallback auf vollständige Ausgabe.")
+    response = llm(prompt, temperature)
+    return trim_code(response) if response else ""
@@ -0,0 +1,360 @@
+# overlay.py
+"""
+Transaktionale Copy-on-Write-Sicht auf ein Repository für einen ganzen Pipeline-Lauf.
+
+Das Overlay ist eine DocumentSession, die zwischen den Schritten nichts auf die
+Festplatte schreibt: Alle Lese- und Schreibzugriffe über ``base_prompt_handling``
+landen in Arbeitskopien im Speicher. Am Ende des Laufs werden alle Änderungen in
+einem Batch übernommen (``commit``) oder verworfen (``discard``).
+
+Aktionen, die echte Dateien brauchen (pylint, sourcery, Tests, Analysen), laufen
+auf einer materialisierten Sicht: einer Kopie des Repositories in einem
+temporären Verzeichnis (bevorzugt tmpfs unter /dev/shm), in die die geänderten
+Arbeitskopien geschrieben werden. Was die Aktion dort ändert, wird in das
+Overlay zurückgelesen – das Original bleibt bis zum Commit unberührt.
+Große Dateien, die kein Python-Code sind (Audio, Bilder, Datenbanken), werden in der
+Sicht nur verlinkt statt kopiert; Aktionen sollen sie dort nicht verändern.
+``find_project_root`` und ``original_path`` bilden Pfade in einer Sicht auf das
+Original ab, damit Schritte in der Sicht dieselbe Projektwurzel finden.
+
+Beispiel:
+
+    overlay = Overlay()
+    with document_scope(overlay):
+        run_move_imports(path)
+        run_black(path)
+    errors = overlay.validate()
+    overlay.commit() if not errors else overlay.discard()
+"""
+
+import ast
+import atexit
+import difflib
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Set
+
+from phoenixai.utils.cancellation import run_subprocess
+from phoenixai.utils.document import DocumentSession
+from phoenixai.utils.tracing import span
+
+# Verzeichnisse, die nicht in die materialisierte Sicht kopiert werden
+VIEW_IGNORED_DIRS = (".git", ".hg", ".svn", ".venv", "venv", "node_modules", "__pycache__",
+                     ".mypy_cache", ".pytest_cache", ".tox")
+# Markierungen, an denen die Wurzel eines Projekts erkannt wird
+# (requirements.txt trennt die Beispielprojekte unter phoenixai/Projects vom Repository)
+ROOT_MARKERS = (".git", "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt")
+# Nicht-Python-Dateien ab dieser Größe werden in der Sicht verlinkt statt kopiert
+VIEW_LINK_SIZE = int(os.getenv("PHOENIXAI_OVERLAY_LINK_SIZE", str(256 * 1024)))
+
+# Wiederverwendete Sichten (Wurzel -> Verzeichnis) für Overlays mit keep_view=True
+_shared_views: Dict[str, str] = {}
+# Alle bestehenden Sichten dieses Prozesses (Verzeichnis -> Wurzel des Originals)
+_view_origins: Dict[str, str] = {}
+
+
+class OverlayConflict(Exception):
+    """Eine Datei wurde während des Laufs außerhalb des Overlays verändert."""
+
+
+def _tmpfs_dir() -> Optional[str]:
+    if os.getenv("PHOENIXAI_OVERLAY_TMPFS", "1") == "0":
+        return None
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
+def _view_of(path: str) -> Optional[str]:
+    for view in list(_view_origins):
+        if path.startswith(view + os.sep):
+            return view
+    return None
+
+
+def original_path(path: str) -> str:
+    """Bildet einen Pfad in einer materialisierten Sicht auf das Original ab (sonst unverändert)."""
+    path = os.path.abspath(path)
+    view = _view_of(path)
+    if view is None:
+        return path
+    return os.path.join(_view_origins[view], os.path.relpath(path, view))
+
+
+def find_project_root(path: str) -> str:
+    """
+    Sucht von der Datei aus nach oben die Projektwurzel (.git, pyproject.toml, ...).
+    Für Pfade in einer Sicht wird die Wurzel am Original gesucht und in die Sicht übertragen,
+    da die Sicht kein .git enthält.
+    """
+    path = os.path.abspath(path)
+    view = _view_of(path)
+    if view is not None:
+        root = _view_origins[view]
+        real_root = find_project_root(original_path(path))
+        if real_root != root and not real_root.startswith(root + os.sep):
+            return view
+        return os.path.normpath(os.path.join(view, os.path.relpath(real_root, root)))
+    directory = os.path.dirname(path)
+    current = directory
+    while True:
+        if any(os.path.exists(os.path.join(current, marker)) for marker in ROOT_MARKERS):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return directory
+        current = parent
+
+
+def _remove_views(views: Sequence[str]):
+    for view in views:
+        _view_origins.pop(view, None)
+        shutil.rmtree(os.path.dirname(view), ignore_errors=True)
+
+
+def _copy_into_view(source: str, target: str):
+    if not source.endswith(".py") and os.path.getsize(source) >= VIEW_LINK_SIZE:
+        os.symlink(os.path.abspath(source), target)
+    else:
+        shutil.copy2(source, target)
+
+
+atexit.register(lambda: _remove_views(list(_shared_views.values())))
+
+
+class Overlay(DocumentSession):
+    def __init__(self, root: Optional[str] = None, keep_view: bool = False):
+        """
+        :param root: Wurzel des Repositories; ohne Angabe wird sie pro Datei ermittelt.
+        :param keep_view: Materialisierte Sichten prozessweit wiederverwenden (Repository-Läufe).
+        """
+        super().__init__()
+        self.root = os.path.abspath(root) if root else None
+        self.keep_view = keep_view
+        self._views: Dict[str, str] = {}
+        # Inhalt, den das Overlay zuletzt in die Sicht geschrieben hat (Schlüssel: Originalpfad)
+        self._view_state: Dict[str, str] = {}
+
+    # ===================== Materialisierte Sicht =====================
+    def _root_for(self, path: str) -> str:
+        key = self._key(path)
+        if self.root and key.startswith(self.root + os.sep):
+            return self.root
+        return find_project_root(key)
+
+    def _view_for(self, root: str) -> str:
+        view = self._views.get(root) or (_shared_views.get(root) if self.keep_view else None)
+        if view is None or not os.path.isdir(view):
+            with span("materialize view", "io", root=root):
+                base = tempfile.mkdtemp(prefix="phoenixai_overlay_", dir=_tmpfs_dir())
+                view = os.path.join(base, os.path.basename(root) or "root")
+                shutil.copytree(root, view, symlinks=True, ignore=shutil.ignore_patterns(*VIEW_IGNORED_DIRS),
+                                copy_function=_copy_into_view)
+            _view_origins[view] = root
+            if self.keep_view:
+                _shared_views[root] = view
+        self._views[root] = view
+        return view
+
+    def view_path(self, path: str) -> str:
+        """Pfad der Datei innerhalb der materialisierten Sicht."""
+        root = self._root_for(path)
+        return os.path.join(self._view_for(root), os.path.relpath(self._key(path), root))
+
+    def materialize(self, path: str) -> str:
+        """Schreibt alle geänderten Arbeitskopien des Projekts in die Sicht und liefert den Pfad der Datei dort."""
+        target = self.view_path(path)
+        root = self._root_for(path)
+        for key, document in self.documents.items():
+            if self._root_for(key) != root or self._view_state.get(key, document.disk_text) == document.text:
+                continue
+            mirrored = self.view_path(key)
+            os.makedirs(os.path.dirname(mirrored), exist_ok=True)
+            with open(mirrored, "w", encoding="utf-8") as f:
+                f.write(document.text)
+            self._view_state[key] = document.text
+        key = self._key(path)
+        if self.keep_view and key not in self._view_state and os.path.exists(key):
+            # Geteilte Sichten können veraltet sein (andere Worker haben inzwischen committet)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(self.open(key).text)
+            self._view_state[key] = self.documents[key].text
+        return target
+
+    def _scan_view(self, view: str) -> Dict[str, int]:
+        state = {}
+        for directory, dirs, files in os.walk(view):
+            dirs[:] = [d for d in dirs if d not in VIEW_IGNORED_DIRS]
+            for name in files:
+                if name.endswith(".py"):
+                    full = os.path.join(directory, name)
+                    state[full] = os.stat(full).st_mtime_ns
+        return state
+
+    def _sync_back(self, root: str, view: str, before: Dict[str, int]):
+        """Übernimmt Dateien, die eine externe Aktion in der Sicht geändert hat, in das Overlay."""
+        for mirrored, mtime in self._scan_view(view).items():
+            if before.get(mirrored) == mtime:
+                continue
+            original = os.path.join(root, os.path.relpath(mirrored, view))
+            try:
+                with open(mirrored, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            self.open(original, create=True).text = text
+            self._view_state[self._key(original)] = text
+
+    @contextmanager
+    def external_view(self, path: Optional[str]):
+        """Aktionen ohne Overlay-Unterstützung arbeiten auf der materialisierten Sicht statt auf dem Original."""
+        if path is None:
+            yield path
+            return
+        mirrored = self.materialize(path)
+        root = self._root_for(path)
+        view = self._views[root]
+        before = self._scan_view(view)
+        try:
+            yield mirrored
+        finally:
+            self._sync_back(root, view, before)
+
+    # ===================== Validierung =====================
+    def validate(self) -> List[str]:
+        """Prüft alle geänderten Python-Dateien auf Syntaxfehler. Liefert eine Liste von Fehlermeldungen."""
+        errors = []
+        for key, document in self.documents.items():
+            if document.dirty and key.endswith(".py"):
+                try:
+                    ast.parse(document.text, filename=key)
+                except SyntaxError as e:
+                    errors.append(f"{key}:{e.lineno}: {e.msg}")
+        return errors
+
+    def run_in_view(self, command: Sequence[str], path: str, timeout: Optional[float] = None):
+        """Führt einen Befehl (pylint, pytest, ...) im Projektverzeichnis der Sicht aus."""
+        self.materialize(path)
+        return run_subprocess(list(command), timeout=timeout, cwd=self._views[self._root_for(path)],
+                              capture_output=True, text=True)
+
+    # ===================== Abschluss =====================
+    def changed_paths(self) -> List[str]:
+        return sorted(key for key, document in self.documents.items() if document.dirty)
+
+    def commit(self) -> int:
+        """
+        Übernimmt alle Änderungen in einem Batch: erst werden alle Dateien als
+        temporäre Dateien daneben geschrieben, dann per os.replace ausgetauscht.
+        Scheitert das Schreiben, bleibt das Original unverändert; scheitert der
+        Austausch mittendrin, werden bereits ersetzte Dateien zurückgesetzt.
+        """
+        changed = [self.documents[key] for key in self.changed_paths()]
+        self._check_conflicts(changed)
+        staged = []
+        try:
+            with span("overlay commit", "io", files=len(changed)):
+                for document in changed:
+                    os.makedirs(os.path.dirname(document.path), exist_ok=True)
+                    temp_path = f"{document.path}.{uuid.uuid4().hex[:8]}.phoenixai-tmp"
+                    with open(temp_path, "w", encoding="utf-8") as f:
+                        f.write(document.text)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    staged.append((document, temp_path))
+                replaced = []
+                try:
+                    for document, temp_path in staged:
+                        os.replace(temp_path, document.path)
+                        replaced.append(document)
+                except OSError:
+                    self._undo_replaced(replaced)
+                    raise
+        finally:
+            for _, temp_path in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        for document in changed:
+            document.mark_written()
+        if changed:
+            print(f"[Overlay] {len(changed)} Datei(en) übernommen.")
+        self._finish()
+        return len(changed)
+
+    def _check_conflicts(self, changed):
+        for document in changed:
+            if document.disk_text is None:
+                if os.path.exists(document.path):
+                    raise OverlayConflict(f"Datei wurde inzwischen angelegt: {document.path}")
+                continue
+            try:
+                with open(document.path, "r", encoding="utf-8") as f:
+                    current = f.read()
+            except OSError as e:
+                raise OverlayConflict(f"Datei nicht mehr lesbar: {document.path} ({e})") from e
+            if current != document.disk_text:
+                raise OverlayConflict(f"Datei wurde außerhalb der Pipeline geändert: {document.path}")
+
+    @staticmethod
+    def _undo_replaced(replaced):
+        for document in replaced:
+            try:
+                if document.disk_text is None:
+                    os.remove(document.path)
+                else:
+                    with open(document.path, "w", encoding="utf-8") as f:
+                        f.write(document.disk_text)
+            except OSError as e:
+                print(f"[Overlay] Konnte {document.path} nicht zurücksetzen: {e}")
+
+    def export_patch(self, patch_path: str) -> int:
+        """
+        Schreibt alle Änderungen des Laufs als Unified Diff (Pfade relativ zur Projektwurzel,
+        anwendbar mit ``git apply``), z. B. bevor ein gescheiterter Commit verworfen wird.
+
+        :return: Anzahl der Dateien im Patch.
+        """
+        changed = [self.documents[key] for key in self.changed_paths()]
+        with open(patch_path, "w", encoding="utf-8") as f:
+            for document in changed:
+                relative = os.path.relpath(document.path, self._root_for(document.path)).replace(os.sep, "/")
+                before = document.disk_text
+                for line in difflib.unified_diff(
+                        (before or "").splitlines(keepends=True), document.text.splitlines(keepends=True),
+                        fromfile="/dev/null" if before is None else f"a/{relative}", tofile=f"b/{relative}"):
+                    f.write(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
+        return len(changed)
+
+    def discard(self) -> int:
+        """Verwirft alle Änderungen des Laufs."""
+        count = len(self.changed_paths())
+        if count:
+            print(f"[Overlay] {count} geänderte Datei(en) verworfen.")
+        self._finish()
+        return count
+
+    def _finish(self):
+        touched: Set[str] = set(self._view_state)
+        if self.keep_view:
+            # Geteilte Sicht auf den Stand der Festplatte zurücksetzen, damit der nächste Lauf sauber startet
+            for key in touched:
+                mirrored = self.view_path(key)
+                if os.path.exists(key):
+                    shutil.copyfile(key, mirrored)
+                elif os.path.exists(mirrored):
+                    os.remove(mirrored)
+        else:
+            _remove_views(list(self._views.values()))
+        self._views.clear()
+        self._view_state.clear()
+        self.documents.clear()
+
+    def flush(self) -> int:
+        # Innerhalb einer Transaktion wird nie einzeln geschrieben, nur per commit()
+        return 0
+
+    def close(self):
+        """Ein nicht abgeschlossener Lauf wird beim Schließen verworfen."""
+        self.discard()
@@ -0,0 +1,310 @@
+# perf_gate.py
+"""
+Performance-Gate für Transform-Schritte: Benchmarks vor und nach dem Schritt.
+
+LLM-Umschreibungen (Refactor, Pylint, Sourcery, SonarQube, ...) können heißen Code
+unbemerkt langsamer machen. Ist das Gate aktiv (``PHOENIXAI_PERF_GATE=warn`` oder
+``rollback``), misst die Pipeline für die Schritte aus ``PHOENIXAI_PERF_GATE_STEPS`` vor
+und nach dem Schritt dieselben Benchmarks des Zielprojekts:
+
+- einen eigenen Befehl (``PHOENIXAI_PERF_GATE_COMMAND``, z. B. ``python -m spiel --frames 500``),
+  dessen Laufzeit gemessen wird,
+- pytest-benchmark-Tests (Ordner ``PHOENIXAI_PERF_GATE_PYTEST``, Standard ``benchmarks``),
+  sofern pytest-benchmark installiert ist,
+- die mit "Generate Benchmarks" erzeugten Micro-Benchmarks (``benchmark_generator``),
+- weitere Quellen, die über ``register_benchmark_source`` eingehängt werden.
+
+Jeder Befehl läuft ``PERF_GATE_WARMUP`` Mal zum Aufwärmen und dann ``PERF_GATE_REPEAT``
+Mal gemessen. Verglichen wird mit Welchs t-Test: Liegt das ganze 95-%-Konfidenzintervall
+der relativen Änderung über ``PERF_GATE_THRESHOLD``, gilt der Schritt als Regression.
+Bei ``warn`` bleibt der Schritt erfolgreich und bekommt einen Hinweis, bei ``rollback``
+schlägt er fehl – die Pipeline verwirft dann seine Änderungen an den Arbeitskopien.
+Schritte ohne Overlay-Unterstützung (Pylint, Sourcery, SonarQube, Optimize Hotspots)
+schreiben ohne transaktionalen Lauf direkt auf die Festplatte; für sie stellt das Gate
+die Datei des Schritts auf den Stand vor dem Schritt wieder her. Andere Dateien, die
+ein solcher Schritt ändert, werden nur im transaktionalen Lauf (Overlay) verworfen.
+
+Gemessen wird im Projekt mit dem aktuellen Stand der Arbeitskopien (beim Overlay in
+der materialisierten Sicht). Die Ergebnisse landen je Schritt als Markdown-Report mit
+JSON-Rohdaten unter ``reports/PerfGate/<Datei>/``.
+"""
+
+import importlib.util
+import json
+import math
+import os
+import shlex
+import statistics
+import sys
+import tempfile
+import time
+import urllib.parse
+from typing import Callable, Dict, List, Optional
+
+from phoenixai.pipeline_analysis.report_storage import reports_base_dir, versioned_report_path
+from phoenixai.utils.cancellation import DeadlineExceeded, run_subprocess
+from phoenixai.utils.overlay import Overlay, find_project_root
+
+# "off", "warn" (nur markieren) oder "rollback" (Schritt schlägt fehl, Änderungen werden verworfen)
+PERF_GATE = os.getenv("PHOENIXAI_PERF_GATE", "off").strip().lower()
+PERF_GATE_STEPS = {name.strip() for name in os.getenv(
+    "PHOENIXAI_PERF_GATE_STEPS", "Refactor,Pylint,Sourcery,SonarQube,Optimize Hotspots").split(",") if name.strip()}
+PERF_GATE_COMMAND = os.getenv("PHOENIXAI_PERF_GATE_COMMAND", "")
+PERF_GATE_PYTEST = os.getenv("PHOENIXAI_PERF_GATE_PYTEST", "benchmarks")
+PERF_GATE_WARMUP = int(os.getenv("PHOENIXAI_PERF_GATE_WARMUP", "1"))
+PERF_GATE_REPEAT = int(os.getenv("PHOENIXAI_PERF_GATE_REPEAT", "7"))
+# Relative Verlangsamung, ab der (statistisch gesichert) eine Regression vorliegt
+PERF_GATE_THRESHOLD = float(os.getenv("PHOENIXAI_PERF_GATE_THRESHOLD", "0.05"))
+PERF_GATE_TIMEOUT = float(os.getenv("PHOENIXAI_PERF_GATE_TIMEOUT", "300"))
+
+# 97,5-%-Quantile der t-Verteilung (zweiseitiges 95-%-Intervall); darüber Normalverteilung
+T_QUANTILES = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+               9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+# Quelle: (Projektwurzel, Datei des Schritts) -> Benchmarks
+BenchmarkSource = Callable[[str, str], List[Dict]]
+_benchmark_sources: List[BenchmarkSource] = []
+
+
+def register_benchmark_source(source: BenchmarkSource) -> BenchmarkSource:
+    """
+    Hängt eine weitere Benchmark-Quelle ein (auch als Dekorator nutzbar).
+
+    Ein Benchmark ist ein dict mit ``name``, ``command`` (Argumentliste, läuft im
+    Projektverzeichnis) und ``kind``: ``"timed"`` (Laufzeit des Befehls) oder ``"json"``
+    (der Befehl schreibt je Benchmark eine Statistik im Format von pytest-benchmarks
+    ``--benchmark-json``; der Platzhalter ``{json}`` im Befehl wird durch die
+    Ausgabedatei ersetzt). ``"pytest-benchmark"`` ist ein Alias für ``"json"``.
+    """
+    _benchmark_sources.append(source)
+    return source
+
+
+@register_benchmark_source
+def _command_benchmarks(root: str, file_path: str) -> List[Dict]:
+    if not PERF_GATE_COMMAND:
+        return []
+    return [{"name": PERF_GATE_COMMAND, "command": shlex.split(PERF_GATE_COMMAND, posix=os.name == "posix"),
+             "kind": "timed"}]
+
+
+@register_benchmark_source
+def _pytest_benchmarks(root: str, file_path: str) -> List[Dict]:
+    if not os.path.exists(os.path.join(root, PERF_GATE_PYTEST)) or importlib.util.find_spec("pytest_benchmark") is None:
+        return []
+    return [{"name": f"pytest-benchmark {PERF_GATE_PYTEST}", "kind": "json",
+             "command": [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", PERF_GATE_PYTEST,
+                         "--benchmark-only", f"--benchmark-warmup={'on' if PERF_GATE_WARMUP else 'off'}",
+                         "--benchmark-json={json}"]}]
+
+
+def summarize(samples: List[float]) -> Dict:
+    return {"mean": statistics.fmean(samples), "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "n": len(samples), "min": min(samples), "samples": samples}
+
+
+def _t_quantile(df: float) -> float:
+    for limit in sorted(T_QUANTILES):
+        if df <= limit:
+            return T_QUANTILES[limit]
+    return 1.96
+
+
+def compare(before: Dict, after: Dict, threshold: float = PERF_GATE_THRESHOLD) -> Dict:
+    """
+    Welchs t-Test auf die Mittelwerte zweier Messreihen (dicts mit mean, stddev, n).
+
+    :return: relative Änderung (``change``), 95-%-Konfidenzintervall (``ci_low``, ``ci_high``,
+        relativ zu before) und ``verdict``: "langsamer", "schneller" oder "unverändert".
+    """
+    diff = after["mean"] - before["mean"]
+    var_before = before["stddev"] ** 2 / before["n"]
+    var_after = after["stddev"] ** 2 / after["n"]
+    se = math.sqrt(var_before + var_after)
+    if se > 0:
+        # Welch-Satterthwaite-Freiheitsgrade
+        df = (var_before + var_after) ** 2 / (
+            (var_before ** 2 / max(before["n"] - 1, 1)) + (var_after ** 2 / max(after["n"] - 1, 1)))
+        margin = _t_quantile(df) * se
+    else:
+        margin = 0.0
+    base = before["mean"] or 1e-12
+    result = {"change": diff / base, "ci_low": (diff - margin) / base, "ci_high": (diff + margin) / base}
+    if result["ci_low"] > threshold:
+        result["verdict"] = "langsamer"
+    elif result["ci_high"] < -threshold:
+        result["verdict"] = "schneller"
+    else:
+        result["verdict"] = "unverändert"
+    return result
+
+
+class PerformanceGate:
+    def __init__(self, step_name: str, file_path: str, documents, benchmarks: List[Dict], mode: str = PERF_GATE):
+        """
+        :param step_name: Name des Pipeline-Schritts.
+        :param file_path: Datei, auf der der Schritt arbeitet.
+        :param documents: Overlay oder DocumentSession der Pipeline (oder None).
+        :param benchmarks: Die zu messenden Benchmarks (siehe ``register_benchmark_source``).
+        :param mode: "warn" oder "rollback".
+        """
+        self.step_name = step_name
+        self.file_path = file_path
+        self.documents = documents
+        self.benchmarks = benchmarks
+        self.mode = mode
+        self.root = find_project_root(file_path)
+        self.baseline: Dict[str, Dict] = {}
+        self.report_path: Optional[str] = None
+        # Stand der Datei auf der Festplatte vor dem Schritt (nur ohne Overlay)
+        self._disk_text: Optional[str] = None
+
+    @classmethod
+    def for_step(cls, step, documents) -> Optional["PerformanceGate"]:
+        """Das Gate für einen Schritt, oder None, wenn es aus ist, nicht passt oder es nichts zu messen gibt."""
+        if PERF_GATE not in ("warn", "rollback") or step.name not in PERF_GATE_STEPS or not step.args:
+            return None
+        file_path = str(step.args[0])
+        root = find_project_root(file_path)
+        benchmarks = [benchmark for source in _benchmark_sources for benchmark in source(root, file_path)]
+        if not benchmarks:
+            print(f"[PerfGate] Keine Benchmarks für {root} gefunden – Gate für {step.name} übersprungen.")
+            return None
+        return cls(step.name, file_path, documents, benchmarks)
+
+    # ===================== Messen =====================
+    def _run(self, command: List[str]):
+        if isinstance(self.documents, Overlay):
+            return self.documents.run_in_view(command, self.file_path, timeout=PERF_GATE_TIMEOUT)
+        return run_subprocess(command, timeout=PERF_GATE_TIMEOUT, cwd=self.root, capture_output=True, text=True)
+
+    def _measure_timed(self, benchmark: Dict) -> Dict:
+        samples = []
+        for run in range(PERF_GATE_WARMUP + PERF_GATE_REPEAT):
+            start = time.perf_counter()
+            result = self._run(benchmark["command"])
+            elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                return {"error": f"Exit-Code {result.returncode}: {(result.stderr or '').strip()[-300:]}"}
+            if run >= PERF_GATE_WARMUP:
+                samples.append(elapsed)
+        return summarize(samples)
+
+    def _measure_json(self, benchmark: Dict) -> Dict[str, Dict]:
+        with tempfile.TemporaryDirectory(prefix="phoenixai_perfgate_") as directory:
+            json_path = os.path.join(directory, "benchmark.json")
+            result = self._run([part.replace("{json}", json_path) for part in benchmark["command"]])
+            if result.returncode != 0 or not os.path.isfile(json_path):
+                return {benchmark["name"]: {"error": f"Exit-Code {result.returncode}: "
+                                                     f"{(result.stdout or '').strip()[-300:]}"}}
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        return {f"{benchmark['name']}::{entry['name']}": {
+            "mean": entry["stats"]["mean"], "stddev": entry["stats"]["stddev"],
+            "n": entry["stats"]["rounds"], "min": entry["stats"]["min"]} for entry in data.get("benchmarks", [])}
+
+    def measure(self) -> Dict[str, Dict]:
+        """Misst alle Benchmarks auf dem aktuellen Stand; Fehler werden je Benchmark vermerkt."""
+        if self.documents is not None and not isinstance(self.documents, Overlay):
+            # Ohne Overlay liegen die Arbeitskopien nur im Speicher
+            self.documents.flush()
+        results = {}
+        for benchmark in self.benchmarks:
+            try:
+                if benchmark["kind"] in ("json", "pytest-benchmark"):
+                    results.update(self._measure_json(benchmark))
+                else:
+                    results[benchmark["name"]] = self._measure_timed(benchmark)
+            except DeadlineExceeded:
+                results[benchmark["name"]] = {"error": f"Zeitlimit von {PERF_GATE_TIMEOUT:.0f} s überschritten"}
+        return results
+
+    # ===================== Gate =====================
+    def before(self):
+        print(f"[PerfGate] Baseline vor {self.step_name} ({len(self.benchmarks)} Benchmark-Quelle(n))...")
+        self.baseline = self.measure()
+        if not isinstance(self.documents, Overlay):
+            # measure() hat die Arbeitskopien geschrieben: das ist der Stand vor dem Schritt
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                self._disk_text = f.read()
+
+    def after(self, step) -> List[Dict]:
+        """
+        Misst nach dem Schritt, vergleicht mit der Baseline, speichert den Report und passt
+        ``step.status`` an.
+
+        :return: Ein Vergleich je Benchmark (mit ``verdict`` bzw. ``error``).
+        """
+        print(f"[PerfGate] Messung nach {self.step_name}...")
+        current = self.measure()
+        comparisons = []
+        for name, before in self.baseline.items():
+            after = current.get(name, {"error": "nach dem Schritt nicht mehr vorhanden"})
+            entry = {"name": name, "before": before, "after": after}
+            if "error" in before:
+                entry["verdict"] = "nicht messbar"
+            elif "error" in after:
+                # Der Benchmark lief vorher und scheitert jetzt: das ist schlimmer als langsamer
+                entry["verdict"] = "fehlgeschlagen"
+            else:
+                entry.update(compare(before, after))
+            comparisons.append(entry)
+
+        regressions = [c for c in comparisons if c["verdict"] in ("langsamer", "fehlgeschlagen")]
+        self.report_path = self._store(comparisons)
+        if regressions:
+            worst = max(regressions, key=lambda c: c.get("change", math.inf))
+            detail = (f"{worst['name']} fehlgeschlagen" if worst["verdict"] == "fehlgeschlagen" else
+                      f"{worst['name']} {worst['change']:+.1%} (KI {worst['ci_low']:+.1%} … {worst['ci_high']:+.1%})")
+            if self.mode == "rollback":
+                step.status = f"🔴 Failed: Performance-Regression – {detail}"
+                self._restore_disk()
+            else:
+                step.status = f"{step.status} ⚠ Performance: {detail}"
+            print(f"[PerfGate] Regression nach {self.step_name}: {detail}")
+        else:
+            print(f"[PerfGate] Keine signifikante Verlangsamung nach {self.step_name}.")
+        return comparisons
+
+    def _restore_disk(self):
+        """Ohne Overlay hat der Schritt die Datei womöglich direkt geschrieben: alten Stand zurückschreiben."""
+        if self._disk_text is None:
+            return
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            f.write(self._disk_text)
+        print(f"[PerfGate] {self.file_path} auf den Stand vor {self.step_name} zurückgesetzt.")
+
+    def _store(self, comparisons: List[Dict]) -> Optional[str]:
+        """Schreibt Markdown-Report und JSON-Rohdaten in die Report-Ablage."""
+        safe_name = "".join(c if c.isalnum() else "_" for c in self.step_name).strip("_").lower()
+        try:
+            report_path, timestamp = versioned_report_path("PerfGate", self.file_path, prefix=f"perf_gate_{safe_name}")
+        except OSError as e:
+            print(f"[PerfGate] Report konnte nicht gespeichert werden: {e}")
+            return None
+        json_path = report_path[:-len(".md")] + ".json"
+        lines = [
+            f"# Performance-Gate: {self.step_name}",
+            "",
+            f"**Datei:** {self.file_path}  ",
+            f"**Zeitpunkt:** {timestamp}  ",
+            f"**Modus:** {self.mode}, {PERF_GATE_WARMUP} Aufwärmlauf/-läufe, {PERF_GATE_REPEAT} Messungen, "
+            f"Schwelle {PERF_GATE_THRESHOLD:.0%}",
+            "",
+            "| Benchmark | vorher (Mittel ± s) | nachher (Mittel ± s) | Änderung | 95-%-KI | Ergebnis |",
+            "|---|---|---|---|---|---|",
+        ]
+        for c in comparisons:
+            def cell(stats):
+                return stats["error"] if "error" in stats else f"{stats['mean'] * 1000:.2f} ± {stats['stddev'] * 1000:.2f} ms"
+            change = f"{c['change']:+.1%}" if "change" in c else "–"
+            interval = f"{c['ci_low']:+.1%} … {c['ci_high']:+.1%}" if "ci_low" in c else "–"
+            lines.append(f"| {c['name']} | {cell(c['before'])} | {cell(c['after'])} | {change} | {interval} | {c['verdict']} |")
+        raw = os.path.relpath(json_path, reports_base_dir()).replace(os.sep, "/")
+        lines += ["", f"Rohdaten: [{os.path.basename(json_path)}](/raw_report?report={urllib.parse.quote(raw)})", ""]
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"step": self.step_name, "file": self.file_path, "mode": self.mode,
+                       "threshold": PERF_GATE_THRESHOLD, "comparisons": comparisons}, f, indent=2)
+        return report_path
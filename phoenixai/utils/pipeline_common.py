@@ -1,8 +1,17 @@
 # pipeline_common.py
+import itertools
 import time
 from tkinter import messagebox
 from typing import Callable, Optional, Any, List
 
+from phoenixai.pipeline_analysis.report_storage import versioned_report_path
+from phoenixai.utils.cancellation import (DEFAULT_STEP_TIMEOUT, CancellationToken, DeadlineExceeded,
+                                          OperationCancelled, cancellation_scope)
+from phoenixai.utils.document import DocumentSession, document_scope, is_document_aware
+from phoenixai.utils.overlay import Overlay, OverlayConflict
+from phoenixai.utils.perf_gate import PerformanceGate
+from phoenixai.utils.tracing import Tracer, activate, span
+from phoenixai.utils.treeview_model import TreeviewModel
 
 
 class PipelineStep:
@@ -13,76 +22,237 @@ class PipelineStep:
         self.kwargs = kwargs
         self.status = "Pending"
         self.duration = None
+        self.iid = None
+        self.trace: Optional[Tracer] = None
+        self.trace_path: Optional[str] = None
+        # Bei Massenläufen (Repository-Runner) wird nur die Zusammenfassung des Traces verwendet
+        self.export_trace = True
+        # Frist in Sekunden; LLM-Aufrufe und Subprozesse des Schritts werden danach abgebrochen
+        self.timeout: Optional[float] = DEFAULT_STEP_TIMEOUT
+        self.cancel_token: Optional[CancellationToken] = None
+        # Report des Performance-Gates, falls es für den Schritt gemessen hat
+        self.perf_gate_report: Optional[str] = None
 
     def run(self):
-        start_time = time.time()
+        self.trace = Tracer(self.name)
+        self.cancel_token = CancellationToken(timeout=self.timeout)
+        start_time = time.perf_counter()
+        with activate(self.trace), cancellation_scope(self.cancel_token), \
+                span(f"Step: {self.name}", "pipeline", file=str(self.args[0]) if self.args else None):
+            try:
+                self.status = "Running..."
+
+                if self.function:
+                    self.function(*self.args, **self.kwargs)
+                if self.cancel_token.expired:
+                    # Die Funktion hat den Abbruch selbst abgefangen, die Frist ist trotzdem überschritten
+                    raise DeadlineExceeded("Zeitlimit überschritten")
+                self.status = "🟢 Success"
+            except DeadlineExceeded as e:
+                if self.cancel_token.expired and self.timeout is not None:
+                    self.status = f"⏱ Timed out after {self.timeout:.0f}s"
+                else:
+                    # Eine engere Frist (Subprozess, LLM-Aufruf) ist abgelaufen, nicht die des Schritts
+                    self.status = f"⏱ Timed out: {e}"
+            except OperationCancelled as e:
+                self.status = f"⛔ Cancelled: {e}"
+            except Exception as e:
+                self.status = f"🔴 Failed: {e}"
+            finally:
+                end_time = time.perf_counter()
+                self.duration = end_time - start_time
+        if self.export_trace:
+            self._export_trace()
+
+    def _export_trace(self):
+        """Speichert den Trace des Schritts unter reports/Traces/<Datei>/ für die Flask-Ansicht."""
+        if not self.args:
+            return
         try:
-            self.status = "Running..."
+            self.trace_path, _ = versioned_report_path(
+                "Traces", str(self.args[0]), extension="json", prefix=_trace_prefix(self.name)
+            )
+            self.trace.export(self.trace_path)
+        except OSError as e:
+            print(f"[Trace] Trace konnte nicht gespeichert werden: {e}")
+            self.trace_path = None
 
-            if self.function:
-                self.function(*self.args, **self.kwargs)
-            self.status = "🟢 Success"
-        except Exception as e:
-            self.status = f"🔴 Failed: {e}"
-        finally:
-            end_time = time.time()
-            self.duration = end_time - start_time
+
+def _trace_prefix(step_name: str) -> str:
+    safe_name = "".join(c if c.isalnum() else "_" for c in step_name).strip("_").lower()
+    return f"trace_{safe_name}"
 
 
 class Pipeline:
-    def __init__(self, treeview, step_callback: Optional[Callable[[PipelineStep], Any]] = None):
+    def __init__(self, treeview, step_callback: Optional[Callable[[PipelineStep], Any]] = None,
+                 step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT, transactional: bool = True):
         """
         :param treeview: Das Treeview-Widget zur Anzeige der Pipeline-Schritte.
         :param step_callback: Eine optionale Callback-Funktion, die nach jedem Schritt aufgerufen wird.
                               Sie erhält das abgeschlossene PipelineStep-Objekt als Parameter.
+        :param step_timeout: Frist pro Schritt in Sekunden (None = unbegrenzt).
+        :param transactional: Wenn True, laufen alle Schritte in einem Overlay; die Dateien werden
+                              erst nach dem letzten Schritt gemeinsam übernommen oder verworfen.
         """
         self.steps: List[PipelineStep] = []
         self.current_step = 0
-        self.treeview = treeview
+        self.view = TreeviewModel(treeview)
         self.step_callback = step_callback
+        self.step_timeout = step_timeout
+        self.transactional = transactional
+        # Overlay für den ganzen Lauf bzw. Arbeitskopien, solange Schritte dieselbe Datei bearbeiten
+        self.documents = Overlay() if transactional else DocumentSession()
+        self._next_iid = itertools.count(1)
+
+    @property
+    def treeview(self):
+        return self.view.treeview
+
+    @treeview.setter
+    def treeview(self, treeview):
+        self.view.treeview = treeview
+        self.view.schedule_flush()
 
     def add_step(self, name: str, function: Callable, *args, **kwargs):
         step = PipelineStep(name, function, *args, **kwargs)
+        step.iid = str(next(self._next_iid))
+        step.timeout = self.step_timeout
         self.steps.append(step)
-        self.display_status()
+        self._update_row(step)
+
+    def remove_step(self, iid: str) -> Optional[int]:
+        """Entfernt den Schritt mit der gegebenen iid und gibt seine bisherige Position zurück."""
+        for idx, step in enumerate(self.steps):
+            if step.iid == iid:
+                del self.steps[idx]
+                if idx < self.current_step:
+                    self.current_step -= 1
+                self.view.remove(iid)
+                if self.transactional and 0 < self.current_step == len(self.steps):
+                    # Der entfernte Schritt war der letzte ausstehende: Lauf abschließen
+                    self.finish_transaction()
+                return idx
+        return None
 
     def display_status(self):
-        # TreeView-Einträge leeren
-        for item in self.treeview.get_children():
-            self.treeview.delete(item)
-
-        # Aktuelle Steps eintragen
-        for idx, step in enumerate(self.steps, start=1):
-            duration_text = f"{step.duration:.2f}s" if step.duration else "N/A"
-            file_path_display = self._truncate_path(step.args[0]) if step.args else "N/A"
-            self.treeview.insert(
-                "",
-                "end",
-                iid=str(idx),
-                values=(step.status, step.name, file_path_display, duration_text)
-            )
+        """Gleicht alle Zeilen mit dem Zustand der Steps ab; nur geänderte Zeilen werden neu gezeichnet."""
+        known = set(self.view.iids())
+        for step in self.steps:
+            known.discard(step.iid)
+            self._update_row(step)
+        for iid in known:
+            self.view.remove(iid)
+
+    def _update_row(self, step: PipelineStep):
+        duration_text = f"{step.duration:.2f}s" if step.duration else "N/A"
+        file_path_display = self._truncate_path(step.args[0]) if step.args else "N/A"
+        self.view.upsert(step.iid, (step.status, step.name, file_path_display, duration_text))
 
     def run_next_step(self):
         if self.current_step < len(self.steps):
             step = self.steps[self.current_step]
             step.status = "Running..."
-            self.display_status()
+            self._update_row(step)
+            self.view.reveal(step.iid)
+            # Der Schritt blockiert die Event-Loop, daher sofort zeichnen statt auf den Timer zu warten
+            self.view.flush()
+            self.view.see(step.iid)
             self.treeview.update_idletasks()  # Erzwingt die GUI-Aktualisierung
 
-            step.run()
-            self.display_status()
+            self.run_step_on_documents(step, self.documents)
+            if not self.transactional and not self._continues_chain(step, self.current_step + 1):
+                self.documents.flush()
+            self._update_row(step)
 
             if self.step_callback:
                 self.step_callback(step)
 
             self.current_step += 1
+            if self.transactional and self.current_step == len(self.steps):
+                self.finish_transaction()
         else:
             messagebox.showinfo("Info", "Alle Schritte sind abgeschlossen.")
 
+    def _continues_chain(self, step: PipelineStep, next_index: int) -> bool:
+        """True, wenn der nächste Schritt dieselbe Datei ebenfalls in der Arbeitskopie bearbeitet."""
+        if next_index >= len(self.steps) or not is_document_aware(step.function):
+            return False
+        next_step = self.steps[next_index]
+        return is_document_aware(next_step.function) and next_step.args[:1] == step.args[:1]
+
+    @staticmethod
+    def run_step_on_documents(step: PipelineStep, documents: DocumentSession):
+        """
+        Führt den Schritt auf den Arbeitskopien der Session aus, sofern die Aktion das unterstützt.
+        Andere Aktionen arbeiten auf echten Dateien: ohne Overlay wird vorher alles geschrieben,
+        mit Overlay bekommen sie den Pfad in der materialisierten Sicht.
+        Schlägt ein Schritt fehl, werden seine Änderungen an den Arbeitskopien verworfen.
+        Mit aktivem Performance-Gate (``PHOENIXAI_PERF_GATE``) wird vorher und nachher gemessen;
+        eine Regression markiert den Schritt oder lässt ihn fehlschlagen.
+        """
+        snapshot = documents.snapshot()
+        gate = PerformanceGate.for_step(step, documents)
+        if gate is not None:
+            gate.before()
+        if is_document_aware(step.function):
+            with document_scope(documents):
+                step.run()
+        else:
+            original_args = step.args
+            with documents.external_view(step.args[0] if step.args else None) as path:
+                step.args = (path,) + original_args[1:] if original_args else original_args
+                try:
+                    step.run()
+                finally:
+                    step.args = original_args
+        if gate is not None and step.status.startswith("🟢"):
+            gate.after(step)
+            step.perf_gate_report = gate.report_path
+        if not step.status.startswith("🟢"):
+            documents.restore(snapshot)
+
+    def finish_transaction(self) -> bool:
+        """
+        Schließt den Lauf ab: Syntaxprüfung aller geänderten Dateien, dann gemeinsamer Commit.
+        Bei fehlgeschlagenen Schritten oder Syntaxfehlern wird nachgefragt, ob trotzdem übernommen wird.
+        """
+        changed = self.documents.changed_paths()
+        if not changed:
+            self.documents.discard()
+            return False
+        problems = [f"{step.name}: {step.status}" for step in self.steps if not step.status.startswith("🟢")]
+        problems += self.documents.validate()
+        message = f"{len(changed)} Datei(en) wurden geändert."
+        if problems:
+            message += "\n\nProbleme:\n" + "\n".join(problems[:10]) + "\n\nÄnderungen trotzdem übernehmen?"
+            if not messagebox.askyesno("Pipeline abgeschlossen", message):
+                self.documents.discard()
+                return False
+        try:
+            self.documents.commit()
+        except (OverlayConflict, OSError) as e:
+            # Die Ergebnisse des Laufs (samt LLM-Ausgaben) nicht kommentarlos verwerfen
+            message = f"Änderungen konnten nicht übernommen werden:\n{e}"
+            try:
+                patch_path, _ = versioned_report_path("Overlay", changed[0], extension="patch", prefix="uncommitted")
+                self.documents.export_patch(patch_path)
+                message += f"\n\nAlle Änderungen wurden als Patch gesichert:\n{patch_path}"
+            except OSError as export_error:
+                message += f"\n\nPatch konnte nicht gespeichert werden: {export_error}"
+            messagebox.showerror("Pipeline abgeschlossen", message)
+            self.documents.discard()
+            return False
+        return True
+
+    def close_documents(self):
+        """Beim Beenden: offene Arbeitskopien schreiben bzw. eine offene Transaktion verwerfen."""
+        self.documents.close()
+
     def reset(self):
+        self.documents.close()
         self.steps.clear()
         self.current_step = 0
-        self.display_status()
+        self.view.clear()
 
     def _truncate_path(self, path: str) -> str:
         import os
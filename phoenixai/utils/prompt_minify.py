@@ -0,0 +1,251 @@
+# prompt_minify.py
+"""
+Aufgabenbezogenes Verkleinern des Quelltexts, bevor er in einen Prompt geht.
+
+Viele Aktionen schicken den Code samt Kommentaren, langen Docstrings und
+Leerzeilen an das LLM, obwohl die Aufgabe sie nicht braucht: Für Typannotationen
+oder Namensvorschläge reicht die erste Zeile eines Docstrings, Kommentare tragen
+nichts bei. ``ACTION_PROFILES`` legt je Aktion fest, was entfernt oder gekürzt wird:
+
+- ``comments``: Kommentare entfernen (Pragmas wie ``# type:``, ``# noqa`` oder
+  ``# pylint:`` bleiben stehen),
+- ``docstrings``: mehrzeilige Docstrings auf ihre erste Zeile plus Marker
+  ``<<doc:N>>`` kürzen,
+- ``blank_lines``: Leerzeilen-Folgen auf eine Leerzeile zusammenfassen und
+  Leerzeichen am Zeilenende entfernen.
+
+Der Inhalt von Strings bleibt immer unverändert. Die Kürzungen sind umkehrbar:
+``MinifiedSource.restore`` setzt die Original-Docstrings in Code ein, den das LLM auf
+Basis der verkleinerten Fassung zurückgibt; der Prompt muss verlangen, dass die Marker
+erhalten bleiben. Fehlen Marker in der Antwort (``missing_markers``), gingen Docstrings
+verloren – die Aktion verwirft die Antwort dann oder fragt mit dem vollständigen Code neu.
+Aktionen, deren Ergebnis über Namen statt über Zeilennummern zugeordnet wird
+(Typannotationen, Name Checker), brauchen keine weitere Rückabbildung.
+
+Die Einsparung auf einem Korpus zeigt:
+
+    python -m phoenixai.utils.prompt_minify phoenixai/tests
+"""
+
+import argparse
+import ast
+import io
+import os
+import re
+import tokenize
+from typing import Dict, List, Optional
+
+from phoenixai.utils.span_patch import SourcePatch, get_docstring_node, render_docstring
+
+PROMPT_MINIFY = os.getenv("PHOENIXAI_PROMPT_MINIFY", "1") != "0"
+# Grobe Schätzung für Gemini-Tokens bei Python-Code
+CHARS_PER_TOKEN = 4
+
+ACTION_PROFILES: Dict[str, Dict[str, bool]] = {
+    "Type Annotation Updater": {"comments": True, "docstrings": True, "blank_lines": True},
+    "Refactor": {"comments": False, "docstrings": True, "blank_lines": True},
+    "Name Checker": {"comments": True, "docstrings": True, "blank_lines": True},
+}
+
+PRAGMA_PATTERN = re.compile(r"#\s*(type:|noqa|pylint:|pragma|fmt:|isort:|mypy:|pyright:)")
+MARKER_PATTERN = re.compile(r"<<doc:(\d+)>>")
+
+
+class MinifiedSource:
+    def __init__(self, original: str, text: str, docstrings: Dict[str, str], action: str = ""):
+        """
+        :param original: Der ursprüngliche Quelltext.
+        :param text: Die verkleinerte Fassung für den Prompt.
+        :param docstrings: Marker-Nummer -> vollständiger (bereinigter) Docstring.
+        :param action: Name der Aktion, für die verkleinert wurde.
+        """
+        self.original = original
+        self.text = text
+        self.docstrings = docstrings
+        self.action = action
+
+    @property
+    def saved_chars(self) -> int:
+        return len(self.original) - len(self.text)
+
+    def summary(self) -> str:
+        percent = 100 * self.saved_chars / len(self.original) if self.original else 0.0
+        return (f"[Minify] {self.action or 'Prompt'}: {len(self.original)} → {len(self.text)} Zeichen "
+                f"(−{percent:.0f} %, ca. {self.saved_chars // CHARS_PER_TOKEN} Tokens gespart)")
+
+    def missing_markers(self, code: str) -> List[str]:
+        """Die Marker gekürzter Docstrings, die in code fehlen (z. B. weil das LLM sie entfernt hat)."""
+        present = set(MARKER_PATTERN.findall(code))
+        return [f"<<doc:{key}>>" for key in self.docstrings if key not in present]
+
+    def restore(self, code: str) -> str:
+        """
+        Ersetzt gekürzte Docstrings (erkennbar am Marker) in code wieder durch die Originale.
+
+        :param code: Code auf Basis von ``text``, z. B. die Antwort des LLM.
+        :return: Der Code mit vollständigen Docstrings; unverändert, wenn er nicht geparst werden kann.
+        """
+        if not self.docstrings or "<<doc:" not in code:
+            return code
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return code
+        patch = SourcePatch(code)
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            docstring = get_docstring_node(node)
+            if docstring is None:
+                continue
+            match = MARKER_PATTERN.search(docstring.value.value)
+            if match and match.group(1) in self.docstrings:
+                indent = "" if isinstance(node, ast.Module) else patch.indent_of(docstring.lineno)
+                patch.replace_node(docstring, render_docstring(self.docstrings[match.group(1)], indent))
+        return patch.apply()
+
+
+def _string_lines(code: str) -> set:
+    """Zeilen, deren Zeilenende innerhalb eines mehrzeiligen Strings liegt."""
+    lines = set()
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type == tokenize.STRING and token.end[0] > token.start[0]:
+            lines.update(range(token.start[0], token.end[0]))
+    return lines
+
+
+def minify_source(code: str, comments: bool = True, docstrings: bool = True,
+                  blank_lines: bool = True, action: str = "") -> MinifiedSource:
+    """
+    Verkleinert Python-Quelltext für einen Prompt.
+
+    :param comments: Kommentare (außer Pragmas) entfernen.
+    :param docstrings: Mehrzeilige Docstrings auf die erste Zeile plus Marker kürzen.
+    :param blank_lines: Leerzeilen zusammenfassen und Leerzeichen am Zeilenende entfernen.
+    :return: Die verkleinerte Fassung; bei nicht parsebarem Code unverändert.
+    """
+    try:
+        tree = ast.parse(code)
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (SyntaxError, tokenize.TokenError):
+        return MinifiedSource(code, code, {}, action)
+
+    patch = SourcePatch(code)
+    elided: Dict[str, str] = {}
+    if docstrings:
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            docstring = get_docstring_node(node)
+            text = ast.get_docstring(node)
+            if docstring is None or not text or len(text.splitlines()) < 2:
+                continue
+            key = str(len(elided) + 1)
+            elided[key] = text
+            patch.replace_node(docstring, render_docstring(f"{text.splitlines()[0]} <<doc:{key}>>", ""))
+    if comments:
+        for token in tokens:
+            if token.type != tokenize.COMMENT or PRAGMA_PATTERN.match(token.string):
+                continue
+            if token.start[0] == 1 and token.string.startswith("#!"):
+                continue
+            lineno = token.start[0]
+            before = patch.lines[lineno - 1][:token.start[1]]
+            if before.strip():
+                start = patch.offset(lineno, len(before.rstrip()), byte_col=False)
+                patch.replace(start, patch.offset(*token.end, byte_col=False), "")
+            else:
+                # Reine Kommentarzeilen verschwinden ganz
+                patch.replace(patch.line_start(lineno), patch.line_start(lineno + 1), "")
+
+    text = patch.apply()
+    if blank_lines:
+        text = _collapse_blank_lines(text)
+    return MinifiedSource(code, text, elided, action)
+
+
+def _collapse_blank_lines(code: str) -> str:
+    """Fasst Leerzeilen zusammen und entfernt Leerzeichen am Zeilenende (außerhalb von Strings)."""
+    try:
+        protected = _string_lines(code)
+    except tokenize.TokenError:
+        return code
+    output: List[str] = []
+    previous_blank = True
+    for lineno, line in enumerate(code.splitlines(keepends=True), start=1):
+        if lineno in protected:
+            output.append(line)
+            previous_blank = False
+        elif not line.strip():
+            if not previous_blank:
+                output.append("\n")
+            previous_blank = True
+        else:
+            output.append(line.rstrip() + ("\n" if line.endswith("\n") else ""))
+            previous_blank = False
+    return "".join(output)
+
+
+def minify_for_action(code: str, action: str) -> MinifiedSource:
+    """
+    Verkleinert den Code nach dem Profil der Aktion (ohne Profil oder bei
+    ``PHOENIXAI_PROMPT_MINIFY=0`` unverändert) und gibt die Einsparung aus.
+    """
+    profile = ACTION_PROFILES.get(action)
+    if not PROMPT_MINIFY or profile is None:
+        return MinifiedSource(code, code, {}, action)
+    minified = minify_source(code, action=action, **profile)
+    if minified.saved_chars:
+        print(minified.summary(), flush=True)
+    return minified
+
+
+def corpus_report(path: str) -> Dict[str, Dict[str, int]]:
+    """
+    Misst die Einsparung je Aktion über alle Python-Dateien unter path.
+
+    Für "Refactor" zählt der Quelltext jeder einzelnen Funktion (so wird er gesendet),
+    sonst die ganze Datei.
+
+    :return: Aktion -> {"files", "original", "minified"} in Zeichen.
+    """
+    from phoenixai.utils.code_index import CodeIndex
+
+    files = [path] if os.path.isfile(path) else [
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in sorted(names)
+        if name.endswith(".py") and "__pycache__" not in root
+    ]
+    report = {action: {"files": 0, "original": 0, "minified": 0} for action in ACTION_PROFILES}
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            code = f.read()
+        try:
+            index = CodeIndex(code)
+        except SyntaxError:
+            continue
+        for action, profile in ACTION_PROFILES.items():
+            sources = [index.source(e["qualified_name"]) for e in index.functions()] if action == "Refactor" else [code]
+            entry = report[action]
+            entry["files"] += 1
+            for source in sources:
+                entry["original"] += len(source)
+                entry["minified"] += len(minify_source(source, **profile).text)
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Einsparung der Prompt-Verkleinerung je Aktion.")
+    parser.add_argument("path", nargs="?", default=os.path.join("phoenixai", "tests"),
+                        help="Datei oder Verzeichnis mit Python-Dateien")
+    args = parser.parse_args(argv)
+    report = corpus_report(args.path)
+    print(f"{'Aktion':<26}{'Dateien':>8}{'Tokens vorher':>15}{'Tokens nachher':>16}{'Ersparnis':>11}")
+    for action, entry in report.items():
+        before = entry["original"] // CHARS_PER_TOKEN
+        after = entry["minified"] // CHARS_PER_TOKEN
+        percent = 100 * (before - after) / before if before else 0.0
+        print(f"{action:<26}{entry['files']:>8}{before:>15}{after:>16}{percent:>10.1f}%")
+
+
+if __name__ == "__main__":
+    main()
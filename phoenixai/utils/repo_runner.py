@@ -0,0 +1,376 @@
+# repo_runner.py
+"""
+Repository-weite Ausführung von Analyse- und Transformationsaktionen.
+
+Ein Repository wird in Arbeitspakete pro Datei zerlegt (gefiltert über .gitignore
+sowie Include-/Exclude-Globs). Jedes Arbeitspaket führt die gewählten Aktionen als
+PipelineSteps nacheinander auf seiner Datei aus; die Arbeitspakete selbst laufen
+parallel in einem Prozesspool.
+
+Es gibt zwei getrennte Nebenläufigkeitsgrenzen:
+
+- CPU-gebundene Schritte (black, isort, pylint, Profiling, ...) teilen sich
+  ``cpu_limit`` Slots (Standard: Anzahl der Kerne).
+- LLM-gebundene Schritte teilen sich ``llm_limit`` Slots, damit das API-Kontingent
+  nicht überlastet wird.
+
+Der Pool erhält Kerne + LLM-Slots Prozesse, damit Worker, die auf eine LLM-Antwort
+warten, keinen Kern blockieren. Am Ende entsteht ein aggregierter Report unter
+reports/Repo_Run/<Repository>/.
+
+Aufruf über die Kommandozeile:
+
+    python -m phoenixai.utils.repo_runner <repo> --transform Black --analysis "Name Checker"
+"""
+
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from phoenixai.pipeline_analysis.report_storage import save_report_generic
+from phoenixai.utils.overlay import Overlay, OverlayConflict
+from phoenixai.utils.pipeline_common import Pipeline, PipelineStep
+
+DEFAULT_INCLUDE = ("**/*.py",)
+DEFAULT_LLM_LIMIT = 4
+
+# Aktionen, deren Laufzeit von LLM-Aufrufen dominiert wird
+LLM_BOUND_ACTIONS = {
+    ("transform", "Add/Improve Docstrings"),
+    ("transform", "Type Annotation Updater"),
+    ("transform", "Pylint"),
+    ("transform", "SonarQube"),
+    ("transform", "Portierung"),
+    ("analysis", "Name Checker"),
+}
+
+# Aktionen mit Dialogen können nicht unbeaufsichtigt in einem Worker laufen
+INTERACTIVE_ACTIONS = {("transform", "Refactor")}
+
+# Verzeichnisse, die ohne Git-Informationen nie durchsucht werden
+ALWAYS_SKIPPED_DIRS = {".git", ".venv", "venv", "__pycache__", ".idea", ".tox", "node_modules"}
+
+_cpu_slots = None
+_llm_slots = None
+
+
+# ===================== Arbeitspakete bilden =====================
+def _git_tracked_files(repo_path: str) -> Optional[List[str]]:
+    """Listet versionierte und nicht ignorierte Dateien über git auf (None, falls kein Git-Repository)."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+            cwd=repo_path, capture_output=True, text=True, check=True,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def _read_gitignore_patterns(repo_path: str) -> List[str]:
+    gitignore = os.path.join(repo_path, ".gitignore")
+    if not os.path.isfile(gitignore):
+        return []
+    with open(gitignore, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _is_ignored(rel_path: str, patterns: Sequence[str]) -> bool:
+    """Vereinfachte .gitignore-Auswertung für Projekte ohne Git (nur Wurzel-.gitignore, ohne Negationen)."""
+    parts = rel_path.split("/")
+    for pattern in patterns:
+        if pattern.startswith("!"):
+            continue
+        directory_only = pattern.endswith("/")
+        pattern = pattern.strip("/")
+        candidates = parts[:-1] if directory_only else parts
+        if "/" in pattern:
+            if fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(rel_path, f"{pattern}/*"):
+                return True
+        elif any(fnmatch.fnmatch(part, pattern) for part in candidates):
+            return True
+    return False
+
+
+def _walk_files(repo_path: str) -> List[str]:
+    patterns = _read_gitignore_patterns(repo_path)
+    files = []
+    for root, dirs, filenames in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in ALWAYS_SKIPPED_DIRS]
+        for filename in filenames:
+            rel_path = os.path.relpath(os.path.join(root, filename), repo_path).replace(os.sep, "/")
+            if not _is_ignored(rel_path, patterns):
+                files.append(rel_path)
+    return files
+
+
+def matches_any(rel_path: str, patterns: Iterable[str]) -> bool:
+    """Glob-Abgleich auf relativen POSIX-Pfaden; '**/' am Anfang trifft auch Dateien im Wurzelverzeichnis."""
+    for pattern in patterns:
+        if fnmatch.fnmatch(rel_path, pattern):
+            return True
+        if pattern.startswith("**/") and fnmatch.fnmatch(rel_path, pattern[3:]):
+            return True
+    return False
+
+
+def list_repository_files(repo_path: str, include: Sequence[str] = DEFAULT_INCLUDE,
+                          exclude: Sequence[str] = ()) -> List[str]:
+    """Liefert die relativen Pfade aller Dateien des Repositories, die in die Ausführung eingehen."""
+    files = _git_tracked_files(repo_path)
+    if files is None:
+        files = _walk_files(repo_path)
+    selected = [
+        rel_path for rel_path in files
+        if matches_any(rel_path, include) and not matches_any(rel_path, exclude)
+        and os.path.isfile(os.path.join(repo_path, rel_path))
+    ]
+    return sorted(selected)
+
+
+def expand_work_items(repo_path: str, actions: Sequence[Tuple[str, str]],
+                      include: Sequence[str] = DEFAULT_INCLUDE, exclude: Sequence[str] = ()) -> List[Dict]:
+    """
+    Zerlegt ein Repository in Arbeitspakete pro Datei.
+
+    :param actions: Liste aus (Art, Name), z. B. ("transform", "Black") oder ("analysis", "Name Checker").
+    """
+    repo_path = os.path.abspath(repo_path)
+    return [
+        {"repo_root": repo_path, "rel_path": rel_path, "actions": [list(action) for action in actions]}
+        for rel_path in list_repository_files(repo_path, include, exclude)
+    ]
+
+
+# ===================== Ausführung im Worker =====================
+def resolve_action(kind: str, name: str) -> Optional[Callable]:
+    # Import erst hier, damit die Aktionsmodule nur in den Workern geladen werden
+    if kind == "analysis":
+        from phoenixai.pipeline_analysis.pipeline_analysis_impl import analysis_actions
+        return analysis_actions.get(name)
+    from phoenixai.pipeline_transformation.pipeline_transform_impl import transform_actions
+    return transform_actions.get(name)
+
+
+def _init_worker(cpu_slots, llm_slots):
+    global _cpu_slots, _llm_slots
+    _cpu_slots = cpu_slots
+    _llm_slots = llm_slots
+
+
+def _slots_for(action: Tuple[str, str]):
+    slots = _llm_slots if tuple(action) in LLM_BOUND_ACTIONS else _cpu_slots
+    return slots if slots is not None else nullcontext()
+
+
+def run_work_item(item: Dict) -> Dict:
+    """
+    Führt alle Aktionen eines Arbeitspakets nacheinander auf der Datei aus.
+    Schlägt ein Schritt fehl, werden die restlichen Aktionen dieser Datei übersprungen
+    und alle Änderungen an der Datei verworfen; sonst werden sie gemeinsam übernommen.
+    """
+    file_path = os.path.join(item["repo_root"], item["rel_path"])
+    started = time.perf_counter()
+    steps = []
+    status = "ok"
+    # Alle Aktionen einer Datei laufen in einem Overlay und werden nur gemeinsam übernommen
+    documents = Overlay(root=item["repo_root"], keep_view=True)
+    for kind, name in item["actions"]:
+        function = resolve_action(kind, name)
+        if function is None:
+            steps.append({"action": name, "kind": kind, "status": "🔴 Failed: unbekannte Aktion", "duration": 0.0})
+            status = "failed"
+            break
+        step = PipelineStep(name, function, file_path)
+        step.export_trace = False
+        with _slots_for((kind, name)):
+            Pipeline.run_step_on_documents(step, documents)
+        steps.append({
+            "action": name,
+            "kind": kind,
+            "status": step.status,
+            "duration": step.duration or 0.0,
+            "time_by_category": step.trace.summary() if step.trace else {},
+        })
+        if not step.status.startswith("🟢"):
+            status = "failed"
+            break
+    result = {
+        "rel_path": item["rel_path"],
+        "status": status,
+        "duration": time.perf_counter() - started,
+        "steps": steps,
+    }
+    errors = documents.validate() if status == "ok" else []
+    if status != "ok" or errors:
+        documents.discard()
+        if errors:
+            result.update(status="failed", error=f"Syntaxfehler, Änderungen verworfen: {'; '.join(errors)}")
+        return result
+    try:
+        documents.commit()
+    except (OverlayConflict, OSError) as e:
+        documents.discard()
+        result.update(status="failed", error=f"Commit fehlgeschlagen: {e}")
+    return result
+
+
+# ===================== Koordination =====================
+class RepoRunner:
+    def __init__(self, repo_path: str, actions: Sequence[Tuple[str, str]],
+                 include: Sequence[str] = DEFAULT_INCLUDE, exclude: Sequence[str] = (),
+                 max_workers: Optional[int] = None, cpu_limit: Optional[int] = None,
+                 llm_limit: int = DEFAULT_LLM_LIMIT,
+                 progress_callback: Optional[Callable[[Dict, int, int], None]] = None):
+        """
+        :param repo_path: Wurzelverzeichnis des Repositories.
+        :param actions: Liste aus (Art, Name) der auszuführenden Aktionen in Reihenfolge.
+        :param include: Globs der Dateien, die bearbeitet werden.
+        :param exclude: Globs der Dateien, die ausgelassen werden.
+        :param max_workers: Größe des Prozesspools (Standard: cpu_limit + llm_limit).
+        :param cpu_limit: Gleichzeitige CPU-gebundene Schritte (Standard: Anzahl der Kerne).
+        :param llm_limit: Gleichzeitige LLM-gebundene Schritte.
+        :param progress_callback: Wird nach jedem Arbeitspaket mit (Ergebnis, erledigt, gesamt) aufgerufen.
+        """
+        interactive = [name for kind, name in actions if (kind, name) in INTERACTIVE_ACTIONS]
+        if interactive:
+            raise ValueError(f"Interaktive Aktionen können nicht repository-weit laufen: {', '.join(interactive)}")
+        self.repo_path = os.path.abspath(repo_path)
+        self.actions = [tuple(action) for action in actions]
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.cpu_limit = cpu_limit or os.cpu_count() or 1
+        self.llm_limit = llm_limit
+        self.max_workers = max_workers or (self.cpu_limit + self.llm_limit)
+        self.progress_callback = progress_callback
+
+    def run(self) -> Dict:
+        items = expand_work_items(self.repo_path, self.actions, self.include, self.exclude)
+        print(f"[RepoRunner] {len(items)} Dateien, {self.max_workers} Prozesse, "
+              f"{self.cpu_limit} CPU-Slots, {self.llm_limit} LLM-Slots", flush=True)
+        started = time.perf_counter()
+        results = []
+        if items:
+            context = multiprocessing.get_context()
+            cpu_slots = context.BoundedSemaphore(self.cpu_limit)
+            llm_slots = context.BoundedSemaphore(self.llm_limit)
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(items)), mp_context=context,
+                                     initializer=_init_worker, initargs=(cpu_slots, llm_slots)) as pool:
+                futures = {pool.submit(run_work_item, item): item for item in items}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"rel_path": futures[future]["rel_path"], "status": "failed",
+                                  "duration": 0.0, "steps": [], "error": str(e)}
+                    results.append(result)
+                    if self.progress_callback:
+                        self.progress_callback(result, len(results), len(items))
+        wall_time = time.perf_counter() - started
+        report = aggregate_results(results, wall_time)
+        report["report_id"] = save_report_generic(
+            format_run_report(self.repo_path, self.actions, report), "Repo_Run", self.repo_path
+        )
+        return report
+
+
+def aggregate_results(results: List[Dict], wall_time: float) -> Dict:
+    """Fasst die Ergebnisse aller Arbeitspakete zu einem Lauf-Report zusammen."""
+    per_action: Dict[str, Dict] = {}
+    time_by_category: Dict[str, float] = {}
+    for result in results:
+        for step in result["steps"]:
+            stats = per_action.setdefault(step["action"], {"success": 0, "failed": 0, "timed_out": 0,
+                                                           "duration": 0.0})
+            if step["status"].startswith("🟢"):
+                stats["success"] += 1
+            elif step["status"].startswith("⏱"):
+                stats["timed_out"] += 1
+            else:
+                stats["failed"] += 1
+            stats["duration"] += step["duration"]
+            for category, seconds in step.get("time_by_category", {}).items():
+                time_by_category[category] = time_by_category.get(category, 0.0) + seconds
+    busy_time = sum(result["duration"] for result in results)
+    return {
+        "files": len(results),
+        "failed_files": sorted(r["rel_path"] for r in results if r["status"] != "ok"),
+        "wall_time": wall_time,
+        "busy_time": busy_time,
+        "per_action": per_action,
+        "time_by_category": time_by_category,
+        "slowest": sorted(results, key=lambda r: r["duration"], reverse=True)[:10],
+        "results": sorted(results, key=lambda r: r["rel_path"]),
+    }
+
+
+def format_run_report(repo_path: str, actions: Sequence[Tuple[str, str]], report: Dict) -> List[str]:
+    lines = [
+        "# Repository Run Report\n",
+        f"**Repository:** `{repo_path}`\n",
+        f"**Aktionen:** {', '.join(f'{name} ({kind})' for kind, name in actions)}\n",
+        f"**Dateien:** {report['files']}, davon fehlgeschlagen: {len(report['failed_files'])}\n",
+        f"**Laufzeit:** {report['wall_time']:.1f}s (Summe der Arbeitspakete: {report['busy_time']:.1f}s)\n",
+        "\n## Aktionen\n",
+        "| Aktion | Erfolgreich | Fehlgeschlagen | Zeitüberschreitung | Zeit gesamt (s) |",
+        "|---|---|---|---|---|",
+    ]
+    for name, stats in report["per_action"].items():
+        lines.append(f"| {name} | {stats['success']} | {stats['failed']} | {stats['timed_out']} "
+                     f"| {stats['duration']:.1f} |")
+
+    if report["time_by_category"]:
+        lines += ["\n## Zeit nach Kategorie\n", "| Kategorie | Zeit (s) |", "|---|---|"]
+        for category, seconds in sorted(report["time_by_category"].items(), key=lambda c: -c[1]):
+            lines.append(f"| {category} | {seconds:.1f} |")
+
+    lines += ["\n## Langsamste Dateien\n", "| Datei | Dauer (s) |", "|---|---|"]
+    for result in report["slowest"]:
+        lines.append(f"| {result['rel_path']} | {result['duration']:.1f} |")
+
+    lines += ["\n## Ergebnisse pro Datei\n", "| Datei | Status | Schritte |", "|---|---|---|"]
+    for result in report["results"]:
+        steps = "; ".join(f"{s['action']}: {s['status']}" for s in result["steps"]) or result.get("error", "")
+        lines.append(f"| {result['rel_path']} | {result['status']} | {steps} |")
+    return lines
+
+
+def parse_action_args(transforms: Sequence[str], analyses: Sequence[str]) -> List[Tuple[str, str]]:
+    return [("analysis", name) for name in analyses] + [("transform", name) for name in transforms]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Führt PhoenixAI-Aktionen für alle Dateien eines Repositories aus.")
+    parser.add_argument("repo", help="Pfad zum Repository.")
+    parser.add_argument("--analysis", action="append", default=[], help="Name einer Analyse-Aktion (mehrfach möglich).")
+    parser.add_argument("--transform", action="append", default=[], help="Name einer Transform-Aktion (mehrfach möglich).")
+    parser.add_argument("--include", action="append", default=None, help="Include-Glob (Standard: **/*.py).")
+    parser.add_argument("--exclude", action="append", default=[], help="Exclude-Glob.")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl der Worker-Prozesse.")
+    parser.add_argument("--cpu-limit", type=int, default=None, help="Gleichzeitige CPU-gebundene Schritte.")
+    parser.add_argument("--llm-limit", type=int, default=DEFAULT_LLM_LIMIT, help="Gleichzeitige LLM-Schritte.")
+    args = parser.parse_args()
+
+    actions = parse_action_args(args.transform, args.analysis)
+    if not actions:
+        parser.error("Bitte mindestens eine Aktion über --analysis oder --transform angeben.")
+
+    def print_progress(result, done, total):
+        print(f"[RepoRunner] {done}/{total} {result['rel_path']}: {result['status']}", flush=True)
+
+    runner = RepoRunner(args.repo, actions, include=args.include or DEFAULT_INCLUDE, exclude=args.exclude,
+                        max_workers=args.workers, cpu_limit=args.cpu_limit, llm_limit=args.llm_limit,
+                        progress_callback=print_progress)
+    report = runner.run()
+    print(f"[RepoRunner] Fertig: {report['files']} Dateien in {report['wall_time']:.1f}s, "
+          f"Report-ID: {report['report_id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,26 @@ import pathlib
 import json
 import subprocess
 import shutil
+import re
+import uuid
 from tkinter import END, filedialog, messagebox
 import tkinter as tk
 import ttkbootstrap as tb
 
+from phoenixai.utils.cancellation import DeadlineExceeded, OperationCancelled, run_subprocess
+
+# Zeitlimits in Sekunden; danach werden docker build/run samt Kindprozessen beendet
+DOCKER_BUILD_TIMEOUT = 1800
+DOCKER_RUN_TIMEOUT = 3600
+DOCKER_STOP_TIMEOUT = 30
+
 
 class RepositoryManager:
-    def __init__(self, parent_frame, set_status_callback, populate_repos_callback):
+    def __init__(self, parent_frame, set_status_callback, populate_repos_callback, run_repository_callback=None):
         self.parent_frame = parent_frame
         self.set_status = set_status_callback
         self.populate_repos = populate_repos_callback
+        self.run_repository = run_repository_callback
         self.repositories = []
         self.repos_file = "repos.json"
         self.selection = None
@@ -83,6 +93,26 @@ class RepositoryManager:
             bootstyle="success")
         run_analyzing_pipeline_btn.grid(row=0, column=1, padx=10, pady=10)
 
+        run_repository_actions_btn = tb.Button(
+            button_frame,
+            text="Aktionen auf Repository anwenden",
+            command=self.run_actions_on_repo,
+            bootstyle="success-outline")
+        run_repository_actions_btn.grid(row=0, column=2, padx=10, pady=10)
+
+        # Filter für die repository-weite Ausführung
+        filter_frame = tb.Frame(repo_frame)
+        filter_frame.pack(fill="x", padx=5, pady=(0, 5))
+        tb.Label(filter_frame, text="Include-Globs:", bootstyle="secondary").grid(row=0, column=0, sticky="w")
+        self.include_entry = tb.Entry(filter_frame, width=30, bootstyle="secondary")
+        self.include_entry.insert(0, "**/*.py")
+        self.include_entry.grid(row=0, column=1, padx=5, sticky="ew")
+        tb.Label(filter_frame, text="Exclude-Globs:", bootstyle="secondary").grid(row=0, column=2, sticky="w")
+        self.exclude_entry = tb.Entry(filter_frame, width=30, bootstyle="secondary")
+        self.exclude_entry.grid(row=0, column=3, padx=5, sticky="ew")
+        filter_frame.columnconfigure(1, weight=1)
+        filter_frame.columnconfigure(3, weight=1)
+
         # Laden der Repositories in die Listbox
         self.load_repositories()
         self.populate_repos_listbox()
@@ -254,6 +284,17 @@ class RepositoryManager:
         self.selected_repo = self.repositories[index]
         self.populate_repos(self.selected_repo['path'])  # Aktualisiere das aktuelle Verzeichnis in der GUI
 
+    def run_actions_on_repo(self):
+        """Startet die ausgewählten Aktionen für alle Dateien des gewählten Repositories."""
+        if not self.selection or not self.selected_repo:
+            messagebox.showwarning("Warnung", "Bitte wählen Sie ein Repository aus.")
+            return
+        if self.run_repository is None:
+            return
+        include = [glob.strip() for glob in self.include_entry.get().split(",") if glob.strip()]
+        exclude = [glob.strip() for glob in self.exclude_entry.get().split(",") if glob.strip()]
+        self.run_repository(self.selected_repo, include, exclude)
+
     def run_analyze_repo(self):
         if not self.selection:
             messagebox.showwarning("Warnung", "Bitte wählen Sie ein Repository zum Analysieren aus.")
@@ -270,7 +311,8 @@ class RepositoryManager:
             print("Building Docker image...")
             print("original_dir:" + str(original_dir))
             print("current_dir:" + str(pathlib.Path().resolve()))
-            subprocess.run(["docker", "build", "--no-cache", "-t", self.selected_repo['name'], "."], check=True)
+            run_subprocess(["docker", "build", "--no-cache", "-t", self.selected_repo['name'], "."], check=True,
+                           timeout=DOCKER_BUILD_TIMEOUT)
 
             # Run the Docker container with the correct volume mapping
             print("Running Docker container...")
@@ -278,18 +320,27 @@ class RepositoryManager:
             # Get the absolute path in a cross-platform way
             current_dir = str(pathlib.Path().resolve())
 
-            # Run the Docker container
-            subprocess.run([
-                "docker", "run", "--rm",
-                "-v", f"{current_dir}:/app",
-                self.selected_repo['name']
-            ], check=True)
+            # Run the Docker container; named, so it can be stopped on cancel
+            container = self.container_name(self.selected_repo['name'])
+            try:
+                run_subprocess([
+                    "docker", "run", "--rm", "--name", container,
+                    "-v", f"{current_dir}:/app",
+                    self.selected_repo['name']
+                ], check=True, timeout=DOCKER_RUN_TIMEOUT)
+            except OperationCancelled:
+                # Killing the docker client does not stop the container itself
+                self.kill_container(container)
+                raise
 
             print("Docker container executed successfully")
 
         except subprocess.CalledProcessError as e:
             print(f"Error executing Docker command: {e}")
             messagebox.showwarning("Error", "Error executing Docker command: {e}")
+        except DeadlineExceeded:
+            print("Docker command timed out and was killed")
+            messagebox.showwarning("Error", "Docker-Befehl hat das Zeitlimit überschritten und wurde beendet.")
         except Exception as e:
             print(f"Error: {e}")
             messagebox.showwarning("Error", f"Error: {e}")
@@ -297,6 +348,27 @@ class RepositoryManager:
             # Change back to the original directory
             os.chdir(original_dir)
 
+    @staticmethod
+    def container_name(image_name):
+        """Unique container name derived from the image name (only characters Docker allows)."""
+        base = re.sub(r"[^a-zA-Z0-9_.-]", "-", image_name).lstrip("-_.") or "repo"
+        return f"phoenixai-{base}-{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def kill_container(container):
+        """Kills a running container; --rm removes it afterwards."""
+        try:
+            # Not run_subprocess: the active token is already cancelled
+            result = subprocess.run(["docker", "kill", container], capture_output=True, text=True,
+                                    timeout=DOCKER_STOP_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Could not stop Docker container {container}: {e}")
+            return
+        if result.returncode == 0:
+            print(f"Docker container {container} stopped")
+        else:
+            print(f"Could not stop Docker container {container}: {result.stderr.strip()}")
+
 
     @staticmethod
     def add_dockerfile_and_startup_to_project(destination_path):
@@ -1,5 +1,5 @@
 import ttkbootstrap as tb
-from tkinter import END, filedialog
+from tkinter import filedialog
 from tkinter.scrolledtext import ScrolledText
 import json
 import csv
@@ -8,8 +8,11 @@ import urllib.parse
 import subprocess
 import socket
 import os
+import sys
 from pathlib import Path
 
+from phoenixai.utils.treeview_model import TreeviewModel
+
 def is_port_in_use(port):
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         return s.connect_ex(('localhost', port)) == 0
@@ -20,6 +23,8 @@ class ResultManager:
         self.results_tree = results_tree
         self.set_status = set_status_callback
         self.results = []
+        # Neue Ergebnisse werden gebündelt gezeichnet; das Fenster folgt den neuesten Einträgen
+        self.view = TreeviewModel(results_tree, follow_tail=True)
 
         self.build_results_section()
 
@@ -40,6 +45,8 @@ class ResultManager:
             self.results_tree.heading(col, text=col)
             self.results_tree.column(col, width=200, anchor="center")
         self.results_tree.pack(fill="both", expand=True, pady=5, padx=10)
+        self.results_tree.bind("<Control-Prior>", lambda event: self.view.page(-1))
+        self.results_tree.bind("<Control-Next>", lambda event: self.view.page(1))
 
         # Buttons für Details, Vergleich, Export
         ergebnisse_buttons = tb.Frame(self.parent_frame)
@@ -59,17 +66,17 @@ class ResultManager:
         Fügt einen Eintrag in der Ergebnis-TreeView hinzu
         und speichert ihn in self.results (als Liste von Dicts).
         """
-        self.results_tree.insert("", END, values=(script, result, status))
         self.results.append({"Script": script, "Ergebnis": result, "Status": status})
+        self.view.upsert(str(len(self.results)), (script, result, status))
 
     def show_details(self):
         flask_url = "http://localhost:5000/"
         # Prüfe, ob auf Port 5000 bereits eine Flask-App läuft; wenn nicht, starte sie.
         if not is_port_in_use(5000):
-            base_dir = Path(__file__).parent
-            app_path = str(base_dir / "app.py")
+            # Als Modul aus dem Repository-Wurzelverzeichnis, damit die phoenixai-Importe gelingen
+            repo_root = Path(__file__).resolve().parents[2]
             try:
-                subprocess.Popen(["python", app_path])
+                subprocess.Popen([sys.executable, "-m", "phoenixai.utils.app"], cwd=str(repo_root))
                 self.set_status("Flask-App gestartet.")
             except Exception as e:
                 self.set_status(f"Fehler beim Starten der Flask-App: {e}")
@@ -0,0 +1,228 @@
+# span_patch.py
+"""
+Minimale Text-Patches auf Python-Quelltext statt Neugenerierung des ganzen Moduls.
+
+Bisher wurden Docstrings, Typannotationen und Import-Blöcke in den AST
+eingetragen und das komplette Modul mit ``astor.to_source`` neu erzeugt. Dabei
+gehen Kommentare und Formatierung verloren, der Diff umfasst die ganze Datei und
+black/isort mussten danach alles wieder aufräumen.
+
+``SourcePatch`` arbeitet stattdessen auf dem Originaltext: Die Positionen kommen
+aus dem AST (``lineno``/``col_offset`` bis ``end_lineno``/``end_col_offset``),
+feinere Stellen wie der Doppelpunkt eines Funktionskopfs aus ``tokenize``.
+Gesammelte Änderungen werden am Ende in einem Durchgang von hinten nach vorne
+angewendet; alles außerhalb der geänderten Bereiche bleibt Byte für Byte gleich.
+
+Beispiel:
+
+    patch = SourcePatch(code)
+    patch.set_docstring(tree.body[0], "Kurzbeschreibung.")
+    patch.set_return_annotation(tree.body[0], "int")
+    new_code = patch.apply()
+"""
+
+import ast
+import io
+import tokenize
+from typing import List, Optional, Tuple
+
+def get_docstring_node(node: ast.AST) -> Optional[ast.Expr]:
+    """Der Ausdruck, der den Docstring von node bildet (oder None)."""
+    body = getattr(node, "body", None)
+    if not body:
+        return None
+    first = body[0]
+    if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+        return first
+    return None
+
+
+def render_docstring(text: str, indent: str) -> str:
+    """Erzeugt ein dreifach-gequotetes Literal für den (bereinigten) Docstring-Text."""
+    text = text.strip().replace("\\", "\\\\").replace('"""', '\\"\\"\\"')
+    lines = text.splitlines()
+    if len(lines) <= 1:
+        # Ein Anführungszeichen direkt vor den schließenden Quotes muss maskiert werden
+        return f'"""{text[:-1]}\\""""' if text.endswith('"') else f'"""{text}"""'
+    body = "\n".join(f"{indent}{line}" if line.strip() else "" for line in lines[1:])
+    return f'"""{lines[0]}\n{body}\n{indent}"""'
+
+
+def annotation_source(code: str, node: ast.AST) -> str:
+    """Quelltext einer Annotation; mehrzeilige Ausdrücke werden auf eine Zeile gebracht."""
+    segment = ast.get_source_segment(code, node)
+    if segment is None or "\n" in segment:
+        return ast.unparse(node)
+    return segment
+
+
+class SourcePatch:
+    def __init__(self, code: str):
+        self.code = code
+        self.lines = code.splitlines(keepends=True)
+        self._line_starts = [0]
+        for line in self.lines:
+            self._line_starts.append(self._line_starts[-1] + len(line))
+        self._tokens: Optional[List[tokenize.TokenInfo]] = None
+        # (Start, Ende, Ersatz) als Zeichen-Offsets im Originaltext
+        self.edits: List[Tuple[int, int, str]] = []
+
+    # ===================== Positionen =====================
+    def offset(self, lineno: int, col: int, byte_col: bool = True) -> int:
+        """Zeichen-Offset zu einer Position; ``col_offset`` im AST zählt UTF-8-Bytes."""
+        if lineno > len(self.lines):
+            return len(self.code)
+        line = self.lines[lineno - 1]
+        if byte_col:
+            col = len(line.encode("utf-8")[:col].decode("utf-8", errors="ignore"))
+        return self._line_starts[lineno - 1] + col
+
+    def start(self, node: ast.AST) -> int:
+        return self.offset(node.lineno, node.col_offset)
+
+    def end(self, node: ast.AST) -> int:
+        return self.offset(node.end_lineno, node.end_col_offset)
+
+    def line_start(self, lineno: int) -> int:
+        return self._line_starts[min(lineno, len(self.lines) + 1) - 1]
+
+    def indent_of(self, lineno: int) -> str:
+        line = self.lines[lineno - 1]
+        return line[:len(line) - len(line.lstrip())]
+
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        if self._tokens is None:
+            self._tokens = list(tokenize.generate_tokens(io.StringIO(self.code).readline))
+        return self._tokens
+
+    # ===================== Änderungen sammeln =====================
+    def replace(self, start: int, end: int, text: str):
+        if self.code[start:end] != text:
+            self.edits.append((start, end, text))
+
+    def insert(self, position: int, text: str):
+        self.edits.append((position, position, text))
+
+    def insert_lines(self, lineno: int, text: str):
+        """Fügt ganze Zeilen (text endet mit Zeilenumbruch) vor der Zeile lineno ein."""
+        position = self.line_start(lineno)
+        if position == len(self.code) and self.code and not self.code.endswith("\n"):
+            text = "\n" + text
+        self.insert(position, text)
+
+    def replace_node(self, node: ast.AST, text: str):
+        self.replace(self.start(node), self.end(node), text)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.edits)
+
+    def apply(self) -> str:
+        """
+        Wendet alle Änderungen an und liefert den neuen Text.
+
+        :raises ValueError: Wenn sich zwei Änderungen überlappen.
+        """
+        edits = sorted(self.edits, key=lambda e: (e[0], e[1]))
+        for (start_a, end_a, _), (start_b, _, _) in zip(edits, edits[1:]):
+            if start_b < end_a:
+                raise ValueError(f"Überlappende Änderungen an Offset {start_a}-{end_a} und {start_b}")
+        code = self.code
+        for start, end, text in reversed(edits):
+            code = code[:start] + text + code[end:]
+        return code
+
+    # ===================== Docstrings =====================
+    def set_docstring(self, node: ast.AST, text: str) -> bool:
+        """
+        Ersetzt oder ergänzt den Docstring von Modul, Klasse oder Funktion.
+
+        :return: False, wenn der Docstring schon so lautet oder nicht sicher eingefügt werden kann.
+        """
+        if ast.get_docstring(node) == text.strip():
+            return False
+        existing = get_docstring_node(node)
+        if isinstance(node, ast.Module):
+            indent = ""
+        elif existing is not None or node.body[0].lineno > node.lineno:
+            indent = self.indent_of((existing or node.body[0]).lineno)
+        else:
+            # Einzeiliger Rumpf ("def f(): pass") – hier wird nicht umgebaut
+            return False
+        literal = render_docstring(text, indent)
+        if existing is not None:
+            self.replace_node(existing, literal)
+        elif isinstance(node, ast.Module):
+            self.insert_lines(self._module_header_end() + 1, f"{literal}\n")
+        else:
+            first = node.body[0]
+            lineno = min([d.lineno for d in getattr(first, "decorator_list", [])] + [first.lineno])
+            # Kommentarzeilen direkt über der ersten Anweisung gehören zu ihr
+            while lineno - 1 > node.lineno and self.lines[lineno - 2].strip().startswith("#"):
+                lineno -= 1
+            self.insert_lines(lineno, f"{indent}{literal}\n")
+        return True
+
+    def _module_header_end(self) -> int:
+        """Letzte Zeile des Dateikopfs (Shebang, Encoding-Kommentar), vor der nichts eingefügt wird."""
+        end = 0
+        for lineno, line in enumerate(self.lines[:2], start=1):
+            if line.startswith("#!") or (line.startswith("#") and "coding" in line):
+                end = lineno
+        return end
+
+    def module_insert_line(self, tree: ast.Module) -> int:
+        """Zeile, vor der neue Modul-Anweisungen (z. B. Imports) eingefügt werden: nach Kopf und Docstring."""
+        docstring = get_docstring_node(tree)
+        if docstring is not None:
+            return docstring.end_lineno + 1
+        return self._module_header_end() + 1
+
+    # ===================== Typannotationen =====================
+    def set_annotation(self, arg: ast.arg, annotation: str) -> bool:
+        """Setzt die Annotation eines Parameters (``name`` -> ``name: annotation``)."""
+        if arg.annotation is not None:
+            if self.code[self.start(arg.annotation):self.end(arg.annotation)] == annotation:
+                return False
+            self.replace_node(arg.annotation, annotation)
+            return True
+        end = self.end(arg)
+        self.insert(end, f": {annotation}")
+        # PEP 8: "x=1" wird mit Annotation zu "x: int = 1"
+        if self.code[end:end + 1] == "=":
+            self.replace(end, end + 1, " = ")
+        return True
+
+    def set_return_annotation(self, function: ast.AST, annotation: str) -> bool:
+        """Setzt die Rückgabe-Annotation; ohne vorhandene wird ``-> annotation`` hinter die Parameterliste geschrieben."""
+        if function.returns is not None:
+            if self.code[self.start(function.returns):self.end(function.returns)] == annotation:
+                return False
+            self.replace_node(function.returns, annotation)
+            return True
+        closing = self._closing_parenthesis(function)
+        if closing is None:
+            return False
+        self.insert(closing, f" -> {annotation}")
+        return True
+
+    def _closing_parenthesis(self, function: ast.AST) -> Optional[int]:
+        """Offset hinter der schließenden Klammer der Parameterliste (per tokenize, Klammertiefe 0)."""
+        start = (function.lineno, self.offset(function.lineno, function.col_offset)
+                 - self._line_starts[function.lineno - 1])
+        depth = 0
+        last_closing = None
+        for token in self.tokens():
+            if token.start < start or token.type != tokenize.OP:
+                continue
+            if token.string in "([{":
+                depth += 1
+            elif token.string in ")]}":
+                depth -= 1
+                if depth == 0:
+                    last_closing = token.end
+            elif token.string == ":" and depth == 0:
+                break
+        if last_closing is None:
+            return None
+        return self.offset(last_closing[0], last_closing[1], byte_col=False)
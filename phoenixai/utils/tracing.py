@@ -0,0 +1,195 @@
+# tracing.py
+"""
+Leichtgewichtige, verschachtelte Span-Instrumentierung für Pipeline-Läufe.
+
+Ein Span misst mit einer monotonen Uhr (``time.perf_counter_ns``), wie lange ein
+Abschnitt dauert – z. B. ein Pipeline-Schritt, ein LLM-Aufruf, ein Subprozess
+(pylint, black, isort, ...), Datei-I/O oder eine SQLite-Abfrage. Spans werden nur
+aufgezeichnet, solange ein Tracer aktiv ist; ohne aktiven Tracer kostet ``span``
+praktisch nichts.
+
+Aufgezeichnete Läufe lassen sich als Chrome-Trace-Event-JSON (chrome://tracing,
+Perfetto) oder im speedscope-Format exportieren und in der Flask-App als
+Flame-Chart ansehen.
+
+Beispiel:
+
+    tracer = Tracer("Pylint")
+    with activate(tracer):
+        with span("LLM: gemini", "llm", temperature=0.2):
+            ...
+    tracer.export("trace.json")
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_active_tracer = None
+_local = threading.local()
+
+
+def _span_stack() -> List[str]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class Tracer:
+    def __init__(self, name: str):
+        """
+        :param name: Name des Laufs (z. B. der Name des Pipeline-Schritts).
+        """
+        self.name = name
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._thread_names: Dict[int, str] = {}
+
+    def record(self, name: str, category: str, start_ns: int, end_ns: int, depth: int, args: Dict[str, Any]):
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": dict(args, depth=depth),
+        }
+        with self._lock:
+            self.events.append(event)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    # ===================== Export =====================
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Liefert den Lauf im Chrome-Trace-Event-Format."""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: (e["ts"], e["args"]["depth"]))
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in self._thread_names.items()
+            ]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run": self.name},
+        }
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """Liefert den Lauf im speedscope-Format (ein 'evented' Profil pro Thread)."""
+        return chrome_to_speedscope(self.to_chrome_trace())
+
+    def export(self, path: str, fmt: str = "chrome") -> str:
+        data = self.to_speedscope() if fmt == "speedscope" else self.to_chrome_trace()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        return path
+
+    def summary(self) -> Dict[str, float]:
+        """Summiert die Dauer (in Sekunden) der obersten Arbeits-Spans je Kategorie."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for event in self.events:
+                if is_top_level_work(event):
+                    totals[event["cat"]] = totals.get(event["cat"], 0.0) + event["dur"] / 1e6
+        return totals
+
+
+def is_top_level_work(event: Dict[str, Any]) -> bool:
+    """True für Spans direkt unter dem Schritt – bzw. für Wurzelspans in Worker-Threads."""
+    depth = event.get("args", {}).get("depth", 0)
+    return depth == 1 or (depth == 0 and event.get("cat") != "pipeline")
+
+
+def chrome_to_speedscope(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """Wandelt ein Chrome-Trace-Dokument (nur 'X'-Events) in das speedscope-Format um."""
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    per_thread: Dict[Any, List[Dict[str, Any]]] = {}
+    thread_names = {}
+
+    for event in trace.get("traceEvents", []):
+        if event.get("ph") == "M" and event.get("name") == "thread_name":
+            thread_names[event["tid"]] = event["args"]["name"]
+        elif event.get("ph") == "X":
+            per_thread.setdefault(event["tid"], []).append(event)
+
+    profiles = []
+    for tid, events in per_thread.items():
+        timeline = []
+        for event in events:
+            if event["name"] not in frame_index:
+                frame_index[event["name"]] = len(frames)
+                frames.append({"name": event["name"]})
+            depth = event.get("args", {}).get("depth", 0)
+            frame = frame_index[event["name"]]
+            timeline.append((event["ts"], 1, depth, {"type": "O", "frame": frame, "at": event["ts"]}))
+            end = event["ts"] + event["dur"]
+            timeline.append((end, 0, -depth, {"type": "C", "frame": frame, "at": end}))
+        # Bei gleichem Zeitpunkt zuerst schließen, dann öffnen; Eltern öffnen vor und schließen nach Kindern
+        timeline.sort(key=lambda item: item[:3])
+        start = timeline[0][0] if timeline else 0
+        end = max((item[0] for item in timeline), default=0)
+        profiles.append({
+            "type": "evented",
+            "name": thread_names.get(tid, str(tid)),
+            "unit": "microseconds",
+            "startValue": start,
+            "endValue": end,
+            "events": [item[3] for item in timeline],
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+        "name": trace.get("otherData", {}).get("run", "PhoenixAI"),
+        "exporter": "phoenixai",
+    }
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]):
+    """Macht den Tracer für die Dauer des Blocks prozessweit aktiv (auch für Worker-Threads)."""
+    global _active_tracer
+    previous = _active_tracer
+    _active_tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _active_tracer = previous
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _active_tracer
+
+
+@contextmanager
+def span(name: str, category: str = "phoenixai", **args):
+    """
+    Misst den umschlossenen Block als Span. Zusätzliche Keyword-Argumente landen
+    in den Event-Args (z. B. Dateipfad, Modell, Promptlänge).
+    """
+    tracer = _active_tracer
+    if tracer is None:
+        yield args
+        return
+    stack = _span_stack()
+    depth = len(stack)
+    stack.append(name)
+    start_ns = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end_ns = time.perf_counter_ns()
+        stack.pop()
+        tracer.record(name, category, start_ns, end_ns, depth, args)
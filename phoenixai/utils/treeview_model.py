@@ -0,0 +1,178 @@
+# treeview_model.py
+"""
+View-Model für Treeview-Widgets mit vielen Zeilen.
+
+Die Pipeline- und Ergebnisansicht können bei Repository-Läufen mehrere tausend
+Einträge enthalten. Anstatt bei jeder Änderung alle Zeilen zu löschen und neu
+einzufügen, hält das TreeviewModel die Daten vollständig im Speicher und
+synchronisiert nur geänderte Zeilen (anhand ihrer iid) mit dem Widget.
+
+- Änderungen werden gesammelt und höchstens ``max_redraws_per_second`` Mal pro
+  Sekunde in das Widget übertragen.
+- Es wird immer nur ein Fenster von ``window_size`` Zeilen im Widget gehalten
+  (Windowing). Die restlichen Zeilen existieren nur im Modell und werden beim
+  Verschieben des Fensters eingeblendet.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_REDRAWS_PER_SECOND = 10
+WINDOW_SIZE = 500
+
+
+class TreeviewModel:
+    def __init__(self, treeview=None, max_redraws_per_second: int = MAX_REDRAWS_PER_SECOND,
+                 window_size: int = WINDOW_SIZE, follow_tail: bool = False):
+        """
+        :param treeview: Das Treeview-Widget (darf zunächst None sein und später gesetzt werden).
+        :param max_redraws_per_second: Obergrenze für Aktualisierungen des Widgets pro Sekunde.
+        :param window_size: Anzahl der Zeilen, die maximal gleichzeitig im Widget stehen.
+        :param follow_tail: Wenn True, folgt das Fenster automatisch den zuletzt angefügten Zeilen.
+        """
+        self.treeview = treeview
+        self.min_interval = 1.0 / max(1, max_redraws_per_second)
+        self.window_size = window_size
+        self.follow_tail = follow_tail
+        self.window_start = 0
+
+        self._order: List[str] = []
+        self._positions: Optional[Dict[str, int]] = {}
+        self._rows: Dict[str, Tuple[Any, ...]] = {}
+        self._dirty: set = set()
+        self._structure_changed = False
+        self._flush_pending = False
+        self._last_flush = 0.0
+
+    # ===================== Modell-Operationen =====================
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, iid):
+        return iid in self._rows
+
+    def iids(self) -> List[str]:
+        return list(self._order)
+
+    def index(self, iid: str) -> int:
+        """Liefert die Position der Zeile im gesamten Modell (nicht nur im Fenster)."""
+        if self._positions is None:
+            self._positions = {row_iid: idx for idx, row_iid in enumerate(self._order)}
+        return self._positions[iid]
+
+    def upsert(self, iid: str, values: Tuple[Any, ...]):
+        """Fügt eine Zeile hinzu oder aktualisiert sie. Unveränderte Werte lösen kein Redraw aus."""
+        values = tuple(values)
+        if iid in self._rows:
+            if self._rows[iid] == values:
+                return
+            self._rows[iid] = values
+            self._dirty.add(iid)
+        else:
+            self._rows[iid] = values
+            self._order.append(iid)
+            if self._positions is not None:
+                self._positions[iid] = len(self._order) - 1
+            self._structure_changed = True
+            if self.follow_tail:
+                self.window_start = max(0, len(self._order) - self.window_size)
+        self.schedule_flush()
+
+    def remove(self, iid: str):
+        if iid not in self._rows:
+            return
+        del self._rows[iid]
+        self._order.remove(iid)
+        self._positions = None
+        self._dirty.discard(iid)
+        self._structure_changed = True
+        self._clamp_window()
+        self.schedule_flush()
+
+    def clear(self):
+        self._order.clear()
+        self._positions = {}
+        self._rows.clear()
+        self._dirty.clear()
+        self.window_start = 0
+        self._structure_changed = True
+        self.schedule_flush()
+
+    # ===================== Fenster (Windowing) =====================
+    def window_iids(self) -> List[str]:
+        return self._order[self.window_start:self.window_start + self.window_size]
+
+    def scroll_window(self, start: int):
+        """Verschiebt das sichtbare Fenster auf die angegebene Startzeile."""
+        previous = self.window_start
+        self.window_start = start
+        self._clamp_window()
+        if self.window_start != previous:
+            self._structure_changed = True
+            self.schedule_flush()
+
+    def reveal(self, iid: str):
+        """Verschiebt das Fenster so, dass die Zeile iid darin liegt."""
+        if iid not in self._rows:
+            return
+        position = self.index(iid)
+        if position < self.window_start or position >= self.window_start + self.window_size:
+            # Etwas Vorlauf lassen, damit vorherige Zeilen sichtbar bleiben
+            self.scroll_window(position - self.window_size // 4)
+
+    def _clamp_window(self):
+        max_start = max(0, len(self._order) - self.window_size)
+        self.window_start = min(max(0, self.window_start), max_start)
+
+    # ===================== Synchronisation mit dem Widget =====================
+    def schedule_flush(self):
+        """Plant eine Aktualisierung des Widgets; mehrere Änderungen werden zusammengefasst."""
+        if self.treeview is None or self._flush_pending:
+            return
+        self._flush_pending = True
+        elapsed = time.monotonic() - self._last_flush
+        delay_ms = int(max(0.0, self.min_interval - elapsed) * 1000)
+        self.treeview.after(delay_ms, self.flush)
+
+    def flush(self):
+        """Überträgt alle ausstehenden Änderungen sofort in das Widget."""
+        self._flush_pending = False
+        if self.treeview is None:
+            return
+        self._last_flush = time.monotonic()
+
+        if self._structure_changed:
+            self._sync_window()
+        else:
+            for iid in self._dirty:
+                if self.treeview.exists(iid):
+                    self.treeview.item(iid, values=self._rows[iid])
+        self._dirty.clear()
+        self._structure_changed = False
+
+    def _sync_window(self):
+        wanted = self.window_iids()
+        wanted_set = set(wanted)
+        shown = self.treeview.get_children()
+        stale = [iid for iid in shown if iid not in wanted_set]
+        if stale:
+            self.treeview.delete(*stale)
+        shown_set = set(shown).difference(stale)
+
+        for position, iid in enumerate(wanted):
+            if iid not in shown_set:
+                self.treeview.insert("", position, iid=iid, values=self._rows[iid])
+            elif iid in self._dirty:
+                self.treeview.item(iid, values=self._rows[iid])
+
+    def see(self, iid: str):
+        """Scrollt das Widget zur Zeile, sofern sie im aktuellen Fenster steht."""
+        if self.treeview is not None and self.treeview.exists(iid):
+            self.treeview.see(iid)
+
+    def page(self, direction: int):
+        """Blättert das Fenster um eine halbe Fensterlänge vor (direction=1) oder zurück (-1)."""
+        self.scroll_window(self.window_start + direction * (self.window_size // 2))
+
+    def get(self, iid: str) -> Optional[Tuple[Any, ...]]:
+        return self._rows.get(iid)
@@ -0,0 +1,521 @@
+# work_queue.py
+"""
+Verteilte Ausführung von Pipeline-Läufen über mehrere Rechner (Coordinator/Worker).
+
+Der Coordinator legt für ein Repository pro Datei ein Arbeitspaket in einer
+dauerhaften SQLite-Queue an und stellt sie über einen kleinen HTTP-Dienst (Flask)
+bereit. Worker – auf anderen Hosts oder lokal als eigene Prozesse – leasen
+Arbeitspakete, führen die bestehenden ``transform_actions``/``analysis_actions``
+über ``repo_runner.run_work_item`` auf ihrer eigenen Arbeitskopie aus und laden
+Ergebnis sowie geänderte Dateien als Artefakte hoch.
+
+Leases haben ein Ablaufdatum und werden vom Worker per Heartbeat verlängert.
+Läuft eine Lease ab (Worker abgestürzt, Netz weg), wird das Arbeitspaket wieder
+in die Queue gestellt, bis ``max_attempts`` erreicht ist.
+
+Beispiel mit drei lokalen Workern als Ersatz für mehrere Knoten:
+
+    python -m phoenixai.utils.work_queue coordinator <repo> --transform Black --port 5050
+    python -m phoenixai.utils.work_queue worker --queue http://localhost:5050 --repo <repo> --processes 3
+    python -m phoenixai.utils.work_queue collect --db work_queue.db --run <run_id> --apply
+
+Der HTTP-Dienst hat keine Authentifizierung und lauscht daher standardmäßig nur auf
+127.0.0.1; für Worker auf anderen Hosts ``--host 0.0.0.0`` nur in vertrauenswürdigen Netzen
+setzen. Artefakte dürfen nur die Datei des eigenen Arbeitspakets betreffen und werden nur
+für erfolgreich abgeschlossene Pakete gespeichert und übernommen.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from phoenixai.utils.repo_runner import DEFAULT_INCLUDE, expand_work_items, parse_action_args, run_work_item
+
+DEFAULT_DB_PATH = "work_queue.db"
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_HOST = "127.0.0.1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    repo_root TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, id);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (run_id, rel_path)
+);
+"""
+
+
+def safe_join(base: str, rel_path: str) -> str:
+    """
+    Absoluter Pfad von rel_path unterhalb von base. ValueError bei absoluten Pfaden,
+    ``..``-Komponenten oder Pfaden, die aus base herausführen.
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    if not rel_path or os.path.isabs(rel_path) or os.path.splitdrive(rel_path)[0] or ".." in parts:
+        raise ValueError(f"Ungültiger Pfad: {rel_path}")
+    base = os.path.abspath(base)
+    target = os.path.abspath(os.path.join(base, rel_path))
+    if os.path.commonpath([base, target]) != base or target == base:
+        raise ValueError(f"Ungültiger Pfad: {rel_path}")
+    return target
+
+
+class SQLiteWorkQueue:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, artifact_dir: Optional[str] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        :param db_path: Pfad zur SQLite-Datenbank der Queue.
+        :param artifact_dir: Ablage für hochgeladene Dateien (Standard: <db>_artifacts).
+        :param max_attempts: Wie oft ein Arbeitspaket nach abgelaufener Lease erneut vergeben wird.
+        """
+        self.db_path = db_path
+        self.artifact_dir = artifact_dir or f"{os.path.splitext(db_path)[0]}_artifacts"
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Eigene Verbindung pro Aufruf: die Queue wird aus mehreren Threads und Prozessen benutzt
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # ===================== Coordinator-Seite =====================
+    def create_run(self, repo_root: str, actions: Sequence[Tuple[str, str]], rel_paths: Sequence[str]) -> str:
+        run_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO runs (run_id, repo_root, actions, created) VALUES (?, ?, ?, ?)",
+                         (run_id, repo_root, json.dumps([list(a) for a in actions]), now))
+            conn.executemany("INSERT INTO work_items (run_id, rel_path, updated) VALUES (?, ?, ?)",
+                             [(run_id, rel_path, now) for rel_path in rel_paths])
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return run_id
+
+    def requeue_expired(self, conn=None) -> int:
+        """Stellt Arbeitspakete mit abgelaufener Lease zurück in die Queue (oder markiert sie als fehlgeschlagen)."""
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            now = time.time()
+            conn.execute(
+                "UPDATE work_items SET status = 'failed', lease_owner = NULL, updated = ?, "
+                "result = json_object('error', 'Lease abgelaufen, maximale Versuche erreicht') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'queued', lease_owner = NULL, updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ?", (now, now))
+            return cursor.rowcount
+        finally:
+            if own_conn:
+                conn.close()
+
+    # ===================== Worker-Seite =====================
+    def lease(self, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        """Vergibt das nächste freie Arbeitspaket exklusiv an den Worker."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self.requeue_expired(conn)
+            row = conn.execute(
+                "SELECT w.id, w.run_id, w.rel_path, w.attempts, r.repo_root, r.actions FROM work_items w "
+                "JOIN runs r ON r.run_id = w.run_id WHERE w.status = 'queued' ORDER BY w.id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE work_items SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {
+            "id": row["id"],
+            "run_id": row["run_id"],
+            "rel_path": row["rel_path"],
+            "repo_root": row["repo_root"],
+            "actions": json.loads(row["actions"]),
+            "attempt": row["attempts"] + 1,
+        }
+
+    def heartbeat(self, item_id: int, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        """Verlängert die Lease. False bedeutet, dass der Worker die Lease verloren hat."""
+        conn = self._connect()
+        try:
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE work_items SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased' AND lease_expires >= ?",
+                (now + lease_seconds, now, item_id, worker_id, now))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, item_id: int, worker_id: str, result: Dict,
+                 artifacts: Optional[Dict[str, bytes]] = None) -> bool:
+        """Schließt ein Arbeitspaket ab; nur der aktuelle Lease-Inhaber darf das."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT run_id, rel_path FROM work_items WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (item_id, worker_id)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return False
+            status = "done" if result.get("status") == "ok" else "failed"
+            # Fehlgeschlagene Läufe hinterlassen evtl. halbfertige Dateien: nicht übernehmen
+            try:
+                for rel_path, content in (artifacts or {}).items() if status == "done" else ():
+                    if rel_path != row["rel_path"]:
+                        raise ValueError(f"Artefakt {rel_path} gehört nicht zum Arbeitspaket {row['rel_path']}")
+                    self._store_artifact(conn, row["run_id"], rel_path, content)
+            except ValueError:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute(
+                "UPDATE work_items SET status = ?, lease_owner = NULL, result = ?, updated = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False), time.time(), item_id))
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def _store_artifact(self, conn, run_id: str, rel_path: str, content: bytes):
+        target = safe_join(safe_join(self.artifact_dir, run_id), rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+        conn.execute("INSERT OR REPLACE INTO artifacts (run_id, rel_path, sha256, path) VALUES (?, ?, ?, ?)",
+                     (run_id, rel_path, hashlib.sha256(content).hexdigest(), target))
+
+    # ===================== Auswertung =====================
+    def run_status(self, run_id: str) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM work_items WHERE run_id = ? GROUP BY status",
+                                (run_id,)).fetchall()
+        finally:
+            conn.close()
+        return {row["status"]: row["n"] for row in rows}
+
+    def run_results(self, run_id: str) -> List[Dict]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT rel_path, status, attempts, result FROM work_items WHERE run_id = ? "
+                                "ORDER BY rel_path", (run_id,)).fetchall()
+        finally:
+            conn.close()
+        return [{"rel_path": row["rel_path"], "status": row["status"], "attempts": row["attempts"],
+                 "result": json.loads(row["result"]) if row["result"] else None} for row in rows]
+
+    def artifacts(self, run_id: str) -> List[Dict]:
+        """Artefakte der erfolgreich abgeschlossenen Arbeitspakete eines Laufs."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT a.rel_path, a.sha256, a.path FROM artifacts a JOIN work_items w "
+                "ON w.run_id = a.run_id AND w.rel_path = a.rel_path "
+                "WHERE a.run_id = ? AND w.status = 'done' ORDER BY a.rel_path", (run_id,)).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def apply_artifacts(self, run_id: str, repo_root: Optional[str] = None) -> int:
+        """Schreibt die hochgeladenen Dateien in das Repository des Coordinators zurück."""
+        if repo_root is None:
+            conn = self._connect()
+            try:
+                repo_root = conn.execute("SELECT repo_root FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+            finally:
+                conn.close()
+        applied = 0
+        for artifact in self.artifacts(run_id):
+            target = safe_join(repo_root, artifact["rel_path"])
+            with open(artifact["path"], "rb") as src, open(target, "wb") as dst:
+                dst.write(src.read())
+            applied += 1
+        return applied
+
+
+class HttpWorkQueueClient:
+    """Worker-seitiger Zugriff auf die Queue eines entfernten Coordinators."""
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, route: str, payload: Dict) -> Dict:
+        import requests
+        response = requests.post(f"{self.base_url}{route}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Dict]:
+        return self._post("/lease", {"worker_id": worker_id, "lease_seconds": lease_seconds}).get("item")
+
+    def heartbeat(self, item_id: int, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+        return self._post("/heartbeat", {"id": item_id, "worker_id": worker_id,
+                                         "lease_seconds": lease_seconds})["ok"]
+
+    def complete(self, item_id: int, worker_id: str, result: Dict,
+                 artifacts: Optional[Dict[str, bytes]] = None) -> bool:
+        encoded = {path: base64.b64encode(content).decode("ascii") for path, content in (artifacts or {}).items()}
+        return self._post("/complete", {"id": item_id, "worker_id": worker_id, "result": result,
+                                        "artifacts": encoded})["ok"]
+
+
+def create_coordinator_app(work_queue: SQLiteWorkQueue):
+    """Flask-App, über die entfernte Worker die SQLite-Queue des Coordinators nutzen."""
+    from flask import Flask, abort, jsonify, request
+
+    app = Flask(__name__)
+
+    @app.post("/lease")
+    def lease():
+        data = request.get_json(force=True)
+        item = work_queue.lease(data["worker_id"], int(data.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+        return jsonify({"item": item})
+
+    @app.post("/heartbeat")
+    def heartbeat():
+        data = request.get_json(force=True)
+        ok = work_queue.heartbeat(int(data["id"]), data["worker_id"],
+                                  int(data.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+        return jsonify({"ok": ok})
+
+    @app.post("/complete")
+    def complete():
+        data = request.get_json(force=True)
+        try:
+            artifacts = {path: base64.b64decode(content) for path, content in data.get("artifacts", {}).items()}
+            ok = work_queue.complete(int(data["id"]), data["worker_id"], data["result"], artifacts)
+        except ValueError as e:
+            abort(400, str(e))
+        return jsonify({"ok": ok})
+
+    @app.get("/status/<run_id>")
+    def status(run_id):
+        return jsonify(work_queue.run_status(run_id))
+
+    return app
+
+
+# ===================== Worker =====================
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class _HeartbeatThread(threading.Thread):
+    def __init__(self, work_queue, item_id: int, worker_id: str, lease_seconds: int):
+        super().__init__(daemon=True)
+        self.work_queue = work_queue
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.lease_lost = False
+
+    def run(self):
+        # Deutlich vor Ablauf verlängern, damit ein verspäteter Heartbeat die Lease nicht kostet
+        while not self.stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self.work_queue.heartbeat(self.item_id, self.worker_id, self.lease_seconds):
+                    self.lease_lost = True
+                    return
+            except Exception as e:
+                print(f"[Worker {self.worker_id}] Heartbeat fehlgeschlagen: {e}", flush=True)
+
+
+def run_worker(work_queue, repo_root: Optional[str] = None, worker_id: Optional[str] = None,
+               lease_seconds: int = DEFAULT_LEASE_SECONDS, poll_interval: float = 2.0,
+               exit_when_idle: bool = True) -> int:
+    """
+    Least Arbeitspakete, bis die Queue leer ist (oder endlos, falls exit_when_idle False ist).
+
+    :param work_queue: SQLiteWorkQueue (gleiches Dateisystem) oder HttpWorkQueueClient.
+    :param repo_root: Lokale Arbeitskopie des Repositories; ohne Angabe wird der Pfad des Coordinators benutzt.
+    :return: Anzahl der bearbeiteten Arbeitspakete.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    processed = 0
+    while True:
+        item = work_queue.lease(worker_id, lease_seconds)
+        if item is None:
+            if exit_when_idle:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        if repo_root:
+            item["repo_root"] = os.path.abspath(repo_root)
+        file_path = os.path.join(item["repo_root"], item["rel_path"])
+        digest_before = _file_digest(file_path)
+
+        heartbeat = _HeartbeatThread(work_queue, item["id"], worker_id, lease_seconds)
+        heartbeat.start()
+        try:
+            result = run_work_item(item)
+        except Exception as e:
+            result = {"rel_path": item["rel_path"], "status": "failed", "duration": 0.0, "steps": [], "error": str(e)}
+        finally:
+            heartbeat.stopped.set()
+            heartbeat.join()
+        result["worker_id"] = worker_id
+
+        artifacts = {}
+        if _file_digest(file_path) != digest_before and os.path.isfile(file_path):
+            with open(file_path, "rb") as f:
+                artifacts[item["rel_path"]] = f.read()
+
+        if heartbeat.lease_lost or not work_queue.complete(item["id"], worker_id, result, artifacts):
+            print(f"[Worker {worker_id}] Lease für {item['rel_path']} verloren, Ergebnis verworfen.", flush=True)
+        else:
+            print(f"[Worker {worker_id}] {item['rel_path']}: {result['status']}", flush=True)
+        processed += 1
+
+
+def _make_queue(queue_spec: str):
+    if queue_spec.startswith(("http://", "https://")):
+        return HttpWorkQueueClient(queue_spec)
+    return SQLiteWorkQueue(queue_spec)
+
+
+def _worker_process_main(queue_spec: str, repo_root: Optional[str], lease_seconds: int, exit_when_idle: bool):
+    run_worker(_make_queue(queue_spec), repo_root=repo_root, lease_seconds=lease_seconds,
+               exit_when_idle=exit_when_idle)
+
+
+def spawn_local_workers(queue_spec: str, processes: int, repo_root: Optional[str] = None,
+                        lease_seconds: int = DEFAULT_LEASE_SECONDS, exit_when_idle: bool = True) -> List:
+    """Startet mehrere Worker-Prozesse auf diesem Rechner, z. B. als Ersatz für mehrere Knoten in Tests."""
+    workers = []
+    for _ in range(processes):
+        process = multiprocessing.Process(target=_worker_process_main,
+                                          args=(queue_spec, repo_root, lease_seconds, exit_when_idle))
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def enqueue_repository(work_queue: SQLiteWorkQueue, repo_path: str, actions: Sequence[Tuple[str, str]],
+                       include: Sequence[str] = DEFAULT_INCLUDE, exclude: Sequence[str] = ()) -> str:
+    items = expand_work_items(repo_path, actions, include, exclude)
+    return work_queue.create_run(os.path.abspath(repo_path), actions, [item["rel_path"] for item in items])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verteilte PhoenixAI-Läufe über eine Work-Queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="Repository einreihen und die Queue per HTTP bereitstellen.")
+    coordinator.add_argument("repo", nargs="?", help="Repository, das eingereiht wird (optional).")
+    coordinator.add_argument("--db", default=DEFAULT_DB_PATH)
+    coordinator.add_argument("--host", default=DEFAULT_HOST,
+                             help="Ohne Authentifizierung: 0.0.0.0 nur in vertrauenswürdigen Netzen.")
+    coordinator.add_argument("--port", type=int, default=5050)
+
+    enqueue = sub.add_parser("enqueue", help="Repository nur einreihen.")
+    enqueue.add_argument("repo")
+    enqueue.add_argument("--db", default=DEFAULT_DB_PATH)
+
+    for command in (coordinator, enqueue):
+        command.add_argument("--analysis", action="append", default=[])
+        command.add_argument("--transform", action="append", default=[])
+        command.add_argument("--include", action="append", default=None)
+        command.add_argument("--exclude", action="append", default=[])
+
+    worker = sub.add_parser("worker", help="Arbeitspakete abarbeiten.")
+    worker.add_argument("--queue", required=True, help="http://host:port des Coordinators oder Pfad zur SQLite-Datei.")
+    worker.add_argument("--repo", default=None, help="Lokale Arbeitskopie des Repositories.")
+    worker.add_argument("--processes", type=int, default=1)
+    worker.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+    worker.add_argument("--wait", action="store_true", help="Bei leerer Queue weiter auf Arbeit warten.")
+
+    status = sub.add_parser("status", help="Fortschritt eines Laufs anzeigen.")
+    status.add_argument("--db", default=DEFAULT_DB_PATH)
+    status.add_argument("--run", required=True)
+
+    collect = sub.add_parser("collect", help="Ergebnisse eines Laufs ausgeben und Artefakte übernehmen.")
+    collect.add_argument("--db", default=DEFAULT_DB_PATH)
+    collect.add_argument("--run", required=True)
+    collect.add_argument("--apply", action="store_true", help="Artefakte in das Repository zurückschreiben.")
+
+    args = parser.parse_args()
+
+    if args.command in ("coordinator", "enqueue"):
+        work_queue = SQLiteWorkQueue(args.db)
+        if args.repo:
+            actions = parse_action_args(args.transform, args.analysis)
+            if not actions:
+                parser.error("Bitte mindestens eine Aktion über --analysis oder --transform angeben.")
+            run_id = enqueue_repository(work_queue, args.repo, actions, args.include or DEFAULT_INCLUDE, args.exclude)
+            print(f"[Coordinator] Lauf {run_id} eingereiht: {work_queue.run_status(run_id)}", flush=True)
+        if args.command == "coordinator":
+            create_coordinator_app(work_queue).run(host=args.host, port=args.port, threaded=True)
+    elif args.command == "worker":
+        exit_when_idle = not args.wait
+        if args.processes > 1:
+            for process in spawn_local_workers(args.queue, args.processes, args.repo, args.lease_seconds,
+                                               exit_when_idle):
+                process.join()
+        else:
+            run_worker(_make_queue(args.queue), repo_root=args.repo, lease_seconds=args.lease_seconds,
+                       exit_when_idle=exit_when_idle)
+    elif args.command == "status":
+        print(json.dumps(SQLiteWorkQueue(args.db).run_status(args.run), indent=2))
+    elif args.command == "collect":
+        work_queue = SQLiteWorkQueue(args.db)
+        for entry in work_queue.run_results(args.run):
+            print(f"{entry['rel_path']}: {entry['status']} (Versuche: {entry['attempts']})")
+        if args.apply:
+            print(f"[Coordinator] {work_queue.apply_artifacts(args.run)} Artefakte übernommen.")
+
+
+if __name__ == "__main__":
+    main()